@@ -60,7 +60,7 @@ export default function LoginPage() {
         role: decoded?.role || "student",
       };
 
-      setStoredAuth(response.access_token, userPayload);
+      setStoredAuth(response.access_token, userPayload, response.refresh_token);
 
       if (userPayload.role === "admin") {
         router.push("/dashboard/admin");
@@ -60,7 +60,7 @@ export default function RegisterPage() {
         role: decoded?.role || role,
       };
 
-      setStoredAuth(response.access_token, userPayload);
+      setStoredAuth(response.access_token, userPayload, response.refresh_token);
 
       // Redirect based on role
       if (role === "admin") router.push("/dashboard/admin");
@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..core.db import get_db
-from ..schemas.user import UserCreate, LoginRequest, Token
-from ..services import user_service
-from ..core.security import verify_password, create_access_token
-from datetime import timedelta
+from ..schemas.user import UserCreate, LoginRequest, Token, RefreshRequest, LogoutRequest
+from ..services import user_service, token_service
+from ..core.security import verify_password_bounded, VerificationBusy
 from ..core.config import settings
+from .deps import oauth2_scheme
 import logging
+import re
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -15,7 +17,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 @router.post("/register", response_model=Token)
 def register(payload: UserCreate, db: Session = Depends(get_db)):
     try:
-        normalized_email = payload.email.strip().lower()  # normalize email
+        normalized_email = user_service.normalize_email(payload.email)
         existing = user_service.get_user_by_email(db, normalized_email)
         if existing:
             raise HTTPException(status_code=400, detail="Email already registered")
@@ -30,11 +32,7 @@ def register(payload: UserCreate, db: Session = Depends(get_db)):
             passport=payload.passport,
         )
         
-        token = create_access_token(
-            {"user_id": user.id, "role": user.role},
-            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-        )
-        return {"access_token": token, "token_type": "bearer"}
+        return token_service.issue_token_pair(db, user)
     
     except HTTPException:
         raise
@@ -43,53 +41,92 @@ def register(payload: UserCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Registration failed: {str(e)}")
 
 
+# Accept either NG/EEV/1234A or legacy NG/EEV/1234/A (case-insensitive)
+REG_PATTERN_NEW = re.compile(r"^NG/EEV/\d{4}[A-Z]$", re.IGNORECASE)
+REG_PATTERN_LEGACY = re.compile(r"^NG/EEV/\d{4}/[A-Z]$", re.IGNORECASE)
+
+
+def _is_registration_number(identifier: str) -> bool:
+    return bool(REG_PATTERN_NEW.match(identifier) or REG_PATTERN_LEGACY.match(identifier))
+
+
+def _find_login_user(db: Session, identifier: str):
+    if _is_registration_number(identifier):
+        # Normalize to the new format without the extra slash before the letter
+        norm = identifier.upper()
+        if REG_PATTERN_LEGACY.match(norm):
+            # NG/EEV/1234/A -> NG/EEV/1234A
+            parts = norm.split("/")
+            norm = f"{parts[0]}/{parts[1]}/{parts[2]}{parts[3]}"
+        user = user_service.get_user_by_registration_number(db, norm)
+        logger.info(f"Lookup by registration number returned: {user and user.email}")
+        return user
+    return user_service.get_user_by_email(db, identifier)
+
+
+def _complete_login(db: Session, user, identifier: str, new_hash):
+    # Argon2 parameters changed since this hash was made: store a fresh one
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+
+    # Enforce that students must login using registration number
+    if user.role == "student" and not _is_registration_number(identifier):
+        # user attempted to login with email; instruct to use reg number
+        raise HTTPException(status_code=403, detail="Students must login using their registration number")
+
+    tokens = token_service.issue_token_pair(db, user)
+    logger.info(f"Successful login for identifier={identifier}")
+    return tokens
+
+
 @router.post("/login", response_model=Token)
-def login(form_data: LoginRequest, db: Session = Depends(get_db)):
+async def login(form_data: LoginRequest, db: Session = Depends(get_db)):
+    # Async so a login waiting for its password check holds no threadpool
+    # token: the bounded verify pool sheds a storm with 503s. Database work
+    # still runs in the threadpool.
     try:
         identifier = form_data.email.strip()
         logger.info(f"Login attempt for identifier={identifier}")
 
-        # Detect registration-number formats and normalize.
-        # Accept either NG/EEV/1234A or legacy NG/EEV/1234/A (case-insensitive).
-        import re
-        reg_pattern_new = re.compile(r"^NG/EEV/\d{4}[A-Z]$", re.IGNORECASE)
-        reg_pattern_legacy = re.compile(r"^NG/EEV/\d{4}/[A-Z]$", re.IGNORECASE)
-
-        user = None
-        if reg_pattern_new.match(identifier) or reg_pattern_legacy.match(identifier):
-            # Normalize to the new format without the extra slash before the letter
-            norm = identifier.upper()
-            if reg_pattern_legacy.match(norm):
-                # convert NG/EEV/1234/A -> NG/EEV/1234A
-                norm = norm.replace("/", "", 1)  # only remove the first extra slash after prefix? safer to reconstruct
-                # Better reconstruction: split and join
-                parts = identifier.split("/")
-                # parts like ['NG', 'EEV', '1234', 'A'] -> join 3rd and 4th
-                if len(parts) >= 4:
-                    norm = f"{parts[0]}/{parts[1]}/{parts[2]}{parts[3]}".upper()
-
-            user = user_service.get_user_by_registration_number(db, norm)
-            logger.info(f"Lookup by registration number returned: {user and user.email}")
-        else:
-            normalized_email = identifier.lower()
-            user = user_service.get_user_by_email(db, normalized_email)
+        user = await run_in_threadpool(_find_login_user, db, identifier)
 
         # If user not found or password invalid, fail
-        if not user or not verify_password(form_data.password, user.hashed_password):
+        if not user:
+            logger.info(f"Failed login attempt for identifier={identifier}")
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        try:
+            valid, new_hash = await verify_password_bounded(form_data.password, user.hashed_password)
+        except VerificationBusy:
+            logger.warning("Login verification queue full; shedding request")
+            raise HTTPException(
+                status_code=503,
+                detail="Server busy, please retry shortly",
+                headers={"Retry-After": str(settings.LOGIN_RETRY_AFTER_SECONDS)},
+            )
+        if not valid:
             logger.info(f"Failed login attempt for identifier={identifier}")
             raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        # Enforce that students must login using registration number
-        if user.role == "student" and not (reg_pattern_new.match(identifier) or reg_pattern_legacy.match(identifier)):
-            # user attempted to login with email; instruct to use reg number
-            raise HTTPException(status_code=403, detail="Students must login using their registration number")
+        return await run_in_threadpool(_complete_login, db, user, identifier, new_hash)
 
-        token = create_access_token({"user_id": user.id, "role": user.role})
-        logger.info(f"Successful login for identifier={identifier}")
-        return {"access_token": token, "token_type": "bearer"}
-    
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"Login error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail="Login failed")
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(payload: RefreshRequest, db: Session = Depends(get_db)):
+    """Exchange a refresh token for a new access token and a rotated refresh token."""
+    tokens = token_service.rotate_refresh_token(db, payload.refresh_token)
+    if not tokens:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    return tokens
+
+
+@router.post("/logout")
+def logout(payload: LogoutRequest, db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    token_service.logout(db, token, payload.refresh_token)
+    return {"detail": "Logged out"}
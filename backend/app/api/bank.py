@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from ..core.db import get_db
+from ..core.fastjson import rows_response, schema_columns
+from ..models.exam import Exam
+from ..models.question_bank import BankQuestion
+from ..schemas.question_bank import BankAttach, BankQuestionCreate, BankQuestionOut, BankQuestionUpdate, BankSaveExam, Difficulty, ExamAssemble
+from ..api.deps import require_role
+from ..services import assembly_service, exam_service, question_bank_service
+
+router = APIRouter(prefix="/bank", tags=["question bank"])
+
+BANK_COLUMNS = schema_columns(BankQuestion, BankQuestionOut)
+
+
+def _require_exam_access(db: Session, exam_id: int, current_user):
+    exam = exam_service.get_exam(db, exam_id)
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    if getattr(current_user, "role", None) == "teacher" and not exam_service.teacher_can_access_exam(db, current_user.id, exam):
+        raise HTTPException(status_code=403, detail="Not allowed to modify this exam")
+    return exam
+
+
+def _require_owner(item, current_user):
+    # Any teacher may search and reuse the bank; only the author (or an
+    # admin) may change an item
+    if getattr(current_user, "role", None) == "teacher" and item.created_by != current_user.id:
+        raise HTTPException(status_code=403, detail="Not allowed to modify this question")
+
+
+# -------- Specific routes (must come before generic {id} routes) --------
+
+@router.get("/questions", response_model=List[BankQuestionOut])
+def search_bank(
+    q: Optional[str] = Query(None, description="Words to search for; the last one also matches as a prefix"),
+    subject_id: Optional[int] = None,
+    level: Optional[str] = None,
+    topic: Optional[str] = None,
+    difficulty: Optional[Difficulty] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("teacher")),
+):
+    rows = question_bank_service.search_bank(db, BANK_COLUMNS, q, subject_id=subject_id, level=level, topic=topic, difficulty=difficulty, limit=limit, offset=offset)
+    return rows_response(rows, BANK_COLUMNS)
+
+
+@router.post("/questions", response_model=BankQuestionOut)
+def create_bank_question(payload: BankQuestionCreate, db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
+    try:
+        return question_bank_service.create_bank_question(db, current_user.id, **payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/exams/{exam_id}/attach")
+def attach_to_exam(exam_id: int, payload: BankAttach, db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
+    """Add bank questions to an exam, in the order given."""
+    _require_exam_access(db, exam_id, current_user)
+    try:
+        added = question_bank_service.attach_to_exam(db, exam_id, payload.bank_question_ids, current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"attached": added}
+
+
+@router.post("/exams/{exam_id}/save")
+def save_exam_to_bank(exam_id: int, payload: BankSaveExam, db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
+    """Put an exam's questions into the bank, tagged with its class level and subject."""
+    _require_exam_access(db, exam_id, current_user)
+    try:
+        saved = question_bank_service.save_exam_to_bank(db, exam_id, current_user.id, topic=payload.topic, difficulty=payload.difficulty)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"saved": saved}
+
+
+@router.post("/assemble")
+def assemble_exam(payload: ExamAssemble, db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
+    """Create an unpublished exam drawn at random from the bank to a blueprint.
+
+    With `per_student`, every student of the class gets their own paper.
+    """
+    if getattr(current_user, "role", None) == "teacher":
+        target = Exam(class_id=payload.class_id, subject_id=payload.subject_id)
+        if not exam_service.teacher_can_access_exam(db, current_user.id, target):
+            raise HTTPException(status_code=403, detail="Not allowed to create exams for this class and subject")
+    try:
+        return assembly_service.assemble_exam(
+            db, current_user.id, payload.title, payload.class_id, payload.subject_id,
+            [section.model_dump() for section in payload.blueprint],
+            description=payload.description, duration_minutes=payload.duration_minutes,
+            per_student=payload.per_student, shuffle=payload.shuffle, seed=payload.seed,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# -------- Generic routes (must come after specific routes) --------
+
+@router.get("/questions/{bank_question_id}", response_model=BankQuestionOut)
+def get_bank_question(bank_question_id: int, db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
+    item = question_bank_service.get_bank_question(db, bank_question_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Question not found")
+    return item
+
+
+@router.put("/questions/{bank_question_id}", response_model=BankQuestionOut)
+def update_bank_question(bank_question_id: int, payload: BankQuestionUpdate, db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
+    item = question_bank_service.get_bank_question(db, bank_question_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Question not found")
+    _require_owner(item, current_user)
+    try:
+        return question_bank_service.update_bank_question(db, bank_question_id, **payload.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/questions/{bank_question_id}")
+def delete_bank_question(bank_question_id: int, db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
+    item = question_bank_service.get_bank_question(db, bank_question_id)
+    if not item:
+        raise HTTPException(status_code=404, detail="Question not found")
+    _require_owner(item, current_user)
+    question_bank_service.delete_bank_question(db, bank_question_id)
+    return {"detail": "Question deleted"}
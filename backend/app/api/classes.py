@@ -9,17 +9,20 @@ from ..schemas.subject import (
     ClassUpdate,
     ClassWithSubjects,
     AssignStudentToClass,
+    BulkEnrollStudents,
     AssignTeacherToClass,
     AssignTeacherToSubject,
     TeacherRequestCreate,
     TeacherRequestOut,
     TeacherSubjectOut,
 )
-from ..services.subject_service import SubjectService, ClassService
+from ..services.subject_service import SubjectService, ClassService, normalize_registration_number
 from ..core.security import decode_access_token
 from ..models.user import User
 from ..api.deps import require_role, get_current_user
 from ..models.subject import NIGERIAN_SCHOOL_SUBJECTS, SCHOOL_LEVEL_DISPLAY
+import csv
+import io
 import logging
 
 logger = logging.getLogger(__name__)
@@ -206,6 +209,55 @@ def assign_student_to_class(
         )
 
 
+def _registration_numbers_from_csv(text: str) -> list[str]:
+    """The first column of each CSV row, skipping blank rows and a header row.
+
+    Values are left for `bulk_enroll_students` to normalize, so malformed
+    numbers come back in its `errors`.
+    """
+    numbers = []
+    for row in csv.reader(io.StringIO(text)):
+        if not row or not row[0].strip():
+            continue
+        value = row[0].strip()
+        # A header: the first row, with a label rather than a number
+        if not numbers and normalize_registration_number(value) is None and not any(ch.isdigit() for ch in value):
+            continue
+        numbers.append(value)
+    return numbers
+
+
+@router.post("/{class_id}/enroll-bulk")
+def enroll_students_bulk(
+    class_id: int,
+    payload: BulkEnrollStudents,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role("admin")),
+):
+    """Enroll many students into a class at once (ids and/or registration numbers)."""
+    registration_numbers = list(payload.registration_numbers)
+    if payload.registration_numbers_csv:
+        registration_numbers.extend(
+            _registration_numbers_from_csv(payload.registration_numbers_csv)
+        )
+    if not payload.student_ids and not registration_numbers:
+        raise HTTPException(status_code=400, detail="No students supplied")
+
+    try:
+        return ClassService.bulk_enroll_students(
+            db,
+            class_id,
+            student_ids=payload.student_ids,
+            registration_numbers=registration_numbers,
+            created_by_id=current_user.id,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error bulk enrolling students: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to enroll students")
+
+
 @router.get("/{class_id}/students")
 def get_class_students(class_id: int, db: Session = Depends(get_db)):
     """Get all students in a class"""
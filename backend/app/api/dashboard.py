@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from typing import List
+from ..core.db import get_db
+from ..core.fastjson import dumps, rows_to_dicts
+from ..schemas.exam import DashboardExam
+from ..api.deps import require_role
+from ..services import dashboard_service
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+
+@router.get("/teacher", response_model=List[DashboardExam])
+def teacher_dashboard(db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
+    """Every exam the caller can manage with its question and submission
+    counts, mean score and last submission, in one query (cached briefly)."""
+    body = dashboard_service.cache.get(current_user.id)
+    if body is None:
+        # Admins see every exam
+        teacher_id = current_user.id if current_user.role == "teacher" else None
+        fields, rows = dashboard_service.dashboard_rows(db, teacher_id)
+        body = dumps(rows_to_dicts(rows, fields))
+        dashboard_service.cache.put(current_user.id, [row.id for row in rows], body)
+    return Response(body, media_type="application/json")
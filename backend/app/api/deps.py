@@ -1,10 +1,7 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
 from typing import Union, Iterable
-from ..core.db import get_db
 from ..core.security import decode_access_token
-from ..services.user_service import get_user
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,14 +9,26 @@ logger = logging.getLogger(__name__)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+class TokenUser:
+    """The caller as described by a verified access token (id and role)."""
+    __slots__ = ("id", "role")
+
+    def __init__(self, id: int, role: str):
+        self.id = id
+        self.role = role
+
+
+def get_current_user(token: str = Depends(oauth2_scheme)):
+    """Authorize from the access token alone, without a DB round trip.
+
+    Tokens are short-lived and checked against the revocation list, so a
+    deleted user or a role change stops being honoured within the access
+    token lifetime. Endpoints that need the full row load it themselves.
+    """
     payload = decode_access_token(token)
-    if not payload:
+    if not payload or payload.get("user_id") is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
-    user = get_user(db, payload.get("user_id"))
-    if not user:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    return TokenUser(payload["user_id"], payload.get("role"))
 
 
 def require_role(role: Union[str, Iterable[str]]):
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.orm import Session
+from typing import Optional
+import hmac
+from ..core.config import settings
+from ..core.db import get_db
+from ..core.fastjson import FastJSONResponse
+from ..schemas.result import ResultSyncRequest, ResultSyncResponse
+from ..services import edge_service, result_service
+
+router = APIRouter(prefix="/edge", tags=["edge"])
+
+
+def require_edge_key(x_edge_key: Optional[str] = Header(None)):
+    """Edge nodes authenticate with the shared EDGE_SYNC_KEY, not a user token."""
+    if not settings.EDGE_SYNC_KEY:
+        raise HTTPException(status_code=404, detail="Edge sync is not enabled")
+    if not x_edge_key or not hmac.compare_digest(x_edge_key, settings.EDGE_SYNC_KEY):
+        raise HTTPException(status_code=403, detail="Invalid edge key")
+
+
+@router.get("/snapshot", dependencies=[Depends(require_edge_key)])
+def get_snapshot(class_ids: Optional[str] = None, if_none_match: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Published exams, questions, rosters and logins for an edge node.
+
+    The ETag is the snapshot's version; 304 when the edge already has it.
+    """
+    try:
+        ids = edge_service.parse_class_ids(class_ids) if class_ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="class_ids must be comma-separated integers")
+    snapshot = edge_service.build_snapshot(db, ids)
+    etag = f'"{snapshot["version"]}"'
+    if if_none_match == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return FastJSONResponse(snapshot, headers={"ETag": etag})
+
+
+@router.post("/results", response_model=ResultSyncResponse, dependencies=[Depends(require_edge_key)])
+def receive_results(payload: ResultSyncRequest, db: Session = Depends(get_db)):
+    """Attempts forwarded by an edge node; same semantics as /results/sync."""
+    if len(payload.items) > settings.RESULT_SYNC_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.RESULT_SYNC_MAX_ITEMS} attempts per request")
+    statuses = result_service.sync_results(db, [item.model_dump() for item in payload.items])
+    return result_service.sync_summary(statuses)
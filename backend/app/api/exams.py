@@ -1,15 +1,25 @@
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Body
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Body, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal
 from ..core.db import get_db
-from ..schemas.exam import ExamCreate, ExamOut, ExamUpdate
-from ..services import exam_service
+from ..core.fastjson import rows_response, schema_columns
+from ..models.exam import Exam
+from ..models.question import Question
+from ..schemas.exam import ExamClone, ExamCloneBatch, ExamCreate, ExamOut, ExamUpdate
+from ..services import exam_service, bundle_service
 from ..api.deps import require_role, get_current_user
+from ..api.questions import question_rows_for
 from io import BytesIO
+from fastapi.responses import FileResponse
 
 router = APIRouter(prefix="/exams", tags=["exams"])
 
+# Read-only lists go from column tuples straight to JSON (core/fastjson.py)
+EXAM_COLUMNS = schema_columns(Exam, ExamOut)
+# /{exam_id}/questions has always returned every column of the question to staff
+QUESTION_COLUMNS = {column.name: getattr(Question, column.name) for column in Question.__table__.columns}
+
 
 @router.post("/", response_model=ExamOut)
 def create_exam(
@@ -25,7 +35,7 @@ def list_all_exams(
     db: Session = Depends(get_db),
     current_user = Depends(require_role(["admin"]))
 ):
-    return exam_service.list_exams(db, published_only=False)
+    return rows_response(exam_service.list_exam_rows(db, EXAM_COLUMNS, published_only=False), EXAM_COLUMNS)
 
 
 @router.get("/", response_model=List[ExamOut])
@@ -34,20 +44,59 @@ def list_exams_for_user(
     current_user = Depends(get_current_user)
 ):
     if current_user.role == "admin":
-        return exam_service.list_exams(db, published_only=False)
-    if current_user.role == "teacher":
+        rows = exam_service.list_exam_rows(db, EXAM_COLUMNS, published_only=False)
+    elif current_user.role == "teacher":
         # Return only exams relevant to this teacher
-        return exam_service.list_exams(db, published_only=False, teacher_id=current_user.id)
-    # For students, return only published exams for their class
-    return exam_service.list_exams(db, published_only=True, student_id=current_user.id)
+        rows = exam_service.list_exam_rows(db, EXAM_COLUMNS, published_only=False, teacher_id=current_user.id)
+    else:
+        # For students, return only published exams for their class
+        rows = exam_service.list_exam_rows(db, EXAM_COLUMNS, published_only=True, student_id=current_user.id)
+    return rows_response(rows, EXAM_COLUMNS)
 
 
 # -------------------- Specific routes (must come before /{exam_id} catch-all) --------------------
 
+def _clone_targets(db: Session, current_user, items) -> List[exam_service.CloneTarget]:
+    """CloneTargets for (exam_id, ExamClone) pairs, checking the teacher may read each
+    source and write each target. The sources and the teacher's assignments are
+    read once for the whole batch."""
+    exams = exam_service.get_exams(db, [exam_id for exam_id, _ in items])
+    can_access = exam_service.teacher_access(db, current_user.id) if getattr(current_user, "role", None) == "teacher" else None
+    targets = []
+    for exam_id, item in items:
+        exam = exams.get(exam_id)
+        if not exam:
+            raise HTTPException(status_code=404, detail=f"Exam {exam_id} not found")
+        for class_id in item.class_ids or [None]:
+            target = exam_service.CloneTarget(exam_id, class_id=class_id, subject_id=item.subject_id, title=item.title)
+            if can_access is not None:
+                copy = Exam(class_id=class_id or exam.class_id, subject_id=item.subject_id or exam.subject_id)
+                if not can_access(exam) or not can_access(copy):
+                    raise HTTPException(status_code=403, detail=f"Not allowed to clone exam {exam_id} there")
+            targets.append(target)
+    return targets
+
+
+@router.post("/clone")
+def clone_exams(
+    payload: ExamCloneBatch,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role(["teacher", "admin"]))
+):
+    """Clone many exams at once (term rollover), each with its questions, in one transaction."""
+    targets = _clone_targets(db, current_user, [(item.exam_id, item) for item in payload.items])
+    try:
+        exam_ids = exam_service.clone_exams(db, current_user.id, targets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"cloned": len(exam_ids), "exam_ids": exam_ids}
+
+
 @router.post("/import-from-document/{exam_id}")
 async def import_from_document(
     exam_id: int,
     file: UploadFile = File(...),
+    on_duplicate: Literal["flag", "skip"] = Query("flag", description="What to do with near-duplicates of questions already in the subject"),
     db: Session = Depends(get_db),
     current_user = Depends(require_role(["teacher", "admin"]))
 ):
@@ -66,7 +115,7 @@ async def import_from_document(
     try:
         file_bytes = await file.read()
         import_result = exam_service.import_questions_from_docx(
-            db, exam_id, file_bytes, creator_id=current_user.id
+            db, exam_id, file_bytes, creator_id=current_user.id, on_duplicate=on_duplicate
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Import failed: {str(e)}")
@@ -94,14 +143,58 @@ def toggle_publish_exam(
     return exam_service.update_exam_published(db, exam_id, published)
 
 
+@router.post("/{exam_id}/clone")
+def clone_exam(
+    exam_id: int,
+    payload: ExamClone = Body(default_factory=ExamClone),
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role(["teacher", "admin"]))
+):
+    """Copy an exam and its questions, unpublished, optionally into other classes or a subject."""
+    targets = _clone_targets(db, current_user, [(exam_id, payload)])
+    try:
+        exam_ids = exam_service.clone_exams(db, current_user.id, targets)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"cloned": len(exam_ids), "exam_ids": exam_ids}
+
+
+@router.get("/{exam_id}/bundle")
+def get_exam_bundle(
+    exam_id: int,
+    db: Session = Depends(get_db),
+    current_user = Depends(require_role(["teacher", "admin"]))
+):
+    """Download the signed offline bundle (no answer keys) for a published exam."""
+    exam = exam_service.get_exam(db, exam_id)
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+
+    if getattr(current_user, "role", None) == "teacher":
+        if not exam_service.teacher_can_access_exam(db, current_user.id, exam):
+            raise HTTPException(status_code=403, detail="Not allowed to download this exam")
+
+    try:
+        path = bundle_service.get_exam_bundle(db, exam)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"exam_{exam_id}.zip",
+        headers={"Cache-Control": "private, no-cache"},
+    )
+
+
 @router.get("/{exam_id}/questions")
 def get_exam_questions(
     exam_id: int,
     db: Session = Depends(get_db),
     current_user = Depends(get_current_user)
 ):
-    questions = exam_service.get_questions_for_exam(db, exam_id)
-    return questions
+    # Students get their own paper (per-student variants) without the answer keys
+    return rows_response(*question_rows_for(db, exam_id, current_user, QUESTION_COLUMNS))
 
 
 # -------------------- Generic exam routes (catch-all, must come last) --------------------
@@ -1,44 +1,53 @@
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..core.db import get_db
-from ..schemas.question import QuestionCreate, QuestionOut, QuestionUpdate
+from ..core.fastjson import rows_response, schema_columns
+from ..models.question import Question
+from ..schemas.question import QuestionCreate, QuestionOut, QuestionPaperOut, QuestionUpdate
 from ..api.deps import require_role, get_current_user
-from ..services import exam_service
-from typing import List
+from ..services import assembly_service, exam_service
+from ..core.static_files import store_upload
+from typing import List, Union
 import os
-import uuid
 from fastapi.responses import FileResponse
 
 router = APIRouter(prefix="/questions", tags=["questions"])
 
+QUESTION_COLUMNS = schema_columns(Question, QuestionOut)
+# Students never get the answer keys
+PAPER_COLUMNS = schema_columns(Question, QuestionPaperOut)
+
+
+def question_rows_for(db: Session, exam_id: int, user, columns: dict):
+    """(rows, columns) of `exam_id`'s questions as `user` may see them.
+
+    Staff get `columns`. A student gets PAPER_COLUMNS, and only their own
+    paper when the exam was assembled with per-student variants.
+    """
+    if getattr(user, "role", None) != "student":
+        return exam_service.get_question_rows_for_exam(db, exam_id, columns), columns
+    paper = assembly_service.paper_for(db, exam_id, user.id)
+    return exam_service.get_question_rows_for_exam(db, exam_id, PAPER_COLUMNS, question_ids=paper), PAPER_COLUMNS
+
 # -------- Specific routes (must come before generic {id} routes) --------
 
 @router.post("/upload-image")
 async def upload_question_image(file: UploadFile = File(...), current_user = Depends(require_role("teacher"))):
     """Upload an image for a question. Returns the relative URL to use in question creation."""
     try:
-        # Create uploads directory if it doesn't exist
-        upload_dir = "uploads/questions"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Generate unique filename
+        # Stored under its content hash so the URL can be cached as immutable;
+        # compressible formats also get .gz/.br sidecars. Hashing, writing and
+        # compressing run on a worker thread, off the event loop.
         file_ext = os.path.splitext(file.filename)[1]
-        unique_filename = f"{uuid.uuid4()}{file_ext}"
-        filepath = os.path.join(upload_dir, unique_filename)
-        
-        # Save file
         contents = await file.read()
-        with open(filepath, "wb") as f:
-            f.write(contents)
-        
-        # Return relative URL
-        return {"image_url": f"/uploads/questions/{unique_filename}"}
+        return {"image_url": await run_in_threadpool(store_upload, contents, file_ext, "questions")}
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"File upload failed: {str(e)}")
 
-@router.get("/exam/{exam_id}", response_model=List[QuestionOut])
-def get_questions_for_exam(exam_id: int, db: Session = Depends(get_db)):
-    return exam_service.get_questions_for_exam(db, exam_id)
+@router.get("/exam/{exam_id}", response_model=List[Union[QuestionOut, QuestionPaperOut]])
+def get_questions_for_exam(exam_id: int, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    return rows_response(*question_rows_for(db, exam_id, current_user, QUESTION_COLUMNS))
 
 # -------- Generic routes (must come after specific routes) --------
 
@@ -49,7 +58,13 @@ def add_question(payload: QuestionCreate, db: Session = Depends(get_db), current
         exam = exam_service.get_exam(db, payload.exam_id)
         if not exam:
             raise HTTPException(status_code=404, detail="Exam not found")
-    q = exam_service.add_question(db, current_user.id, payload.exam_id, payload.text, payload.options, payload.correct_answer, payload.marks, payload.image_url)
+    try:
+        q = exam_service.add_question(
+            db, current_user.id, payload.exam_id, payload.text, payload.options, payload.correct_answer, payload.marks, payload.image_url,
+            question_type=payload.question_type, answer_key=payload.answer_key, negative_marks=payload.negative_marks,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return q
 
 @router.put("/{question_id}", response_model=QuestionOut)
@@ -66,7 +81,8 @@ def update_question(question_id: int, payload: QuestionUpdate, db: Session = Dep
             raise HTTPException(status_code=403, detail="Not allowed to modify this question")
 
     try:
-        updated = exam_service.update_question(db, question_id, current_user.id, text=payload.text, options=payload.options, correct_answer=payload.correct_answer, marks=payload.marks, image_url=payload.image_url)
+        updated = exam_service.update_question(db, question_id, current_user.id, text=payload.text, options=payload.options, correct_answer=payload.correct_answer, marks=payload.marks, image_url=payload.image_url,
+                                               question_type=payload.question_type, answer_key=payload.answer_key, negative_marks=payload.negative_marks)
         return updated
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
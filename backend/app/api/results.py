@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from ..core.db import get_db
-from ..schemas.result import SubmitResult, ResultOut
+from ..core.fastjson import rows_response, schema_columns
+from ..models.result import Result
+from ..schemas.result import SubmitResult, ResultOut, ResultSyncRequest, ResultSyncResponse
+from ..core.config import settings
 from ..api.deps import get_current_user, require_role
-from ..services import result_service, exam_service
+from ..services import result_service, exam_service, edge_service
 from typing import List
 
 router = APIRouter(prefix="/results", tags=["results"])
 
+RESULT_COLUMNS = schema_columns(Result, ResultOut)
+
 @router.post("/submit", response_model=ResultOut)
 def submit_result(payload: SubmitResult, db: Session = Depends(get_db), current_user = Depends(get_current_user)):
     # only student may submit (admins/teachers could submit for testing; we allow admin bypass)
@@ -16,13 +21,36 @@ def submit_result(payload: SubmitResult, db: Session = Depends(get_db), current_
     exam = exam_service.get_exam(db, payload.exam_id)
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
-    answers_list = [a.dict() for a in payload.answers]
+    answers_list = [a.model_dump(exclude_none=True) for a in payload.answers]
+    if settings.EDGE_MODE:
+        # Queued for the central server; committed together with the local result
+        edge_service.queue_attempt(db, current_user.id, payload.exam_id, answers_list)
     result = result_service.grade_and_record(db, current_user.id, payload.exam_id, answers_list)
     return result
 
+@router.post("/sync", response_model=ResultSyncResponse)
+def sync_results(payload: ResultSyncRequest, db: Session = Depends(get_db), current_user = Depends(require_role(["teacher", "admin"]))):
+    """Upload attempts taken offline. Re-sending the same batch is safe."""
+    if len(payload.items) > settings.RESULT_SYNC_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.RESULT_SYNC_MAX_ITEMS} attempts per request")
+
+    allowed = None
+    if current_user.role == "teacher":
+        # Teachers may only upload results for exams they can manage
+        checked = {}
+
+        def allowed(exam_id):
+            if exam_id not in checked:
+                checked[exam_id] = exam_service.teacher_can_access_exam(db, current_user.id, exam_service.get_exam(db, exam_id))
+            return checked[exam_id]
+
+    items = [item.model_dump(exclude_none=True) for item in payload.items]
+    statuses = result_service.sync_results(db, items, allowed_exam_ids=allowed)
+    return result_service.sync_summary(statuses)
+
 @router.get("/me", response_model=List[ResultOut])
 def my_results(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
-    return result_service.get_results_for_student(db, current_user.id)
+    return rows_response(result_service.get_result_rows_for_student(db, current_user.id, RESULT_COLUMNS), RESULT_COLUMNS)
 
 @router.get("/exam/{exam_id}", response_model=List[ResultOut])
 def results_for_exam(exam_id: int, db: Session = Depends(get_db), current_user = Depends(require_role("teacher"))):
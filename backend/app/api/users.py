@@ -1,15 +1,21 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select, union
 from sqlalchemy.orm import Session
 from ..core.db import get_db
-from ..schemas.user import UserCreate, UserOut, UserUpdate
+from ..core.fastjson import rows_response, schema_columns
+from ..schemas.user import UserCreate, UserOut, UserUpdate, BulkUserCreate, BulkUserResult
 from ..services import user_service
 from ..models.user import User as UserModel
 from ..api.deps import require_role, get_current_user
 from typing import List
-from ..models.subject import TeacherSubject, Class, Subject as SubjectModel
+from ..models.subject import TeacherSubject, Class, Subject as SubjectModel, teacher_class_association
+import csv
+import io
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+USER_COLUMNS = schema_columns(UserModel, UserOut)
+
 @router.post("/", response_model=UserOut)
 def create_user(payload: UserCreate, db: Session = Depends(get_db), current_user = Depends(require_role("admin"))):
     existing = user_service.get_user_by_email(db, payload.email)
@@ -29,11 +35,26 @@ def create_user(payload: UserCreate, db: Session = Depends(get_db), current_user
         raise HTTPException(status_code=400, detail=str(e))
     return user
 
+@router.post("/bulk", response_model=BulkUserResult)
+def create_users_bulk(payload: BulkUserCreate, db: Session = Depends(get_db), current_user = Depends(require_role("admin"))):
+    """Create many users from JSON rows and/or CSV text; every row gets its own status."""
+    rows = list(payload.users)
+    if payload.csv:
+        for record in csv.DictReader(io.StringIO(payload.csv)):
+            # Blank cells fall back to the UserCreate defaults
+            rows.append({k.strip(): v.strip() for k, v in record.items() if k and v and v.strip()})
+    if not rows:
+        raise HTTPException(status_code=400, detail="No users supplied")
+
+    results = user_service.bulk_create_users(db, rows)
+    created = sum(1 for r in results if r["status"] == "created")
+    return {"created": created, "failed": len(results) - created, "results": results}
+
 @router.get("/", response_model=List[UserOut])
 def list_users(db: Session = Depends(get_db), current_user = Depends(require_role("admin"))):
-    # Return all users (admin-only). Use the User model from models.user
+    # Return all users (admin-only), as column tuples straight to JSON
     try:
-        return db.query(UserModel).all()
+        return rows_response(user_service.list_user_rows(db, USER_COLUMNS), USER_COLUMNS)
     except Exception as e:
         # Log and return a clear HTTP error for debugging
         import traceback
@@ -45,7 +66,7 @@ def list_users(db: Session = Depends(get_db), current_user = Depends(require_rol
 def list_users_noslash(db: Session = Depends(get_db), current_user = Depends(require_role("admin"))):
     """Alias endpoint to accept requests without trailing slash so proxies/clients don't trigger a redirect that strips auth headers."""
     try:
-        return db.query(UserModel).all()
+        return rows_response(user_service.list_user_rows(db, USER_COLUMNS), USER_COLUMNS)
     except Exception as e:
         import traceback
         traceback.print_exc()
@@ -179,3 +200,20 @@ def get_my_assignments(db: Session = Depends(get_db), current_user = Depends(get
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch my assignments: {str(e)}")
+
+
+@router.get("/me/classes")
+def get_my_classes(db: Session = Depends(get_db), current_user = Depends(get_current_user)):
+    """Return the classes the current teacher teaches or has subject assignments in.
+
+    Response format:
+    [ {"class_id": int, "class_name": str, "level": str} ]
+    """
+    if getattr(current_user, "role", None) != "teacher":
+        return []
+    class_ids = union(
+        select(teacher_class_association.c.class_id).where(teacher_class_association.c.teacher_id == current_user.id),
+        select(TeacherSubject.class_id).where(TeacherSubject.teacher_id == current_user.id),
+    )
+    rows = db.query(Class.id, Class.name, Class.level).filter(Class.id.in_(class_ids)).order_by(Class.name).all()
+    return [{"class_id": class_id, "class_name": name, "level": level} for class_id, name, level in rows]
@@ -0,0 +1,14 @@
+"""
+Micro-benchmarks for the service functions on the exam-day hot path.
+
+    python -m app.bench run [-k SUBSTRING] [--json FILE]
+    python -m app.bench save [-k SUBSTRING]          # record baseline.json
+    python -m app.bench compare [--threshold 0.25]   # exit 1 on regressions
+
+Every benchmark runs against fixtures built in memory from fixed seeds (see
+fixtures.py), so runs differ only in timing noise; nothing touches the
+network or the real database. `compare` reruns the suite and flags any
+benchmark whose median time per call grew by more than the threshold over
+the stored baseline. Baselines are only comparable on the machine that
+recorded them; record one per machine before relying on `compare`.
+"""
@@ -0,0 +1,52 @@
+import argparse
+import json
+import sys
+
+from . import __doc__ as USAGE
+from .runner import (
+    BASELINE_PATH,
+    DEFAULT_THRESHOLD,
+    compare,
+    format_us,
+    load_baseline,
+    machine,
+    print_comparison,
+    run_suite,
+    save_baseline,
+)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.bench", description=USAGE, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["run", "save", "compare"])
+    parser.add_argument("-k", dest="pattern", default=None, help="only benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, as a fraction (0.25 = 25%%)")
+    parser.add_argument("--json", dest="json_path", default=None, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    def progress(name, result):
+        print(f"  {name:<60} {format_us(result['median_us']):>10}", file=sys.stderr)
+
+    results = run_suite(args.pattern, rounds=args.rounds, progress=progress)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"machine": machine(), "benchmarks": results}, f, indent=2)
+
+    if args.command == "save":
+        save_baseline(results, args.baseline)
+        print(f"Saved {len(results)} result(s) to {args.baseline}")
+        return 0
+    if args.command == "compare":
+        stored = load_baseline(args.baseline)
+        if stored["machine"] and stored["machine"] != machine():
+            print(f"Note: baseline recorded on {stored['machine'].get('platform')} / Python {stored['machine'].get('python')}", file=sys.stderr)
+        rows = compare(results, stored["benchmarks"], args.threshold)
+        print_comparison(rows, args.threshold)
+        return 1 if any(r["status"] == "regressed" for r in rows) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
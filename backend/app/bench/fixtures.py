@@ -0,0 +1,248 @@
+"""Deterministic in-memory datasets for the benchmarks."""
+
+import random
+from functools import cached_property
+from io import BytesIO
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+SEED = 20240901
+LEVELS = ["JSS1", "JSS2", "JSS3", "SS1", "SS2", "SS3"]
+ARMS = "ABCDE"
+STUDENTS_PER_CLASS = 40
+QUESTIONS_PER_EXAM = 40
+TEACHERS = 12
+ASSIGNMENTS_PER_TEACHER = 8
+PASSWORD = "bench-password"
+BANK_QUESTIONS = 100_000
+BANK_TOPICS = [
+    "Fractions", "Decimals", "Algebra", "Geometry", "Statistics", "Photosynthesis", "Cells", "Ecology",
+    "Electricity", "Magnetism", "Grammar", "Comprehension", "Poetry", "Citizenship", "Map Reading", "Trade",
+]
+# Fingerprints of other schools' questions in the duplicate index, on top of the school's own
+DUPLICATE_INDEX_SIZE = 200_000
+# Bank items per difficulty for one subject at one level, as exams are assembled from
+ASSEMBLY_POOL_PER_DIFFICULTY = 200
+SYLLABLES = ["ba", "ko", "ri", "la", "mo", "de", "si", "tu", "na", "fe", "gi", "yo"]
+
+
+def question_text(n: int, rng: random.Random) -> str:
+    a, b = rng.randint(2, 99), rng.randint(2, 99)
+    options = [a + b + d for d in (-2, -1, 0, 1)]
+    rng.shuffle(options)
+    lines = [f"Question: What is {a} + {b}? (item {n + 1})"]
+    lines += [f"{letter}) {value}" for letter, value in zip("ABCD", options)]
+    lines.append(f"Answer: {'ABCD'[options.index(a + b)]}")
+    return "\n".join(lines)
+
+
+def _begin_once(conn) -> None:
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
+
+
+class Fixtures:
+    """Builds each dataset on first use and keeps it for the whole run."""
+
+    def __init__(self, seed: int = SEED):
+        self.seed = seed
+
+    @cached_property
+    def hashed_password(self) -> str:
+        from ..core.security import hash_password
+
+        return hash_password(PASSWORD)
+
+    @cached_property
+    def school(self) -> SimpleNamespace:
+        """A school of 30 classes, ~300 exams, 1,200 students and 12,000 questions.
+
+        Returns the session factory for it and the ids the benchmarks act as.
+        """
+        from ..core.db import Base, import_models
+        from ..models.exam import Exam
+        from ..models.question import Question
+        from ..models.subject import NIGERIAN_SCHOOL_SUBJECTS, Class, Subject, TeacherSubject, student_class_association
+        from ..models.user import User
+        from ..services import duplicate_service
+
+        import_models()
+        rng = random.Random(self.seed)
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        # Let SQLAlchemy issue BEGIN itself (pysqlite's own handling breaks
+        # SAVEPOINT), so benchmarks that write can roll back what they did.
+        # Every session shares the one connection, so only the first begins.
+        event.listen(engine, "connect", lambda dbapi_connection, record: setattr(dbapi_connection, "isolation_level", None))
+        event.listen(engine, "begin", _begin_once)
+        Base.metadata.create_all(bind=engine)
+        factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        with factory() as db:
+            hashed = self.hashed_password
+            admin = User(full_name="Admin", email="admin@bench.example.com", hashed_password=hashed, role="admin")
+            teachers = [User(full_name=f"Teacher {t}", email=f"teacher{t}@bench.example.com", hashed_password=hashed, role="teacher") for t in range(TEACHERS)]
+            names = sorted({s for level in LEVELS for s in NIGERIAN_SCHOOL_SUBJECTS[level]})
+            subjects = {name: Subject(name=name, code=f"S{i:02d}") for i, name in enumerate(names)}
+            classes = [Class(name=f"{level}{arm}", level=level) for level in LEVELS for arm in ARMS]
+            db.add_all([admin, *teachers, *subjects.values(), *classes])
+            db.commit()
+
+            exams = [
+                Exam(title=f"{name} {c.name}", created_by=admin.id, class_id=c.id, subject_id=subjects[name].id, published=rng.random() < 0.8)
+                for c in classes
+                for name in NIGERIAN_SCHOOL_SUBJECTS[c.level]
+            ]
+            db.add_all(exams)
+            db.commit()
+            db.execute(insert(Question), [
+                {"exam_id": e.id, "text": f"Q{n} of {e.title}", "options": ["a", "b", "c", "d"], "correct_answer": rng.randrange(4), "marks": 1, "created_by": admin.id}
+                for e in exams
+                for n in range(QUESTIONS_PER_EXAM)
+            ])
+            # Indexed for duplicates, as migration 0006 and the services leave a real school
+            duplicate_service.index_missing(db)
+
+            pairs = [(e.class_id, e.subject_id) for e in exams]
+            db.add_all([
+                TeacherSubject(teacher_id=t.id, class_id=class_id, subject_id=subject_id)
+                for t in teachers
+                for class_id, subject_id in rng.sample(pairs, ASSIGNMENTS_PER_TEACHER)
+            ])
+
+            student_ids = db.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), [
+                {"full_name": f"Student {i}", "email": f"student{i}@bench.example.com", "hashed_password": hashed, "role": "student", "registration_number": f"NG/EEV/{i:04d}A"}
+                for i in range(len(classes) * STUDENTS_PER_CLASS)
+            ]).all()
+            db.execute(student_class_association.insert(), [
+                {"student_id": sid, "class_id": classes[i // STUDENTS_PER_CLASS].id}
+                for i, sid in enumerate(student_ids)
+            ])
+            db.commit()
+
+            return SimpleNamespace(
+                session_factory=factory,
+                admin_id=admin.id,
+                teacher_id=teachers[0].id,
+                student_id=student_ids[0],
+                exam_id=exams[0].id,
+                import_exam_id=exams[1].id,
+            )
+
+    @cached_property
+    def bank(self) -> SimpleNamespace:
+        """BANK_QUESTIONS question bank items in the school database, with their search index."""
+        from ..models.question_bank import DIFFICULTIES, BankQuestion
+        from ..models.subject import Subject
+
+        rng = random.Random(self.seed)
+        # A vocabulary of ~1,700 made-up words, so a word matches a few
+        # hundred items the way a real subject term would
+        vocabulary = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+        with self.school.session_factory() as db:
+            subject_ids = db.scalars(db.query(Subject.id).statement).all()
+            db.execute(insert(BankQuestion), [
+                {
+                    "subject_id": rng.choice(subject_ids),
+                    "level": rng.choice(LEVELS),
+                    "topic": topic,
+                    "difficulty": rng.choice(DIFFICULTIES),
+                    "text": f"In {topic.lower()}, which statement about the {' '.join(rng.sample(vocabulary, 6))} is correct?",
+                    "options": [" ".join(rng.sample(vocabulary, 3)) for _ in range(4)],
+                    "correct_answer": rng.randrange(4),
+                    "marks": 1,
+                    "created_by": self.school.admin_id,
+                }
+                for topic in (rng.choice(BANK_TOPICS) for _ in range(BANK_QUESTIONS))
+            ])
+            db.commit()
+        return SimpleNamespace(subject_id=subject_ids[0], word=vocabulary[100])
+
+    @cached_property
+    def assembly_pool(self) -> SimpleNamespace:
+        """ASSEMBLY_POOL_PER_DIFFICULTY bank items per difficulty for the first student's class and a subject."""
+        from ..models.question_bank import DIFFICULTIES, BankQuestion
+        from ..models.subject import Class, Subject, student_class_association
+
+        rng = random.Random(self.seed)
+        with self.school.session_factory() as db:
+            class_id, level = db.query(Class.id, Class.level).join(student_class_association).filter(
+                student_class_association.c.student_id == self.school.student_id
+            ).first()
+            subject_id = db.query(Subject.id).order_by(Subject.id).first()[0]
+            db.execute(insert(BankQuestion), [
+                {
+                    "subject_id": subject_id, "level": level, "topic": rng.choice(BANK_TOPICS), "difficulty": difficulty,
+                    "text": f"{difficulty} item {n}", "options": ["a", "b", "c", "d"], "correct_answer": rng.randrange(4),
+                    "marks": 1, "created_by": self.school.admin_id,
+                }
+                for difficulty in DIFFICULTIES
+                for n in range(ASSEMBLY_POOL_PER_DIFFICULTY)
+            ])
+            db.commit()
+        return SimpleNamespace(class_id=class_id, subject_id=subject_id)
+
+    @cached_property
+    def duplicate_index(self) -> SimpleNamespace:
+        """The near-duplicate index: the school's questions plus DUPLICATE_INDEX_SIZE more.
+
+        The extra entries have random signatures, as unrelated questions
+        would, all filed under one subject, the worst case for a lookup.
+        """
+        from ..models.exam import Exam
+        from ..models.question import Question
+        from ..services import duplicate_service
+
+        rng = random.Random(self.seed)
+        with self.school.session_factory() as db:
+            duplicate_service.index_missing(db)
+            subject_id, text, options = db.query(Exam.subject_id, Question.text, Question.options).join(Question).filter(Exam.id == self.school.exam_id).first()
+            first_id = 10_000_000  # clear of real question ids
+            conn = db.connection()
+            for start in range(0, DUPLICATE_INDEX_SIZE, 10_000):
+                ids = range(first_id + start, first_id + min(start + 10_000, DUPLICATE_INDEX_SIZE))
+                conn.exec_driver_sql(
+                    "INSERT INTO question_fingerprints (question_id, subject_id, signature) VALUES (?, ?, ?)",
+                    [(i, subject_id, rng.randbytes(duplicate_service.SIGNATURE_SIZE)) for i in ids],
+                )
+                # The buckets of a random signature are as good as random
+                conn.exec_driver_sql(
+                    "INSERT INTO question_lsh_buckets (question_id, subject_id, bucket) VALUES (?, ?, ?)",
+                    [(i, subject_id, rng.getrandbits(64) - 2**63) for i in ids for _ in range(duplicate_service.BANDS)],
+                )
+            db.commit()
+        return SimpleNamespace(subject_id=subject_id, text=text, options=options)
+
+    @cached_property
+    def answers(self) -> list:
+        from ..models.question import Question
+
+        rng = random.Random(self.seed)
+        with self.school.session_factory() as db:
+            ids = [qid for (qid,) in db.query(Question.id).filter(Question.exam_id == self.school.exam_id).order_by(Question.id)]
+        return [{"question_id": qid, "answer_index": rng.randrange(4)} for qid in ids]
+
+    @cached_property
+    def questions_text(self) -> str:
+        """100 questions in the document_parser text format."""
+        rng = random.Random(self.seed)
+        return "\n---\n".join(question_text(n, rng) for n in range(100))
+
+    @cached_property
+    def docx_bytes(self) -> bytes:
+        """30 numbered questions, as teachers upload them."""
+        from docx import Document
+
+        rng = random.Random(self.seed)
+        doc = Document()
+        for n in range(30):
+            block = question_text(n, rng).splitlines()
+            doc.add_paragraph(f"{n + 1}. {block[0][len('Question: '):]}")
+            for line in block[1:5]:
+                doc.add_paragraph(line)
+            doc.add_paragraph(block[5])
+        out = BytesIO()
+        doc.save(out)
+        return out.getvalue()
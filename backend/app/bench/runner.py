@@ -0,0 +1,110 @@
+"""Timing, baselines and regression checks for the benchmark suite."""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from .fixtures import Fixtures
+from .suite import BENCHMARKS, select
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(fn: Callable[[], object], rounds: int = 7, min_round_seconds: float = 0.05) -> dict:
+    """Time `fn` like timeit: calibrate calls per round, then keep per-call times.
+
+    The median of the rounds is what gets compared; the minimum is reported
+    as the best case the machine managed.
+    """
+    started = time.perf_counter()
+    fn()  # warm-up: first-call imports, caches and statement compilation
+    single = time.perf_counter() - started
+    number = max(1, int(min_round_seconds / single)) if single > 0 else 1000
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        per_call.append((time.perf_counter() - started) / number)
+    return {
+        "median_us": statistics.median(per_call) * 1e6,
+        "min_us": min(per_call) * 1e6,
+        "calls_per_round": number,
+        "rounds": rounds,
+    }
+
+
+def run_suite(pattern: str = None, rounds: int = 7, min_round_seconds: float = 0.05, progress: Optional[Callable[[str, dict], None]] = None) -> Dict[str, dict]:
+    fixtures = Fixtures()
+    results = {}
+    for name in select(pattern):
+        fn = BENCHMARKS[name](fixtures)
+        results[name] = measure(fn, rounds=rounds, min_round_seconds=min_round_seconds)
+        if progress is not None:
+            progress(name, results[name])
+    return results
+
+
+def machine() -> dict:
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def load_baseline(path: str = BASELINE_PATH) -> dict:
+    if not os.path.exists(path):
+        return {"machine": {}, "benchmarks": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results: Dict[str, dict], path: str = BASELINE_PATH, merge: bool = True) -> None:
+    """Write `results` as the baseline, keeping stored entries not rerun when merging."""
+    benchmarks = load_baseline(path)["benchmarks"] if merge else {}
+    benchmarks.update(results)
+    with open(path, "w") as f:
+        json.dump({"machine": machine(), "benchmarks": dict(sorted(benchmarks.items()))}, f, indent=2)
+        f.write("\n")
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float = DEFAULT_THRESHOLD) -> List[dict]:
+    """One row per benchmark: its change against the baseline and a verdict."""
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            rows.append({"name": name, "median_us": result["median_us"], "baseline_us": None, "change": None, "status": "new"})
+            continue
+        change = result["median_us"] / base["median_us"] - 1
+        status = "regressed" if change > threshold else "improved" if change < -threshold else "ok"
+        rows.append({"name": name, "median_us": result["median_us"], "baseline_us": base["median_us"], "change": change, "status": status})
+    return rows
+
+
+def format_us(us: float) -> str:
+    if us >= 1e6:
+        return f"{us / 1e6:.2f} s"
+    if us >= 1e3:
+        return f"{us / 1e3:.2f} ms"
+    return f"{us:.1f} us"
+
+
+def print_comparison(rows: List[dict], threshold: float, out=sys.stdout) -> None:
+    width = max((len(r["name"]) for r in rows), default=10)
+    print(f"{'benchmark':<{width}}  {'baseline':>10}  {'now':>10}  {'change':>8}", file=out)
+    for r in rows:
+        base = format_us(r["baseline_us"]) if r["baseline_us"] is not None else "-"
+        change = f"{r['change']:+.0%}" if r["change"] is not None else "-"
+        flag = {"regressed": "  REGRESSION", "improved": "  faster", "new": "  (no baseline)"}.get(r["status"], "")
+        print(f"{r['name']:<{width}}  {base:>10}  {format_us(r['median_us']):>10}  {change:>8}{flag}", file=out)
+    regressed = sum(r["status"] == "regressed" for r in rows)
+    print(f"\n{regressed} regression(s) beyond {threshold:.0%}", file=out)
@@ -0,0 +1,348 @@
+"""
+The benchmarks. Each one is a setup function, registered with @benchmark,
+that takes the shared Fixtures and returns the zero-argument callable to
+time; anything that should not be measured happens in the setup.
+
+Benchmarks that write wrap their call in `_rolled_back`, so every call
+(however many the calibration asks for) starts from the same school and
+later benchmarks measure the data their names describe.
+"""
+
+from typing import Callable, Dict, List
+
+from sqlalchemy.orm import Session
+
+from .fixtures import PASSWORD, Fixtures
+
+BENCHMARKS: Dict[str, Callable[[Fixtures], Callable[[], object]]] = {}
+
+
+def benchmark(name: str):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def select(pattern: str = None) -> List[str]:
+    return [name for name in BENCHMARKS if not pattern or pattern in name]
+
+
+def _rolled_back(session_factory, call: Callable[[Session], object]) -> Callable[[], object]:
+    """`call(db)` inside a transaction that is rolled back afterwards.
+
+    The session joins the outer transaction with SAVEPOINTs, so the
+    service's own commits and rollbacks behave as usual; the rollback is
+    part of the timing.
+    """
+    engine = session_factory.kw["bind"]
+
+    def run():
+        with engine.connect() as conn:
+            outer = conn.begin()
+            db = Session(bind=conn, join_transaction_mode="create_savepoint", autoflush=False)
+            try:
+                return call(db)
+            finally:
+                db.close()
+                outer.rollback()
+    return run
+
+
+@benchmark("result_service.grade_and_record[40 answers]")
+def grade_and_record(fx: Fixtures):
+    from ..services.result_service import grade_and_record
+
+    school, answers = fx.school, fx.answers
+    return _rolled_back(school.session_factory, lambda db: grade_and_record(db, school.student_id, school.exam_id, answers))
+
+
+@benchmark("exam_service.import_questions_from_docx[30 questions]")
+def import_questions_from_docx(fx: Fixtures):
+    from ..services.exam_service import import_questions_from_docx
+
+    school, data = fx.school, fx.docx_bytes
+    return _rolled_back(school.session_factory, lambda db: import_questions_from_docx(db, school.import_exam_id, data, school.admin_id))
+
+
+@benchmark("document_parser.parse_questions_from_text[100 questions]")
+def parse_questions_from_text(fx: Fixtures):
+    from ..services.document_parser import parse_questions_from_text
+
+    text = fx.questions_text
+    return lambda: parse_questions_from_text(text)
+
+
+@benchmark("security.hash_password")
+def hash_password(fx: Fixtures):
+    from ..core.security import hash_password
+
+    return lambda: hash_password(PASSWORD)
+
+
+@benchmark("security.verify_password")
+def verify_password(fx: Fixtures):
+    from ..core.security import verify_password
+
+    hashed = fx.hashed_password
+    return lambda: verify_password(PASSWORD, hashed)
+
+
+@benchmark("security.create_access_token")
+def create_access_token(fx: Fixtures):
+    from ..core.security import create_access_token
+
+    return lambda: create_access_token({"user_id": 1, "role": "student"})
+
+
+@benchmark("security.decode_access_token")
+def decode_access_token(fx: Fixtures):
+    from ..core.security import create_access_token, decode_access_token
+
+    token = create_access_token({"user_id": 1, "role": "student"})
+    return lambda: decode_access_token(token)
+
+
+def _list_exams(session_factory, **filters):
+    from ..services.exam_service import list_exams
+
+    def call():
+        # A fresh session per call, like a request, so nothing is served
+        # from the identity map of an earlier call
+        with session_factory() as db:
+            return list_exams(db, **filters)
+    return call
+
+
+# Filters as the GET /api/exams/ route passes them for each role
+@benchmark("exam_service.list_exams[admin]")
+def list_exams_admin(fx: Fixtures):
+    return _list_exams(fx.school.session_factory, published_only=False)
+
+
+@benchmark("exam_service.list_exams[teacher]")
+def list_exams_teacher(fx: Fixtures):
+    return _list_exams(fx.school.session_factory, published_only=False, teacher_id=fx.school.teacher_id)
+
+
+@benchmark("exam_service.list_exams[student]")
+def list_exams_student(fx: Fixtures):
+    return _list_exams(fx.school.session_factory, published_only=True, student_id=fx.school.student_id)
+
+
+@benchmark("schemas.QuestionOut[40].dump_json")
+def serialize_questions(fx: Fixtures):
+    from pydantic import TypeAdapter
+
+    from ..models.question import Question
+    from ..schemas.question import QuestionOut
+
+    with fx.school.session_factory() as db:
+        rows = db.query(Question).filter(Question.exam_id == fx.school.exam_id).order_by(Question.id).limit(40).all()
+    adapter = TypeAdapter(List[QuestionOut])
+    # Validate from attributes, then dump: what a response_model does
+    return lambda: adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+@benchmark("schemas.ExamOut[all].dump_json")
+def serialize_exams(fx: Fixtures):
+    from pydantic import TypeAdapter
+
+    from ..models.exam import Exam
+    from ..schemas.exam import ExamOut
+
+    with fx.school.session_factory() as db:
+        rows = db.query(Exam).order_by(Exam.id).all()
+    adapter = TypeAdapter(List[ExamOut])
+    return lambda: adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def _orm_validate(session_factory, schema, query):
+    from pydantic import TypeAdapter
+
+    adapter = TypeAdapter(List[schema])
+
+    def call():
+        with session_factory() as db:
+            return adapter.dump_json(adapter.validate_python(query(db), from_attributes=True))
+    return call
+
+
+def _rows_fastjson(session_factory, columns, rows):
+    from ..core.fastjson import rows_response
+
+    def call():
+        with session_factory() as db:
+            return rows_response(rows(db), columns).body
+    return call
+
+
+# Each list endpoint both ways: ORM objects through response_model
+# validation, and the column tuples it now returns via core/fastjson.py
+@benchmark("api.exams[student].orm_validate")
+def exams_student_orm(fx: Fixtures):
+    from ..schemas.exam import ExamOut
+    from ..services.exam_service import list_exams
+
+    school = fx.school
+    return _orm_validate(school.session_factory, ExamOut, lambda db: list_exams(db, published_only=True, student_id=school.student_id))
+
+
+@benchmark("api.exams[student].rows_fastjson")
+def exams_student_rows(fx: Fixtures):
+    from ..api.exams import EXAM_COLUMNS
+    from ..services.exam_service import list_exam_rows
+
+    school = fx.school
+    return _rows_fastjson(school.session_factory, EXAM_COLUMNS, lambda db: list_exam_rows(db, EXAM_COLUMNS, published_only=True, student_id=school.student_id))
+
+
+@benchmark("api.questions[exam].orm_validate")
+def questions_orm(fx: Fixtures):
+    from ..schemas.question import QuestionOut
+    from ..services.exam_service import get_questions_for_exam
+
+    school = fx.school
+    return _orm_validate(school.session_factory, QuestionOut, lambda db: get_questions_for_exam(db, school.exam_id))
+
+
+@benchmark("api.questions[exam].rows_fastjson")
+def questions_rows(fx: Fixtures):
+    from ..api.questions import QUESTION_COLUMNS
+    from ..services.exam_service import get_question_rows_for_exam
+
+    school = fx.school
+    return _rows_fastjson(school.session_factory, QUESTION_COLUMNS, lambda db: get_question_rows_for_exam(db, school.exam_id, QUESTION_COLUMNS))
+
+
+@benchmark("api.users[all].orm_validate")
+def users_orm(fx: Fixtures):
+    from ..models.user import User
+    from ..schemas.user import UserOut
+
+    return _orm_validate(fx.school.session_factory, UserOut, lambda db: db.query(User).all())
+
+
+@benchmark("api.users[all].rows_fastjson")
+def users_rows(fx: Fixtures):
+    from ..api.users import USER_COLUMNS
+    from ..services.user_service import list_user_rows
+
+    return _rows_fastjson(fx.school.session_factory, USER_COLUMNS, lambda db: list_user_rows(db, USER_COLUMNS))
+
+
+def _search_bank(fx: Fixtures, search, **filters):
+    from ..api.bank import BANK_COLUMNS
+    from ..services.question_bank_service import search_bank
+
+    factory = fx.school.session_factory
+    fx.bank  # build the bank outside the timing
+
+    def call():
+        with factory() as db:
+            return search_bank(db, BANK_COLUMNS, search, **filters)
+    return call
+
+
+# The first page of results, as GET /api/bank/questions serves it
+@benchmark("question_bank.search[100k, topic word]")
+def search_bank_topic(fx: Fixtures):
+    return _search_bank(fx, "photosynthesis")
+
+
+@benchmark("question_bank.search[100k, two words + subject]")
+def search_bank_words(fx: Fixtures):
+    return _search_bank(fx, f"statement {fx.bank.word}", subject_id=fx.bank.subject_id)
+
+
+@benchmark("question_bank.search[100k, prefix]")
+def search_bank_prefix(fx: Fixtures):
+    return _search_bank(fx, "frac")
+
+
+@benchmark("duplicate_service.signature")
+def duplicate_signature(fx: Fixtures):
+    from ..services.duplicate_service import signature
+
+    text = "Which of the following is the process by which green plants make their own food using sunlight?"
+    options = ["Photosynthesis", "Respiration", "Transpiration", "Digestion"]
+    return lambda: signature(text, options)
+
+
+# One question checked at import: signature, bucket lookup, candidate checks
+@benchmark("duplicate_service.find_duplicate[212k indexed, distinct question]")
+def find_duplicate_distinct(fx: Fixtures):
+    from ..services.duplicate_service import find_duplicate
+
+    index = fx.duplicate_index
+    db = fx.school.session_factory()
+    text = "Which of the following is the process by which green plants make their own food using sunlight?"
+    options = ["Photosynthesis", "Respiration", "Transpiration", "Digestion"]
+    return lambda: find_duplicate(db, index.subject_id, text, options)
+
+
+# "Q7 of English Language JSS1A": hundreds of the subject's questions share a bucket with it
+@benchmark("duplicate_service.find_duplicate[212k indexed, templated question]")
+def find_duplicate_templated(fx: Fixtures):
+    from ..services.duplicate_service import find_duplicate
+
+    index = fx.duplicate_index
+    db = fx.school.session_factory()
+    return lambda: find_duplicate(db, index.subject_id, index.text + " (reworded)", index.options)
+
+
+# A class's exam drawn to a 10 easy / 20 medium / 10 hard blueprint, one
+# paper per student: sampling, the INSERT ... SELECT and 40 paper rows
+@benchmark("assembly_service.assemble_exam[40 per-student papers]")
+def assemble_per_student(fx: Fixtures):
+    from ..services.assembly_service import Section, assemble_exam
+
+    pool = fx.assembly_pool
+    blueprint = [Section("easy", 10), Section("medium", 20), Section("hard", 10)]
+    return _rolled_back(fx.school.session_factory, lambda db: assemble_exam(
+        db, fx.school.admin_id, "Assembled", pool.class_id, pool.subject_id, blueprint, per_student=True))
+
+
+# Term rollover: every exam of the school (~300, 40 questions each) cloned
+# for the new term in one batch
+@benchmark("exam_service.clone_exams[300 exams]")
+def clone_all_exams(fx: Fixtures):
+    from ..models.exam import Exam
+    from ..services.exam_service import CloneTarget, clone_exams
+
+    with fx.school.session_factory() as db:
+        targets = [CloneTarget(exam_id) for (exam_id,) in db.query(Exam.id).filter(Exam.created_by == fx.school.admin_id).order_by(Exam.id)]
+    return _rolled_back(fx.school.session_factory, lambda db: clone_exams(db, fx.school.admin_id, targets))
+
+
+# The grading loop alone, over a compiled table of 40 mixed-type questions
+@benchmark("grading_service.grade[40 answers, mixed types]")
+def grade_mixed_types(fx: Fixtures):
+    from ..services.grading_service import compile_answer_table, grade
+
+    kinds = [
+        ("single_choice", 1, None, {"answer_index": 1}),
+        ("true_false", 0, None, {"answer_index": 1}),
+        ("multi_select", 0, [0, 2, 3], {"selected": [0, 2]}),
+        ("numeric", 0, {"value": 3.14, "tolerance": 0.01}, {"value": "3.145"}),
+        ("short_text", 0, ["Abuja", "FCT Abuja"], {"value": "F.C.T. Abuja"}),
+    ]
+    rows, answers = [], []
+    for qid in range(40):
+        kind, correct, key, answer = kinds[qid % len(kinds)]
+        rows.append((qid, kind, correct, key, 2, 0.5))
+        answers.append({"question_id": qid, **answer})
+    table = compile_answer_table(rows)
+    return lambda: grade(answers, table)
+
+
+# GET /api/dashboard/teacher on a cache miss: the admin's view, all ~300
+# exams with their question and submission aggregates in one query
+@benchmark("dashboard_service.dashboard_rows[admin]")
+def dashboard_admin(fx: Fixtures):
+    from ..services.dashboard_service import dashboard_rows
+
+    def call():
+        with fx.school.session_factory() as db:
+            return dashboard_rows(db)
+    return call
@@ -3,10 +3,110 @@ from pydantic import ConfigDict
 
 class Settings(BaseSettings):
     SECRET_KEY: str = "change-this-secret-in-production"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Access tokens are checked without a DB lookup, so keep them short;
+    # clients renew them through /api/auth/refresh.
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Expired refresh tokens are deleted while issuing tokens, at most this often
+    REFRESH_TOKEN_PURGE_INTERVAL_SECONDS: int = 3600
     ALGORITHM: str = "HS256"
     DATABASE_URL: str = "sqlite:///./school_cbt.db"
     PASSWORD_SALT_ROUNDS: int = 12
+    # Argon2 cost parameters; changing them rehashes passwords on next login
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    # Login password checks run on a bounded pool (0 = one thread per CPU);
+    # once this many more are waiting, logins get 503 + Retry-After
+    LOGIN_VERIFY_WORKERS: int = 0
+    LOGIN_VERIFY_QUEUE_LIMIT: int = 200
+    LOGIN_RETRY_AFTER_SECONDS: int = 5
+    # Auth rate limits, in attempts per minute. Per-IP limits are generous
+    # because a whole lab usually sits behind one NAT address.
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_PER_IP: int = 600
+    RATE_LIMIT_LOGIN_PER_IDENTIFIER: int = 10
+    RATE_LIMIT_REGISTER_PER_IP: int = 60
+    RATE_LIMIT_REGISTER_PER_IDENTIFIER: int = 5
+    # "memory" (per process), "sqlite" (shared by workers on one host) or
+    # "auto": sqlite when app.server starts more than one worker (or
+    # WEB_CONCURRENCY asks uvicorn/gunicorn for several), memory otherwise
+    RATE_LIMIT_STORE: str = "auto"
+    RATE_LIMIT_SQLITE_PATH: str = "./rate_limits.db"
+    # Largest auth request bodies read before the limits apply (413 above);
+    # register carries the passport photo as a data URL
+    RATE_LIMIT_LOGIN_MAX_BODY_BYTES: int = 4096
+    RATE_LIMIT_REGISTER_MAX_BODY_BYTES: int = 2 * 1024 * 1024
+    # Worker processes used for bulk password hashing (0 = one per CPU)
+    BULK_HASH_WORKERS: int = 0
+    # Rows per INSERT statement when provisioning users in bulk
+    BULK_INSERT_BATCH_SIZE: int = 500
+    # Registration-number slots reserved per allocator block
+    REG_BLOCK_SIZE: int = 100
+
+    # Attempts written per transaction by /results/sync, and the largest
+    # batch one request may carry
+    RESULT_SYNC_CHUNK_SIZE: int = 500
+    RESULT_SYNC_MAX_ITEMS: int = 10000
+    # Near-duplicate detection on question import (services/duplicate_service.py):
+    # estimated Jaccard similarity from which an imported question counts as
+    # a copy of one already in the subject
+    DUPLICATE_THRESHOLD: float = 0.7
+    # Seconds a teacher's /api/dashboard/teacher response is reused; results
+    # written for one of its exams drop it sooner (0 = no caching)
+    DASHBOARD_CACHE_SECONDS: float = 15
+    # Offline exam bundles: cache directory and HMAC key for manifest.sig
+    # (empty = derived from SECRET_KEY)
+    EXAM_BUNDLE_DIR: str = "./exam_bundles"
+    BUNDLE_SIGNING_KEY: str = ""
+
+    # Edge nodes (see app/services/edge_service.py). EDGE_SYNC_KEY is shared
+    # by the central server and its edge nodes; empty disables /api/edge.
+    EDGE_MODE: bool = False
+    EDGE_UPSTREAM_URL: str = ""
+    EDGE_SYNC_KEY: str = ""
+    EDGE_CLASS_IDS: str = ""  # comma-separated; empty = every class
+    EDGE_PULL_INTERVAL_SECONDS: int = 300
+    EDGE_FORWARD_INTERVAL_SECONDS: int = 15
+    EDGE_FORWARD_BATCH_SIZE: int = 500
+    EDGE_LOCK_FILE: str = "./edge_sync.lock"
+
+    # Online backups (app/services/backup_service.py). 0 minutes = no
+    # scheduled backups; scripts/backup_db.py still works on demand.
+    # BACKUP_DIR briefly holds an uncompressed copy of the database while
+    # it is compressed, so it needs that much free space on top
+    BACKUP_DIR: str = "./backups"
+    BACKUP_INTERVAL_MINUTES: int = 0
+    BACKUP_PAGES_PER_STEP: int = 256
+    BACKUP_STEP_SLEEP_MS: int = 20
+    # Restarts caused by concurrent writes before the copy is finished in one
+    # locked step
+    BACKUP_MAX_RESTARTS: int = 3
+    BACKUP_KEEP_LAST: int = 7
+    BACKUP_KEEP_DAILY: int = 14
+    BACKUP_LOCK_FILE: str = "./backup.lock"
+
+    # Schema migrations (app/core/migrations.py): rows rewritten per
+    # committed chunk by data backfills, and the lock workers wait on
+    MIGRATION_BACKFILL_CHUNK_SIZE: int = 1000
+    MIGRATION_LOCK_FILE: str = "./migrations.lock"
+
+    # Launcher (python -m app.server)
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 = one per CPU
+    SERVER_KEEPALIVE_SECONDS: int = 5
+    SERVER_BACKLOG: int = 2048
+    SERVER_GRACEFUL_TIMEOUT: int = 30
+    SERVER_READY_TIMEOUT: int = 60
+    SERVER_READY_FILE: str = ""  # written with the parent pid once all workers are up
+    SERVER_LOG_LEVEL: str = "info"
+    # Crashed workers are replaced after a doubling delay; more than
+    # SERVER_MAX_RESTARTS within the window shuts the server down
+    SERVER_RESTART_BACKOFF_SECONDS: float = 0.5
+    SERVER_RESTART_BACKOFF_MAX_SECONDS: float = 30
+    SERVER_MAX_RESTARTS: int = 10
+    SERVER_RESTART_WINDOW_SECONDS: float = 60
 
     model_config = ConfigDict(env_file=".env")
 
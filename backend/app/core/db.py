@@ -10,6 +10,27 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+_schema_ready = False
+
+def import_models():
+    """Import every model module so Base.metadata is complete."""
+    from ..models import edge, exam, question, question_bank, question_fingerprint, refresh_token, result, subject, user  # noqa: F401
+
+def init_db():
+    """Create missing tables and apply pending migrations, once per process.
+
+    Called from the app lifespan, and by the launcher before it forks so
+    workers inherit the flag and skip the check.
+    """
+    global _schema_ready
+    if _schema_ready:
+        return
+    from .migrations import upgrade
+    import_models()
+    Base.metadata.create_all(bind=engine)
+    upgrade(engine)
+    _schema_ready = True
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
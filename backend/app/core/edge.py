@@ -0,0 +1,41 @@
+"""
+Request guard for edge nodes.
+
+An edge node only mirrors the central server, so anything that would
+change data there is refused locally; the few writes exam delivery needs
+(signing in and submitting answers) are let through.
+"""
+
+import json
+
+EDGE_WRITABLE_PATHS = {
+    "/api/auth/login",
+    "/api/auth/refresh",
+    "/api/auth/logout",
+    "/api/results/submit",
+}
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class EdgeReadOnlyMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or scope["path"] in EDGE_WRITABLE_PATHS
+        ):
+            return await self.app(scope, receive, send)
+
+        payload = json.dumps({"detail": "This is an edge node; make changes on the central server"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 403,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": payload})
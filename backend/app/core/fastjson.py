@@ -0,0 +1,63 @@
+"""
+Direct JSON for read-only list endpoints.
+
+The normal path for a list endpoint loads ORM instances (identity map,
+attribute instrumentation), validates each one into its response schema
+with `from_attributes`, and then serializes the models. For big read-only
+lists most of that work is wasted, so these endpoints select plain column
+tuples instead and return them with `rows_response`:
+
+    columns = schema_columns(Exam, ExamOut)
+    rows = db.execute(select(*columns.values()).where(...)).all()
+    return rows_response(rows, columns)
+
+`schema_columns` takes the field list from the response schema, so the
+JSON keeps the documented shape (the route still declares response_model
+for OpenAPI); fields the model has no column for come out as null.
+Serialization uses orjson when it is installed, else the standard library.
+"""
+
+import json
+from typing import Dict, Iterable, Optional, Sequence, Type
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy import null
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson (falls back to json)."""
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+def schema_columns(model, schema: Type[BaseModel], extra: Sequence[str] = ()) -> Dict[str, object]:
+    """{field: column} for every field of `schema` (plus `extra`), in schema order.
+
+    Fields without a column on `model` map to a NULL literal.
+    """
+    table = model.__table__
+    fields = [*schema.model_fields, *extra]
+    return {name: getattr(model, name) if name in table.c else null().label(name) for name in fields}
+
+
+def rows_to_dicts(rows: Iterable[Sequence], fields: Iterable[str]) -> list:
+    keys = tuple(fields)
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def rows_response(rows: Iterable[Sequence], fields: Iterable[str], status_code: int = 200, headers: Optional[dict] = None):
+    """A JSON array of objects with `fields` as keys, one per row tuple."""
+    return FastJSONResponse(rows_to_dicts(rows, fields), status_code=status_code, headers=headers)
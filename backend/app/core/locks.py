@@ -0,0 +1,36 @@
+"""
+Cross-process locks for background jobs.
+
+Every server worker runs the app lifespan, so jobs started there (edge sync,
+scheduled backups) use a lock file to make sure only one worker on the host
+does the work at a time. Schema migrations wait for the lock instead, so
+workers starting together upgrade the database one after another.
+"""
+
+import contextlib
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows runs a single worker
+    fcntl = None
+
+
+@contextlib.contextmanager
+def exclusive(lock_path: str, blocking: bool = False):
+    """Yield True if this process holds `lock_path`, False if another one does.
+
+    With `blocking=True`, wait for the lock; the result is then always True.
+    """
+    if fcntl is None:
+        yield True
+        return
+    with open(lock_path, "a") as handle:
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(handle, fcntl.LOCK_UN)
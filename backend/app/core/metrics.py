@@ -0,0 +1,61 @@
+"""
+Process-local metrics in the Prometheus text format, served at /metrics.
+
+Only what the backend itself reports (background jobs and the like); no
+client library is needed for a handful of gauges and counters. Each worker
+process has its own values; collectors can fill in values that should look
+the same from every worker (e.g. read from disk).
+"""
+
+import threading
+from typing import Callable, Dict, List, Tuple
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = {}
+        self._meta: Dict[str, Tuple[str, str]] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register_collector(self, collector: Callable[[], None]) -> None:
+        """Call `collector` before every render, to refresh values computed on demand."""
+        self._collectors.append(collector)
+
+    def _declare(self, name: str, kind: str, help_text: str) -> None:
+        if name not in self._meta:
+            self._meta[name] = (kind, help_text)
+            self._values.setdefault(name, 0.0)
+
+    def set(self, name: str, value: float, help_text: str = "") -> None:
+        with self._lock:
+            self._declare(name, "gauge", help_text)
+            self._values[name] = float(value)
+
+    def inc(self, name: str, amount: float = 1.0, help_text: str = "") -> None:
+        with self._lock:
+            self._declare(name, "counter", help_text)
+            self._values[name] += amount
+
+    def get(self, name: str, default: float = 0.0) -> float:
+        return self._values.get(name, default)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception:
+                pass  # a broken collector must not take /metrics down
+        lines = []
+        with self._lock:
+            for name in sorted(self._values):
+                kind, help_text = self._meta[name]
+                if help_text:
+                    lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                value = self._values[name]
+                lines.append(f"{name} {int(value) if value.is_integer() else repr(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
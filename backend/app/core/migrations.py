@@ -0,0 +1,262 @@
+"""
+Versioned schema migrations.
+
+Migrations live in `app/migrations/` as `NNNN_short_name.py` modules; the
+number is the version and the module docstring the description. Each one
+defines `upgrade(ctx)` and is applied at most once per database, in version
+order, with the version recorded in the `schema_migrations` table.
+
+`init_db()` creates missing tables and then runs whatever is pending, so a
+server always starts on the current schema. Fresh databases get every table
+from the models at once; the migrations then find nothing to do, which is
+why the `MigrationContext` helpers are idempotent (add a column only if it
+is missing, CREATE INDEX IF NOT EXISTS, backfill only rows still needing it).
+
+Workers wait on MIGRATION_LOCK_FILE, so only one of them upgrades at a time
+and the rest see nothing pending. From the command line:
+
+    python -m app.core.migrations status
+    python -m app.core.migrations upgrade [--to VERSION]
+"""
+
+import argparse
+import importlib
+import logging
+import pkgutil
+import re
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .config import settings
+from .locks import exclusive
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_PACKAGE = "app.migrations"
+MODULE_NAME = re.compile(r"^(?P<version>\d{4})_(?P<name>\w+)$")
+
+# Kept out of Base.metadata: the models describe the application schema,
+# this table describes the database's history
+_history = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _history,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+    Column("duration_ms", Integer, nullable=False),
+)
+
+
+class MigrationError(Exception):
+    pass
+
+
+class Migration:
+    def __init__(self, version: int, name: str, description: str, upgrade: Callable[["MigrationContext"], None]):
+        self.version = version
+        self.name = name
+        self.description = description
+        self.upgrade = upgrade
+
+
+def discover(package: str = MIGRATIONS_PACKAGE) -> List[Migration]:
+    """Every migration module in `package`, in version order."""
+    pkg = importlib.import_module(package)
+    found: Dict[int, Migration] = {}
+    for info in pkgutil.iter_modules(pkg.__path__):
+        m = MODULE_NAME.match(info.name)
+        if not m:
+            continue
+        version = int(m.group("version"))
+        if version in found:
+            raise MigrationError(f"Duplicate migration version {version}: {found[version].name}, {m.group('name')}")
+        module = importlib.import_module(f"{package}.{info.name}")
+        description = (module.__doc__ or m.group("name")).strip().splitlines()[0]
+        found[version] = Migration(version, m.group("name"), description, module.upgrade)
+    return [found[v] for v in sorted(found)]
+
+
+class MigrationContext:
+    """What a migration's `upgrade(ctx)` works with.
+
+    Statements run on one connection. Everything not yet committed is
+    committed together with the migration's history row, except `backfill`,
+    which commits after every chunk so long data rewrites never hold the
+    write lock for more than one chunk.
+    """
+
+    def __init__(self, conn: Connection):
+        self.conn = conn
+
+    def execute(self, sql: str, params=None):
+        return self.conn.execute(text(sql), params or {})
+
+    def columns(self, table: str) -> List[str]:
+        return [c["name"] for c in inspect(self.conn).get_columns(table)]
+
+    def has_table(self, table: str) -> bool:
+        return inspect(self.conn).has_table(table)
+
+    def add_column(self, table: str, column: str, ddl_type: str) -> bool:
+        """ALTER TABLE ... ADD COLUMN unless the column exists; True if added."""
+        if column in self.columns(table):
+            return False
+        self.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {ddl_type}')
+        return True
+
+    def create_index(self, name: str, table: str, columns: Sequence[str], unique: bool = False) -> None:
+        cols = ", ".join(f'"{c}"' for c in columns)
+        self.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX IF NOT EXISTS "{name}" ON "{table}" ({cols})')
+
+    def create_model_indexes(self, table: str) -> List[str]:
+        """Create the indexes declared on a model's table that the database lacks."""
+        from .db import Base
+
+        existing = {ix["name"] for ix in inspect(self.conn).get_indexes(table)}
+        created = []
+        for index in sorted(Base.metadata.tables[table].indexes, key=lambda ix: ix.name):
+            if index.name not in existing:
+                index.create(self.conn)
+                created.append(index.name)
+        return created
+
+    def add_missing_columns(self, tables: Optional[Iterable[str]] = None) -> List[str]:
+        """Add model columns missing from existing tables, as nullable columns.
+
+        SQLite can only ADD COLUMN without NOT NULL unless there is a
+        default, so every column is added nullable, with the model's
+        literal server default when it has one.
+        """
+        from .db import Base
+
+        added = []
+        for name, table in Base.metadata.tables.items():
+            if tables is not None and name not in tables or not self.has_table(name):
+                continue
+            existing = set(self.columns(name))
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = column.type.compile(dialect=self.conn.dialect)
+                default = getattr(column.server_default, "arg", None)
+                if isinstance(default, str):
+                    ddl += " DEFAULT '" + default.replace("'", "''") + "'"
+                self.add_column(name, column.name, ddl)
+                added.append(f"{name}.{column.name}")
+        return added
+
+    def backfill(
+        self,
+        select_sql: str,
+        update_sql: str,
+        transform: Callable[[tuple], Optional[dict]],
+        chunk_size: int = None,
+    ) -> int:
+        """Rewrite rows in chunks, committing after each; returns rows updated.
+
+        `select_sql` returns rows whose first column is the integer key, for
+        keys above `:after`, ordered by key and limited to `:limit`; it
+        should only match rows that still need the change, so a backfill cut
+        short simply carries on next time. `transform(row)` returns the
+        parameters for `update_sql`, or None to leave the row alone.
+        """
+        chunk_size = chunk_size or settings.MIGRATION_BACKFILL_CHUNK_SIZE
+        after, updated = 0, 0
+        while True:
+            rows = self.execute(select_sql, {"after": after, "limit": chunk_size}).fetchall()
+            if not rows:
+                break
+            params = [p for p in (transform(tuple(row)) for row in rows) if p is not None]
+            if params:
+                self.conn.execute(text(update_sql), params)
+            self.conn.commit()
+            updated += len(params)
+            after = rows[-1][0]
+        return updated
+
+
+def applied_versions(conn: Connection) -> Dict[int, dict]:
+    _history.create_all(conn)
+    rows = conn.execute(schema_migrations.select().order_by(schema_migrations.c.version)).mappings().all()
+    conn.commit()
+    return {row["version"]: dict(row) for row in rows}
+
+
+def pending(conn: Connection, migrations: List[Migration] = None) -> List[Migration]:
+    done = applied_versions(conn)
+    return [m for m in (migrations if migrations is not None else discover()) if m.version not in done]
+
+
+def upgrade(engine: Engine, target: int = None, migrations: List[Migration] = None, lock_path: str = None) -> List[int]:
+    """Apply pending migrations up to `target` (default: all); returns the versions applied."""
+    lock_path = lock_path or settings.MIGRATION_LOCK_FILE
+    migrations = migrations if migrations is not None else discover()
+    applied = []
+    with exclusive(lock_path, blocking=True), engine.connect() as conn:
+        for migration in pending(conn, migrations):
+            if target is not None and migration.version > target:
+                break
+            logger.info("Applying migration %04d_%s", migration.version, migration.name)
+            started = time.monotonic()
+            try:
+                migration.upgrade(MigrationContext(conn))
+                conn.execute(schema_migrations.insert().values(
+                    version=migration.version,
+                    name=migration.name,
+                    applied_at=datetime.now(timezone.utc),
+                    duration_ms=int((time.monotonic() - started) * 1000),
+                ))
+                conn.commit()
+            except Exception as exc:
+                conn.rollback()
+                raise MigrationError(f"Migration {migration.version:04d}_{migration.name} failed: {exc}") from exc
+            applied.append(migration.version)
+    return applied
+
+
+def status(engine: Engine, migrations: List[Migration] = None) -> List[dict]:
+    migrations = migrations if migrations is not None else discover()
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    return [
+        {
+            "version": m.version,
+            "name": m.name,
+            "description": m.description,
+            "applied_at": done[m.version]["applied_at"] if m.version in done else None,
+        }
+        for m in migrations
+    ]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.core.migrations", description="Database schema migrations")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("status", help="list migrations and whether they are applied")
+    up = sub.add_parser("upgrade", help="create missing tables and apply pending migrations")
+    up.add_argument("--to", type=int, default=None, help="stop after this version")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from .db import Base, engine, import_models
+
+    if args.command == "upgrade":
+        import_models()
+        Base.metadata.create_all(bind=engine)
+        applied = upgrade(engine, target=args.to)
+        print(f"Applied {len(applied)} migration(s)" + (f": {', '.join(f'{v:04d}' for v in applied)}" if applied else ""))
+        return 0
+
+    for row in status(engine):
+        state = row["applied_at"] or "pending"
+        print(f"{row['version']:04d}  {row['name']:<32} {state}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,310 @@
+"""
+Token-bucket rate limiting for the auth endpoints.
+
+Each key (client IP or normalised login identifier, per path) owns a bucket
+of `capacity` tokens that refills at `refill_per_second`. A request takes one
+token; an empty bucket means 429 with Retry-After. The check runs in ASGI
+middleware before routing, so a rejected attempt never reaches Argon2.
+
+Two stores are provided:
+- MemoryBucketStore: per-process dict, the default for a single worker.
+- SQLiteBucketStore: a small SQLite file shared by all workers on one host,
+  the default when the launcher runs more than one. Its `take` blocks on a
+  file lock, so the middleware runs it in a worker thread.
+"""
+
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import anyio.to_thread
+
+from .config import settings
+
+
+class BucketStore:
+    """Storage for token buckets. `take` must be atomic per key."""
+
+    # True when `take` may wait on I/O or locks and must stay off the event loop
+    blocking = False
+
+    def take(self, key: str, capacity: float, refill_per_second: float, now: float) -> float:
+        """Consume one token. Return 0 if allowed, else seconds until one is available."""
+        raise NotImplementedError
+
+
+def _refill(tokens: float, updated: float, capacity: float, rate: float, now: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBucketStore(BucketStore):
+    def __init__(self, prune_every: int = 10000):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._prune_every = prune_every
+        self._ops = 0
+
+    def take(self, key, capacity, refill_per_second, now):
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, capacity, refill_per_second, now)
+            self._ops += 1
+            if self._ops >= self._prune_every:
+                self._prune(now, refill_per_second, capacity)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / refill_per_second
+
+    def _prune(self, now, refill_per_second, capacity):
+        # Buckets that would be full again carry no state worth keeping
+        self._ops = 0
+        idle = capacity / refill_per_second
+        for key in [k for k, (_, updated) in self._buckets.items() if now - updated > idle]:
+            del self._buckets[key]
+
+
+class SQLiteBucketStore(BucketStore):
+    blocking = True
+
+    def __init__(self, path: str, prune_every: int = 1000):
+        self.path = path
+        self._local = threading.local()
+        self._prune_every = prune_every
+        self._ops = 0
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        # On first use rather than at construction, so importing the app
+        # does not create the file
+        with self._schema_lock:
+            if self._schema_ready:
+                return
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(rate_buckets)")}
+            if "full_at" not in columns:
+                # Files from before pruning: their rows count as full and go first
+                conn.execute("ALTER TABLE rate_buckets ADD COLUMN full_at REAL NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_buckets_full_at ON rate_buckets (full_at)")
+            self._schema_ready = True
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        if not self._schema_ready:
+            self._create_schema(conn)
+        return conn
+
+    def take(self, key, capacity, refill_per_second, now):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens = _refill(row[0], row[1], capacity, refill_per_second, now) if row else capacity
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / refill_per_second
+            conn.execute(
+                "INSERT INTO rate_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated, full_at = excluded.full_at",
+                (key, tokens, now, now + (capacity - tokens) / refill_per_second),
+            )
+            self._ops += 1
+            if self._ops >= self._prune_every:
+                self.prune(now, conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def prune(self, now: float, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Delete buckets that have refilled by `now`; a missing bucket is a full one."""
+        self._ops = 0
+        return (conn or self._connect()).execute("DELETE FROM rate_buckets WHERE full_at <= ?", (now,)).rowcount
+
+
+class Limit:
+    def __init__(self, capacity: float, per_seconds: float):
+        self.capacity = capacity
+        self.refill_per_second = capacity / per_seconds
+
+
+_LEGACY_REG = re.compile(r"^(NG/EEV/\d{4})/([A-Z])$")
+
+
+def normalize_identifier(identifier: str) -> str:
+    """Same normalisation auth.login applies, so case/format variants share a bucket."""
+    value = identifier.strip().upper()
+    m = _LEGACY_REG.match(value)
+    if m:
+        return m.group(1) + m.group(2)
+    return value.lower() if "@" in value else value
+
+
+class AuthRateLimitMiddleware:
+    """ASGI middleware applying per-IP and per-identifier buckets to auth POSTs.
+
+    `rules` maps a path to (ip_limit, identifier_limit, body_field,
+    max_body_bytes); the identifier is read from `body_field` of the JSON
+    body, which is buffered and replayed to the endpoint unchanged. Bodies
+    over `max_body_bytes` get 413 before being buffered in full.
+    """
+
+    def __init__(self, app, store: BucketStore, rules: Dict[str, Tuple[Limit, Limit, str, int]], clock: Callable[[], float] = time.monotonic):
+        self.app = app
+        self.store = store
+        self.rules = rules
+        self.clock = clock
+
+    async def _take(self, key: str, limit: Limit, now: float) -> float:
+        if self.store.blocking:
+            return await anyio.to_thread.run_sync(self.store.take, key, limit.capacity, limit.refill_per_second, now)
+        return self.store.take(key, limit.capacity, limit.refill_per_second, now)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.rules:
+            return await self.app(scope, receive, send)
+
+        ip_limit, id_limit, field, max_body = self.rules[scope["path"]]
+        path = scope["path"]
+        now = self.clock()
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+
+        wait = await self._take(f"ip:{client_ip}:{path}", ip_limit, now)
+        if wait:
+            return await self._reject(send, wait)
+
+        declared = dict(scope.get("headers") or ()).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > max_body:
+            return await self._too_large(send)
+        chunks, size, more = [], 0, True
+        while more:
+            message = await receive()
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > max_body:
+                return await self._too_large(send)
+            chunks.append(chunk)
+            more = message.get("more_body", False)
+        body = b"".join(chunks)
+
+        identifier = self._identifier(body, field)
+        if identifier:
+            wait = await self._take(f"id:{identifier}:{path}", id_limit, now)
+            if wait:
+                return await self._reject(send, wait)
+
+        replayed = False
+
+        async def replay():
+            nonlocal replayed
+            if not replayed:
+                replayed = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return await self.app(scope, replay, send)
+
+    @staticmethod
+    def _identifier(body: bytes, field: str) -> Optional[str]:
+        try:
+            value = json.loads(body).get(field)
+        except Exception:
+            return None
+        return normalize_identifier(value) if isinstance(value, str) and value.strip() else None
+
+    @staticmethod
+    async def _respond(send, status: int, detail: str, headers=()):
+        payload = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode()),
+                *headers,
+            ],
+        })
+        await send({"type": "http.response.body", "body": payload})
+
+    @classmethod
+    async def _reject(cls, send, wait: float):
+        await cls._respond(send, 429, "Too many attempts, please slow down",
+                           [(b"retry-after", str(max(1, math.ceil(wait))).encode())])
+
+    @classmethod
+    async def _too_large(cls, send):
+        await cls._respond(send, 413, "Request body too large")
+
+
+# Set by app.server to the number of workers it starts; WEB_CONCURRENCY is
+# what `uvicorn --workers` and gunicorn read. Anything else is one process.
+WORKERS_ENV = "APP_SERVER_WORKERS"
+
+
+def launched_workers() -> int:
+    for name in (WORKERS_ENV, "WEB_CONCURRENCY"):
+        value = os.environ.get(name)
+        if value:
+            return max(1, int(value))
+    return 1
+
+
+def resolve_store_kind() -> str:
+    """"memory" or "sqlite" for RATE_LIMIT_STORE, resolving "auto" from the worker count.
+
+    Raises ValueError for "memory" with several workers: each worker would
+    keep its own buckets and every limit would be multiplied by their count.
+    """
+    kind = settings.RATE_LIMIT_STORE
+    workers = launched_workers()
+    if kind == "auto":
+        return "sqlite" if workers > 1 else "memory"
+    if kind == "memory" and workers > 1:
+        raise ValueError(
+            f"RATE_LIMIT_STORE=memory with {workers} workers would multiply every auth limit by {workers}; "
+            "use RATE_LIMIT_STORE=sqlite (or auto), or a single worker"
+        )
+    if kind not in ("memory", "sqlite"):
+        raise ValueError(f"Unknown RATE_LIMIT_STORE {kind!r}: use auto, memory or sqlite")
+    return kind
+
+
+def build_store() -> BucketStore:
+    if resolve_store_kind() == "sqlite":
+        return SQLiteBucketStore(settings.RATE_LIMIT_SQLITE_PATH)
+    return MemoryBucketStore()
+
+
+def auth_rate_limit_rules() -> Dict[str, Tuple[Limit, Limit, str, int]]:
+    return {
+        "/api/auth/login": (
+            Limit(settings.RATE_LIMIT_LOGIN_PER_IP, 60),
+            Limit(settings.RATE_LIMIT_LOGIN_PER_IDENTIFIER, 60),
+            "email",
+            settings.RATE_LIMIT_LOGIN_MAX_BODY_BYTES,
+        ),
+        "/api/auth/register": (
+            Limit(settings.RATE_LIMIT_REGISTER_PER_IP, 60),
+            Limit(settings.RATE_LIMIT_REGISTER_PER_IDENTIFIER, 60),
+            "email",
+            settings.RATE_LIMIT_REGISTER_MAX_BODY_BYTES,
+        ),
+    }
@@ -0,0 +1,102 @@
+"""
+In-memory revocation list for access tokens.
+
+Access tokens are short-lived and are checked without a DB lookup, so a
+deleted user, a role change or a logout has to be remembered somewhere until
+the affected tokens expire on their own. This module keeps:
+
+- revoked token ids (`jti`) until their `exp`, and
+- per-user "revoked before" timestamps, which invalidate every token for
+  that user issued earlier (used on delete and role change).
+
+Nearly every lookup is for a token that was never revoked, so both are
+fronted by a Bloom filter: a miss there answers "not revoked" without
+touching the dicts. Entries only need to live for one access-token TTL;
+expired ones are pruned and the filter rebuilt.
+
+State is per process. Other workers pick up the change when the token
+expires, i.e. within ACCESS_TOKEN_EXPIRE_MINUTES.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Dict, Optional
+
+from .config import settings
+
+
+class BloomFilter:
+    def __init__(self, size_bits: int = 1 << 16, hashes: int = 4):
+        self.size = size_bits
+        self.hashes = hashes
+        self.bits = bytearray(size_bits // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.hashes).digest()
+        for i in range(self.hashes):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], "little") % self.size
+
+    def add(self, key: str) -> None:
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class RevocationList:
+    def __init__(self, ttl_seconds: float):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, float] = {}       # jti -> exp
+        self._users: Dict[str, float] = {}        # user id -> revoked-before timestamp
+        self._bloom = BloomFilter()
+        self._last_prune = time.time()
+
+    def revoke_token(self, jti: str, exp: float) -> None:
+        self._maybe_prune()
+        with self._lock:
+            self._tokens[jti] = exp
+            self._bloom.add("t:" + jti)
+
+    def revoke_user(self, user_id: int, now: Optional[float] = None) -> None:
+        self._maybe_prune()
+        now = time.time() if now is None else now
+        with self._lock:
+            self._users[str(user_id)] = now
+            self._bloom.add("u:" + str(user_id))
+
+    def _maybe_prune(self) -> None:
+        if time.time() - self._last_prune > self.ttl:
+            self.prune()
+
+    def is_revoked(self, payload: dict) -> bool:
+        jti = payload.get("jti")
+        user_key = str(payload.get("user_id"))
+        bloom = self._bloom
+        maybe_token = jti is not None and ("t:" + jti) in bloom
+        maybe_user = ("u:" + user_key) in bloom
+        if not maybe_token and not maybe_user:
+            return False
+        if maybe_token and jti in self._tokens:
+            return True
+        revoked_before = self._users.get(user_key) if maybe_user else None
+        return revoked_before is not None and payload.get("iat", 0) < revoked_before
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Drop entries that can no longer match an unexpired token and rebuild the filter."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._tokens = {j: exp for j, exp in self._tokens.items() if exp > now}
+            self._users = {u: ts for u, ts in self._users.items() if ts + self.ttl > now}
+            bloom = BloomFilter(self._bloom.size, self._bloom.hashes)
+            for jti in self._tokens:
+                bloom.add("t:" + jti)
+            for user_key in self._users:
+                bloom.add("u:" + user_key)
+            self._bloom = bloom
+            self._last_prune = now
+
+
+revocations = RevocationList(ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
@@ -1,31 +1,139 @@
 from passlib.context import CryptContext
+import asyncio
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
+import multiprocessing
+import os
+import threading
+import time
+import uuid
 from jose import jwt
 from .config import settings
+from .revocation import revocations
 
-# Use Argon2 instead of bcrypt - no 72 byte limit, better for Python 3.13
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+# Use Argon2 instead of bcrypt - no 72 byte limit, better for Python 3.13.
+# Hashes made with other cost parameters still verify and are flagged for
+# rehash by verify_and_update().
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
+# Below this many passwords the process pool start-up costs more than it saves
+PARALLEL_HASH_THRESHOLD = 16
+
+# One spawn pool per process, started by the first bulk call and kept, so
+# later uploads skip interpreter start-up; shut down with the app
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = ProcessPoolExecutor(
+                    max_workers=settings.BULK_HASH_WORKERS or os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _hash_pool
+
+def shutdown_hash_pool() -> None:
+    """Stop the bulk hashing processes, if they were started."""
+    global _hash_pool
+    with _hash_pool_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def hash_passwords(passwords: List[str], max_workers: Optional[int] = None) -> List[str]:
+    """Hash many passwords, spreading the Argon2 work across worker processes.
+
+    Results are returned in the same order as `passwords`. The shared pool
+    (BULK_HASH_WORKERS processes) is started with the "spawn" method so this
+    is safe to call from a threaded server; scripts calling it must guard
+    their entry point with `if __name__ == "__main__":`. `max_workers` of 1
+    hashes in this process.
+    """
+    if max_workers is None:
+        max_workers = settings.BULK_HASH_WORKERS or os.cpu_count() or 1
+    if max_workers <= 1 or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [hash_password(p) for p in passwords]
+
+    workers = min(max_workers, len(passwords))
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(_get_hash_pool().map(hash_password, passwords, chunksize=chunksize))
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_password_and_update(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one uses outdated parameters."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class VerificationBusy(Exception):
+    """Raised when too many password checks are already queued."""
+
+
+# Argon2 releases the GIL, so a thread pool sized to the CPU count keeps every
+# core busy without oversubscribing it. The semaphore bounds running + queued
+# checks so a login storm is shed with 503s instead of piling up. Callers
+# await the check on the event loop, so waiting logins hold no threadpool
+# token and the semaphore, not AnyIO's limiter, is what fills up.
+_verify_executor: Optional[ThreadPoolExecutor] = None
+_verify_slots: Optional[threading.BoundedSemaphore] = None
+_verify_init_lock = threading.Lock()
+
+def _get_verify_executor() -> Tuple[ThreadPoolExecutor, threading.BoundedSemaphore]:
+    global _verify_executor, _verify_slots
+    if _verify_executor is None:
+        with _verify_init_lock:
+            if _verify_executor is None:
+                workers = settings.LOGIN_VERIFY_WORKERS or os.cpu_count() or 1
+                _verify_slots = threading.BoundedSemaphore(workers + settings.LOGIN_VERIFY_QUEUE_LIMIT)
+                _verify_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwd-verify")
+    return _verify_executor, _verify_slots
+
+async def verify_password_bounded(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Await `verify_password_and_update` on the bounded login pool.
+
+    Raises VerificationBusy immediately when the pool's queue is full.
+    """
+    executor, slots = _get_verify_executor()
+    if not slots.acquire(blocking=False):
+        raise VerificationBusy()
+    try:
+        return await asyncio.wrap_future(executor.submit(verify_password_and_update, plain_password, hashed_password))
+    finally:
+        slots.release()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire})
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    # iat (sub-second, so a fresh login right after a revocation is not
+    # caught by it) lets a per-user revocation cover every earlier token;
+    # jti lets a single token be revoked on logout.
+    to_encode.update({"exp": expire, "iat": time.time(), "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 def decode_access_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except Exception:
         return None
+    if revocations.is_revoked(payload):
+        return None
+    return payload
@@ -0,0 +1,196 @@
+"""
+Static serving for uploaded assets (/uploads).
+
+Uploads are stored under a content-hash filename (sha256 prefix + original
+extension), so a given URL always names the same bytes and can be cached
+by browsers and proxies forever (`Cache-Control: immutable`). Files that
+compress well also get `.gz` / `.br` sidecars written at upload time; the
+handler serves the best one the client accepts, so nothing is compressed
+per request.
+
+Range requests and conditional requests (ETag / If-None-Match) come from
+Starlette's FileResponse, which also hands the file to the server for
+zero-copy sending when the server supports the ASGI `pathsend` extension.
+
+    python -m app.core.static_files   # write sidecars for existing uploads
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+try:  # optional: brotli sidecars are skipped when the package is missing
+    import brotli
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "uploads")
+
+IMMUTABLE_CACHE = "public, max-age=31536000, immutable"
+# Legacy uuid-named uploads could in principle be overwritten; revalidate them
+MUTABLE_CACHE = "public, max-age=3600"
+
+HASHED_NAME = re.compile(r"^[0-9a-f]{32}\.[A-Za-z0-9]+$")
+# Already-compressed formats gain nothing from gzip/brotli
+COMPRESSIBLE_EXTENSIONS = {".svg", ".txt", ".json", ".csv", ".html", ".css", ".js", ".xml", ".bmp", ".tif", ".tiff"}
+MIN_SAVING = 0.1
+SIDECARS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def hashed_filename(contents: bytes, ext: str) -> str:
+    return hashlib.sha256(contents).hexdigest()[:32] + ext.lower()
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _compressors() -> list:
+    """(encoding, suffix, compress) for every sidecar this install can write."""
+    candidates = [("gzip", ".gz", lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        candidates.append(("br", ".br", lambda data: brotli.compress(data, quality=11)))
+    return candidates
+
+
+def write_sidecars(path: str, contents: Optional[bytes] = None, encodings: Optional[set] = None) -> list:
+    """Write .gz/.br next to `path` when its type compresses and the saving is worthwhile.
+
+    `encodings` limits which sidecars are written (default: all available).
+    """
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return []
+    candidates = [c for c in _compressors() if encodings is None or c[0] in encodings]
+    if not candidates:
+        return []
+    if contents is None:
+        with open(path, "rb") as f:
+            contents = f.read()
+    written = []
+    for encoding, suffix, compress in candidates:
+        packed = compress(contents)
+        if len(packed) <= len(contents) * (1 - MIN_SAVING):
+            _write_atomic(path + suffix, packed)
+            written.append(encoding)
+    return written
+
+
+def upload_path(url: Optional[str]) -> Optional[str]:
+    """Map an /uploads/... URL to its path inside UPLOAD_DIR (None if it points elsewhere)."""
+    if not url or not url.startswith("/uploads/"):
+        return None
+    root = os.path.realpath(UPLOAD_DIR)
+    path = os.path.realpath(os.path.join(root, url[len("/uploads/"):]))
+    return path if path.startswith(root + os.sep) else None
+
+
+def store_upload(contents: bytes, ext: str, subdir: str) -> str:
+    """Save an upload under its content hash and return its URL path.
+
+    Re-uploading identical bytes reuses the existing file.
+    """
+    directory = os.path.join(UPLOAD_DIR, subdir)
+    os.makedirs(directory, exist_ok=True)
+    name = hashed_filename(contents, ext)
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        _write_atomic(path, contents)
+        write_sidecars(path, contents)
+    return f"/uploads/{subdir}/{name}"
+
+
+def _accepted_encodings(headers: Headers) -> set:
+    accepted = set()
+    for part in headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        if token:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+# Keyed on the directory's mtime as well as the file's: writing a sidecar
+# (here or from precompress_tree in another process) adds a directory
+# entry, which bumps it, so new sidecars are picked up on the next request
+@lru_cache(maxsize=4096)
+def _sidecars_for(full_path: str, mtime_ns: int, dir_mtime_ns: int) -> Tuple[Tuple[str, str, os.stat_result], ...]:
+    found = []
+    for encoding, suffix in SIDECARS:
+        try:
+            found.append((encoding, full_path + suffix, os.stat(full_path + suffix)))
+        except OSError:
+            continue
+    return tuple(found)
+
+
+class UploadStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = os.fspath(full_path)
+
+        path, stat, encoding = full_path, stat_result, None
+        try:
+            dir_mtime_ns = os.stat(os.path.dirname(full_path)).st_mtime_ns
+        except OSError:
+            dir_mtime_ns = 0
+        sidecars = _sidecars_for(full_path, stat_result.st_mtime_ns, dir_mtime_ns)
+        if sidecars:
+            accepted = _accepted_encodings(request_headers)
+            for candidate_encoding, candidate_path, candidate_stat in sidecars:
+                if candidate_encoding in accepted:
+                    path, stat, encoding = candidate_path, candidate_stat, candidate_encoding
+                    break
+
+        # media type always comes from the original name, not the sidecar
+        response = FileResponse(path, status_code=status_code, stat_result=stat, filename=None,
+                                media_type=self._media_type(full_path))
+        name = os.path.basename(full_path)
+        response.headers["cache-control"] = IMMUTABLE_CACHE if HASHED_NAME.match(name) else MUTABLE_CACHE
+        if sidecars:
+            response.headers["vary"] = "Accept-Encoding"
+        if encoding:
+            response.headers["content-encoding"] = encoding
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    @staticmethod
+    def _media_type(path: str) -> str:
+        return mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+
+def precompress_tree(root: str = UPLOAD_DIR) -> int:
+    """Write missing sidecars for every compressible file under `root`.
+
+    Only sidecars this install can produce count as missing (no .br
+    without brotli), and existing ones are left alone.
+    """
+    producible = [(encoding, suffix) for encoding, suffix, _ in _compressors()]
+    count = 0
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith((".gz", ".br", ".tmp")):
+                continue
+            path = os.path.join(dirpath, filename)
+            missing = {encoding for encoding, suffix in producible if not os.path.exists(path + suffix)}
+            if missing and write_sidecars(path, encodings=missing):
+                count += 1
+    return count
+
+
+if __name__ == "__main__":
+    print(f"Wrote sidecars for {precompress_tree()} file(s) under {UPLOAD_DIR}")
@@ -0,0 +1,308 @@
+"""
+Synthetic school generator, for benchmarks and capacity planning.
+
+    python -m app.datagen --db PATH [--profile tiny|small|medium|large|xlarge]
+                          [--arms N] [--students-per-class N] [--questions N]
+                          [--exams-per-subject N] [--passport-kb N] [--seed N]
+
+Builds a school the size of the chosen profile in a new SQLite file (its
+migration lock goes next to it, as PATH.migrations.lock):
+
+- every level in NIGERIAN_SCHOOL_SUBJECTS, with --arms classes each (JSS1A,
+  JSS1B, ...)
+- students with NG/EEV registration numbers
+- subject teachers assigned per class and subject (teacher_subjects and
+  teacher_class)
+- exams per class and subject, with their questions
+- past results
+- duplicate-detection fingerprints for every question, as the app keeps them
+
+Each student has an ability and each exam a difficulty, so every answer is
+right with a per-student, per-exam probability. Scores therefore spread
+the way real class results do, and every result's score matches its
+stored answers.
+
+Every user has a passport photo, as the app requires: a JPEG-sized data URL
+of --passport-kb kilobytes (random bytes, so it does not compress better
+than a photo would).
+
+Everyone signs in with a profile password (students: "student-pass",
+teachers: "teacher-pass", admin: admin@school.local / "admin-pass"). Each is
+hashed once and shared, so the cost of Argon2 is not multiplied by the size
+of the school. Rows go in through batched executemany with ids assigned up
+front, and synchronous writes are off while loading. Fingerprinting the
+questions takes most of the time: `xlarge` (about 800,000 rows, then
+450,000 fingerprints) takes around four minutes on a laptop.
+
+To load-test a generated school:
+
+    python -m app.loadtest --db PATH --no-seed --password student-pass
+"""
+
+import argparse
+import base64
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+BATCH_SIZE = 5000
+STUDENT_PASSWORD = "student-pass"
+TEACHER_PASSWORD = "teacher-pass"
+ADMIN_PASSWORD = "admin-pass"
+EXAM_TITLES = ["First Test", "Mid-Term Examination", "Second Test", "Terminal Examination"]
+
+
+@dataclass(frozen=True)
+class Profile:
+    arms: int  # classes per level
+    students_per_class: int
+    exams_per_subject: int
+    questions: int  # per exam
+    sat_fraction: float  # share of a class that sat each published exam
+    published_fraction: float = 0.85
+    teacher_load: int = 8  # class-subjects taught per teacher
+    passport_kb: int = 12  # size of each user's passport photo
+
+
+PROFILES: Dict[str, Profile] = {
+    "tiny": Profile(arms=1, students_per_class=10, exams_per_subject=1, questions=10, sat_fraction=0.5),
+    "small": Profile(arms=2, students_per_class=30, exams_per_subject=1, questions=20, sat_fraction=0.8),
+    "medium": Profile(arms=4, students_per_class=40, exams_per_subject=2, questions=40, sat_fraction=0.9),
+    "large": Profile(arms=8, students_per_class=45, exams_per_subject=3, questions=50, sat_fraction=0.95),
+    "xlarge": Profile(arms=16, students_per_class=50, exams_per_subject=4, questions=60, sat_fraction=0.95),
+}
+
+
+def subject_codes(names: Iterable[str]) -> Dict[str, str]:
+    """Short unique codes: first letters of the words, numbered on clashes (ENG, MAT, PE, ...)."""
+    codes: Dict[str, str] = {}
+    for name in names:
+        words = [w for w in name.replace("/", " ").split() if w[0].isalpha()]
+        base = (words[0][:3] if len(words) == 1 else "".join(w[0] for w in words)).upper()
+        code, n = base, 2
+        while code in codes.values():
+            code, n = f"{base}{n}", n + 1
+        codes[name] = code
+    return codes
+
+
+class Generator:
+    """Generates rows table by table, assigning ids itself (the database must be empty)."""
+
+    def __init__(self, conn, profile: Profile, seed: int = 0, batch_size: int = BATCH_SIZE, now: datetime = None):
+        self.conn = conn
+        self.profile = profile
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.now = now or datetime(2025, 7, 1, 9, 0, 0)
+        self.counts: Dict[str, int] = {}
+
+    def insert(self, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        batch, total = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.conn.exec_driver_sql(sql, batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.conn.exec_driver_sql(sql, batch)
+            total += len(batch)
+        self.counts[table] = self.counts.get(table, 0) + total
+        return total
+
+    def passport(self) -> str:
+        return "data:image/jpeg;base64," + base64.b64encode(self.rng.randbytes(self.profile.passport_kb * 1024)).decode()
+
+    def stamp(self, days_ago: float) -> str:
+        return (self.now - timedelta(days=days_ago)).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+    def generate(self, hashes: Dict[str, str]) -> Dict[str, int]:
+        from .models.subject import NIGERIAN_SCHOOL_SUBJECTS
+        from .services.registration_allocator import DEFAULT_PREFIX, SLOT_COUNT, slot_to_number
+
+        p, rng = self.profile, self.rng
+        levels = list(NIGERIAN_SCHOOL_SUBJECTS)
+        names = sorted({s for level in levels for s in NIGERIAN_SCHOOL_SUBJECTS[level]})
+        codes = subject_codes(names)
+        subject_id = {name: i + 1 for i, name in enumerate(names)}
+        self.insert("subjects", ["id", "name", "code"], ((subject_id[n], n, codes[n]) for n in names))
+
+        classes: List[Tuple[int, str, str]] = []
+        for level in levels:
+            for arm in range(p.arms):
+                classes.append((len(classes) + 1, f"{level}{chr(65 + arm)}", level))
+        self.insert("classes", ["id", "name", "level"], classes)
+        self.insert("class_subject", ["class_id", "subject_id"], (
+            (cid, subject_id[s]) for cid, _, level in classes for s in NIGERIAN_SCHOOL_SUBJECTS[level]
+        ))
+
+        # Users: admin, then teachers, then students
+        class_subjects = [(cid, subject_id[s]) for cid, _, level in classes for s in NIGERIAN_SCHOOL_SUBJECTS[level]]
+        n_teachers = max(1, -(-len(class_subjects) // p.teacher_load))
+        n_students = len(classes) * p.students_per_class
+        if n_students > SLOT_COUNT:
+            raise ValueError(f"{n_students} students do not fit the {SLOT_COUNT} registration numbers of {DEFAULT_PREFIX}")
+        first_teacher, first_student = 2, 2 + n_teachers
+        users = [(1, "School Admin", "admin@school.local", hashes["admin"], "admin", None, None, self.passport())]
+        users += [
+            (first_teacher + t, f"Teacher {t + 1}", f"teacher{t + 1}@school.local", hashes["teacher"], "teacher", None, None, self.passport())
+            for t in range(n_teachers)
+        ]
+        student_level = {}
+        for n in range(n_students):
+            cid, _, level = classes[n // p.students_per_class]
+            student_level[first_student + n] = level
+        users += [
+            (uid, f"Student {uid - first_student + 1}", f"student{uid - first_student + 1}@school.local", hashes["student"], "student", level,
+             slot_to_number(DEFAULT_PREFIX, uid - first_student), self.passport())
+            for uid, level in student_level.items()
+        ]
+        self.insert("users", ["id", "full_name", "email", "hashed_password", "role", "student_class", "registration_number", "passport"], users)
+        self.insert("student_class", ["student_id", "class_id"], (
+            (first_student + n, classes[n // p.students_per_class][0]) for n in range(n_students)
+        ))
+
+        # Subject teachers: class-subjects grouped by subject, dealt out in turn,
+        # so a teacher mostly teaches one subject across several classes
+        by_subject = sorted(class_subjects, key=lambda cs: (cs[1], cs[0]))
+        teacher_of = {cs: first_teacher + i // p.teacher_load for i, cs in enumerate(by_subject)}
+        self.insert("teacher_subjects", ["teacher_id", "subject_id", "class_id"], (
+            (tid, sid, cid) for (cid, sid), tid in teacher_of.items()
+        ))
+        self.insert("teacher_class", ["teacher_id", "class_id"], sorted({(tid, cid) for (cid, _), tid in teacher_of.items()}))
+
+        # Exams and their questions; marks are mostly 1 with some 2-mark items
+        exams = []
+        for (cid, sid), tid in sorted(teacher_of.items()):
+            for e in range(p.exams_per_subject):
+                published = rng.random() < p.published_fraction
+                days_ago = 7 + 30 * (p.exams_per_subject - e) + rng.random() * 10
+                exams.append((len(exams) + 1, cid, sid, tid, published, days_ago))
+        title = {sid: name for name, sid in subject_id.items()}
+        self.insert("exams", ["id", "title", "description", "duration_minutes", "published", "created_by", "class_id", "subject_id", "created_at"], (
+            (eid, f"{title[sid]}: {EXAM_TITLES[n % len(EXAM_TITLES)]}", None, rng.choice([30, 40, 45, 60]), int(published), tid, cid, sid, self.stamp(days_ago + 3))
+            for n, (eid, cid, sid, tid, published, days_ago) in enumerate(exams)
+        ))
+
+        # Questions: (question_id, correct_answer, marks) per exam, kept for grading results
+        paper: Dict[int, List[Tuple[int, int, int]]] = {}
+        next_qid = 1
+        for eid, *_ in exams:
+            items = []
+            for _ in range(p.questions):
+                items.append((next_qid, rng.randrange(4), 2 if rng.random() < 0.1 else 1))
+                next_qid += 1
+            paper[eid] = items
+        self.insert("questions", ["id", "exam_id", "text", "options", "correct_answer", "marks", "created_by"], (
+            (qid, eid, f"Question {n + 1} of exam {eid}", '["A", "B", "C", "D"]', correct, marks, exams[eid - 1][3])
+            for eid, items in paper.items()
+            for n, (qid, correct, marks) in enumerate(items)
+        ))
+
+        # Results for published exams. P(correct) = ability - difficulty, clamped
+        ability = {uid: min(0.97, max(0.15, rng.gauss(0.62, 0.14))) for uid in student_level}
+        roster: Dict[int, List[int]] = {}
+        for n in range(n_students):
+            roster.setdefault(classes[n // p.students_per_class][0], []).append(first_student + n)
+
+        def results():
+            rid = 0
+            for eid, cid, _, _, published, days_ago in exams:
+                if not published:
+                    continue
+                difficulty = rng.gauss(0.0, 0.08)
+                items = paper[eid]
+                max_score = float(sum(marks for _, _, marks in items))
+                for uid in roster[cid]:
+                    if rng.random() >= p.sat_fraction:
+                        continue
+                    chance = min(0.98, max(0.05, ability[uid] - difficulty))
+                    score, parts = 0, []
+                    for qid, correct, marks in items:
+                        if rng.random() < chance:
+                            answer = correct
+                            score += marks
+                        else:
+                            answer = (correct + rng.randrange(1, 4)) % 4
+                        parts.append(f'{{"question_id": {qid}, "answer_index": {answer}}}')
+                    rid += 1
+                    yield (rid, uid, eid, "[" + ", ".join(parts) + "]", float(score), max_score, self.stamp(days_ago - rng.random()))
+
+        self.insert("results", ["id", "student_id", "exam_id", "answers", "score", "max_score", "taken_at"], results())
+        return self.counts
+
+
+def generate(database_url: str, profile: Profile, seed: int = 0, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """Create the schema in an empty database and fill it; returns rows per table."""
+    from sqlalchemy import create_engine, text
+
+    from sqlalchemy.engine import make_url
+
+    from .core.db import Base, import_models
+    from .core.migrations import upgrade
+    from .core.security import hash_password
+    from .services.duplicate_service import index_missing
+
+    import_models()
+    engine = create_engine(database_url)
+    try:
+        Base.metadata.create_all(bind=engine)
+        upgrade(engine, lock_path=f"{os.path.abspath(make_url(database_url).database)}.migrations.lock")
+        with engine.connect() as conn:
+            if conn.execute(text("SELECT 1 FROM users LIMIT 1")).first() is not None:
+                raise SystemExit("Refusing to generate into a database that already has users; use a new --db file")
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+            hashes = {"student": hash_password(STUDENT_PASSWORD), "teacher": hash_password(TEACHER_PASSWORD), "admin": hash_password(ADMIN_PASSWORD)}
+            counts = Generator(conn, profile, seed=seed, batch_size=batch_size).generate(hashes)
+            conn.commit()
+            # The app fingerprints every question it writes (duplicate detection)
+            counts["question_fingerprints"] = index_missing(conn, chunk_size=batch_size)
+            conn.exec_driver_sql("PRAGMA synchronous = FULL")
+            conn.exec_driver_sql("ANALYZE")
+        return counts
+    finally:
+        engine.dispose()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", required=True, help="SQLite file to create")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="small")
+    parser.add_argument("--arms", type=int, help="classes per level")
+    parser.add_argument("--students-per-class", type=int)
+    parser.add_argument("--exams-per-subject", type=int)
+    parser.add_argument("--questions", type=int, help="questions per exam")
+    parser.add_argument("--passport-kb", type=int, help="size of each passport photo")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print row counts as JSON")
+    args = parser.parse_args(argv)
+
+    overrides = {
+        field: getattr(args, field)
+        for field in ("arms", "students_per_class", "exams_per_subject", "questions", "passport_kb")
+        if getattr(args, field) is not None
+    }
+    profile = replace(PROFILES[args.profile], **overrides)
+    started = time.perf_counter()
+    counts = generate(f"sqlite:///{os.path.abspath(args.db)}", profile, seed=args.seed)
+    seconds = time.perf_counter() - started
+
+    if args.json:
+        print(json.dumps({"profile": args.profile, "seconds": seconds, "rows": counts}, indent=2))
+        return 0
+    for table, rows in counts.items():
+        print(f"  {table:<18} {rows:>10,}")
+    total = sum(counts.values())
+    print(f"{total:,} rows in {seconds:.1f}s ({total / seconds:,.0f} rows/s) -> {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+"""
+Exam-day load test: can this box take the whole school sitting at once?
+
+    python -m app.loadtest [--students N] [--classes K] [--questions Q]
+                           [--curve burst|linear|poisson] [--ramp SECONDS]
+                           [--think SECONDS] [--target inprocess|launch|URL]
+                           [--workers W] [--db PATH] [--no-seed] [--json]
+
+Seeds a synthetic school into a scratch SQLite database (K classes with one
+published exam of Q questions each, N students spread over them), then lets
+the students arrive along the chosen curve over --ramp seconds:
+
+    burst    everyone at once
+    linear   evenly spread
+    poisson  random arrivals at an even average rate (seeded)
+
+Every virtual student signs in with their registration number, lists their
+exams, fetches the paper, spends --think seconds on average answering, and
+submits. Per step the report gives request counts, errors and p50/p95/p99
+latency, plus overall throughput and the database contention the server
+logged: "database is locked" errors and connection-pool timeouts.
+
+Targets: `inprocess` (default) drives app.main over ASGI in this process,
+which measures the application without network or worker effects;
+`launch` starts `python -m app.server` on a free local port with --workers
+workers; anything else is the base URL of a server that is already running
+against the --db database (seeded by this command, or, with --no-seed,
+by an earlier run or by app.datagen). Auth rate limits are switched off in the first
+two, since every virtual student comes from one address; lock errors can
+only be counted there too, as they come from the server's log.
+
+Needs httpx (already required by the test suite).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import math
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+STEPS = ["login", "list_exams", "questions", "submit"]
+DEFAULT_PASSWORD = "exam-day-2024"
+# Logged text that marks database contention, by report key
+DB_ERRORS = {"lock_errors": "database is locked", "pool_timeouts": "QueuePool limit"}
+
+
+class StepFailed(Exception):
+    pass
+
+
+def registration_number(i: int) -> str:
+    # Slot order, as the allocator and app.datagen hand them out
+    from .services.registration_allocator import DEFAULT_PREFIX, slot_to_number
+
+    return slot_to_number(DEFAULT_PREFIX, i)
+
+
+def seed_school(db, students: int, classes: int = 10, questions: int = 40, password: str = DEFAULT_PASSWORD) -> List[str]:
+    """Seed an empty database and return the students' registration numbers.
+
+    Every student shares one password hash, so seeding costs one Argon2 hash
+    however large the school; logins still pay the full verification cost.
+    """
+    from sqlalchemy import insert
+
+    from .core.security import hash_password
+    from .models.exam import Exam
+    from .models.question import Question
+    from .models.subject import Class, Subject, student_class_association
+    from .models.user import User
+
+    if db.query(User.id).first() is not None:
+        raise SystemExit("Refusing to seed a database that already has users; point --db at a new file")
+
+    admin = User(full_name="Load Test Admin", email="loadtest-admin@example.com", hashed_password=hash_password(password), role="admin")
+    subject = Subject(name="Mathematics", code="MAT")
+    class_rows = [Class(name=f"LOAD{c + 1:03d}", level="JSS1") for c in range(classes)]
+    db.add_all([admin, subject, *class_rows])
+    db.commit()
+    exams = [
+        Exam(title=f"Mathematics {c.name}", created_by=admin.id, class_id=c.id, subject_id=subject.id, published=True, duration_minutes=60)
+        for c in class_rows
+    ]
+    db.add_all(exams)
+    db.commit()
+
+    db.execute(insert(Question), [
+        {
+            "exam_id": exam.id,
+            "text": f"Question {n + 1}: what is {n} + {n}?",
+            "options": [str(2 * n + d) for d in (-1, 0, 1, 2)],
+            "correct_answer": 1,
+            "marks": 1,
+            "created_by": admin.id,
+        }
+        for exam in exams
+        for n in range(questions)
+    ])
+
+    hashed = admin.hashed_password
+    regs = [registration_number(i) for i in range(students)]
+    batch = 1000
+    for start in range(0, students, batch):
+        chunk = regs[start:start + batch]
+        ids = db.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), [
+            {
+                "full_name": f"Student {start + n + 1}",
+                "email": f"student{start + n + 1}@loadtest.example.com",
+                "hashed_password": hashed,
+                "role": "student",
+                "student_class": "JSS1",
+                "registration_number": reg,
+            }
+            for n, reg in enumerate(chunk)
+        ]).all()
+        db.execute(student_class_association.insert(), [
+            {"student_id": student_id, "class_id": class_rows[(start + n) % classes].id}
+            for n, student_id in enumerate(ids)
+        ])
+    db.commit()
+    return regs
+
+
+def arrival_offsets(n: int, curve: str, ramp: float, seed: int = 0) -> List[float]:
+    """Seconds after the start at which each of `n` students arrives."""
+    if curve == "burst" or ramp <= 0 or n == 0:
+        return [0.0] * n
+    if curve == "linear":
+        return [ramp * i / n for i in range(n)]
+    if curve == "poisson":
+        rng = random.Random(seed)
+        offsets, t = [], 0.0
+        for _ in range(n):
+            t += rng.expovariate(n / ramp)
+            offsets.append(min(t, ramp))
+        return offsets
+    raise ValueError(f"Unknown arrival curve: {curve}")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def count_db_errors(log_text: str) -> Dict[str, int]:
+    return {key: log_text.count(marker) for key, marker in DB_ERRORS.items()}
+
+
+class DBErrorCounter(logging.Handler):
+    """Counts logged database contention errors (in-process target)."""
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.counts = dict.fromkeys(DB_ERRORS, 0)
+
+    def emit(self, record):
+        text = record.getMessage()
+        if record.exc_info and record.exc_info[1] is not None:
+            text += str(record.exc_info[1])
+        for key, marker in DB_ERRORS.items():
+            # one per failed request, however often the message repeats it
+            self.counts[key] += marker in text
+
+
+async def sit_exam(client, reg: str, password: str, start_at: float, think: float, rng: random.Random, samples: list) -> bool:
+    loop = asyncio.get_running_loop()
+    await asyncio.sleep(max(0.0, start_at - loop.time()))
+
+    async def step(name, method, url, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception as exc:
+            samples.append((name, time.perf_counter() - started, type(exc).__name__))
+            raise StepFailed(name)
+        samples.append((name, time.perf_counter() - started, response.status_code))
+        if response.status_code >= 400:
+            raise StepFailed(name)
+        return response.json()
+
+    try:
+        tokens = await step("login", "POST", "/api/auth/login", json={"email": reg, "password": password})
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        exams = await step("list_exams", "GET", "/api/exams/", headers=headers)
+        if not exams:
+            samples.append(("list_exams", 0.0, "no exams"))
+            return False
+        exam_id = exams[0]["id"]
+        paper = await step("questions", "GET", f"/api/exams/{exam_id}/questions", headers=headers)
+        if think > 0:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+        answers = [{"question_id": q["id"], "answer_index": rng.randrange(len(q["options"]))} for q in paper]
+        await step("submit", "POST", "/api/results/submit", json={"exam_id": exam_id, "answers": answers}, headers=headers)
+        return True
+    except StepFailed:
+        return False
+
+
+async def drive(client, regs: List[str], password: str, offsets: List[float], think: float, seed: int) -> dict:
+    samples: list = []
+    loop = asyncio.get_running_loop()
+    start = loop.time() + 0.1
+    wall = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        sit_exam(client, reg, password, start + offset, think, random.Random(seed + i), samples)
+        for i, (reg, offset) in enumerate(zip(regs, offsets))
+    ))
+    return {"samples": samples, "completed": sum(outcomes), "seconds": time.perf_counter() - wall}
+
+
+def summarize(run: dict, students: int, db_errors: Optional[Dict[str, int]]) -> dict:
+    by_step: Dict[str, list] = defaultdict(list)
+    errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for name, seconds, status in run["samples"]:
+        if isinstance(status, int) and status < 400:
+            by_step[name].append(seconds)
+        else:
+            errors[name][str(status)] += 1
+    steps = {}
+    for name in STEPS:
+        ok = sorted(by_step[name])
+        steps[name] = {
+            "ok": len(ok),
+            "errors": dict(errors[name]),
+            "p50_ms": percentile(ok, 50) * 1000,
+            "p95_ms": percentile(ok, 95) * 1000,
+            "p99_ms": percentile(ok, 99) * 1000,
+        }
+    seconds = run["seconds"]
+    return {
+        "students": students,
+        "completed": run["completed"],
+        "failed": students - run["completed"],
+        "seconds": seconds,
+        "requests_per_second": len(run["samples"]) / seconds if seconds else 0.0,
+        "submissions_per_second": steps["submit"]["ok"] / seconds if seconds else 0.0,
+        "db_errors": db_errors,
+        "steps": steps,
+    }
+
+
+def print_report(report: dict, label: str) -> None:
+    print(f"{label}: {report['completed']}/{report['students']} students submitted in {report['seconds']:.1f}s")
+    print(f"Throughput: {report['requests_per_second']:.1f} req/s, {report['submissions_per_second']:.1f} submissions/s")
+    print(f"\n{'step':<12}{'ok':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}  error statuses")
+    for name, s in report["steps"].items():
+        failed = sum(s["errors"].values())
+        detail = ", ".join(f"{k}x{v}" for k, v in sorted(s["errors"].items()))
+        print(f"{name:<12}{s['ok']:>8}{failed:>8}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}{s['p99_ms']:>10.1f}  {detail}")
+    if report["db_errors"] is None:
+        print("\nDB errors: not counted (server log not available)")
+    else:
+        print(f"\nDB lock errors: {report['db_errors']['lock_errors']}, connection pool timeouts: {report['db_errors']['pool_timeouts']}")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def launch_server(env: dict, workers: int, log_path: str, timeout: float = 120) -> tuple:
+    """Start `python -m app.server` and wait until every worker is up; returns (process, url)."""
+    port = _free_port()
+    ready_file = log_path + ".ready"
+    env = dict(env, SERVER_PORT=str(port), SERVER_WORKERS=str(workers), SERVER_READY_FILE=ready_file, SERVER_LOG_LEVEL="warning")
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    log = open(log_path, "w")
+    proc = subprocess.Popen([sys.executable, "-m", "app.server"], cwd=backend_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + timeout
+    while not os.path.exists(ready_file):
+        if proc.poll() is not None or time.monotonic() > deadline:
+            proc.kill()
+            raise SystemExit(f"Server did not start; see {log_path}")
+        time.sleep(0.2)
+    return proc, f"http://127.0.0.1:{port}"
+
+
+async def run(args, regs: List[str]) -> dict:
+    import httpx
+
+    offsets = arrival_offsets(len(regs), args.curve, args.ramp, args.random_seed)
+    timeout = httpx.Timeout(args.timeout)
+    if args.target == "inprocess":
+        # app.main prints while importing; keep stdout clean for --json
+        with contextlib.redirect_stdout(sys.stderr):
+            from .main import app
+
+        counter = DBErrorCounter()
+        logging.getLogger().addHandler(counter)
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout) as client:
+                result = await drive(client, regs, args.password, offsets, args.think, args.random_seed)
+        finally:
+            logging.getLogger().removeHandler(counter)
+        return summarize(result, len(regs), counter.counts)
+
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=timeout) as client:
+        result = await drive(client, regs, args.password, offsets, args.think, args.random_seed)
+    db_errors = None
+    if args.server_log and os.path.exists(args.server_log):
+        with open(args.server_log, errors="replace") as f:
+            # The last line of each traceback names the exception once per failure
+            db_errors = count_db_errors("\n".join(line for line in f if line.startswith("sqlalchemy.exc.")))
+    return summarize(result, len(regs), db_errors)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--questions", type=int, default=40, help="questions per exam")
+    parser.add_argument("--curve", choices=["burst", "linear", "poisson"], default="linear")
+    parser.add_argument("--ramp", type=float, default=30, help="seconds over which students arrive")
+    parser.add_argument("--think", type=float, default=0, help="mean seconds between fetching the paper and submitting")
+    parser.add_argument("--target", default="inprocess", help="inprocess, launch, or the base URL of a running server")
+    parser.add_argument("--workers", type=int, default=0, help="server workers for --target launch (0 = one per CPU)")
+    parser.add_argument("--db", default=None, help="SQLite file to seed (default: a new scratch file)")
+    parser.add_argument("--password", default=DEFAULT_PASSWORD)
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout in seconds")
+    parser.add_argument("--no-seed", action="store_true", help="use students seeded by an earlier run")
+    parser.add_argument("--random-seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    scratch = tempfile.mkdtemp(prefix="cbt-loadtest-")
+    db_path = os.path.abspath(args.db or os.path.join(scratch, "loadtest.db"))
+    # Settings are read at import time, so configure before importing the app
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}", MIGRATION_LOCK_FILE=os.path.join(scratch, "migrations.lock"))
+    if args.target in ("inprocess", "launch"):
+        env["RATE_LIMIT_ENABLED"] = "false"
+    os.environ.update(env)
+
+    from .core.db import SessionLocal, init_db
+
+    init_db()
+    db = SessionLocal()
+    try:
+        if not args.no_seed:
+            started = time.perf_counter()
+            regs = seed_school(db, args.students, args.classes, args.questions, args.password)
+            if not args.json:
+                print(f"Seeded {args.students} students, {args.classes} exams in {time.perf_counter() - started:.1f}s ({db_path})")
+        else:
+            regs = [registration_number(i) for i in range(args.students)]
+    finally:
+        db.close()
+
+    proc = None
+    args.url, args.server_log = args.target, None
+    if args.target == "launch":
+        args.server_log = os.path.join(scratch, "server.log")
+        proc, args.url = launch_server(env, args.workers, args.server_log)
+    try:
+        report = asyncio.run(run(args, regs))
+    finally:
+        if proc is not None:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=60)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report, f"{args.curve} arrivals over {args.ramp:g}s, target {args.target}")
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
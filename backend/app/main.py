@@ -1,20 +1,68 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from app.core.db import Base, engine
-from app.api import auth, exams, questions, results, users, classes
+from app.core.db import init_db
+from app.core.config import settings
+from app.core.rate_limit import AuthRateLimitMiddleware, auth_rate_limit_rules, build_store
+from app.core.static_files import UPLOAD_DIR, UploadStaticFiles
+from app.core.edge import EdgeReadOnlyMiddleware
+from app.services.edge_service import start_edge_sync
+from app.services.backup_service import BackupScheduler
+from app.core.metrics import metrics
+from app.core.security import shutdown_hash_pool
+from app.api import auth, bank, exams, questions, results, users, classes, edge, dashboard
 import logging
 import os
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 import traceback
 
+# --------------------
+# Lifespan: startup/shutdown
+# --------------------
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logging.info("Starting School CBT backend")
+    # Schema check runs here rather than at import time, so importing
+    # app.main (tests, scripts, the launcher's preload) stays cheap
+    init_db()
+    edge_sync = None
+    if settings.EDGE_MODE:
+        edge_sync = start_edge_sync()
+    backups = None
+    if settings.BACKUP_INTERVAL_MINUTES > 0:
+        backups = BackupScheduler(settings.BACKUP_INTERVAL_MINUTES * 60).start()
+    yield
+    if edge_sync is not None:
+        edge_sync.stop()
+    if backups is not None:
+        backups.stop()
+    shutdown_hash_pool()
+
+
 # FastAPI app
-app = FastAPI(title="School CBT System - Backend")
+app = FastAPI(title="School CBT System - Backend", lifespan=lifespan)
 
 # Development CORS origins (used for both middleware and error responses)
 DEV_CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
+# --------------------
+# Edge mode
+# --------------------
+# A lab edge node mirrors the central server, so only sign-in and answer
+# submission may write (see app/services/edge_service.py)
+if settings.EDGE_MODE:
+    app.add_middleware(EdgeReadOnlyMiddleware)
+
+# --------------------
+# Auth rate limiting
+# --------------------
+# Runs before routing, so a throttled login costs a bucket lookup rather
+# than an Argon2 hash. Registered before CORS so 429s still carry CORS
+# headers the browser can read.
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(AuthRateLimitMiddleware, store=build_store(), rules=auth_rate_limit_rules())
+
 # --------------------
 # CORS configuration
 # --------------------
@@ -31,19 +79,15 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# --------------------
-# Database tables
-# --------------------
-Base.metadata.create_all(bind=engine)
-
 # --------------------
 # Static files for uploads
 # --------------------
+# Content-hash names are served as immutable; .gz/.br sidecars are picked
+# by Accept-Encoding (see app/core/static_files.py)
 try:
-    upload_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "uploads")
-    os.makedirs(upload_dir, exist_ok=True)
-    app.mount("/uploads", StaticFiles(directory=upload_dir), name="uploads")
-    print(f"Mounted uploads at {upload_dir}")
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    app.mount("/uploads", UploadStaticFiles(directory=UPLOAD_DIR), name="uploads")
+    print(f"Mounted uploads at {UPLOAD_DIR}")
 except Exception as e:
     print(f"WARNING: Failed to mount uploads: {e}")
 
@@ -60,9 +104,19 @@ def health_check():
 app.include_router(auth.router, prefix="/api")
 app.include_router(exams.router, prefix="/api")
 app.include_router(questions.router, prefix="/api")
+app.include_router(bank.router, prefix="/api")
 app.include_router(results.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
 app.include_router(users.router, prefix="/api")
 app.include_router(classes.router, prefix="/api")
+app.include_router(edge.router, prefix="/api")
+
+# --------------------
+# Metrics (Prometheus text format, per worker process)
+# --------------------
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 # --------------------
 # Root endpoint
@@ -71,14 +125,6 @@ app.include_router(classes.router, prefix="/api")
 def root():
     return {"message": "School CBT Backend is running. Use /api/... endpoints."}
 
-# --------------------
-# Startup logging
-# --------------------
-@app.on_event("startup")
-def startup_event():
-    logging.info("Starting School CBT backend")
-
-
 @app.exception_handler(Exception)
 async def all_exceptions_handler(request: Request, exc: Exception):
     # Log full traceback to server logs for easier debugging of 500 errors
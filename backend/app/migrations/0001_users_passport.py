@@ -0,0 +1,5 @@
+"""Add users.passport to databases created before passport photos."""
+
+
+def upgrade(ctx):
+    ctx.add_column("users", "passport", "VARCHAR")
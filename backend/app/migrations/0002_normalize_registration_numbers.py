@@ -0,0 +1,29 @@
+"""Rewrite legacy registration numbers NG/EEV/1234/A as NG/EEV/1234A."""
+
+import re
+
+LEGACY = re.compile(r"^([A-Z]+)/([A-Z]+)/(\d{4})/([A-Z])$", re.IGNORECASE)
+
+
+def upgrade(ctx):
+    taken = {row[0] for row in ctx.execute("SELECT registration_number FROM users WHERE registration_number IS NOT NULL")}
+
+    def normalize(row):
+        user_id, reg = row
+        m = LEGACY.match(reg)
+        if not m:
+            return None
+        new = "{}/{}/{}{}".format(*m.groups()).upper()
+        if new in taken:
+            # Leave both for an admin to resolve rather than break uniqueness
+            return None
+        taken.add(new)
+        return {"id": user_id, "reg": new}
+
+    ctx.backfill(
+        "SELECT id, registration_number FROM users"
+        " WHERE id > :after AND registration_number LIKE '%/%/%/%'"
+        " ORDER BY id LIMIT :limit",
+        "UPDATE users SET registration_number = :reg WHERE id = :id",
+        normalize,
+    )
@@ -0,0 +1,5 @@
+"""Add model columns missing from tables created by older releases."""
+
+
+def upgrade(ctx):
+    ctx.add_missing_columns()
@@ -0,0 +1,8 @@
+"""Index the columns exam listing, results, questions and teacher access filter on."""
+
+TABLES = ["exams", "questions", "results", "teacher_subjects", "users"]
+
+
+def upgrade(ctx):
+    for table in TABLES:
+        ctx.create_model_indexes(table)
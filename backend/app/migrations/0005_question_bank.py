@@ -0,0 +1,16 @@
+"""Link exam questions to the question bank and build its full-text index."""
+
+from app.models.question_bank import FTS_DDL, FTS_TABLE
+
+
+def upgrade(ctx):
+    # bank_questions itself comes from create_all, which runs first
+    ctx.add_missing_columns(["questions"])
+    ctx.create_model_indexes("questions")
+    ctx.create_model_indexes("bank_questions")
+    if ctx.conn.dialect.name != "sqlite":
+        return
+    for statement in FTS_DDL:
+        ctx.execute(statement)
+    # Index any rows written before the triggers existed
+    ctx.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
@@ -0,0 +1,10 @@
+"""Fingerprint existing questions for near-duplicate detection on import."""
+
+from app.core.config import settings
+from app.services import duplicate_service
+
+
+def upgrade(ctx):
+    # The tables come from create_all; this fills them, committing per chunk
+    # like ctx.backfill, so a run cut short carries on where it stopped
+    duplicate_service.index_missing(ctx.conn, chunk_size=settings.MIGRATION_BACKFILL_CHUNK_SIZE)
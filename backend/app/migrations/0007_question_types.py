@@ -0,0 +1,6 @@
+"""Add question types, their answer keys and negative marking to questions."""
+
+
+def upgrade(ctx):
+    # Existing questions become single choice, with no negative marking
+    ctx.add_missing_columns(["questions"])
@@ -0,0 +1,5 @@
+"""Index results for the teacher dashboard's per-exam aggregates."""
+
+
+def upgrade(ctx):
+    ctx.create_model_indexes("results")
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
+from sqlalchemy.sql import func
+from ..core.db import Base
+
+
+class EdgeOutbox(Base):
+    """An attempt submitted to an edge node, waiting to be forwarded upstream.
+
+    Written in the same transaction as the local Result, so an attempt is
+    never graded locally without also being queued for the central server.
+    """
+    __tablename__ = "edge_outbox"
+    id = Column(Integer, primary_key=True)
+    idempotency_key = Column(String(128), nullable=False, unique=True)
+    # {"student_id", "exam_id", "answers", "taken_at"} as sent to /api/edge/results
+    payload = Column(JSON, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    # Set once the central server has rejected the attempt; it is then kept
+    # for an administrator to look at instead of being retried
+    failed_reason = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class EdgeState(Base):
+    """Small key/value facts an edge node keeps about its sync, such as the
+    version of the last snapshot it applied."""
+    __tablename__ = "edge_state"
+    key = Column(String(64), primary_key=True)
+    value = Column(Text, nullable=True)
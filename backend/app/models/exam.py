@@ -1,17 +1,22 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.db import Base
 
 class Exam(Base):
     __tablename__ = "exams"
+    # list_exams filters by class (students), class + subject (teachers)
+    # and published (everyone but admins browsing drafts)
+    __table_args__ = (
+        Index("ix_exams_class_id_subject_id_published", "class_id", "subject_id", "published"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     duration_minutes = Column(Integer, default=30)
-    published = Column(Boolean, default=False)
-    created_by = Column(Integer, ForeignKey("users.id"))
+    published = Column(Boolean, default=False, index=True)
+    created_by = Column(Integer, ForeignKey("users.id"), index=True)
     class_id = Column(Integer, ForeignKey("classes.id"), nullable=True)
     subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -26,3 +31,26 @@ class Exam(Base):
         back_populates="exam",
         cascade="all, delete-orphan"
     )
+
+    variants = relationship(
+        "ExamVariant",
+        back_populates="exam",
+        cascade="all, delete-orphan"
+    )
+
+
+class ExamVariant(Base):
+    """One student's paper of an exam assembled with per-student variants
+    (see services/assembly_service.py): their questions, in their order."""
+    __tablename__ = "exam_variants"
+    __table_args__ = (
+        Index("ix_exam_variants_exam_id_student_id", "exam_id", "student_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False)
+    student_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    paper_number = Column(Integer, nullable=False)
+    question_ids = Column(JSON, nullable=False)
+
+    exam = relationship("Exam", back_populates="variants")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, JSON
+from sqlalchemy import Column, Float, Integer, String, Text, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from ..core.db import Base
 
@@ -6,13 +6,21 @@ class Question(Base):
     __tablename__ = "questions"
 
     id = Column(Integer, primary_key=True, index=True)
-    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False)
+    exam_id = Column(Integer, ForeignKey("exams.id", ondelete="CASCADE"), nullable=False, index=True)
     text = Column(Text, nullable=False)
     options = Column(JSON, nullable=False)
     correct_answer = Column(Integer, nullable=False)
     marks = Column(Integer, default=1)
+    # One of services/grading_service.QUESTION_TYPES. Types other than
+    # single choice keep their key in answer_key (correct_answer then holds
+    # 0, or the first correct option of a multi-select)
+    question_type = Column(String, nullable=False, default="single_choice", server_default="single_choice")
+    answer_key = Column(JSON, nullable=True)
+    negative_marks = Column(Float, nullable=False, default=0, server_default="0")  # taken off for a wrong answer
     image_url = Column(String, nullable=True)
     created_by = Column(Integer, ForeignKey("users.id"))
+    # Set when the question was attached from the question bank
+    bank_question_id = Column(Integer, ForeignKey("bank_questions.id", ondelete="SET NULL"), nullable=True, index=True)
 
     exam = relationship("Exam", back_populates="questions")
     creator = relationship("User", backref="questions_created")
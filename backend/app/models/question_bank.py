@@ -0,0 +1,58 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, DDL, event
+from sqlalchemy.sql import func
+from ..core.db import Base
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+class BankQuestion(Base):
+    """A reusable question, tagged for search (see services/question_bank_service.py).
+
+    Exams link to bank items through `questions.bank_question_id`.
+    """
+    __tablename__ = "bank_questions"
+    # Browsing narrows by subject, then level, topic and difficulty
+    __table_args__ = (
+        Index("ix_bank_questions_subject_id_level_topic_difficulty", "subject_id", "level", "topic", "difficulty"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=False)
+    level = Column(String, nullable=False)  # JSS1, SS2, ... as on classes.level
+    topic = Column(String, nullable=True)
+    difficulty = Column(String, nullable=False, default="medium")  # one of DIFFICULTIES
+    text = Column(Text, nullable=False)
+    options = Column(JSON, nullable=False)
+    correct_answer = Column(Integer, nullable=False)
+    marks = Column(Integer, default=1)
+    image_url = Column(String, nullable=True)
+    created_by = Column(Integer, ForeignKey("users.id"), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+# Full-text index over the bank. External content: the FTS table stores only
+# the index and reads text back from bank_questions, and the triggers keep
+# the two in step. unicode61 with remove_diacritics folds "Ọ̀rọ̀" to "oro";
+# the prefix indexes make the last, half-typed search term cheap.
+FTS_TABLE = "bank_questions_fts"
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        text, topic, options,
+        content='bank_questions', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS bank_questions_fts_ai AFTER INSERT ON bank_questions BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text, topic, options) VALUES (new.id, new.text, new.topic, new.options);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS bank_questions_fts_ad AFTER DELETE ON bank_questions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text, topic, options) VALUES ('delete', old.id, old.text, old.topic, old.options);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS bank_questions_fts_au AFTER UPDATE OF text, topic, options ON bank_questions BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text, topic, options) VALUES ('delete', old.id, old.text, old.topic, old.options);
+        INSERT INTO {FTS_TABLE}(rowid, text, topic, options) VALUES (new.id, new.text, new.topic, new.options);
+    END""",
+]
+
+for _statement in FTS_DDL:
+    event.listen(BankQuestion.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
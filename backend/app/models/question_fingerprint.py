@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, BigInteger, LargeBinary, ForeignKey, Index
+from ..core.db import Base
+
+
+class QuestionFingerprint(Base):
+    """MinHash signature of a question (see services/duplicate_service.py)."""
+    __tablename__ = "question_fingerprints"
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), primary_key=True)
+    # The exam's subject when the question was indexed; NULL for exams without one
+    subject_id = Column(Integer, nullable=True)
+    signature = Column(LargeBinary, nullable=False)
+
+
+class QuestionLSHBucket(Base):
+    """One LSH band of a question's signature, hashed; equal buckets mean a likely near-duplicate."""
+    __tablename__ = "question_lsh_buckets"
+    # Lookups are "which questions of this subject share any of these
+    # buckets"; with question_id in the index they never touch the table
+    __table_args__ = (
+        Index("ix_question_lsh_buckets_subject_id_bucket_question_id", "subject_id", "bucket", "question_id"),
+    )
+    id = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id", ondelete="CASCADE"), nullable=False, index=True)
+    subject_id = Column(Integer, nullable=True)
+    bucket = Column(BigInteger, nullable=False)
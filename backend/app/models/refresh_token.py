@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, LargeBinary, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from ..core.db import Base
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    # id of the first token in a rotation chain; reuse of a rotated token
+    # revokes the whole family
+    family_id = Column(Integer, nullable=True, index=True)
+    # SHA-256 of the secret part; the secret itself is never stored
+    token_hash = Column(LargeBinary(32), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    rotated_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, JSON
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, JSON, String, Index
 from sqlalchemy.sql import func
 from ..core.db import Base
 
 class Result(Base):
     __tablename__ = "results"
+    __table_args__ = (
+        Index("ix_results_exam_id_student_id", "exam_id", "student_id"),
+        Index("ix_results_student_id_exam_id", "student_id", "exam_id"),
+        # Covers the per-exam submission count, mean score and last
+        # submission time of the teacher dashboard
+        Index("ix_results_exam_id_taken_at_score", "exam_id", "taken_at", "score"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("users.id"))
     exam_id = Column(Integer, ForeignKey("exams.id"))
@@ -12,3 +19,17 @@ class Result(Base):
     score = Column(Float, default=0.0)
     max_score = Column(Float, default=0.0)
     taken_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class ResultSyncReceipt(Base):
+    """Idempotency key of an attempt uploaded through /results/sync.
+
+    The row is claimed before the result is written, so a batch that is
+    re-sent (or sent twice at once) records each attempt only once.
+    """
+    __tablename__ = "result_sync_receipts"
+    idempotency_key = Column(String(128), primary_key=True)
+    result_id = Column(Integer, ForeignKey("results.id", ondelete="CASCADE"), nullable=True)
+    student_id = Column(Integer, nullable=False)
+    exam_id = Column(Integer, nullable=False)
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
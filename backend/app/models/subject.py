@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..core.db import Base
@@ -88,6 +88,9 @@ class StudentSubject(Base):
 
 class TeacherSubject(Base):
     __tablename__ = "teacher_subjects"
+    __table_args__ = (
+        Index("ix_teacher_subjects_teacher_id_class_id_subject_id", "teacher_id", "class_id", "subject_id"),
+    )
     id = Column(Integer, primary_key=True, index=True)
     teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     subject_id = Column(Integer, ForeignKey("subjects.id"), nullable=False)
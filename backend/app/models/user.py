@@ -8,10 +8,24 @@ class User(Base):
     full_name = Column(String, nullable=False)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
-    role = Column(String, default="student")  # admin | teacher | student
+    role = Column(String, default="student", index=True)  # admin | teacher | student
     student_class = Column(String, nullable=True)  # e.g., "JSS1", "SS2"
     registration_number = Column(String, nullable=True, unique=True)
     # URL or path to the user's passport/photo image
     passport = Column(String, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class RegistrationBlock(Base):
+    """A range of registration-number slots reserved by one allocator.
+
+    Each server worker claims whole blocks so it can hand out numbers from
+    them without coordinating with other workers. `block_no` indexes a run
+    of `REG_BLOCK_SIZE` slots in the NNNNL space (see registration_allocator).
+    """
+    __tablename__ = "registration_blocks"
+    prefix = Column(String, primary_key=True)
+    block_no = Column(Integer, primary_key=True)
+    owner = Column(String, nullable=False)
+    claimed_at = Column(DateTime(timezone=True), server_default=func.now())
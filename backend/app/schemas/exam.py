@@ -1,5 +1,6 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional
 
 class ExamCreate(BaseModel):
     title: str
@@ -27,3 +28,26 @@ class ExamOut(BaseModel):
     created_by: int
     class_id: Optional[int] = None
     subject_id: Optional[int] = None
+
+class ExamClone(BaseModel):
+    # One copy per class; without class_ids, a single copy for the source's class
+    class_ids: Optional[List[int]] = Field(default=None, min_length=1, max_length=100)
+    subject_id: Optional[int] = None
+    title: Optional[str] = None
+
+class ExamCloneItem(ExamClone):
+    exam_id: int
+
+class ExamCloneBatch(BaseModel):
+    items: List[ExamCloneItem] = Field(min_length=1, max_length=1000)
+
+class DashboardExam(BaseModel):
+    id: int
+    title: str
+    published: bool
+    class_id: Optional[int] = None
+    subject_id: Optional[int] = None
+    question_count: int
+    submission_count: int
+    mean_score: Optional[float] = None  # null until the first submission
+    last_submission_at: Optional[datetime] = None
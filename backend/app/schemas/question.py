@@ -1,12 +1,19 @@
 from pydantic import BaseModel, ConfigDict, Field
-from typing import List, Optional
+from typing import Any, List, Literal, Optional
+
+# The types registered in services/grading_service.py
+QuestionType = Literal["single_choice", "multi_select", "numeric", "short_text", "true_false"]
 
 class QuestionCreate(BaseModel):
     exam_id: Optional[int] = None
     text: str
-    options: List[str] = Field(min_length=2)
-    correct_answer: int  # index in options list, 0-based
+    question_type: QuestionType = "single_choice"
+    options: List[str] = Field(default_factory=list)  # at least two for the choice types
+    correct_answer: Optional[int] = None  # index in options list, 0-based (choice types)
+    # multi_select: [indices]; numeric: {"value": 3.5, "tolerance": 0.05}; short_text: [accepted answers]
+    answer_key: Optional[Any] = None
     marks: Optional[int] = 1
+    negative_marks: float = Field(default=0, ge=0)  # taken off for a wrong answer
     image_url: Optional[str] = None  # URL to question image
 
 class QuestionOut(BaseModel):
@@ -18,12 +25,36 @@ class QuestionOut(BaseModel):
     correct_answer: int
     options: List[str]
     marks: int
+    question_type: str = "single_choice"
+    answer_key: Optional[Any] = None
+    negative_marks: float = 0
+    image_url: Optional[str] = None
+    bank_question_id: Optional[int] = None  # set when attached from the question bank
+
+
+class QuestionPaperOut(BaseModel):
+    """A question as a student sits it: no correct_answer or answer_key.
+
+    The same fields as a question in the offline bundle (services/bundle_service.py).
+    """
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    exam_id: Optional[int]
+    text: str
+    question_type: str = "single_choice"
+    options: List[str]
+    marks: int
+    negative_marks: float = 0
     image_url: Optional[str] = None
 
 
 class QuestionUpdate(BaseModel):
     text: Optional[str] = None
+    question_type: Optional[QuestionType] = None
     options: Optional[List[str]] = None
     correct_answer: Optional[int] = None
+    answer_key: Optional[Any] = None
     marks: Optional[int] = None
+    negative_marks: Optional[float] = Field(default=None, ge=0)
     image_url: Optional[str] = None
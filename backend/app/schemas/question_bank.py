@@ -0,0 +1,73 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional
+
+Difficulty = Literal["easy", "medium", "hard"]
+
+
+class BankQuestionCreate(BaseModel):
+    subject_id: int
+    level: str  # JSS1, SS2, ... as on classes.level
+    topic: Optional[str] = None
+    difficulty: Difficulty = "medium"
+    text: str
+    options: List[str] = Field(min_length=2)
+    correct_answer: int  # index in options list, 0-based
+    marks: Optional[int] = 1
+    image_url: Optional[str] = None
+
+
+class BankQuestionUpdate(BaseModel):
+    subject_id: Optional[int] = None
+    level: Optional[str] = None
+    topic: Optional[str] = None
+    difficulty: Optional[Difficulty] = None
+    text: Optional[str] = None
+    options: Optional[List[str]] = Field(default=None, min_length=2)
+    correct_answer: Optional[int] = None
+    marks: Optional[int] = None
+    image_url: Optional[str] = None
+
+
+class BankQuestionOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    subject_id: int
+    level: str
+    topic: Optional[str] = None
+    difficulty: str
+    text: str
+    options: List[str]
+    correct_answer: int
+    marks: int
+    image_url: Optional[str] = None
+    created_by: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+
+class BankAttach(BaseModel):
+    bank_question_ids: List[int] = Field(min_length=1, max_length=500)
+
+
+class BankSaveExam(BaseModel):
+    topic: Optional[str] = None
+    difficulty: Difficulty = "medium"
+
+
+class BlueprintSection(BaseModel):
+    difficulty: Difficulty
+    count: int = Field(ge=1, le=200)
+    topics: List[str] = Field(default_factory=list)  # empty: any topic
+
+
+class ExamAssemble(BaseModel):
+    title: str
+    description: Optional[str] = None
+    duration_minutes: Optional[int] = 30
+    class_id: int
+    subject_id: int
+    blueprint: List[BlueprintSection] = Field(min_length=1, max_length=20)
+    per_student: bool = False  # a different paper for every student of the class
+    shuffle: bool = True
+    seed: Optional[int] = None
@@ -1,9 +1,13 @@
-from pydantic import BaseModel, ConfigDict
-from typing import List, Dict, Any
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Dict, Any, Optional, Union
 
 class AnswerItem(BaseModel):
     question_id: int
-    answer_index: int  # index of selected option
+    # Which field carries the answer depends on the question type
+    answer_index: Optional[int] = None  # single choice, true/false: index of the selected option
+    selected: Optional[List[int]] = None  # multi-select: indices of the selected options
+    value: Optional[Union[float, str]] = None  # numeric or short text
 
 class SubmitResult(BaseModel):
     exam_id: int
@@ -18,3 +22,29 @@ class ResultOut(BaseModel):
     answers: List[Dict[str, Any]]
     score: float
     max_score: float
+
+
+class SyncAttempt(BaseModel):
+    idempotency_key: str = Field(min_length=8, max_length=128)  # client-generated, e.g. a UUID
+    student_id: int
+    exam_id: int
+    answers: List[AnswerItem]
+    taken_at: Optional[datetime] = None
+
+class ResultSyncRequest(BaseModel):
+    items: List[SyncAttempt]
+
+class SyncItemStatus(BaseModel):
+    index: int
+    idempotency_key: str
+    status: str  # created | duplicate | conflict | error | retry
+    result_id: Optional[int] = None
+    score: Optional[float] = None
+    max_score: Optional[float] = None
+    detail: Optional[str] = None
+
+class ResultSyncResponse(BaseModel):
+    created: int
+    duplicates: int
+    failed: int
+    items: List[SyncItemStatus]
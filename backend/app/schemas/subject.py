@@ -84,6 +84,17 @@ class AssignStudentToClass(BaseModel):
     student_id: int
 
 
+class BulkEnrollStudents(BaseModel):
+    """Students to enroll in one class, by id and/or registration number.
+
+    `registration_numbers_csv` accepts the raw text of a CSV export; the
+    first column of each row is read and a header row is ignored.
+    """
+    student_ids: List[int] = []
+    registration_numbers: List[str] = []
+    registration_numbers_csv: Optional[str] = None
+
+
 class AssignTeacherToClass(BaseModel):
     teacher_id: int
 
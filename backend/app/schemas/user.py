@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional, Literal
+from typing import Optional, Literal, List, Dict, Any
 
 class UserCreate(BaseModel):
     full_name: str
@@ -10,6 +10,26 @@ class UserCreate(BaseModel):
     # Passport photo data (could be a data URL or uploaded image path)
     passport: str
 
+class BulkUserCreate(BaseModel):
+    # Each row has the same fields as UserCreate; rows are validated one by
+    # one so a bad row is reported instead of rejecting the whole upload.
+    users: List[Dict[str, Any]] = []
+    # Raw CSV text with a header row (full_name,email,password,role,student_class,passport)
+    csv: Optional[str] = None
+
+class BulkUserRowResult(BaseModel):
+    row: int
+    status: Literal["created", "error"]
+    id: Optional[int] = None
+    email: Optional[str] = None
+    registration_number: Optional[str] = None
+    error: Optional[str] = None
+
+class BulkUserResult(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkUserRowResult]
+
 class LoginRequest(BaseModel):
     email: str  # Use plain str instead of EmailStr to accept a wider range of email formats
     password: str
@@ -39,6 +59,14 @@ class UserUpdate(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None  # access token lifetime in seconds
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
 
 class TokenData(BaseModel):
     user_id: int
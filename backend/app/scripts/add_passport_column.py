@@ -1,9 +0,0 @@
-import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
-from core.db import engine
-from sqlalchemy import text
-
-with engine.connect() as conn:
-    conn.execute(text("ALTER TABLE users ADD COLUMN passport TEXT"))
-    print("Added 'passport' column to users table.")
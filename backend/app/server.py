@@ -0,0 +1,257 @@
+"""
+Production launcher for the backend.
+
+    python -m app.server            (from the backend directory)
+
+The parent process imports the app once, binds the listening socket and
+then forks SERVER_WORKERS uvicorn workers that share that socket, so each
+worker starts from an already-loaded app instead of importing it again.
+Every worker reports back over a pipe once its lifespan startup has
+finished; the parent only announces readiness (and writes SERVER_READY_FILE,
+if set) when all of them have. SIGTERM/SIGINT are forwarded to the workers,
+which finish in-flight requests for up to SERVER_GRACEFUL_TIMEOUT seconds
+before being killed. Workers that die unexpectedly are replaced after an
+exponential backoff; if more than SERVER_MAX_RESTARTS die within
+SERVER_RESTART_WINDOW_SECONDS (a worker that cannot start, say), the parent
+shuts everything down and exits with status 1 instead of forking forever.
+
+Platforms without fork (Windows) run a single in-process worker.
+
+With more than one worker the default RATE_LIMIT_STORE ("auto") shares
+auth rate limits between workers through SQLite; "memory" is refused. The
+worker count reaches the app through the APP_SERVER_WORKERS environment
+variable, set before the app is imported.
+"""
+
+import logging
+import os
+import select
+import signal
+import socket
+import sys
+import time
+from collections import deque
+from typing import Optional
+
+import uvicorn
+
+from .core.config import settings
+from .core.rate_limit import WORKERS_ENV
+
+logger = logging.getLogger("app.server")
+
+
+class _ReadyServer(uvicorn.Server):
+    """uvicorn.Server that calls `on_ready` once lifespan startup has finished."""
+
+    def __init__(self, config, on_ready=None):
+        super().__init__(config)
+        self.on_ready = on_ready
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.on_ready is not None and not self.should_exit:
+            self.on_ready()
+            self.on_ready = None
+
+
+def _build_config(app) -> uvicorn.Config:
+    return uvicorn.Config(
+        app,
+        host=settings.SERVER_HOST,
+        port=settings.SERVER_PORT,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE_SECONDS,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        log_level=settings.SERVER_LOG_LEVEL,
+        lifespan="on",
+    )
+
+
+def _bind_socket() -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((settings.SERVER_HOST, settings.SERVER_PORT))
+    sock.listen(settings.SERVER_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app, sock: socket.socket, ready_fd: int) -> None:
+    # Connections opened by the parent during import must not be shared
+    from .core.db import engine
+    engine.dispose(close=False)
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, signal.SIG_DFL)
+
+    def notify():
+        os.write(ready_fd, b"R")
+
+    server = _ReadyServer(_build_config(app), on_ready=notify)
+    server.run(sockets=[sock])
+
+
+def _spawn(app, sock, ready_w) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(app, sock, ready_w)
+        except BaseException:
+            logger.exception("Worker crashed")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def _announce_ready(workers: int) -> None:
+    if settings.SERVER_READY_FILE:
+        with open(settings.SERVER_READY_FILE, "w", encoding="utf-8") as f:
+            f.write(str(os.getpid()))
+    logger.info("Ready: %d worker(s) on http://%s:%d", workers, settings.SERVER_HOST, settings.SERVER_PORT)
+    print(f"READY {settings.SERVER_HOST}:{settings.SERVER_PORT} workers={workers}", flush=True)
+
+
+def _remove_ready_file() -> None:
+    if settings.SERVER_READY_FILE and os.path.exists(settings.SERVER_READY_FILE):
+        os.remove(settings.SERVER_READY_FILE)
+
+
+def _wait_ready(ready_r: int, count: int, timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    received = 0
+    while received < count:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        readable, _, _ = select.select([ready_r], [], [], remaining)
+        if readable:
+            received += len(os.read(ready_r, count - received))
+    return True
+
+
+class RestartPolicy:
+    """When to replace a dead worker: a doubling delay, and a cap per window."""
+
+    def __init__(self, base: float, cap: float, max_restarts: int, window: float):
+        self.base = base
+        self.cap = cap
+        self.max_restarts = max_restarts
+        self.window = window
+        self._recent = deque()
+
+    def delay(self, now: float) -> Optional[float]:
+        """Seconds to wait before the next replacement, or None to give up."""
+        while self._recent and now - self._recent[0] > self.window:
+            self._recent.popleft()
+        self._recent.append(now)
+        if len(self._recent) > self.max_restarts:
+            return None
+        return min(self.cap, self.base * 2 ** (len(self._recent) - 1))
+
+
+def serve_multiprocess(app, workers: int) -> int:
+    sock = _bind_socket()
+    ready_r, ready_w = os.pipe()
+    children = {_spawn(app, sock, ready_w) for _ in range(workers)}
+
+    stopping = False
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+
+    exit_code = 0
+    if _wait_ready(ready_r, workers, settings.SERVER_READY_TIMEOUT):
+        _announce_ready(workers)
+    else:
+        logger.error("Workers did not become ready within %ss", settings.SERVER_READY_TIMEOUT)
+        exit_code = 1
+        _stop(None, None)
+
+    policy = RestartPolicy(
+        settings.SERVER_RESTART_BACKOFF_SECONDS,
+        settings.SERVER_RESTART_BACKOFF_MAX_SECONDS,
+        settings.SERVER_MAX_RESTARTS,
+        settings.SERVER_RESTART_WINDOW_SECONDS,
+    )
+    respawn_at = []  # monotonic times at which to fork a replacement
+    stop_deadline = None
+    while children or (respawn_at and not stopping):
+        if stopping:
+            respawn_at.clear()
+        now = time.monotonic()
+        while respawn_at and respawn_at[0] <= now:
+            respawn_at.pop(0)
+            children.add(_spawn(app, sock, ready_w))
+        if stopping and stop_deadline is None:
+            stop_deadline = time.monotonic() + settings.SERVER_GRACEFUL_TIMEOUT + 5
+        if stop_deadline is not None and time.monotonic() > stop_deadline:
+            for pid in children:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        if not children:
+            # Every worker is down and waiting out its backoff
+            time.sleep(min(0.2, max(0.0, respawn_at[0] - now)))
+            continue
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.2)
+            continue
+        children.discard(pid)
+        if not stopping:
+            delay = policy.delay(time.monotonic())
+            if delay is None:
+                logger.error("Workers keep dying (%d restarts within %ss); shutting down",
+                             settings.SERVER_MAX_RESTARTS, settings.SERVER_RESTART_WINDOW_SECONDS)
+                exit_code = 1
+                _stop(None, None)
+                continue
+            logger.warning("Worker %d exited (status %d); starting a replacement in %.1fs", pid, status, delay)
+            respawn_at.append(time.monotonic() + delay)
+            respawn_at.sort()
+
+    os.close(ready_r)
+    os.close(ready_w)
+    sock.close()
+    _remove_ready_file()
+    return exit_code
+
+
+def main() -> int:
+    logging.basicConfig(level=settings.SERVER_LOG_LEVEL.upper())
+    workers = (settings.SERVER_WORKERS or os.cpu_count() or 1) if hasattr(os, "fork") else 1
+    # The app picks its rate-limit store from this when it is imported
+    os.environ[WORKERS_ENV] = str(workers)
+    # Preload: import the app (routes, models, settings) and check the
+    # schema once in the parent; forked workers inherit both
+    from .main import app
+    from .core.db import init_db
+    init_db()
+
+    if workers == 1:
+        server = _ReadyServer(_build_config(app), on_ready=lambda: _announce_ready(1))
+        try:
+            server.run()
+        finally:
+            _remove_ready_file()
+        return 0
+    return serve_multiprocess(app, workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
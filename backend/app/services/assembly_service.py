@@ -0,0 +1,197 @@
+"""
+Exams assembled at random from the question bank to a blueprint, such as
+10 easy, 20 medium and 10 hard items from a given set of topics.
+
+A blueprint section's candidates are read as ids alone, straight from the
+(subject_id, level, topic, difficulty) index on bank_questions. They are
+then sampled in Python, without replacement. ORDER BY RANDOM() would
+instead read and sort every candidate row once for each paper.
+
+With per-student variants, every student of the class gets their own draw
+from the same candidates, and no two papers draw the same set while the
+pool allows otherwise. The exam owns one linked question for each bank item
+anyone drew. `exam_variants` records each student's paper as an ordered
+list of those question ids. The exam, its questions and its papers are
+written in one transaction, so a failed assembly leaves nothing behind.
+"""
+
+import random
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from ..models.exam import Exam, ExamVariant
+from ..models.question import Question
+from ..models.question_bank import DIFFICULTIES, BankQuestion
+from ..models.subject import Class, student_class_association
+from . import question_bank_service
+
+# Draws per student before a repeated set of questions is accepted (when
+# the pool is too small for every paper to differ)
+MAX_REDRAWS = 10
+
+
+@dataclass
+class Section:
+    difficulty: str
+    count: int
+    topics: Sequence[str] = field(default_factory=tuple)
+
+
+def _describe(section: Section) -> str:
+    topics = f" on {', '.join(section.topics)}" if section.topics else ""
+    return f"{section.count} {section.difficulty} item(s){topics}"
+
+
+def candidate_ids(db: Session, subject_id: int, level: str, section: Section) -> List[int]:
+    """Ids of the bank items a section can draw from, in id order."""
+    stmt = select(BankQuestion.id).where(
+        BankQuestion.subject_id == subject_id,
+        BankQuestion.level == level,
+        BankQuestion.difficulty == section.difficulty,
+    )
+    if section.topics:
+        stmt = stmt.where(BankQuestion.topic.in_(list(section.topics)))
+    # Sorted here: with a seed, the same pool then gives the same papers
+    return sorted(db.execute(stmt).scalars())
+
+
+def draw_paper(rng: random.Random, pools: Sequence[List[int]], sections: Sequence[Section], shuffle: bool = True, overlapping: bool = True) -> List[int]:
+    """One paper of bank ids: each section's count from its pool, no item twice.
+
+    Pass `overlapping=False` when no item is in two pools, to skip the
+    filtering that keeps a later section from repeating an earlier pick.
+    """
+    paper, taken = [], set()
+    for pool, section in zip(pools, sections):
+        free = [i for i in pool if i not in taken] if taken and overlapping else pool
+        if len(free) < section.count:
+            raise ValueError(f"The bank has only {len(free)} free item(s) for {_describe(section)}")
+        picked = rng.sample(free, section.count)
+        taken.update(picked)
+        paper.extend(picked)
+    if shuffle:
+        rng.shuffle(paper)
+    return paper
+
+
+def assemble_exam(db: Session, creator_id: int, title: str, class_id: int, subject_id: int, sections: Sequence[Section],
+                  description: Optional[str] = None, duration_minutes: int = 30, per_student: bool = False,
+                  shuffle: bool = True, seed: Optional[int] = None) -> dict:
+    """Create an unpublished exam drawn from the bank to `sections`.
+
+    Returns the new exam's id with its question and paper counts. Raises
+    ValueError when the class is unknown, or the bank cannot fill a section.
+    """
+    sections = [s if isinstance(s, Section) else Section(**s) for s in sections]
+    if not sections:
+        raise ValueError("The blueprint needs at least one section")
+    for section in sections:
+        if section.difficulty not in DIFFICULTIES:
+            raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+        if section.count < 1:
+            raise ValueError("Each section needs a count of at least 1")
+    level = db.execute(select(Class.level).where(Class.id == class_id)).scalar()
+    if level is None:
+        raise ValueError("Class not found")
+
+    pools = [candidate_ids(db, subject_id, level, section) for section in sections]
+    for pool, section in zip(pools, sections):
+        if len(pool) < section.count:
+            raise ValueError(f"The bank has only {len(pool)} item(s) for {_describe(section)} at {level}")
+
+    # Sections overlap when they share a difficulty and a topic
+    overlapping = len(set().union(*pools)) < sum(map(len, pools))
+    rng = random.Random(seed)
+    if per_student:
+        student_ids = db.execute(
+            select(student_class_association.c.student_id)
+            .where(student_class_association.c.class_id == class_id)
+            .order_by(student_class_association.c.student_id)
+        ).scalars().all()
+        if not student_ids:
+            raise ValueError("The class has no students to draw papers for")
+        papers, seen = [], set()
+        for _ in student_ids:
+            for _ in range(MAX_REDRAWS):
+                paper = draw_paper(rng, pools, sections, shuffle, overlapping)
+                if frozenset(paper) not in seen:
+                    break
+            seen.add(frozenset(paper))
+            papers.append(paper)
+        bank_ids = sorted({i for paper in papers for i in paper})
+    else:
+        bank_ids = draw_paper(rng, pools, sections, shuffle, overlapping)
+
+    exam = Exam(
+        title=title, description=description, duration_minutes=duration_minutes, published=False,
+        created_by=creator_id, class_id=class_id, subject_id=subject_id,
+    )
+    try:
+        db.add(exam)
+        db.flush()
+        question_bank_service.insert_linked_questions(db, exam.id, bank_ids, creator_id)
+        if per_student:
+            question_of: Dict[int, int] = dict(db.execute(
+                select(Question.bank_question_id, Question.id).where(Question.exam_id == exam.id)
+            ).all())
+            db.execute(insert(ExamVariant), [
+                {"exam_id": exam.id, "student_id": student_id, "paper_number": number, "question_ids": [question_of[i] for i in paper]}
+                for number, (student_id, paper) in enumerate(zip(student_ids, papers), start=1)
+            ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return {"exam_id": exam.id, "questions": len(bank_ids), "papers": len(papers) if per_student else 0}
+
+
+def paper_for(db: Session, exam_id: int, student_id: int) -> Optional[List[int]]:
+    """The question ids of a student's paper, in order; None if the exam has no variants.
+
+    A student who joined the class after assembly sits one of the existing
+    papers, picked by their id.
+    """
+    own = db.execute(
+        select(ExamVariant.question_ids).where(ExamVariant.exam_id == exam_id, ExamVariant.student_id == student_id)
+    ).scalar()
+    if own is not None:
+        return own
+    count = db.execute(select(func.count(ExamVariant.id)).where(ExamVariant.exam_id == exam_id)).scalar()
+    if not count:
+        return None
+    return db.execute(
+        select(ExamVariant.question_ids)
+        .where(ExamVariant.exam_id == exam_id)
+        .order_by(ExamVariant.paper_number)
+        .offset(student_id % count)
+        .limit(1)
+    ).scalar()
+
+
+def papers_for(db: Session, pairs: Iterable[Tuple[int, int]]) -> Dict[Tuple[int, int], List[int]]:
+    """`paper_for` for many (exam_id, student_id) pairs at once.
+
+    Reads the variants of the exams involved once; pairs whose exam has no
+    variants are left out of the result.
+    """
+    pairs = set(pairs)
+    exam_ids = sorted({exam_id for exam_id, _ in pairs})
+    variants: Dict[int, list] = {}
+    for start in range(0, len(exam_ids), 500):
+        rows = db.execute(
+            select(ExamVariant.exam_id, ExamVariant.student_id, ExamVariant.question_ids)
+            .where(ExamVariant.exam_id.in_(exam_ids[start:start + 500]))
+            .order_by(ExamVariant.exam_id, ExamVariant.paper_number)
+        )
+        for exam_id, student_id, question_ids in rows:
+            variants.setdefault(exam_id, []).append((student_id, question_ids))
+    papers = {}
+    for exam_id, student_id in pairs:
+        exam_papers = variants.get(exam_id)
+        if exam_papers:
+            own = dict(exam_papers).get(student_id)
+            papers[(exam_id, student_id)] = own if own is not None else exam_papers[student_id % len(exam_papers)][1]
+    return papers
@@ -0,0 +1,261 @@
+"""
+Online SQLite backups.
+
+`backup_database` copies the live database with SQLite's backup API
+(`sqlite3.Connection.backup`), BACKUP_PAGES_PER_STEP pages at a time with a
+short pause between steps, so the server keeps reading and writing while a
+backup runs. A write from another connection restarts that copy; after
+BACKUP_MAX_RESTARTS restarts the rest is copied in a single step, which
+holds the read lock (and makes writers wait) until it is done, but always
+finishes. The copy is checked with `PRAGMA integrity_check`, then
+gzip-compressed in chunks into BACKUP_DIR as school_cbt-YYYYmmdd-HHMMSS.db.gz.
+
+The backup API needs a database file to copy into, so BACKUP_DIR briefly
+holds an uncompressed copy next to the compressed one: allow for the size
+of the database plus its backup in free space there.
+Finally `apply_retention` keeps the newest BACKUP_KEEP_LAST files plus the
+newest file of each of the last BACKUP_KEEP_DAILY days.
+
+With BACKUP_INTERVAL_MINUTES > 0 the server runs backups itself (see
+`BackupScheduler`); progress and outcomes are exported at /metrics as
+`backup_*`. To restore, stop the server and gunzip a backup over the
+database file.
+
+    python scripts/backup_db.py [--dest DIR]   (from the repository root)
+"""
+
+import gzip
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from ..core.config import settings
+from ..core.locks import exclusive
+from ..core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BACKUP_NAME = re.compile(r"^(?P<stem>.+)-(?P<stamp>\d{8}-\d{6})\.db\.gz$")
+COPY_CHUNK = 1024 * 1024
+
+
+class BackupError(Exception):
+    pass
+
+
+class _TooManyRestarts(Exception):
+    """Raised from the progress callback to abandon a stepped copy."""
+
+
+def sqlite_path(database_url: str = None) -> str:
+    url = make_url(database_url or settings.DATABASE_URL)
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        raise BackupError(f"Not a file-backed SQLite database: {url}")
+    return url.database
+
+
+def backup_database(
+    source_path: str,
+    dest_dir: str,
+    pages: int = None,
+    step_sleep: float = None,
+    progress: Optional[Callable[[int, int], None]] = None,
+    max_restarts: int = None,
+) -> dict:
+    """Back up `source_path` into `dest_dir` and return details of the file written.
+
+    `progress(copied_pages, total_pages)` is called after every step. A
+    write from another connection makes SQLite restart the copy; after
+    `max_restarts` of them the copy is finished in one step (`restarts` and
+    `single_step` in the result say what happened).
+    """
+    pages = pages or settings.BACKUP_PAGES_PER_STEP
+    step_sleep = settings.BACKUP_STEP_SLEEP_MS / 1000 if step_sleep is None else step_sleep
+    max_restarts = settings.BACKUP_MAX_RESTARTS if max_restarts is None else max_restarts
+    if not os.path.exists(source_path):
+        raise BackupError(f"Database not found: {source_path}")
+    os.makedirs(dest_dir, exist_ok=True)
+
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    target = os.path.join(dest_dir, f"{stem}-{stamp}.db.gz")
+    work = os.path.join(dest_dir, f".{stem}-{stamp}.db.partial")
+    started = time.monotonic()
+
+    copied = restarts = 0
+    single_step = False
+
+    def on_step(status, remaining, total):
+        nonlocal copied, restarts
+        if status in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED):
+            return  # waited on a writer's lock and copied nothing
+        # A restart starts over from the first page (as the fallback does, legitimately)
+        if not single_step and total - remaining <= copied:
+            restarts += 1
+            if restarts > max_restarts:
+                raise _TooManyRestarts()
+        copied = total - remaining
+        if progress is not None:
+            progress(copied, total)
+
+    try:
+        # 1) Page-limited online copy; the source is only locked during each step
+        src = sqlite3.connect(source_path)
+        dst = sqlite3.connect(work)
+        try:
+            try:
+                src.backup(dst, pages=pages, progress=on_step, sleep=step_sleep)
+            except _TooManyRestarts:
+                # Writes keep restarting it: copy everything while holding the lock
+                logger.warning("Backup restarted %d times; finishing it in one step", max_restarts)
+                single_step = True
+                src.backup(dst, pages=-1, progress=on_step)
+            # 2) Verify the copy before keeping it
+            check = dst.execute("PRAGMA integrity_check").fetchall()
+            page_count = dst.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            dst.close()
+            src.close()
+        if check != [("ok",)]:
+            raise BackupError(f"integrity_check failed: {check[:5]}")
+
+        # 3) Compress in chunks into a temporary name, then publish atomically
+        partial = target + ".partial"
+        with open(work, "rb") as raw, open(partial, "wb") as out:
+            with gzip.GzipFile(filename=os.path.basename(source_path), mode="wb", compresslevel=6, fileobj=out, mtime=0) as gz:
+                shutil.copyfileobj(raw, gz, COPY_CHUNK)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(partial, target)
+    finally:
+        for leftover in (work, target + ".partial"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return {
+        "path": target,
+        "size": os.path.getsize(target),
+        "pages": page_count,
+        "seconds": time.monotonic() - started,
+        "restarts": restarts,
+        "single_step": single_step,
+    }
+
+
+def list_backups(dest_dir: str) -> List[tuple]:
+    """[(timestamp, path)] for backup files in `dest_dir`, newest first."""
+    found = []
+    if not os.path.isdir(dest_dir):
+        return found
+    for name in os.listdir(dest_dir):
+        m = BACKUP_NAME.match(name)
+        if m:
+            found.append((datetime.strptime(m.group("stamp"), "%Y%m%d-%H%M%S"), os.path.join(dest_dir, name)))
+    return sorted(found, reverse=True)
+
+
+def apply_retention(dest_dir: str, keep_last: int = None, keep_daily: int = None) -> List[str]:
+    """Delete backups outside the retention policy; return the removed paths."""
+    keep_last = settings.BACKUP_KEEP_LAST if keep_last is None else keep_last
+    keep_daily = settings.BACKUP_KEEP_DAILY if keep_daily is None else keep_daily
+    backups = list_backups(dest_dir)
+    keep = {path for _, path in backups[:max(1, keep_last)]}
+    days = []
+    for stamp, path in backups:
+        day = stamp.date()
+        if day not in days:
+            days.append(day)
+            if len(days) <= keep_daily:
+                keep.add(path)
+    removed = [path for _, path in backups if path not in keep]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def run_backup(source_path: str = None, dest_dir: str = None, progress: Optional[Callable[[int, int], None]] = None) -> dict:
+    """One backup plus retention, reporting progress and outcome in metrics."""
+    source_path = source_path or sqlite_path()
+    dest_dir = dest_dir or settings.BACKUP_DIR
+
+    def report(done, total):
+        metrics.set("backup_progress_ratio", done / total if total else 1.0, "Fraction of pages copied by the running backup")
+        if progress is not None:
+            progress(done, total)
+
+    metrics.set("backup_in_progress", 1, "1 while a backup is running")
+    metrics.set("backup_progress_ratio", 0.0, "Fraction of pages copied by the running backup")
+    try:
+        info = backup_database(source_path, dest_dir, progress=report)
+    except Exception:
+        metrics.inc("backup_failures_total", help_text="Backups that failed")
+        raise
+    finally:
+        metrics.set("backup_in_progress", 0, "1 while a backup is running")
+    info["removed"] = apply_retention(dest_dir)
+
+    metrics.inc("backup_runs_total", help_text="Backups completed")
+    metrics.set("backup_last_success_timestamp_seconds", time.time(), "Unix time of the last good backup")
+    metrics.set("backup_last_duration_seconds", info["seconds"], "Duration of the last good backup")
+    metrics.set("backup_last_size_bytes", info["size"], "Compressed size of the last good backup")
+    metrics.set("backup_last_pages", info["pages"], "Database pages in the last good backup")
+    logger.info("Backup written to %s (%d bytes, %.1fs)", info["path"], info["size"], info["seconds"])
+    return info
+
+
+def _collect_backup_files() -> None:
+    # Read from disk so every worker reports it, not just the one that ran the backup
+    backups = list_backups(settings.BACKUP_DIR)
+    metrics.set("backup_files", len(backups), "Backups kept after retention")
+    if backups:
+        metrics.set("backup_newest_timestamp_seconds", backups[0][0].timestamp(), "Unix time of the newest backup file")
+
+
+metrics.register_collector(_collect_backup_files)
+
+
+class BackupScheduler:
+    """Runs `run_backup` every `interval` seconds in a background thread.
+
+    Only the worker holding BACKUP_LOCK_FILE does the work, so a multi-worker
+    server takes one backup per interval.
+    """
+
+    def __init__(self, interval: float, lock_path: str = None):
+        self.interval = interval
+        self.lock_path = lock_path or settings.BACKUP_LOCK_FILE
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _due(self) -> bool:
+        # Another worker may have just finished this interval's backup
+        newest = list_backups(settings.BACKUP_DIR)[:1]
+        return not newest or (datetime.now() - newest[0][0]).total_seconds() >= self.interval / 2
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            with exclusive(self.lock_path) as owner:
+                if not owner or not self._due():
+                    continue
+                try:
+                    run_backup()
+                except Exception:
+                    logger.exception("Scheduled backup failed")
+
+    def start(self) -> "BackupScheduler":
+        self._thread = threading.Thread(target=self._loop, name="backup-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
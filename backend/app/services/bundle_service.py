@@ -0,0 +1,180 @@
+"""
+Offline exam bundles.
+
+A bundle is a zip a school lab can download ahead of time and deliver an
+exam from without reaching the central server:
+
+    manifest.json   format, exam id, version, sha256 + size of every file
+    manifest.sig    hex HMAC-SHA256 of manifest.json
+    exam.json       exam details and questions, with answer keys removed
+    images/<name>   every image the questions reference
+
+Bundles are built when an exam is published and kept on disk under
+EXAM_BUNDLE_DIR; editing the exam or its questions (or unpublishing it)
+deletes the cached file so the next request rebuilds it. Entries are
+written with fixed timestamps, so the same content always produces the same
+bytes and the same version.
+"""
+
+import hashlib
+import hmac
+import json
+import logging
+import os
+import zipfile
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.static_files import upload_path
+from ..models.exam import Exam
+from ..models.question import Question
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_FORMAT = 1
+_ZIP_TIMESTAMP = (2020, 1, 1, 0, 0, 0)
+
+
+def _signing_key() -> bytes:
+    if settings.BUNDLE_SIGNING_KEY:
+        return settings.BUNDLE_SIGNING_KEY.encode()
+    # Derived rather than reused, so a bundle signature is never a valid JWT signature
+    return hmac.new(settings.SECRET_KEY.encode(), b"exam-bundle", hashlib.sha256).digest()
+
+
+def sign(data: bytes) -> str:
+    return hmac.new(_signing_key(), data, hashlib.sha256).hexdigest()
+
+
+def bundle_path(exam_id: int) -> str:
+    return os.path.join(settings.EXAM_BUNDLE_DIR, f"exam_{exam_id}.zip")
+
+
+def invalidate_bundle(exam_id: Optional[int]) -> None:
+    """Drop the cached bundle for an exam whose content has changed."""
+    if exam_id is None:
+        return
+    try:
+        os.remove(bundle_path(exam_id))
+    except FileNotFoundError:
+        pass
+
+
+def _image_file(image_url: Optional[str]) -> Optional[str]:
+    """Map an /uploads/... URL to an existing file inside UPLOAD_DIR, or None."""
+    path = upload_path(image_url)
+    return path if path and os.path.isfile(path) else None
+
+
+def _paper(exam: Exam, questions) -> dict:
+    return {
+        "id": exam.id,
+        "title": exam.title,
+        "description": exam.description,
+        "duration_minutes": exam.duration_minutes,
+        "class_id": exam.class_id,
+        "subject_id": exam.subject_id,
+        "questions": [
+            {
+                "id": q.id,
+                "text": q.text,
+                "question_type": q.question_type,
+                "options": q.options,
+                "marks": q.marks,
+                "negative_marks": q.negative_marks,
+                "image_url": q.image_url,
+                "image": None,
+            }
+            for q in questions
+        ],
+    }
+
+
+def build_exam_bundle(db: Session, exam: Exam) -> str:
+    """Write the bundle for `exam` to EXAM_BUNDLE_DIR and return its path."""
+    questions = db.query(Question).filter(Question.exam_id == exam.id).order_by(Question.id).all()
+    paper = _paper(exam, questions)
+
+    files = {}
+    missing = []
+    for item in paper["questions"]:
+        path = _image_file(item["image_url"])
+        if path is None:
+            if item["image_url"]:
+                missing.append(item["image_url"])
+            continue
+        name = f"images/{os.path.basename(path)}"
+        if name not in files:
+            with open(path, "rb") as f:
+                files[name] = f.read()
+        item["image"] = name
+    files["exam.json"] = json.dumps(paper, sort_keys=True, separators=(",", ":")).encode()
+
+    entries = {
+        name: {"sha256": hashlib.sha256(data).hexdigest(), "size": len(data)}
+        for name, data in sorted(files.items())
+    }
+    version = hashlib.sha256(json.dumps(entries, sort_keys=True).encode()).hexdigest()[:16]
+    manifest = json.dumps(
+        {
+            "format": BUNDLE_FORMAT,
+            "exam_id": exam.id,
+            "version": version,
+            "files": entries,
+            "missing_images": missing,
+        },
+        sort_keys=True,
+        indent=1,
+    ).encode()
+    if missing:
+        logger.warning("Exam %s bundle is missing %d image(s)", exam.id, len(missing))
+
+    os.makedirs(settings.EXAM_BUNDLE_DIR, exist_ok=True)
+    target = bundle_path(exam.id)
+    tmp = f"{target}.{os.getpid()}.tmp"
+    with zipfile.ZipFile(tmp, "w") as zf:
+        def add(name, data, compress=zipfile.ZIP_DEFLATED):
+            info = zipfile.ZipInfo(name, date_time=_ZIP_TIMESTAMP)
+            info.compress_type = compress
+            zf.writestr(info, data)
+
+        add("manifest.json", manifest)
+        add("manifest.sig", sign(manifest).encode())
+        for name, data in sorted(files.items()):
+            # Images are already compressed; deflating them again only costs CPU
+            add(name, data, zipfile.ZIP_STORED if name.startswith("images/") else zipfile.ZIP_DEFLATED)
+    os.replace(tmp, target)
+    return target
+
+
+def get_exam_bundle(db: Session, exam: Exam) -> str:
+    """Return the path of the cached bundle, building it if needed."""
+    if not exam.published:
+        raise ValueError("Only published exams can be bundled")
+    path = bundle_path(exam.id)
+    if os.path.exists(path):
+        return path
+    return build_exam_bundle(db, exam)
+
+
+def read_bundle(data) -> dict:
+    """Check a bundle's signature and hashes; return its manifest and paper.
+
+    `data` is a path or a file-like object. Raises ValueError if anything
+    has been altered.
+    """
+    with zipfile.ZipFile(data) as zf:
+        manifest_bytes = zf.read("manifest.json")
+        signature = zf.read("manifest.sig").decode()
+        if not hmac.compare_digest(signature, sign(manifest_bytes)):
+            raise ValueError("Bundle signature does not match")
+        manifest = json.loads(manifest_bytes)
+        files = {}
+        for name, meta in manifest["files"].items():
+            content = zf.read(name)
+            if hashlib.sha256(content).hexdigest() != meta["sha256"]:
+                raise ValueError(f"Bundle file {name} does not match its manifest hash")
+            files[name] = content
+    return {"manifest": manifest, "paper": json.loads(files["exam.json"]), "files": files}
@@ -0,0 +1,136 @@
+"""
+The teacher dashboard: every exam a teacher can manage, with its question
+count, submission count, mean score and last submission time.
+
+One statement computes it all. Questions and results are grouped by exam,
+restricted to the teacher's exams. The question count comes from the
+questions.exam_id index alone. The result aggregates come from
+ix_results_exam_id_taken_at_score alone. Both are then joined to the
+exams.
+
+Responses are cached per user for DASHBOARD_CACHE_SECONDS, already
+serialized. Writing results for an exam (submit, /results/sync, edge
+uploads) drops every cached dashboard that lists that exam. New exams and
+question edits show up when the entry expires. The cache is per process,
+so another worker's copy also lasts until it expires.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.exam import Exam
+from ..models.question import Question
+from ..models.result import Result
+from ..schemas.exam import DashboardExam
+from . import exam_service
+
+
+def _columns(questions, results) -> dict:
+    return {
+        "id": Exam.id,
+        "title": Exam.title,
+        "published": Exam.published,
+        "class_id": Exam.class_id,
+        "subject_id": Exam.subject_id,
+        "question_count": func.coalesce(questions.c.question_count, 0),
+        "submission_count": func.coalesce(results.c.submission_count, 0),
+        "mean_score": results.c.mean_score,
+        "last_submission_at": results.c.last_submission_at,
+    }
+
+
+def dashboard_rows(db: Session, teacher_id: Optional[int] = None):
+    """(fields, rows) for the exams `teacher_id` can manage (every exam when None)."""
+    filters = exam_service._exam_filters(db, published_only=False, teacher_id=teacher_id)
+    columns = list(DashboardExam.model_fields)
+    if filters is None:
+        return columns, []
+    questions = select(Question.exam_id, func.count().label("question_count"))
+    results = select(
+        Result.exam_id,
+        func.count().label("submission_count"),
+        func.avg(Result.score).label("mean_score"),
+        func.max(Result.taken_at).label("last_submission_at"),
+    )
+    if filters:
+        # Only group the teacher's exams, not the whole school's
+        exam_ids = select(Exam.id).where(*filters)
+        questions = questions.where(Question.exam_id.in_(exam_ids))
+        results = results.where(Result.exam_id.in_(exam_ids))
+    questions = questions.group_by(Question.exam_id).subquery()
+    results = results.group_by(Result.exam_id).subquery()
+    selected = _columns(questions, results)
+    stmt = (
+        select(*(selected[name] for name in columns))
+        .outerjoin(questions, questions.c.exam_id == Exam.id)
+        .outerjoin(results, results.c.exam_id == Exam.id)
+        .where(*filters)
+        .order_by(Exam.id)
+    )
+    return columns, db.execute(stmt).all()
+
+
+class DashboardCache:
+    """Serialized dashboards per user, for `ttl` seconds or until one of their exams gets a result."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[float, frozenset, bytes]] = {}  # user id -> (expires, exam ids, body)
+        self._by_exam: Dict[int, Set[int]] = {}  # exam id -> user ids with it cached
+
+    def get(self, user_id: int, now: Optional[float] = None) -> Optional[bytes]:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] <= (time.monotonic() if now is None else now):
+            return None
+        return entry[2]
+
+    def put(self, user_id: int, exam_ids: Iterable[int], body: bytes, now: Optional[float] = None) -> None:
+        if self.ttl <= 0:
+            return
+        now = time.monotonic() if now is None else now
+        exam_ids = frozenset(exam_ids)
+        with self._lock:
+            self._drop(user_id)
+            for stale in [u for u, (expires, _, _) in self._entries.items() if expires <= now]:
+                self._drop(stale)
+            self._entries[user_id] = (now + self.ttl, exam_ids, body)
+            for exam_id in exam_ids:
+                self._by_exam.setdefault(exam_id, set()).add(user_id)
+
+    def invalidate_exams(self, exam_ids: Iterable[int]) -> None:
+        if not self._by_exam:
+            return
+        with self._lock:
+            for exam_id in set(exam_ids):
+                for user_id in list(self._by_exam.get(exam_id, ())):
+                    self._drop(user_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._by_exam.clear()
+
+    def _drop(self, user_id: int) -> None:
+        entry = self._entries.pop(user_id, None)
+        if entry is None:
+            return
+        for exam_id in entry[1]:
+            users = self._by_exam.get(exam_id)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._by_exam[exam_id]
+
+
+cache = DashboardCache(ttl=settings.DASHBOARD_CACHE_SECONDS)
+
+
+def invalidate_exams(exam_ids: Iterable[int]) -> None:
+    """Drop cached dashboards listing any of `exam_ids`; call after writing results."""
+    cache.invalidate_exams(exam_ids)
@@ -15,8 +15,6 @@ Answer: A or B or C or D
 For next question...
 """
 
-from docx import Document as DocxDocument
-from PyPDF2 import PdfReader
 import re
 from typing import List, Tuple
 
@@ -30,6 +28,9 @@ class ParsedQuestion:
 
 def parse_docx(filepath: str) -> List[ParsedQuestion]:
     """Parse questions from Word document"""
+    # Heavy parser libraries are imported lazily, on first use
+    from docx import Document as DocxDocument
+
     doc = DocxDocument(filepath)
     text_content = "\n".join([para.text for para in doc.paragraphs])
     return parse_questions_from_text(text_content)
@@ -37,6 +38,8 @@ def parse_docx(filepath: str) -> List[ParsedQuestion]:
 
 def parse_pdf(filepath: str) -> List[ParsedQuestion]:
     """Parse questions from PDF document"""
+    from PyPDF2 import PdfReader
+
     reader = PdfReader(filepath)
     text_content = ""
     for page in reader.pages:
@@ -0,0 +1,292 @@
+"""
+Near-duplicate detection for imported questions: MinHash signatures with
+locality-sensitive hashing (LSH), one index per subject.
+
+A question becomes a set of shingles: the character 5-grams of its
+normalized stem, plus each normalized option as a whole. Options count as
+a set, so shuffling them doesn't change anything. Its signature holds
+PERMUTATIONS minimum hashes over that set. Two signatures agree in each
+position with probability equal to the Jaccard similarity of the two sets,
+so the fraction of agreeing positions estimates how alike the questions
+are.
+
+The signature comes from one-permutation hashing. Each shingle is hashed
+once and lands in one of PERMUTATIONS bins, and each bin keeps its
+minimum. Empty bins borrow from the first filled bin along a fixed probe
+order, and that order is the same for every question. This keeps the
+agreement probability equal to the Jaccard similarity, at a fraction of
+the cost of 128 separate hash functions.
+
+The first BANDS * ROWS values are cut into BANDS bands of ROWS values, and
+each band is hashed to a bucket. Questions sharing a bucket are
+candidates. With 20 bands of 6 rows, a pair at similarity 0.8 shares a
+bucket 99.8% of the time, a pair at 0.7 92%, and a pair at 0.5 only 27%.
+A lookup is therefore one indexed query for the 20 buckets, and then a
+check of at most MAX_CANDIDATES signatures, taking the candidates that
+share the most buckets first.
+
+Signatures and buckets live in the database (models/question_fingerprint.py),
+so every worker sees the same index and nothing needs rebuilding at start-up.
+Every service that writes questions keeps the index current in the same
+transaction: exam_service indexes questions created or edited one at a
+time; bank attach and assembly call `index_new_questions` and cloning
+`copy_index`; a bank edit that changes linked questions calls
+`reindex_questions`. `index_missing` indexes whatever is left (migration
+0006 runs it once for existing databases).
+"""
+
+import hashlib
+import random
+import re
+import struct
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from sqlalchemy import bindparam, delete, func, insert, select, update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.exam import Exam
+from ..models.question import Question
+from ..models.question_fingerprint import QuestionFingerprint, QuestionLSHBucket
+
+PERMUTATIONS = 128  # a power of two: the low bits of a hash pick its bin
+BANDS = 20
+ROWS = 6
+SHINGLE_SIZE = 5
+MAX_CANDIDATES = 32
+
+_BIN_BITS = PERMUTATIONS.bit_length() - 1
+# Where an empty bin borrows its value from: a fixed shuffle of all bins per bin
+_rng = random.Random(PERMUTATIONS)
+_PROBES = [_rng.sample(range(PERMUTATIONS), PERMUTATIONS) for _ in range(PERMUTATIONS)]
+# Signatures are the low 16 bits of each minimum, packed little-endian;
+# two different minima then collide only once in 65,536
+_PACKED = struct.Struct(f"<{PERMUTATIONS}H")
+SIGNATURE_SIZE = _PACKED.size
+# Masks over a signature read as one integer: every lane's high bit, and
+# every lane's other 15 bits
+_LANE_HIGH = int.from_bytes(b"\x00\x80" * PERMUTATIONS, "little")
+_LANE_LOW = int.from_bytes(b"\xff\x7f" * PERMUTATIONS, "little")
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+@dataclass
+class Match:
+    question_id: int
+    similarity: float
+
+
+def normalize(text: str) -> str:
+    """Casefolded words without diacritics or punctuation, single-spaced."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", stripped.casefold()).strip()
+
+
+def shingles(text: str, options: Sequence[str] = ()) -> set:
+    stem = normalize(text)
+    grams = {stem[i:i + SHINGLE_SIZE] for i in range(max(1, len(stem) - SHINGLE_SIZE + 1))}
+    grams.update("\x00" + normalize(str(option)) for option in options)
+    return grams
+
+
+def signature(text: str, options: Sequence[str] = ()) -> bytes:
+    """The MinHash signature of a question: PERMUTATIONS 16-bit values, packed."""
+    bins = [None] * PERMUTATIONS
+    for shingle in shingles(text, options):
+        h = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "little")
+        slot, value = h & (PERMUTATIONS - 1), h >> _BIN_BITS
+        if bins[slot] is None or value < bins[slot]:
+            bins[slot] = value
+    out = []
+    for slot, value in enumerate(bins):
+        if value is None:
+            value = next(bins[other] for other in _PROBES[slot] if bins[other] is not None)
+        out.append(value & 0xFFFF)
+    return _PACKED.pack(*out)
+
+
+def buckets(sig: bytes) -> List[int]:
+    """The signature's LSH bucket per band, as signed 64-bit integers."""
+    width = ROWS * 2
+    return [
+        int.from_bytes(hashlib.blake2b(sig[band * width:(band + 1) * width], digest_size=8, salt=band.to_bytes(2, "little")).digest(), "little", signed=True)
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: bytes, b: bytes) -> float:
+    """Estimated Jaccard similarity of the questions behind two signatures.
+
+    Counts the equal 16-bit lanes of the two at once: XOR them as integers,
+    then a lane's high bit survives the masking only if the lane was zero.
+    """
+    x = int.from_bytes(a, "little") ^ int.from_bytes(b, "little")
+    return (_LANE_HIGH & ~(((x & _LANE_LOW) + _LANE_LOW) | x)).bit_count() / PERMUTATIONS
+
+
+def _candidates_statement():
+    # Templated items ("What is 12 + 5?") can share buckets with hundreds of
+    # others; the most similar share the most, so only the top few are checked
+    shared = (
+        select(QuestionLSHBucket.question_id)
+        .where(
+            QuestionLSHBucket.subject_id.is_not_distinct_from(bindparam("subject_id")),
+            QuestionLSHBucket.bucket.in_(bindparam("buckets", expanding=True)),
+        )
+        .group_by(QuestionLSHBucket.question_id)
+        .order_by(func.count().desc(), QuestionLSHBucket.question_id)
+        .limit(MAX_CANDIDATES)
+        .subquery()
+    )
+    return (
+        select(QuestionFingerprint.question_id, QuestionFingerprint.signature)
+        .join(shared, shared.c.question_id == QuestionFingerprint.question_id)
+        # Through questions, so a question deleted without being unindexed
+        # (its exam deleted, say) is never reported
+        .join(Question, Question.id == QuestionFingerprint.question_id)
+    )
+
+
+# Built once: a lookup runs at import for every question, and building the
+# statement cost more than running it. Executed on the connection, since
+# plain column rows need none of the ORM's result handling.
+_CANDIDATES = _candidates_statement()
+
+
+def find_duplicate(db: Session, subject_id: Optional[int], text: str, options: Sequence[str] = (), threshold: float = None, sig: bytes = None) -> Optional[Match]:
+    """The most similar indexed question of the subject at or above `threshold`, if any."""
+    threshold = settings.DUPLICATE_THRESHOLD if threshold is None else threshold
+    sig = sig or signature(text, options)
+    candidates = db.connection().execute(_CANDIDATES, {"subject_id": subject_id, "buckets": buckets(sig)}).all()
+    best = None
+    for question_id, stored in candidates:
+        score = similarity(sig, stored)
+        if score >= threshold and (best is None or (score, -question_id) > (best.similarity, -best.question_id)):
+            best = Match(question_id, score)
+    return best
+
+
+def index_question(db: Session, question_id: int, subject_id: Optional[int], text: str, options: Sequence[str] = (), sig: bytes = None) -> None:
+    """Add (or replace) a question in the index; the caller commits."""
+    unindex_questions(db, [question_id])
+    sig = sig or signature(text, options)
+    db.execute(insert(QuestionFingerprint), [{"question_id": question_id, "subject_id": subject_id, "signature": sig}])
+    db.execute(insert(QuestionLSHBucket), [{"question_id": question_id, "subject_id": subject_id, "bucket": b} for b in buckets(sig)])
+
+
+def unindex_questions(db: Session, question_ids) -> None:
+    """Drop questions from the index; `question_ids` is a list or a subquery of ids."""
+    ids = list(question_ids) if isinstance(question_ids, (list, tuple, set)) else question_ids
+    db.execute(delete(QuestionLSHBucket).where(QuestionLSHBucket.question_id.in_(ids)))
+    db.execute(delete(QuestionFingerprint).where(QuestionFingerprint.question_id.in_(ids)))
+
+
+def move_exam(db: Session, exam_id: int, subject_id: Optional[int]) -> None:
+    """Re-file an exam's questions under its new subject; the caller commits."""
+    ids = select(Question.id).where(Question.exam_id == exam_id).scalar_subquery()
+    for model in (QuestionFingerprint, QuestionLSHBucket):
+        db.execute(update(model).where(model.question_id.in_(ids)).values(subject_id=subject_id).execution_options(synchronize_session=False))
+
+
+def _index_rows(db, rows) -> None:
+    """Insert fingerprints and buckets for (question_id, subject_id, text, options) rows."""
+    fingerprints, bands = [], []
+    for question_id, subject_id, text, options in rows:
+        sig = signature(text, options or ())
+        fingerprints.append({"question_id": question_id, "subject_id": subject_id, "signature": sig})
+        bands.extend({"question_id": question_id, "subject_id": subject_id, "bucket": b} for b in buckets(sig))
+    if fingerprints:
+        db.execute(insert(QuestionFingerprint), fingerprints)
+        db.execute(insert(QuestionLSHBucket), bands)
+
+
+def _indexable():
+    return select(Question.id, Exam.subject_id, Question.text, Question.options).join(Exam, Exam.id == Question.exam_id)
+
+
+def index_new_questions(db: Session, exam_ids: Sequence[int]) -> int:
+    """Index the questions of `exam_ids` that have no fingerprint yet; the caller commits.
+
+    For questions written in bulk (bank attach, assembly) rather than one
+    at a time. Returns how many were indexed.
+    """
+    indexed = 0
+    for start in range(0, len(exam_ids), 500):
+        rows = db.execute(
+            _indexable()
+            .where(Question.exam_id.in_(exam_ids[start:start + 500]), ~Question.id.in_(select(QuestionFingerprint.question_id)))
+            .order_by(Question.id)
+        ).all()
+        _index_rows(db, rows)
+        indexed += len(rows)
+    return indexed
+
+
+def _copy_index_statements():
+    # The n-th question of a copy pairs with the n-th of its source, both in id order
+    def numbered(exam_id):
+        return select(Question.id, func.row_number().over(order_by=Question.id).label("n")).where(Question.exam_id == bindparam(exam_id)).subquery()
+
+    statements = []
+    for model, column in ((QuestionFingerprint, "signature"), (QuestionLSHBucket, "bucket")):
+        copy, source = numbered("new_exam_id"), numbered("source_exam_id")
+        rows = (
+            select(copy.c.id, select(Exam.subject_id).where(Exam.id == bindparam("new_exam_id")).scalar_subquery(), model.__table__.c[column])
+            .select_from(copy)
+            .join(source, source.c.n == copy.c.n)
+            .join(model, model.question_id == source.c.id)
+        )
+        statements.append(insert(model).from_select(["question_id", "subject_id", column], rows))
+    return statements
+
+
+# Prepared once, run with executemany: one INSERT ... SELECT per copy and table
+_COPY_INDEX = _copy_index_statements()
+
+
+def copy_index(db: Session, copies: Sequence[tuple]) -> None:
+    """Index exams copied question for question as (new exam id, source exam id) pairs; the caller commits.
+
+    The copies take their sources' signatures and buckets, filed under
+    their own subject; questions of sources that were never indexed are
+    indexed from their text.
+    """
+    params = [{"new_exam_id": new_id, "source_exam_id": source_id} for new_id, source_id in copies]
+    if not params:
+        return
+    for statement in _COPY_INDEX:
+        db.connection().execute(statement, params)
+    index_new_questions(db, [new_id for new_id, _ in copies])
+
+
+def reindex_questions(db: Session, question_ids: Sequence[int]) -> None:
+    """Replace the index entries of questions whose text or options changed; the caller commits."""
+    for start in range(0, len(question_ids), 500):
+        chunk = list(question_ids[start:start + 500])
+        unindex_questions(db, chunk)
+        _index_rows(db, db.execute(_indexable().where(Question.id.in_(chunk))).all())
+
+
+def index_missing(db, chunk_size: int = 1000) -> int:
+    """Index every question that has no fingerprint yet, committing per chunk; returns how many.
+
+    `db` is a Session or a Connection (as migrations have). A safety net for
+    rows written outside the services, such as restored or hand-loaded data.
+    """
+    indexed, after = 0, 0
+    while True:
+        rows = db.execute(
+            _indexable()
+            .where(Question.id > after, ~Question.id.in_(select(QuestionFingerprint.question_id)))
+            .order_by(Question.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return indexed
+        _index_rows(db, rows)
+        db.commit()
+        indexed += len(rows)
+        after = rows[-1][0]
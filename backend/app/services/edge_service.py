@@ -0,0 +1,431 @@
+"""
+Edge-node replication.
+
+A lab server can run this backend with EDGE_MODE=true. It then keeps a
+read-only copy of what exam delivery needs in its own SQLite file, so
+logins, exam lists and paper fetches never leave the lab:
+
+- Every EDGE_PULL_INTERVAL_SECONDS it asks /api/edge/snapshot on
+  EDGE_UPSTREAM_URL for published exams with their questions and papers,
+  classes, subjects, rosters and the users (with password hashes, without
+  passport photos) who need to log in. The snapshot carries a version (a
+  hash of its contents) that doubles as its ETag; the edge sends the
+  version it last applied and gets a bodiless 304 while nothing changed.
+  A changed snapshot is diffed against the local rows and only the rows
+  that differ are written, in one transaction. Question images missing
+  locally are downloaded into the uploads directory.
+- /results/submit still grades locally (so the student sees a score), and
+  also queues the attempt in `edge_outbox` in the same transaction. Every
+  EDGE_FORWARD_INTERVAL_SECONDS the queue is sent to /api/edge/results in
+  batches of EDGE_FORWARD_BATCH_SIZE. The central server grades it again
+  and deduplicates it by idempotency key, so resending is always safe.
+
+Both directions authenticate with the shared EDGE_SYNC_KEY. When several
+workers run on one edge node, a lock file makes sure only one of them pulls
+or forwards at a time.
+
+Trying it with two instances on one machine (from the backend directory):
+
+    EDGE_SYNC_KEY=k DATABASE_URL=sqlite:///./central.db SERVER_PORT=8000 python -m app.server
+    EDGE_MODE=true EDGE_SYNC_KEY=k EDGE_UPSTREAM_URL=http://127.0.0.1:8000 \\
+        DATABASE_URL=sqlite:///./edge.db SERVER_PORT=8001 python -m app.server
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import bindparam, delete, insert, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.locks import exclusive
+from ..core.static_files import upload_path, write_sidecars
+from ..models.edge import EdgeOutbox, EdgeState
+from ..models.exam import Exam, ExamVariant
+from ..models.question import Question
+from ..models.subject import (
+    Class,
+    Subject,
+    TeacherSubject,
+    class_subject_association,
+    student_class_association,
+)
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = 2
+# EdgeState key holding the version of the last applied snapshot
+SNAPSHOT_VERSION_KEY = "snapshot_version"
+CHUNK_SIZE = 500
+
+# Tables copied to edge nodes, parents first, with the columns that travel.
+# Timestamps stay behind: nothing on the edge reads them. So do passport
+# photos (data URLs of up to 2 MB each), which exam delivery never shows.
+MIRRORED_TABLES = [
+    (User.__table__, ("id", "full_name", "email", "hashed_password", "role", "student_class", "registration_number")),
+    (Subject.__table__, ("id", "name", "code", "description")),
+    (Class.__table__, ("id", "name", "level")),
+    (class_subject_association, ("class_id", "subject_id")),
+    (student_class_association, ("student_id", "class_id")),
+    (TeacherSubject.__table__, ("id", "teacher_id", "subject_id", "class_id")),
+    (Exam.__table__, ("id", "title", "description", "duration_minutes", "published", "created_by", "class_id", "subject_id")),
+    (Question.__table__, ("id", "exam_id", "text", "options", "correct_answer", "marks", "question_type", "answer_key", "negative_marks", "image_url", "created_by")),
+    (ExamVariant.__table__, ("id", "exam_id", "student_id", "paper_number", "question_ids")),
+]
+
+
+class UpstreamError(Exception):
+    """The central server could not be reached or refused the request."""
+
+
+def _chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def parse_class_ids(value: str) -> Optional[list]:
+    ids = [int(part) for part in value.split(",") if part.strip()]
+    return ids or None
+
+
+# -------------------- central side --------------------
+
+def build_snapshot(db: Session, class_ids: Optional[Iterable[int]] = None) -> dict:
+    """Everything an edge node needs to deliver published exams.
+
+    With `class_ids`, only those classes, their students and their exams are
+    included; teachers and admins are always included.
+    """
+    class_ids = list(class_ids) if class_ids else None
+
+    def rows(table, columns, *where):
+        stmt = select(*[table.c[c] for c in columns])
+        for clause in where:
+            stmt = stmt.where(clause)
+        return [list(r) for r in db.execute(stmt).all()]
+
+    def in_chunks(table, columns, column, values):
+        out = []
+        for chunk in _chunked(sorted(values), CHUNK_SIZE):
+            out.extend(rows(table, columns, table.c[column].in_(chunk)))
+        return out
+
+    specs = dict((table.name, (table, columns)) for table, columns in MIRRORED_TABLES)
+    tables = {}
+
+    def add(name, data):
+        tables[name] = {"columns": list(specs[name][1]), "rows": data}
+
+    classes_t, class_cols = specs["classes"]
+    if class_ids is None:
+        add("classes", rows(classes_t, class_cols))
+    else:
+        add("classes", in_chunks(classes_t, class_cols, "id", class_ids))
+    scope = {row[0] for row in tables["classes"]["rows"]}
+
+    for name in ("class_subject", "student_class", "teacher_subjects"):
+        table, columns = specs[name]
+        add(name, in_chunks(table, columns, "class_id", scope))
+
+    exams_t, exam_cols = specs["exams"]
+    exam_filter = [exams_t.c.published == True]  # noqa: E712
+    if class_ids is not None:
+        exam_filter.append(exams_t.c.class_id.in_(scope))
+    add("exams", rows(exams_t, exam_cols, *exam_filter))
+
+    questions_t, question_cols = specs["questions"]
+    exam_ids = {row[0] for row in tables["exams"]["rows"]}
+    add("questions", in_chunks(questions_t, question_cols, "exam_id", exam_ids))
+    variants_t, variant_cols = specs["exam_variants"]
+    add("exam_variants", in_chunks(variants_t, variant_cols, "exam_id", exam_ids))
+
+    subjects_t, subject_cols = specs["subjects"]
+    add("subjects", rows(subjects_t, subject_cols))
+
+    users_t, user_cols = specs["users"]
+    students = {row[0] for row in tables["student_class"]["rows"]}
+    staff = rows(users_t, user_cols, users_t.c.role.in_(["admin", "teacher"]))
+    staff_ids = {row[0] for row in staff}
+    add("users", staff + in_chunks(users_t, user_cols, "id", students - staff_ids))
+
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "version": snapshot_version(tables),
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "tables": tables,
+    }
+
+
+def snapshot_version(tables: dict) -> str:
+    """Hash of the snapshot's contents: equal versions mean equal rows."""
+    canonical = json.dumps(tables, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+# -------------------- edge side --------------------
+
+def applied_version(db: Session) -> Optional[str]:
+    """Version of the last snapshot applied here, if any."""
+    state = db.get(EdgeState, SNAPSHOT_VERSION_KEY)
+    return state.value if state else None
+
+
+def apply_snapshot(db: Session, snapshot: dict) -> dict:
+    """Make the local mirrored tables match `snapshot`, in one transaction.
+
+    Each table is compared with the local rows on the snapshot's columns:
+    new and changed rows are upserted, rows gone upstream are deleted and
+    the rest are left alone, so an edge serving exams only writes what
+    actually changed. The snapshot's version is stored with the rows.
+    Returns the number of rows written per table.
+    """
+    if snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format {snapshot.get('format')!r}")
+    counts = {}
+    try:
+        for table, columns in MIRRORED_TABLES:
+            data = snapshot["tables"].get(table.name, {"columns": list(columns), "rows": []})
+            names = data["columns"]
+            pk = [c.name for c in table.primary_key.columns]
+            incoming = {tuple(row[names.index(c)] for c in pk): dict(zip(names, row)) for row in data["rows"]}
+            local = {
+                tuple(record[c] for c in pk): record
+                for record in (dict(row._mapping) for row in db.execute(select(*[table.c[c] for c in names])))
+            }
+            changed = [record for key, record in incoming.items() if local.get(key) != record]
+            stale = [dict(zip(pk, key)) for key in local.keys() - incoming.keys()]
+            counts[table.name] = len(changed) + len(stale)
+
+            if stale:
+                stmt = delete(table).where(*[table.c[c] == bindparam(f"_{c}") for c in pk])
+                for chunk in _chunked(stale, CHUNK_SIZE):
+                    db.execute(stmt, [{f"_{c}": key[c] for c in pk} for key in chunk])
+            if not changed:
+                continue
+            stmt = sqlite_insert(table)
+            updates = [c for c in names if c not in pk]
+            if updates:
+                stmt = stmt.on_conflict_do_update(index_elements=pk, set_={c: stmt.excluded[c] for c in updates})
+            for chunk in _chunked(changed, CHUNK_SIZE):
+                db.execute(stmt, chunk)
+        db.merge(EdgeState(key=SNAPSHOT_VERSION_KEY, value=snapshot.get("version")))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return counts
+
+
+def queue_attempt(db: Session, student_id: int, exam_id: int, answers: list) -> EdgeOutbox:
+    """Queue a locally graded attempt for the central server.
+
+    Only adds the row; it is committed together with the local Result.
+    """
+    entry = EdgeOutbox(
+        idempotency_key=uuid.uuid4().hex,
+        payload={
+            "student_id": student_id,
+            "exam_id": exam_id,
+            "answers": answers,
+            "taken_at": datetime.now(timezone.utc).isoformat(),
+        },
+    )
+    db.add(entry)
+    return entry
+
+
+class UpstreamClient:
+    """Minimal JSON client for the central server (stdlib only)."""
+
+    def __init__(self, base_url: str, key: str, timeout: float = 60):
+        self.base_url = base_url.rstrip("/")
+        self.key = key
+        self.timeout = timeout
+
+    def _request(self, path: str, data: bytes = None, params: dict = None, headers: dict = None) -> bytes:
+        url = self.base_url + path
+        if params:
+            url += "?" + urllib.parse.urlencode(params)
+        headers = {"X-Edge-Key": self.key, **(headers or {})}
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+        request = urllib.request.Request(url, data=data, headers=headers, method="POST" if data is not None else "GET")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                raise  # Not Modified, for get_json_if_changed
+            raise UpstreamError(f"{path}: {e}") from e
+        except (urllib.error.URLError, OSError) as e:
+            raise UpstreamError(f"{path}: {e}") from e
+
+    def get_json(self, path: str, params: dict = None) -> dict:
+        return json.loads(self._request(path, params=params))
+
+    def get_json_if_changed(self, path: str, etag: Optional[str], params: dict = None) -> Optional[dict]:
+        """GET with If-None-Match; None when upstream answers 304 Not Modified."""
+        try:
+            return json.loads(self._request(path, params=params, headers={"If-None-Match": etag} if etag else None))
+        except urllib.error.HTTPError:
+            return None  # _request only lets 304 through
+
+    def post_json(self, path: str, payload: dict) -> dict:
+        return json.loads(self._request(path, data=json.dumps(payload).encode()))
+
+    def get_bytes(self, path: str) -> bytes:
+        return self._request(path)
+
+
+def pull(db: Session, client, class_ids: Optional[list] = None) -> dict:
+    """Fetch the snapshot if it changed, apply it and download missing images.
+
+    `unchanged` is True in the result when upstream still had the version
+    applied last, in which case nothing is written.
+    """
+    params = {"class_ids": ",".join(str(i) for i in class_ids)} if class_ids else None
+    version = applied_version(db)
+    snapshot = client.get_json_if_changed("/api/edge/snapshot", f'"{version}"' if version else None, params=params)
+    counts = {"unchanged": True} if snapshot is None else {"unchanged": False, **apply_snapshot(db, snapshot)}
+
+    downloaded = 0
+    urls = db.execute(select(Question.image_url).where(Question.image_url.like("/uploads/%")).distinct()).scalars().all()
+    for url in urls:
+        path = upload_path(url)
+        if path is None or os.path.exists(path):
+            continue  # content-hash names never change, so a present file is current
+        try:
+            data = client.get_bytes(url)
+        except UpstreamError as e:
+            logger.warning("Could not fetch image %s: %s", url, e)
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        write_sidecars(path, data)
+        downloaded += 1
+    counts["images_downloaded"] = downloaded
+    return counts
+
+
+def forward(db: Session, client, batch_size: Optional[int] = None) -> dict:
+    """Send queued attempts upstream until the queue is empty.
+
+    Accepted attempts (created or duplicate upstream) are removed; rejected
+    ones keep their row with `failed_reason` set. Stops at the first
+    network error, leaving the rest queued for the next run.
+    """
+    batch_size = batch_size or settings.EDGE_FORWARD_BATCH_SIZE
+    sent = failed = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(EdgeOutbox)
+            .filter(EdgeOutbox.failed_reason.is_(None), EdgeOutbox.id > last_id)
+            .order_by(EdgeOutbox.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            break
+        last_id = rows[-1].id
+        items = [{"idempotency_key": row.idempotency_key, **row.payload} for row in rows]
+        try:
+            response = client.post_json("/api/edge/results", {"items": items})
+        except UpstreamError:
+            for row in rows:
+                row.attempts += 1
+            db.commit()
+            raise
+
+        statuses = {item["idempotency_key"]: item for item in response["items"]}
+        for row in rows:
+            status = statuses.get(row.idempotency_key, {"status": "retry"})
+            if status["status"] in ("created", "duplicate"):
+                db.delete(row)
+                sent += 1
+            elif status["status"] in ("conflict", "error"):
+                row.failed_reason = status.get("detail") or status["status"]
+                failed += 1
+            else:
+                row.attempts += 1
+        db.commit()
+        if len(rows) < batch_size:
+            break
+    return {"sent": sent, "failed": failed}
+
+
+class EdgeSync:
+    """Background thread that pulls snapshots and forwards queued attempts."""
+
+    def __init__(self, session_factory, client, class_ids=None, pull_interval=None, forward_interval=None, lock_path=None):
+        self.session_factory = session_factory
+        self.client = client
+        self.class_ids = class_ids
+        self.pull_interval = pull_interval or settings.EDGE_PULL_INTERVAL_SECONDS
+        self.forward_interval = forward_interval or settings.EDGE_FORWARD_INTERVAL_SECONDS
+        self.lock_path = lock_path or settings.EDGE_LOCK_FILE
+        self._stop = threading.Event()
+        self._thread = None
+
+    def run_once(self, do_pull: bool = True, do_forward: bool = True) -> None:
+        with exclusive(self.lock_path) as owner:
+            if not owner:
+                return
+            db = self.session_factory()
+            try:
+                if do_pull:
+                    counts = pull(db, self.client, self.class_ids)
+                    logger.info("Edge pull applied: %s", counts)
+                if do_forward:
+                    outcome = forward(db, self.client)
+                    if outcome["sent"] or outcome["failed"]:
+                        logger.info("Edge forward: %s", outcome)
+            except UpstreamError as e:
+                logger.warning("Upstream unavailable: %s", e)
+            except Exception:
+                logger.exception("Edge sync failed")
+            finally:
+                db.close()
+
+    def _loop(self) -> None:
+        next_pull = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            due = now >= next_pull
+            self.run_once(do_pull=due, do_forward=True)
+            if due:
+                next_pull = now + self.pull_interval
+            self._stop.wait(self.forward_interval)
+
+    def start(self) -> "EdgeSync":
+        self._thread = threading.Thread(target=self._loop, name="edge-sync", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 10) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def start_edge_sync() -> EdgeSync:
+    from ..core.db import SessionLocal
+    if not settings.EDGE_UPSTREAM_URL or not settings.EDGE_SYNC_KEY:
+        raise RuntimeError("EDGE_MODE needs EDGE_UPSTREAM_URL and EDGE_SYNC_KEY")
+    client = UpstreamClient(settings.EDGE_UPSTREAM_URL, settings.EDGE_SYNC_KEY)
+    return EdgeSync(SessionLocal, client, class_ids=parse_class_ids(settings.EDGE_CLASS_IDS)).start()
@@ -6,14 +6,18 @@ from ..models.question import Question
 from ..models.subject import TeacherSubject
 from ..models.user import User
 from ..schemas.exam import ExamCreate
-from typing import List, Optional
-from docx import Document
+from . import bundle_service, duplicate_service, grading_service
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
 from fastapi import UploadFile
-from sqlalchemy import or_, and_
+from sqlalchemy import Integer, and_, bindparam, insert, or_, select
 import tempfile
 from io import BytesIO
+import logging
 import re
 
+logger = logging.getLogger(__name__)
+
 
 # CREATE EXAM
 def create_exam(db: Session, creator_id: int, exam_in: ExamCreate):
@@ -35,37 +39,41 @@ def create_exam(db: Session, creator_id: int, exam_in: ExamCreate):
 def get_exam(db: Session, exam_id: int):
     return db.query(Exam).filter(Exam.id == exam_id).first()
 
+
+def get_exams(db: Session, exam_ids) -> Dict[int, Exam]:
+    """{exam_id: Exam} for those of `exam_ids` that exist, read in chunks."""
+    ids = list(set(exam_ids))
+    exams = {}
+    for start in range(0, len(ids), 500):
+        exams.update((exam.id, exam) for exam in db.query(Exam).filter(Exam.id.in_(ids[start:start + 500])))
+    return exams
+
 # LIST EXAMS
-def list_exams(db: Session, published_only: bool = True, teacher_id: Optional[int] = None, student_id: Optional[int] = None):
-    """List exams, optionally filtered to published ones only.
+def _exam_filters(db: Session, published_only: bool = True, teacher_id: Optional[int] = None, student_id: Optional[int] = None):
+    """WHERE clauses for `list_exams`, or None when nothing can match."""
+    from ..models.subject import student_class_association
 
-    If `teacher_id` is provided the results include:
-    1. Exams belonging to classes/subjects the teacher is assigned to, OR
-    2. Exams created by the teacher themselves
-    
-    If `student_id` is provided, results are restricted to exams for the
-    student's enrolled class(es).
-    """
-    from ..models.subject import Class
-    
-    query = db.query(Exam)
+    filters = []
 
     # Filter by student's classes
     if student_id is not None:
-        # Get all classes the student is enrolled in
-        student_classes = db.query(Class).join(Class.students).filter(User.id == student_id).all()
-        class_ids = [c.id for c in student_classes]
+        # Only the ids: loading Class objects would also load every class's
+        # teacher, student and subject lists (lazy="selectin")
+        class_ids = [
+            row.class_id
+            for row in db.query(student_class_association.c.class_id).filter(student_class_association.c.student_id == student_id)
+        ]
         
         if not class_ids:
             # Student not enrolled in any class, return empty
-            return []
+            return None
         
         # Filter exams to those for the student's classes
-        query = query.filter(Exam.class_id.in_(class_ids))
+        filters.append(Exam.class_id.in_(class_ids))
     
     # Filter by teacher assignments and created exams
     elif teacher_id is not None:
-        ts = db.query(TeacherSubject).filter(TeacherSubject.teacher_id == teacher_id).all()
+        ts = db.query(TeacherSubject.class_id, TeacherSubject.subject_id).filter(TeacherSubject.teacher_id == teacher_id).all()
 
         # Build conditions: exams for assigned classes/subjects OR exams created by teacher
         conds = [Exam.created_by == teacher_id]  # Always include exams created by teacher
@@ -74,11 +82,35 @@ def list_exams(db: Session, published_only: bool = True, teacher_id: Optional[in
         for t in ts:
             conds.append(and_(Exam.class_id == t.class_id, Exam.subject_id == t.subject_id))
 
-        query = query.filter(or_(*conds))
+        filters.append(or_(*conds))
 
     if published_only:
-        query = query.filter(Exam.published == True)
-    return query.all()
+        filters.append(Exam.published == True)
+    return filters
+
+
+def list_exams(db: Session, published_only: bool = True, teacher_id: Optional[int] = None, student_id: Optional[int] = None):
+    """List exams, optionally filtered to published ones only.
+
+    If `teacher_id` is provided the results include:
+    1. Exams belonging to classes/subjects the teacher is assigned to, OR
+    2. Exams created by the teacher themselves
+    
+    If `student_id` is provided, results are restricted to exams for the
+    student's enrolled class(es).
+    """
+    filters = _exam_filters(db, published_only, teacher_id, student_id)
+    if filters is None:
+        return []
+    return db.query(Exam).filter(*filters).all()
+
+
+def list_exam_rows(db: Session, columns: dict, published_only: bool = True, teacher_id: Optional[int] = None, student_id: Optional[int] = None):
+    """`list_exams` as tuples of `columns` (see core/fastjson.py)."""
+    filters = _exam_filters(db, published_only, teacher_id, student_id)
+    if filters is None:
+        return []
+    return db.execute(select(*columns.values()).where(*filters).order_by(Exam.id)).all()
 
 
 def teacher_can_access_exam(db: Session, teacher_id: int, exam: Exam) -> bool:
@@ -117,14 +149,38 @@ def teacher_can_access_exam(db: Session, teacher_id: int, exam: Exam) -> bool:
     # Otherwise deny
     return False
 
+
+def teacher_access(db: Session, teacher_id: int) -> Callable[[Optional[Exam]], bool]:
+    """`teacher_can_access_exam` for many exams: reads the teacher's
+    assignments once and returns the check, which runs without queries."""
+    pairs = set(db.execute(
+        select(TeacherSubject.class_id, TeacherSubject.subject_id).where(TeacherSubject.teacher_id == teacher_id)
+    ).all())
+    classes = {class_id for class_id, _ in pairs}
+
+    def can_access(exam: Optional[Exam]) -> bool:
+        if not exam:
+            return False
+        if exam.created_by == teacher_id:
+            return True
+        if exam.class_id is not None and exam.subject_id is not None:
+            return (exam.class_id, exam.subject_id) in pairs
+        if exam.class_id is not None:
+            return exam.class_id in classes
+        return False
+
+    return can_access
+
 # DELETE EXAM
 def delete_exam(db: Session, exam_id: int) -> bool:
     """Delete an exam and return True if successful"""
     exam = db.query(Exam).filter(Exam.id == exam_id).first()
     if not exam:
         return False
+    duplicate_service.unindex_questions(db, select(Question.id).where(Question.exam_id == exam_id))
     db.delete(exam)
     db.commit()
+    bundle_service.invalidate_bundle(exam_id)
     return True
 
 # UPDATE EXAM
@@ -142,9 +198,12 @@ def update_exam(db: Session, exam_id: int, title: Optional[str] = None, descript
     if class_id is not None:
         exam.class_id = class_id
     if subject_id is not None:
+        if subject_id != exam.subject_id:
+            duplicate_service.move_exam(db, exam_id, subject_id)
         exam.subject_id = subject_id
     db.commit()
     db.refresh(exam)
+    bundle_service.invalidate_bundle(exam_id)
     return exam
 
 # UPDATE EXAM PUBLISHED STATUS
@@ -156,24 +215,110 @@ def update_exam_published(db: Session, exam_id: int, published: bool):
     exam.published = published
     db.commit()
     db.refresh(exam)
+    bundle_service.invalidate_bundle(exam_id)
+    if published:
+        # Build the offline bundle now so lab downloads are served from disk;
+        # a failure here only means the first download builds it instead
+        try:
+            bundle_service.build_exam_bundle(db, exam)
+        except Exception:
+            logger.exception("Could not build offline bundle for exam %s", exam_id)
     return exam
 
+# CLONE EXAMS
+@dataclass
+class CloneTarget:
+    """One copy to make: `exam_id` cloned into a class/subject (None keeps the source's)."""
+    exam_id: int
+    class_id: Optional[int] = None
+    subject_id: Optional[int] = None
+    title: Optional[str] = None
+
+
+# Copied as they are; a clone gets its own id and author, and starts unpublished
+_EXAM_FIELDS = [c.name for c in Exam.__table__.columns if c.name not in ("id", "created_by", "created_at", "published")]
+_QUESTION_FIELDS = [c.name for c in Question.__table__.columns if c.name not in ("id", "exam_id", "created_by")]
+
+
+def _copy_questions_statement():
+    source = select(bindparam("new_exam_id", type_=Integer), *[Question.__table__.c[name] for name in _QUESTION_FIELDS], bindparam("creator_id", type_=Integer))
+    source = source.where(Question.exam_id == bindparam("source_exam_id")).order_by(Question.id)
+    return insert(Question).from_select(["exam_id", *_QUESTION_FIELDS, "created_by"], source)
+
+
+# Built once and run with executemany: one prepared INSERT ... SELECT per
+# clone, whatever the number of questions
+_COPY_QUESTIONS = _copy_questions_statement()
+
+
+def clone_exams(db: Session, creator_id: int, targets: List[CloneTarget]) -> List[int]:
+    """Copy exams with all their questions in one transaction; returns the new ids in `targets` order.
+
+    Per-student papers are not copied: they belong to the source class's students.
+    """
+    source_ids = list({t.exam_id for t in targets})
+    sources = {}
+    for start in range(0, len(source_ids), 500):
+        chunk = source_ids[start:start + 500]
+        for row in db.execute(select(Exam.id, *[Exam.__table__.c[name] for name in _EXAM_FIELDS]).where(Exam.id.in_(chunk))):
+            sources[row.id] = row._mapping
+    missing = sorted(i for i in source_ids if i not in sources)
+    if missing:
+        raise ValueError(f"Exams not found: {', '.join(map(str, missing))}")
+
+    rows = []
+    for t in targets:
+        row = {name: sources[t.exam_id][name] for name in _EXAM_FIELDS}
+        for name in ("class_id", "subject_id", "title"):
+            if getattr(t, name) is not None:
+                row[name] = getattr(t, name)
+        rows.append({**row, "created_by": creator_id, "published": False})
+    if not rows:
+        return []
+    try:
+        new_ids = db.execute(insert(Exam).returning(Exam.id, sort_by_parameter_order=True), rows).scalars().all()
+        db.connection().execute(_COPY_QUESTIONS, [
+            {"new_exam_id": new_id, "source_exam_id": t.exam_id, "creator_id": creator_id}
+            for new_id, t in zip(new_ids, targets)
+        ])
+        duplicate_service.copy_index(db, [(new_id, t.exam_id) for new_id, t in zip(new_ids, targets)])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return new_ids
+
 # GET QUESTIONS
 def get_questions_for_exam(db: Session, exam_id: int):
     return db.query(Question).filter(Question.exam_id == exam_id).all()
 
 
+def get_question_rows_for_exam(db: Session, exam_id: int, columns: dict, question_ids: Optional[List[int]] = None):
+    """`get_questions_for_exam` as tuples of `columns` (see core/fastjson.py).
+
+    With `question_ids` (a student's paper), only those, in that order;
+    `columns` must then include "id".
+    """
+    stmt = select(*columns.values()).where(Question.exam_id == exam_id)
+    if question_ids is None:
+        return db.execute(stmt.order_by(Question.id)).all()
+    position = {question_id: i for i, question_id in enumerate(question_ids)}
+    rows = db.execute(stmt.where(Question.id.in_(question_ids))).all()
+    return sorted(rows, key=lambda row: position[row._mapping["id"]])
+
+
 def get_question(db: Session, question_id: int):
     return db.query(Question).filter(Question.id == question_id).first()
 
-def add_question(db: Session, creator_id: int, exam_id: int, text: str, options: list, correct_answer: int, marks: int = 1, image_url: str = None):
-    if not options:
+def add_question(db: Session, creator_id: int, exam_id: int, text: str, options: list, correct_answer: Optional[int], marks: int = 1, image_url: str = None,
+                 question_type: str = "single_choice", answer_key=None, negative_marks: float = 0):
+    options = options or []
+    if not options and question_type in ("single_choice", "multi_select", "true_false"):
         raise ValueError("Options cannot be empty")
     exam = db.query(Exam).filter(Exam.id == exam_id).first()
     if not exam:
         raise ValueError("Exam not found")
-    if correct_answer < 0 or correct_answer >= len(options):
-        raise ValueError("correct_answer index out of range")
+    correct_answer, answer_key = grading_service.validate_question(question_type, options, correct_answer, answer_key)
 
     q = Question(
         exam_id=exam_id,
@@ -182,35 +327,43 @@ def add_question(db: Session, creator_id: int, exam_id: int, text: str, options:
         correct_answer=correct_answer,
         marks=marks,
         image_url=image_url,
+        question_type=question_type,
+        answer_key=answer_key,
+        negative_marks=negative_marks or 0,
         created_by=creator_id
     )
     try:
         db.add(q)
+        db.flush()
+        duplicate_service.index_question(db, q.id, exam.subject_id, text, options)
         db.commit()
         db.refresh(q)
     except Exception:
         db.rollback()
         raise
+    bundle_service.invalidate_bundle(exam_id)
     return q
 
 
 # UPDATE QUESTION
-def update_question(db: Session, question_id: int, updater_id: int, text: Optional[str] = None, options: Optional[list] = None, correct_answer: Optional[int] = None, marks: Optional[int] = None, image_url: Optional[str] = None):
+def update_question(db: Session, question_id: int, updater_id: int, text: Optional[str] = None, options: Optional[list] = None, correct_answer: Optional[int] = None, marks: Optional[int] = None, image_url: Optional[str] = None,
+                    question_type: Optional[str] = None, answer_key=None, negative_marks: Optional[float] = None):
     q = db.query(Question).filter(Question.id == question_id).first()
     if not q:
         raise ValueError("Question not found")
 
-    # If options provided, validate correct_answer index (if provided)
-    if options is not None:
-        if len(options) < 2:
-            raise ValueError("Options must contain at least two items")
-        q.options = options
-    if correct_answer is not None:
-        if q.options is None:
-            raise ValueError("Cannot set correct_answer without options")
-        if correct_answer < 0 or correct_answer >= len(q.options):
-            raise ValueError("correct_answer index out of range")
-        q.correct_answer = correct_answer
+    # The key is checked as a whole against the question's (new) type
+    if options is not None or correct_answer is not None or question_type is not None or answer_key is not None:
+        new_type = question_type or q.question_type
+        new_options = options if options is not None else q.options
+        new_correct = correct_answer if correct_answer is not None else q.correct_answer
+        # A new type brings its own key; otherwise the stored one carries over
+        new_key = answer_key if answer_key is not None or question_type not in (None, q.question_type) else q.answer_key
+        q.correct_answer, q.answer_key = grading_service.validate_question(new_type, new_options, new_correct, new_key)
+        q.question_type = new_type
+        q.options = new_options
+    if negative_marks is not None:
+        q.negative_marks = negative_marks
     if text is not None:
         q.text = text
     if marks is not None:
@@ -220,11 +373,15 @@ def update_question(db: Session, question_id: int, updater_id: int, text: Option
 
     try:
         db.add(q)
+        if text is not None or options is not None:
+            subject_id = db.execute(select(Exam.subject_id).where(Exam.id == q.exam_id)).scalar()
+            duplicate_service.index_question(db, q.id, subject_id, q.text, q.options)
         db.commit()
         db.refresh(q)
     except Exception:
         db.rollback()
         raise
+    bundle_service.invalidate_bundle(q.exam_id)
     return q
 
 
@@ -233,35 +390,50 @@ def delete_question(db: Session, question_id: int) -> bool:
     q = db.query(Question).filter(Question.id == question_id).first()
     if not q:
         return False
+    exam_id = q.exam_id
     try:
+        duplicate_service.unindex_questions(db, [question_id])
         db.delete(q)
         db.commit()
     except Exception:
         db.rollback()
         raise
+    bundle_service.invalidate_bundle(exam_id)
     return True
 
 
 # existing functions...
 
-def import_questions_from_docx(db: Session, exam_id: int, file_bytes: bytes, creator_id: int):
+def import_questions_from_docx(db: Session, exam_id: int, file_bytes: bytes, creator_id: int, on_duplicate: str = "flag", duplicate_threshold: Optional[float] = None):
     """
     Parse a docx from bytes and create questions for the given exam.
     Supports multiple question formats:
     - Numbered: "1. Question text" / "A. Option" / "Answer: A"
     - Bullet: "• Question" / "A) Option" / "Answer: A"
-    
+
+    Each question is checked against the subject's existing questions (and
+    the ones imported before it) for near-duplicates; with
+    `on_duplicate="skip"` those are left out, with "flag" they are created
+    and reported.
+
     Returns dict with success status and number of questions created.
     """
+    if on_duplicate not in ("flag", "skip"):
+        raise ValueError("on_duplicate must be 'flag' or 'skip'")
     questions_created = 0
     questions_skipped = 0
     errors = []
+    duplicates = []
 
     # Basic validations
     exam = db.query(Exam).filter(Exam.id == exam_id).first()
     if not exam:
         raise ValueError("Exam not found")
 
+    # python-docx (and lxml) are only needed here; import on first use so
+    # every worker doesn't pay for them at start-up
+    from docx import Document
+
     try:
         doc = Document(BytesIO(file_bytes))
     except Exception as e:
@@ -334,6 +506,17 @@ def import_questions_from_docx(db: Session, exam_id: int, file_bytes: bytes, cre
 
             # Create question if we have required data
             if len(options) >= 2 and correct_answer is not None:
+                match = duplicate_service.find_duplicate(db, exam.subject_id, question_text, options, threshold=duplicate_threshold)
+                if match:
+                    duplicates.append({
+                        "question": question_text[:80],
+                        "duplicate_of": match.question_id,
+                        "similarity": round(match.similarity, 2),
+                        "action": "skipped" if on_duplicate == "skip" else "flagged",
+                    })
+                    if on_duplicate == "skip":
+                        questions_skipped += 1
+                        continue
                 try:
                     add_question(
                         db,
@@ -359,6 +542,7 @@ def import_questions_from_docx(db: Session, exam_id: int, file_bytes: bytes, cre
         "success": True,
         "questions_created": questions_created,
         "questions_skipped": questions_skipped,
+        "duplicates": duplicates,
         "errors": errors[:10]  # Return first 10 errors
     }
 
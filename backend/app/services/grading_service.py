@@ -0,0 +1,242 @@
+"""
+Question types and grading.
+
+Every question type is registered here with three functions:
+
+- `validate(options, correct_answer, answer_key)` checks what a teacher
+  entered. It returns the (correct_answer, answer_key) pair to store.
+  `correct_answer` stays the single-choice key that older clients read.
+  The other types keep their key in `answer_key`.
+- `compile(correct_answer, answer_key)` turns the stored key into whatever
+  makes scoring cheapest, such as a frozenset of indices or normalized
+  accepted answers.
+- `score(answer, key, marks, penalty)` gives the points for one answer.
+  A blank answer scores 0. A wrong one scores `-penalty`, the question's
+  `negative_marks`.
+
+Grading first compiles the answer table for the questions involved, with
+one query: {question_id: (score, key, marks, penalty)}. The type decides
+which function goes into the row, once, at compile time. The loop over a
+student's answers is then a lookup and a call per answer, with no
+branching on question types. A new type is one `register` call.
+
+An attempt's max_score counts the marks of the questions answered (as it
+always has), and its score never drops below zero.
+"""
+
+import math
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import Session
+
+from ..models.question import Question
+
+DEFAULT_TYPE = "single_choice"
+
+_PUNCTUATION = re.compile(r"[^\w\s]+|_", re.UNICODE)
+
+
+def normalize_answer(text: str) -> str:
+    """A short answer as compared: casefolded, without diacritics or
+    punctuation ("F.C.T." is "fct"), single-spaced."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return " ".join(_PUNCTUATION.sub("", stripped.casefold()).split())
+
+
+@dataclass(frozen=True)
+class QuestionType:
+    name: str
+    validate: Callable[[list, Optional[int], Any], Tuple[int, Any]]
+    compile: Callable[[int, Any], Any]
+    score: Callable[[dict, Any, float, float], float]
+
+
+QUESTION_TYPES: Dict[str, QuestionType] = {}
+
+
+def register(question_type: QuestionType) -> QuestionType:
+    QUESTION_TYPES[question_type.name] = question_type
+    return question_type
+
+
+def get_type(name: Optional[str]) -> QuestionType:
+    try:
+        return QUESTION_TYPES[name or DEFAULT_TYPE]
+    except KeyError:
+        raise ValueError(f"question_type must be one of {', '.join(QUESTION_TYPES)}") from None
+
+
+def validate_question(question_type: Optional[str], options: list, correct_answer: Optional[int], answer_key: Any = None) -> Tuple[int, Any]:
+    """The (correct_answer, answer_key) to store for a question; raises ValueError."""
+    return get_type(question_type).validate(options or [], correct_answer, answer_key)
+
+
+# -------------------- the built-in types --------------------
+
+def _index_in_range(options: list, index: Optional[int]) -> int:
+    if index is None:
+        raise ValueError("correct_answer is required")
+    if not 0 <= index < len(options):
+        raise ValueError("correct_answer index out of range")
+    return index
+
+
+def _validate_single(options, correct_answer, answer_key):
+    if len(options) < 2:
+        raise ValueError("Options must contain at least two items")
+    return _index_in_range(options, correct_answer), None
+
+
+def _validate_true_false(options, correct_answer, answer_key):
+    if len(options) != 2:
+        raise ValueError("A true/false question has exactly two options")
+    return _index_in_range(options, correct_answer), None
+
+
+def _compile_single(correct_answer, answer_key):
+    return correct_answer
+
+
+def _score_single(answer, key, marks, penalty):
+    picked = answer.get("answer_index")
+    if picked is None:
+        return 0.0
+    return marks if picked == key else -penalty
+
+
+def _validate_multi(options, correct_answer, answer_key):
+    if len(options) < 2:
+        raise ValueError("Options must contain at least two items")
+    if not answer_key or not isinstance(answer_key, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in answer_key):
+        raise ValueError("answer_key must list the correct option indices")
+    indices = sorted({_index_in_range(options, i) for i in answer_key})
+    return indices[0], indices
+
+
+def _compile_multi(correct_answer, answer_key):
+    return frozenset(answer_key or [correct_answer])
+
+
+def _score_multi(answer, key, marks, penalty):
+    """Partial credit: each correct pick earns its share of the marks and each
+    wrong pick cancels one; the penalty applies only when nothing is left."""
+    picked = answer.get("selected")
+    if picked is None:
+        picked = [] if answer.get("answer_index") is None else [answer["answer_index"]]
+    picked = set(picked)
+    if not picked:
+        return 0.0
+    hits = len(picked & key)
+    net = hits - (len(picked) - hits)
+    return marks * net / len(key) if net > 0 else -penalty
+
+
+def _validate_numeric(options, correct_answer, answer_key):
+    if not isinstance(answer_key, dict) or "value" not in answer_key:
+        raise ValueError('answer_key must be {"value": number, "tolerance": number}')
+    try:
+        value, tolerance = float(answer_key["value"]), float(answer_key.get("tolerance") or 0)
+    except (TypeError, ValueError):
+        raise ValueError("answer_key value and tolerance must be numbers") from None
+    if not math.isfinite(value) or not math.isfinite(tolerance) or tolerance < 0:
+        raise ValueError("answer_key value must be finite and tolerance non-negative")
+    return 0, {"value": value, "tolerance": tolerance}
+
+
+def _compile_numeric(correct_answer, answer_key):
+    return (answer_key["value"], answer_key["tolerance"])
+
+
+def _score_numeric(answer, key, marks, penalty):
+    given = answer.get("value")
+    if given is None or given == "":
+        return 0.0
+    try:
+        number = float(str(given).replace(",", "").strip())
+    except ValueError:
+        return -penalty
+    value, tolerance = key
+    # A little slack, so 0.1 + 0.2 still counts as 0.3 with no tolerance
+    return marks if abs(number - value) <= tolerance + 1e-9 * max(1.0, abs(value)) else -penalty
+
+
+def _validate_short_text(options, correct_answer, answer_key):
+    accepted = answer_key if isinstance(answer_key, list) else [answer_key] if isinstance(answer_key, str) else None
+    accepted = [str(a) for a in accepted or [] if normalize_answer(str(a))]
+    if not accepted:
+        raise ValueError("answer_key must list the accepted answers")
+    return 0, accepted
+
+
+def _compile_short_text(correct_answer, answer_key):
+    return frozenset(normalize_answer(a) for a in answer_key)
+
+
+def _score_short_text(answer, key, marks, penalty):
+    given = normalize_answer(str(answer.get("value") or ""))
+    if not given:
+        return 0.0
+    return marks if given in key else -penalty
+
+
+register(QuestionType("single_choice", _validate_single, _compile_single, _score_single))
+register(QuestionType("true_false", _validate_true_false, _compile_single, _score_single))
+register(QuestionType("multi_select", _validate_multi, _compile_multi, _score_multi))
+register(QuestionType("numeric", _validate_numeric, _compile_numeric, _score_numeric))
+register(QuestionType("short_text", _validate_short_text, _compile_short_text, _score_short_text))
+
+
+# -------------------- compiling and grading --------------------
+
+# What compile_answer_table reads per question, in this order
+ANSWER_COLUMNS = (Question.id, Question.question_type, Question.correct_answer, Question.answer_key, Question.marks, Question.negative_marks)
+# Built once and run on the connection: every submission loads its answer table
+_ANSWER_ROWS = select(*ANSWER_COLUMNS).where(Question.id.in_(bindparam("ids", expanding=True)))
+
+
+def compile_answer_table(rows: Iterable[tuple]) -> dict:
+    """{question_id: (score, key, marks, penalty)} from rows of ANSWER_COLUMNS."""
+    table = {}
+    for question_id, question_type, correct_answer, answer_key, marks, negative_marks in rows:
+        kind = QUESTION_TYPES.get(question_type or DEFAULT_TYPE, QUESTION_TYPES[DEFAULT_TYPE])
+        table[question_id] = (kind.score, kind.compile(correct_answer, answer_key), float(marks or 0), float(negative_marks or 0))
+    return table
+
+
+def load_answer_table(db: Session, question_ids: Iterable[int], chunk_size: int = 500) -> dict:
+    """The compiled answer table for `question_ids`, read in chunks."""
+    ids = list(set(question_ids))
+    table = {}
+    for start in range(0, len(ids), chunk_size):
+        rows = db.connection().execute(_ANSWER_ROWS, {"ids": ids[start:start + chunk_size]}).all()
+        table.update(compile_answer_table(rows))
+    return table
+
+
+def grade(answers: list, table: dict, paper: Optional[Iterable[int]] = None) -> Tuple[float, float]:
+    """(score, max_score) for `answers` against a compiled answer table.
+
+    Without `paper`, max_score counts the questions answered. With `paper`
+    (the question ids a student was set) answers to anything else are
+    ignored, and max_score covers the whole paper, answered or not.
+    """
+    score = 0.0
+    max_score = 0.0
+    get = table.get
+    if paper is not None:
+        paper = set(paper)
+    for answer in answers:
+        entry = get(answer["question_id"])
+        if entry is None or (paper is not None and answer["question_id"] not in paper):
+            continue
+        scorer, key, marks, penalty = entry
+        max_score += marks
+        score += scorer(answer, key, marks, penalty)
+    if paper is not None:
+        max_score = sum(table[question_id][2] for question_id in paper if question_id in table)
+    return max(score, 0.0), max_score
@@ -0,0 +1,250 @@
+"""
+The question bank: reusable questions tagged by subject, level, topic and
+difficulty, searched through an SQLite FTS5 index (models/question_bank.py).
+
+Exams keep owning their `Question` rows, since those are what grading,
+offline bundles and edge snapshots read. Attaching bank items to an exam is
+one INSERT ... SELECT of rows linked back through `bank_question_id`, and
+editing a bank item rewrites the linked questions of every exam nobody has
+sat yet, so the bank is the one copy teachers maintain. Exams that already
+have results keep the wording their students saw.
+"""
+
+import re
+from typing import Iterable, List, Optional
+
+from sqlalchemy import case, column, exists, func, insert, literal, literal_column, select, table, update
+from sqlalchemy.orm import Session
+
+from ..models.exam import Exam
+from ..models.question import Question
+from ..models.question_bank import DIFFICULTIES, FTS_TABLE, BankQuestion
+from ..models.result import Result
+from ..models.subject import Class
+from . import bundle_service, duplicate_service
+
+# Fields copied from a bank item onto the exam questions linked to it
+SHARED_FIELDS = ("text", "options", "correct_answer", "marks", "image_url")
+
+# bm25 weight of each FTS column (text, topic, options): a hit on the topic
+# is the strongest signal, a hit in an option the weakest
+RANK_WEIGHTS = (1.0, 2.0, 0.5)
+
+_fts = table(FTS_TABLE, column("rowid"))
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_query(search: Optional[str]) -> Optional[str]:
+    """A MATCH expression for what a user typed, or None if it has no words.
+
+    Every word must appear (FTS5's implicit AND); the last one also matches
+    as a prefix so results follow the user as they type. Words are quoted,
+    so input can never be read as FTS5 syntax.
+    """
+    terms = _TERM.findall(search or "")
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _validate(difficulty: Optional[str], options: Optional[list], correct_answer: Optional[int]):
+    if difficulty is not None and difficulty not in DIFFICULTIES:
+        raise ValueError(f"difficulty must be one of {', '.join(DIFFICULTIES)}")
+    if options is not None and len(options) < 2:
+        raise ValueError("Options must contain at least two items")
+    if options is not None and correct_answer is not None and not 0 <= correct_answer < len(options):
+        raise ValueError("correct_answer index out of range")
+
+
+def create_bank_question(db: Session, creator_id: int, subject_id: int, level: str, text: str, options: list, correct_answer: int,
+                         topic: Optional[str] = None, difficulty: str = "medium", marks: int = 1, image_url: Optional[str] = None) -> BankQuestion:
+    _validate(difficulty, options, correct_answer)
+    item = BankQuestion(
+        subject_id=subject_id, level=level, topic=topic, difficulty=difficulty, text=text, options=options,
+        correct_answer=correct_answer, marks=marks, image_url=image_url, created_by=creator_id,
+    )
+    try:
+        db.add(item)
+        db.commit()
+        db.refresh(item)
+    except Exception:
+        db.rollback()
+        raise
+    return item
+
+
+def get_bank_question(db: Session, bank_question_id: int) -> Optional[BankQuestion]:
+    return db.query(BankQuestion).filter(BankQuestion.id == bank_question_id).first()
+
+
+def _unsat_linked_questions(bank_question_id: int):
+    """WHERE clauses for questions linked to a bank item on exams with no results."""
+    return (
+        Question.bank_question_id == bank_question_id,
+        ~exists().where(Result.exam_id == Question.exam_id),
+    )
+
+
+def _linked_exam_ids(db: Session, bank_question_id: int) -> List[int]:
+    return db.execute(select(Question.exam_id).where(Question.bank_question_id == bank_question_id).distinct()).scalars().all()
+
+
+def update_bank_question(db: Session, bank_question_id: int, **fields) -> BankQuestion:
+    """Update a bank item and the linked questions of exams not yet sat."""
+    item = get_bank_question(db, bank_question_id)
+    if not item:
+        raise ValueError("Question not found")
+    fields = {k: v for k, v in fields.items() if v is not None}
+    options = fields.get("options", item.options)
+    correct_answer = fields.get("correct_answer", item.correct_answer)
+    _validate(fields.get("difficulty"), options, correct_answer)
+    for name, value in fields.items():
+        setattr(item, name, value)
+
+    shared = {name: getattr(item, name) for name in SHARED_FIELDS if name in fields}
+    exam_ids = _linked_exam_ids(db, bank_question_id) if shared else []
+    try:
+        if shared:
+            question_ids = db.execute(select(Question.id).where(*_unsat_linked_questions(bank_question_id))).scalars().all()
+            db.execute(update(Question).where(Question.id.in_(question_ids)).values(**shared).execution_options(synchronize_session=False))
+            if "text" in shared or "options" in shared:
+                duplicate_service.reindex_questions(db, question_ids)
+        db.commit()
+        db.refresh(item)
+    except Exception:
+        db.rollback()
+        raise
+    for exam_id in exam_ids:
+        bundle_service.invalidate_bundle(exam_id)
+    return item
+
+
+def delete_bank_question(db: Session, bank_question_id: int) -> bool:
+    """Delete a bank item; questions already attached to exams are kept, unlinked."""
+    item = get_bank_question(db, bank_question_id)
+    if not item:
+        return False
+    try:
+        # Done here rather than by ON DELETE SET NULL, which SQLite only
+        # honours with PRAGMA foreign_keys on
+        db.execute(update(Question).where(Question.bank_question_id == bank_question_id).values(bank_question_id=None).execution_options(synchronize_session=False))
+        db.delete(item)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return True
+
+
+def search_bank(db: Session, columns: dict, search: Optional[str] = None, subject_id: Optional[int] = None, level: Optional[str] = None,
+                topic: Optional[str] = None, difficulty: Optional[str] = None, limit: int = 20, offset: int = 0):
+    """Bank items as tuples of `columns` (see core/fastjson.py), best match first.
+
+    With search words the FTS index finds the candidates and bm25 ranks
+    them; without, the tag filters alone apply and the newest items come
+    first.
+    """
+    filters = []
+    if subject_id is not None:
+        filters.append(BankQuestion.subject_id == subject_id)
+    if level is not None:
+        filters.append(BankQuestion.level == level)
+    if topic is not None:
+        filters.append(BankQuestion.topic == topic)
+    if difficulty is not None:
+        filters.append(BankQuestion.difficulty == difficulty)
+
+    stmt = select(*columns.values())
+    match = fts_query(search)
+    if match is None or db.get_bind().dialect.name != "sqlite":
+        if match is not None:
+            # No FTS5 outside SQLite: every word must appear in the text
+            filters.extend(BankQuestion.text.ilike(f"%{term}%") for term in _TERM.findall(search))
+        stmt = stmt.where(*filters).order_by(BankQuestion.id.desc())
+    else:
+        rank = func.bm25(literal_column(FTS_TABLE), *RANK_WEIGHTS)
+        stmt = (
+            stmt.select_from(_fts)
+            .join(BankQuestion, BankQuestion.id == _fts.c.rowid)
+            .where(literal_column(FTS_TABLE).op("MATCH")(match), *filters)
+            .order_by(rank, BankQuestion.id)
+        )
+    return db.execute(stmt.limit(limit).offset(offset)).all()
+
+
+def insert_linked_questions(db: Session, exam_id: int, bank_question_ids: List[int], creator_id: int) -> int:
+    """INSERT ... SELECT bank items into an exam, in the order given, skipping
+    any it already has, and index them for duplicate detection; returns how
+    many were added. The caller commits."""
+    already = exists().where(Question.exam_id == exam_id, Question.bank_question_id == BankQuestion.id)
+    if all(a < b for a, b in zip(bank_question_ids, bank_question_ids[1:])):
+        order = BankQuestion.id
+    else:
+        # Compiling a CASE this long costs more than the insert, hence the shortcut above
+        order = case({bank_id: position for position, bank_id in enumerate(bank_question_ids)}, value=BankQuestion.id)
+    source = (
+        select(literal(exam_id), *[getattr(BankQuestion, name) for name in SHARED_FIELDS], literal(creator_id), BankQuestion.id)
+        .where(BankQuestion.id.in_(bank_question_ids), ~already)
+        .order_by(order)
+    )
+    target = ["exam_id", *SHARED_FIELDS, "created_by", "bank_question_id"]
+    added = db.execute(insert(Question).from_select(target, source)).rowcount
+    duplicate_service.index_new_questions(db, [exam_id])
+    return added
+
+
+def attach_to_exam(db: Session, exam_id: int, bank_question_ids: Iterable[int], creator_id: int) -> int:
+    """Add bank items to an exam, in the order given; returns how many were added.
+
+    Items the exam already has are skipped, so attaching twice is harmless.
+    """
+    ids = list(dict.fromkeys(bank_question_ids))
+    if not db.query(Exam.id).filter(Exam.id == exam_id).first():
+        raise ValueError("Exam not found")
+    found = set(db.execute(select(BankQuestion.id).where(BankQuestion.id.in_(ids))).scalars())
+    missing = [i for i in ids if i not in found]
+    if missing:
+        raise ValueError(f"Bank questions not found: {', '.join(map(str, missing))}")
+
+    try:
+        added = insert_linked_questions(db, exam_id, ids, creator_id)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    bundle_service.invalidate_bundle(exam_id)
+    return added
+
+
+def save_exam_to_bank(db: Session, exam_id: int, creator_id: int, topic: Optional[str] = None, difficulty: str = "medium") -> int:
+    """Copy an exam's unlinked questions into the bank and link them; returns how many."""
+    _validate(difficulty, None, None)
+    exam = db.query(Exam).filter(Exam.id == exam_id).first()
+    if not exam:
+        raise ValueError("Exam not found")
+    level = db.execute(select(Class.level).where(Class.id == exam.class_id)).scalar() if exam.class_id else None
+    if exam.subject_id is None or level is None:
+        raise ValueError("Exam needs a class and a subject before its questions can go to the bank")
+
+    questions = db.execute(
+        select(Question.id, *[getattr(Question, name) for name in SHARED_FIELDS])
+        .where(Question.exam_id == exam_id, Question.bank_question_id.is_(None))
+        .order_by(Question.id)
+    ).all()
+    if not questions:
+        return 0
+    tags = {"subject_id": exam.subject_id, "level": level, "topic": topic, "difficulty": difficulty, "created_by": creator_id}
+    try:
+        bank_ids = db.execute(
+            insert(BankQuestion).returning(BankQuestion.id, sort_by_parameter_order=True),
+            [{**tags, **dict(zip(SHARED_FIELDS, row[1:]))} for row in questions],
+        ).scalars().all()
+        # Bulk UPDATE by primary key
+        db.execute(update(Question), [{"id": row.id, "bank_question_id": bank_id} for row, bank_id in zip(questions, bank_ids)])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return len(bank_ids)
@@ -0,0 +1,201 @@
+"""
+Registration number allocator.
+
+Registration numbers look like NG/EEV/1234A: four digits and a letter, giving
+10,000 * 26 = 260,000 slots per prefix. Slot `i` maps to digits `i // 26`
+and letter `i % 26`.
+
+The allocator keeps a bitmap of used slots (about 32 KB) that is loaded from
+the database once. The slot space is split into blocks of `REG_BLOCK_SIZE`;
+each allocator (one per worker process) claims whole blocks through the
+`registration_blocks` table and hands out free slots from its current block
+in order, so handing out a number is O(1) and two workers never offer the
+same number. The unique index on `users.registration_number` stays as the
+final guard.
+"""
+
+import os
+import random
+import socket
+import threading
+import uuid
+import weakref
+from array import array
+from typing import List, Optional
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.user import User, RegistrationBlock
+
+DEFAULT_PREFIX = "NG/EEV"
+LETTERS = 26
+SLOT_COUNT = 10000 * LETTERS
+
+
+def slot_to_number(prefix: str, slot: int) -> str:
+    digits, letter = divmod(slot, LETTERS)
+    return f"{prefix}/{digits:04d}{chr(65 + letter)}"
+
+
+def number_to_slot(prefix: str, reg: str) -> Optional[int]:
+    """Return the slot of `reg`, accepting the legacy NG/EEV/1234/A form, or None."""
+    if not reg:
+        return None
+    reg = reg.strip().upper()
+    head = prefix.upper() + "/"
+    if not reg.startswith(head):
+        return None
+    tail = reg[len(head):].replace("/", "")
+    if len(tail) != 5 or not tail[:4].isdigit() or not ("A" <= tail[4] <= "Z"):
+        return None
+    return int(tail[:4]) * LETTERS + (ord(tail[4]) - 65)
+
+
+class RegistrationNumberAllocator:
+    def __init__(self, prefix: str = DEFAULT_PREFIX, block_size: Optional[int] = None):
+        self.prefix = prefix
+        self.block_size = block_size or settings.REG_BLOCK_SIZE
+        self.block_count = (SLOT_COUNT + self.block_size - 1) // self.block_size
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._used = bytearray((SLOT_COUNT + 7) // 8)
+        self._block_used = array("H", [0]) * self.block_count
+        self._loaded = False
+        self._block: Optional[int] = None
+        self._cursor = 0
+        self._block_end = 0
+
+    # --- bitmap helpers ---
+    def _is_used(self, slot: int) -> bool:
+        return bool(self._used[slot >> 3] & (1 << (slot & 7)))
+
+    def _mark_used(self, slot: int) -> None:
+        if not self._is_used(slot):
+            self._used[slot >> 3] |= 1 << (slot & 7)
+            self._block_used[slot // self.block_size] += 1
+
+    def _block_capacity(self, block_no: int) -> int:
+        return min(self.block_size, SLOT_COUNT - block_no * self.block_size)
+
+    def _load(self, db: Session) -> None:
+        """Load every used number for this prefix into the bitmap (once)."""
+        rows = (
+            db.query(User.registration_number)
+            .filter(User.registration_number.like(f"{self.prefix}/%"))
+            .all()
+        )
+        for (reg,) in rows:
+            slot = number_to_slot(self.prefix, reg)
+            if slot is not None:
+                self._mark_used(slot)
+        self._loaded = True
+
+    def _refresh_block(self, db: Session, block_no: int) -> None:
+        """Pick up numbers another worker may have issued from this block."""
+        start = block_no * self.block_size
+        numbers = [
+            slot_to_number(self.prefix, s)
+            for s in range(start, start + self._block_capacity(block_no))
+        ]
+        for (reg,) in db.query(User.registration_number).filter(User.registration_number.in_(numbers)).all():
+            self._mark_used(number_to_slot(self.prefix, reg))
+
+    def _claim_block(self, db: Session) -> None:
+        """Reserve a block with free slots. Commits the session."""
+        claimed = {
+            block_no: owner
+            for block_no, owner in db.query(RegistrationBlock.block_no, RegistrationBlock.owner)
+            .filter(RegistrationBlock.prefix == self.prefix)
+            .all()
+        }
+        free = [
+            b for b in range(self.block_count)
+            if b not in claimed and self._block_used[b] < self._block_capacity(b)
+        ]
+        random.shuffle(free)
+        for block_no in free:
+            # ON CONFLICT DO NOTHING: losing a race to another worker is not an error
+            taken = db.execute(
+                sqlite_insert(RegistrationBlock)
+                .values(prefix=self.prefix, block_no=block_no, owner=self.owner)
+                .on_conflict_do_nothing()
+            ).rowcount
+            db.commit()
+            if taken:
+                return self._start_block(db, block_no)
+
+        # Every block is claimed: take over a partly used block from another
+        # owner (e.g. a worker that has exited). Only reached near exhaustion.
+        for block_no, old_owner in claimed.items():
+            if old_owner == self.owner or self._block_used[block_no] >= self._block_capacity(block_no):
+                continue
+            moved = (
+                db.query(RegistrationBlock)
+                .filter(
+                    RegistrationBlock.prefix == self.prefix,
+                    RegistrationBlock.block_no == block_no,
+                    RegistrationBlock.owner == old_owner,
+                )
+                .update({RegistrationBlock.owner: self.owner}, synchronize_session=False)
+            )
+            db.commit()
+            if moved:
+                self._start_block(db, block_no)
+                if self._block_used[block_no] < self._block_capacity(block_no):
+                    return
+        raise ValueError("Registration number space exhausted")
+
+    def _start_block(self, db: Session, block_no: int) -> None:
+        self._refresh_block(db, block_no)
+        self._block = block_no
+        self._cursor = block_no * self.block_size
+        self._block_end = self._cursor + self._block_capacity(block_no)
+
+    def _next_slot(self, db: Session) -> int:
+        while True:
+            if self._block is not None:
+                while self._cursor < self._block_end:
+                    slot = self._cursor
+                    self._cursor += 1
+                    if not self._is_used(slot):
+                        self._mark_used(slot)
+                        return slot
+            self._block = None
+            self._claim_block(db)
+
+    def allocate_many(self, db: Session, count: int) -> List[str]:
+        """Hand out `count` unused registration numbers.
+
+        May commit `db` when a new block has to be claimed, so call it before
+        adding the rows that will use the numbers.
+        """
+        with self._lock:
+            if not self._loaded:
+                self._load(db)
+            return [slot_to_number(self.prefix, self._next_slot(db)) for _ in range(count)]
+
+    def allocate(self, db: Session) -> str:
+        return self.allocate_many(db, 1)[0]
+
+    def mark_used(self, reg: str) -> None:
+        """Record a number found taken after the fact (e.g. an IntegrityError)."""
+        slot = number_to_slot(self.prefix, reg)
+        if slot is not None:
+            with self._lock:
+                self._mark_used(slot)
+
+
+# One allocator per (database, prefix) in this process
+_allocators: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_allocators_lock = threading.Lock()
+
+
+def get_allocator(db: Session, prefix: str = DEFAULT_PREFIX) -> RegistrationNumberAllocator:
+    engine = db.get_bind()
+    with _allocators_lock:
+        per_engine = _allocators.setdefault(engine, {})
+        if prefix not in per_engine:
+            per_engine[prefix] = RegistrationNumberAllocator(prefix)
+        return per_engine[prefix]
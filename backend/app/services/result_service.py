@@ -1,26 +1,25 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
-from ..models.result import Result
-from ..models.question import Question
+from ..core.config import settings
+from ..models.result import Result, ResultSyncReceipt
 from ..models.exam import Exam
+from ..models.user import User
+from . import assembly_service, dashboard_service, grading_service
+
+
+def _chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 
 def grade_and_record(db: Session, student_id: int, exam_id: int, answers: list):
-    # build a map question_id -> Question
-    q_ids = [a['question_id'] for a in answers]
-    questions = db.query(Question).filter(Question.id.in_(q_ids)).all()
-    q_map = {q.id: q for q in questions}
-
-    score = 0.0
-    max_score = 0.0
-    # evaluate
-    for a in answers:
-        qid = a['question_id']
-        ans_index = a.get('answer_index')
-        q = q_map.get(qid)
-        if not q:
-            continue
-        max_score += q.marks
-        if ans_index == q.correct_answer:
-            score += q.marks
+    # On an exam with per-student papers, the student is graded on their own paper
+    paper = assembly_service.paper_for(db, exam_id, student_id)
+    table = grading_service.load_answer_table(db, [a['question_id'] for a in answers] if paper is None else paper)
+    score, max_score = grading_service.grade(answers, table, paper)
 
     result = Result(
         student_id=student_id,
@@ -31,11 +30,195 @@ def grade_and_record(db: Session, student_id: int, exam_id: int, answers: list):
     )
     db.add(result)
     db.commit()
+    dashboard_service.invalidate_exams([exam_id])
     db.refresh(result)
     return result
 
 def get_results_for_student(db: Session, student_id: int):
     return db.query(Result).filter(Result.student_id == student_id).all()
 
+def get_result_rows_for_student(db: Session, student_id: int, columns: dict):
+    """`get_results_for_student` as tuples of `columns` (see core/fastjson.py)."""
+    return db.execute(select(*columns.values()).where(Result.student_id == student_id).order_by(Result.id)).all()
+
 def get_results_for_exam(db: Session, exam_id: int):
     return db.query(Result).filter(Result.exam_id == exam_id).all()
+
+
+def sync_results(db: Session, items: list, allowed_exam_ids=None, chunk_size: int = None) -> list:
+    """Record a batch of attempts taken offline; safe to re-send.
+
+    Each item is a dict with `idempotency_key`, `student_id`, `exam_id`,
+    `answers` and optionally `taken_at`. Attempts are graded exactly like
+    `grade_and_record`, on the student's own paper where the exam has
+    per-student variants. Keys already recorded come back as "duplicate"
+    with the stored result instead of being graded again; a key reused for a
+    different student or exam is a "conflict", and an attempt that cannot be
+    accepted (unknown student or exam) is an "error". New attempts are written
+    `chunk_size` at a time, one transaction per chunk; if a chunk fails its
+    attempts come back as "retry" and can simply be sent again.
+
+    `allowed_exam_ids`, when given, is a callable deciding whether the caller
+    may record results for an exam id. Returns one status dict per item, in
+    order.
+    """
+    chunk_size = chunk_size or settings.RESULT_SYNC_CHUNK_SIZE
+    statuses = [None] * len(items)
+
+    def receipt_status(idx, item, receipt, result):
+        if (receipt.student_id, receipt.exam_id) != (item["student_id"], item["exam_id"]):
+            return {"index": idx, "idempotency_key": item["idempotency_key"], "status": "conflict",
+                    "detail": "Idempotency key already used for a different attempt"}
+        return {"index": idx, "idempotency_key": item["idempotency_key"], "status": "duplicate",
+                "result_id": receipt.result_id,
+                "score": result.score if result else None,
+                "max_score": result.max_score if result else None}
+
+    def lookup_receipts(keys):
+        found = {}
+        for chunk in _chunked(keys, chunk_size):
+            rows = (
+                db.query(ResultSyncReceipt, Result)
+                .outerjoin(Result, Result.id == ResultSyncReceipt.result_id)
+                .filter(ResultSyncReceipt.idempotency_key.in_(chunk))
+                .all()
+            )
+            found.update((receipt.idempotency_key, (receipt, result)) for receipt, result in rows)
+        return found
+
+    # 1) Keys seen before (or repeated inside this batch) are not graded again
+    existing = lookup_receipts(list({item["idempotency_key"] for item in items}))
+    first_index = {}
+    pending = []
+    for idx, item in enumerate(items):
+        key = item["idempotency_key"]
+        if key in existing:
+            statuses[idx] = receipt_status(idx, item, *existing[key])
+        elif key in first_index:
+            pending.append((idx, item, first_index[key]))  # resolved once the first copy is written
+        else:
+            first_index[key] = idx
+            pending.append((idx, item, None))
+
+    # 2) Validate students and exams with one query each
+    new = [(idx, item) for idx, item, first in pending if first is None]
+    student_ids = {item["student_id"] for _, item in new}
+    exam_ids = {item["exam_id"] for _, item in new}
+    students = set()
+    for chunk in _chunked(list(student_ids), chunk_size):
+        students.update(uid for (uid,) in db.query(User.id).filter(User.id.in_(chunk), User.role == "student").all())
+    exams = set()
+    for chunk in _chunked(list(exam_ids), chunk_size):
+        exams.update(eid for (eid,) in db.query(Exam.id).filter(Exam.id.in_(chunk)).all())
+
+    gradable = []
+    for idx, item in new:
+        error = None
+        if item["student_id"] not in students:
+            error = "Student not found"
+        elif item["exam_id"] not in exams:
+            error = "Exam not found"
+        elif allowed_exam_ids is not None and not allowed_exam_ids(item["exam_id"]):
+            error = "Not allowed to record results for this exam"
+        if error:
+            statuses[idx] = {"index": idx, "idempotency_key": item["idempotency_key"], "status": "error", "detail": error}
+        else:
+            gradable.append((idx, item))
+
+    # 3) Papers of exams with per-student variants, and the answer table for
+    # every question in the batch, compiled once
+    papers = assembly_service.papers_for(db, {(item["exam_id"], item["student_id"]) for _, item in gradable})
+    table = grading_service.load_answer_table(
+        db,
+        {a["question_id"] for _, item in gradable for a in item["answers"]}.union(*papers.values()),
+        chunk_size=chunk_size,
+    )
+
+    # 4) One transaction per chunk: claim keys, insert results, link them
+    now = datetime.now(timezone.utc)
+    for batch in _chunked(gradable, chunk_size):
+        try:
+            # Claiming first takes SQLite's write lock, so a concurrent sync of
+            # the same keys waits here and then sees them as taken
+            claimed = {
+                key for (key,) in db.execute(
+                    sqlite_insert(ResultSyncReceipt)
+                    .on_conflict_do_nothing()
+                    .returning(ResultSyncReceipt.idempotency_key),
+                    [
+                        {"idempotency_key": item["idempotency_key"], "student_id": item["student_id"], "exam_id": item["exam_id"]}
+                        for _, item in batch
+                    ],
+                ).all()
+            }
+            to_write = [(idx, item) for idx, item in batch if item["idempotency_key"] in claimed]
+            graded = [
+                grading_service.grade(item["answers"], table, papers.get((item["exam_id"], item["student_id"])))
+                for _, item in to_write
+            ]
+            result_ids = []
+            if to_write:
+                result_ids = db.execute(
+                    insert(Result).returning(Result.id, sort_by_parameter_order=True),
+                    [
+                        {
+                            "student_id": item["student_id"],
+                            "exam_id": item["exam_id"],
+                            "answers": item["answers"],
+                            "score": score,
+                            "max_score": max_score,
+                            "taken_at": item.get("taken_at") or now,
+                        }
+                        for (_, item), (score, max_score) in zip(to_write, graded)
+                    ],
+                ).scalars().all()
+                db.execute(
+                    update(ResultSyncReceipt),
+                    [
+                        {"idempotency_key": item["idempotency_key"], "result_id": result_id}
+                        for (_, item), result_id in zip(to_write, result_ids)
+                    ],
+                )
+            db.commit()
+            dashboard_service.invalidate_exams(item["exam_id"] for _, item in to_write)
+        except Exception as e:
+            db.rollback()
+            # Nothing from this chunk was kept; the client should send it again
+            for idx, item in batch:
+                statuses[idx] = {"index": idx, "idempotency_key": item["idempotency_key"], "status": "retry",
+                                 "detail": f"Could not record attempt: {e}"}
+            continue
+
+        for (idx, item), result_id, (score, max_score) in zip(to_write, result_ids, graded):
+            statuses[idx] = {"index": idx, "idempotency_key": item["idempotency_key"], "status": "created",
+                             "result_id": result_id, "score": score, "max_score": max_score}
+        lost = [(idx, item) for idx, item in batch if item["idempotency_key"] not in claimed]
+        if lost:
+            # Another request recorded these between step 1 and now
+            raced = lookup_receipts([item["idempotency_key"] for _, item in lost])
+            for idx, item in lost:
+                statuses[idx] = receipt_status(idx, item, *raced[item["idempotency_key"]])
+
+    # 5) Repeats within the batch mirror their first copy
+    repeats = [(idx, item, first) for idx, item, first in pending if first is not None]
+    recorded = lookup_receipts([
+        item["idempotency_key"] for _, item, first in repeats
+        if statuses[first]["status"] in ("created", "duplicate")
+    ])
+    for idx, item, first in repeats:
+        key = item["idempotency_key"]
+        if key in recorded:
+            statuses[idx] = receipt_status(idx, item, *recorded[key])
+        else:
+            statuses[idx] = dict(statuses[first], index=idx)
+
+    return statuses
+
+
+def sync_summary(statuses: list) -> dict:
+    return {
+        "created": sum(1 for s in statuses if s["status"] == "created"),
+        "duplicates": sum(1 for s in statuses if s["status"] == "duplicate"),
+        "failed": sum(1 for s in statuses if s["status"] not in ("created", "duplicate")),
+        "items": statuses,
+    }
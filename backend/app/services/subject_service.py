@@ -1,4 +1,7 @@
 
+import re
+
+from sqlalchemy import insert, literal, select
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from ..models.subject import (
@@ -6,6 +9,8 @@ from ..models.subject import (
     Class,
     StudentSubject,
     NIGERIAN_SCHOOL_SUBJECTS,
+    student_class_association,
+    class_subject_association,
 )
 from ..models.exam import Exam
 from ..models.user import User
@@ -17,6 +22,29 @@ from ..schemas.subject import (
 )
 
 
+# Keep IN (...) lists well below SQLite's bound-parameter limit
+BULK_CHUNK_SIZE = 500
+
+
+def _chunked(items: list, size: int = BULK_CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+REG_NUMBER_PATTERN = re.compile(r"^NG/EEV/\d{4}/?[A-Z]$", re.IGNORECASE)
+
+
+def normalize_registration_number(value: str) -> str | None:
+    """NG/EEV/1234A as stored, from any case or the legacy NG/EEV/1234/A form; None if malformed."""
+    value = (value or "").strip().upper()
+    if not REG_NUMBER_PATTERN.match(value):
+        return None
+    parts = value.split("/")
+    if len(parts) == 4:
+        value = f"{parts[0]}/{parts[1]}/{parts[2]}{parts[3]}"
+    return value
+
+
 class SubjectService:
     @staticmethod
     def create_subject(db: Session, subject: SubjectCreate) -> Subject:
@@ -167,17 +195,208 @@ class ClassService:
                 created_relationships += 1
 
         db.commit()
+
+        created_exams = ClassService._create_missing_class_exams(
+            db, class_obj, created_by_id
+        )
+
+        return {
+            "student_id": student_id,
+            "class_id": class_id,
+            "subjects_assigned": len(class_obj.subjects),
+            "exams_created": len(created_exams),
+        }
+
+    @staticmethod
+    def _create_missing_class_exams(
+        db: Session, class_obj: Class, created_by_id: int = None, commit: bool = True
+    ) -> list[Exam]:
+        """Create one exam per class subject that does not have one yet"""
+        existing_subject_ids = {
+            row[0]
+            for row in db.query(Exam.subject_id)
+            .filter(Exam.class_id == class_obj.id)
+            .all()
+        }
+
+        created_exams = []
+        for subject in class_obj.subjects:
+            if subject.id in existing_subject_ids:
+                continue
+            exam = Exam(
+                title=f"{subject.name} - {class_obj.name}",
+                description=f"{subject.name} exam for {class_obj.name}",
+                published=False,
+                created_by=created_by_id,
+                class_id=class_obj.id,
+                subject_id=subject.id,
             )
             db.add(exam)
-            db.commit()
-            db.refresh(exam)
             created_exams.append(exam)
 
+        if created_exams and commit:
+            db.commit()
+        return created_exams
+
+    @staticmethod
+    def bulk_enroll_students(
+        db: Session,
+        class_id: int,
+        student_ids: list[int] | None = None,
+        registration_numbers: list[str] | None = None,
+        created_by_id: int = None,
+    ) -> dict:
+        """Enroll many students into a class in a single transaction.
+
+        Students may be given by id, by registration number, or both. The
+        single-class rule is checked for the whole batch with one query and
+        the `student_class` / `student_subjects` rows are written with
+        set-based INSERT ... SELECT statements that skip existing rows.
+        Registration numbers are normalized with
+        `normalize_registration_number`. Students that cannot be enrolled,
+        and malformed numbers, are reported under `errors` and do not abort
+        the rest of the batch. Missing class exams are created in the same
+        transaction.
+        """
+        class_obj = db.query(Class).filter(Class.id == class_id).first()
+        if not class_obj:
+            raise ValueError("Class not found")
+
+        errors = []
+        requested_ids = list(dict.fromkeys(student_ids or []))
+
+        # Resolve registration numbers to user ids in one query per chunk
+        reg_numbers = []
+        for raw in registration_numbers or []:
+            if not raw or not raw.strip():
+                continue
+            reg = normalize_registration_number(raw)
+            if reg is None:
+                errors.append({"registration_number": raw.strip(), "error": "Invalid registration number"})
+            else:
+                reg_numbers.append(reg)
+        reg_numbers = list(dict.fromkeys(reg_numbers))
+        if reg_numbers:
+            found = {}
+            for chunk in _chunked(reg_numbers):
+                for user_id, reg in (
+                    db.query(User.id, User.registration_number)
+                    .filter(User.registration_number.in_(chunk))
+                    .all()
+                ):
+                    found[reg] = user_id
+            for reg in reg_numbers:
+                if reg in found:
+                    requested_ids.append(found[reg])
+                else:
+                    errors.append({"registration_number": reg, "error": "Student not found"})
+            requested_ids = list(dict.fromkeys(requested_ids))
+
+        # Keep only ids that exist and belong to students
+        student_rows = {}
+        for chunk in _chunked(requested_ids):
+            for user_id, role in db.query(User.id, User.role).filter(User.id.in_(chunk)).all():
+                student_rows[user_id] = role
+        candidate_ids = []
+        for user_id in requested_ids:
+            role = student_rows.get(user_id)
+            if role is None:
+                errors.append({"student_id": user_id, "error": "Student not found"})
+            elif role != "student":
+                errors.append({"student_id": user_id, "error": "User is not a student"})
+            else:
+                candidate_ids.append(user_id)
+
+        # Single-class rule: one query for the whole batch
+        conflicts = {}
+        for chunk in _chunked(candidate_ids):
+            rows = (
+                db.query(student_class_association.c.student_id, Class.name)
+                .join(Class, Class.id == student_class_association.c.class_id)
+                .filter(
+                    student_class_association.c.student_id.in_(chunk),
+                    student_class_association.c.class_id != class_id,
+                )
+                .all()
+            )
+            for user_id, class_name in rows:
+                conflicts.setdefault(user_id, []).append(class_name)
+        for user_id, class_names in conflicts.items():
+            errors.append({
+                "student_id": user_id,
+                "error": f"Student is already assigned to class(es): {', '.join(class_names)}",
+            })
+        enroll_ids = [i for i in candidate_ids if i not in conflicts]
+
+        students_added = 0
+        subjects_created = 0
+        try:
+            for chunk in _chunked(enroll_ids):
+                already_enrolled = (
+                    select(student_class_association.c.student_id)
+                    .where(
+                        student_class_association.c.student_id == User.id,
+                        student_class_association.c.class_id == class_id,
+                    )
+                    .exists()
+                )
+                students_added += db.execute(
+                    insert(student_class_association).from_select(
+                        ["student_id", "class_id"],
+                        select(User.id, literal(class_id)).where(
+                            User.id.in_(chunk), ~already_enrolled
+                        ),
+                    )
+                ).rowcount
+
+                already_linked = (
+                    select(StudentSubject.id)
+                    .where(
+                        StudentSubject.student_id == student_class_association.c.student_id,
+                        StudentSubject.subject_id == class_subject_association.c.subject_id,
+                        StudentSubject.class_id == class_id,
+                    )
+                    .exists()
+                )
+                subjects_created += db.execute(
+                    insert(StudentSubject.__table__).from_select(
+                        ["student_id", "subject_id", "class_id"],
+                        select(
+                            student_class_association.c.student_id,
+                            class_subject_association.c.subject_id,
+                            literal(class_id),
+                        )
+                        .join(
+                            class_subject_association,
+                            class_subject_association.c.class_id
+                            == student_class_association.c.class_id,
+                        )
+                        .where(
+                            student_class_association.c.class_id == class_id,
+                            student_class_association.c.student_id.in_(chunk),
+                            ~already_linked,
+                        ),
+                    )
+                ).rowcount
+            created_exams = []
+            if enroll_ids:
+                created_exams = ClassService._create_missing_class_exams(
+                    db, class_obj, created_by_id, commit=False
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if enroll_ids:
+            db.expire(class_obj, ["students"])
+
         return {
-            "student_id": student_id,
             "class_id": class_id,
-            "subjects_assigned": len(class_obj.subjects),
+            "enrolled": len(enroll_ids),
+            "students_added": students_added,
+            "student_subjects_created": subjects_created,
             "exams_created": len(created_exams),
+            "errors": errors,
         }
 
     @staticmethod
@@ -0,0 +1,134 @@
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from ..models.refresh_token import RefreshToken
+from ..models.user import User
+from ..core.config import settings
+from ..core.security import create_access_token, decode_access_token
+from ..core.revocation import revocations
+
+
+# monotonic time of this process's next purge of expired refresh tokens
+_next_purge = 0.0
+_purge_lock = threading.Lock()
+
+
+def _digest(secret: str) -> bytes:
+    return hashlib.sha256(secret.encode()).digest()
+
+def _issue_refresh_token(db: Session, user_id: int, family_id: Optional[int] = None) -> str:
+    """Store a new refresh token and return it as "<id>.<secret>"."""
+    secret = secrets.token_urlsafe(32)
+    row = RefreshToken(
+        user_id=user_id,
+        family_id=family_id,
+        token_hash=_digest(secret),
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(row)
+    db.flush()
+    if family_id is None:
+        row.family_id = row.id
+    return f"{row.id}.{secret}"
+
+def _parse(raw: str):
+    token_id, _, secret = (raw or "").partition(".")
+    if not token_id.isdigit() or not secret:
+        return None, None
+    return int(token_id), secret
+
+def issue_token_pair(db: Session, user: User) -> dict:
+    """Create an access token and a new refresh-token family for `user`. Commits."""
+    refresh = _issue_refresh_token(db, user.id)
+    db.commit()
+    purge_expired_refresh_tokens_if_due(db)
+    return {
+        "access_token": create_access_token({"user_id": user.id, "role": user.role}),
+        "refresh_token": refresh,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+def rotate_refresh_token(db: Session, raw: str) -> Optional[dict]:
+    """Exchange a refresh token for a new access/refresh pair.
+
+    The presented token is marked rotated. Presenting an already-rotated
+    token means it was copied, so the whole family is revoked. Returns None
+    when the token is unknown, expired, reused or its user no longer exists.
+    """
+    token_id, secret = _parse(raw)
+    if token_id is None:
+        return None
+    row = db.query(RefreshToken).filter(RefreshToken.id == token_id).first()
+    if not row or not hmac.compare_digest(row.token_hash, _digest(secret)):
+        return None
+    if row.rotated_at is not None:
+        revoke_family(db, row.family_id)
+        return None
+    if row.expires_at <= datetime.utcnow():
+        return None
+    # Role is read fresh here, so role changes are picked up on refresh
+    user = db.query(User).filter(User.id == row.user_id).first()
+    if not user:
+        return None
+
+    row.rotated_at = datetime.utcnow()
+    refresh = _issue_refresh_token(db, user.id, family_id=row.family_id)
+    db.commit()
+    purge_expired_refresh_tokens_if_due(db)
+    return {
+        "access_token": create_access_token({"user_id": user.id, "role": user.role}),
+        "refresh_token": refresh,
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+def revoke_family(db: Session, family_id: int) -> None:
+    db.query(RefreshToken).filter(RefreshToken.family_id == family_id).delete(synchronize_session=False)
+    db.commit()
+
+def logout(db: Session, access_token: Optional[str], refresh_token: Optional[str]) -> None:
+    """Revoke the presented access token and the refresh token's family."""
+    payload = decode_access_token(access_token) if access_token else None
+    if payload and payload.get("jti"):
+        revocations.revoke_token(payload["jti"], payload.get("exp", 0))
+    token_id, secret = _parse(refresh_token) if refresh_token else (None, None)
+    if token_id is not None:
+        row = db.query(RefreshToken).filter(RefreshToken.id == token_id).first()
+        if row and hmac.compare_digest(row.token_hash, _digest(secret)):
+            revoke_family(db, row.family_id)
+
+def revoke_user_sessions(db: Session, user_id: int) -> None:
+    """Invalidate every token for a user (delete, role change). Commits."""
+    revocations.revoke_user(user_id)
+    db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete(synchronize_session=False)
+    db.commit()
+
+def purge_expired_refresh_tokens(db: Session) -> int:
+    # Rotated tokens are kept until they expire so reuse is still detected
+    removed = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.expires_at <= datetime.utcnow())
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return removed
+
+def purge_expired_refresh_tokens_if_due(db: Session, now: Optional[float] = None) -> Optional[int]:
+    """Purge at most once per REFRESH_TOKEN_PURGE_INTERVAL_SECONDS per process.
+
+    Called as tokens are issued, so the table stays bounded without a
+    scheduler. Returns the number removed, or None when not due.
+    """
+    global _next_purge
+    now = time.monotonic() if now is None else now
+    with _purge_lock:
+        if now < _next_purge:
+            return None
+        _next_purge = now + settings.REFRESH_TOKEN_PURGE_INTERVAL_SECONDS
+    return purge_expired_refresh_tokens(db)
@@ -1,58 +1,77 @@
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from pydantic import ValidationError
 from ..models.user import User
-from ..core.security import hash_password
+from ..models.refresh_token import RefreshToken
+from ..core.config import settings
+from ..core.security import hash_password, hash_passwords
+from ..schemas.user import UserCreate
+from .registration_allocator import get_allocator
+from .token_service import revoke_user_sessions
+from ..core.revocation import revocations
 import time
-import random
 
 def generate_registration_number(db: Session, prefix: str = "NG/EEV") -> str:
-    """Generate a registration number like NG/EEV/0427/A ensuring uniqueness.
+    """Generate a registration number like NG/EEV/0427A ensuring uniqueness.
 
-    Format: NG/EEV/<4-digit-number>/<UPPER_LETTER>
+    Format: NG/EEV/<4-digit-number><UPPER_LETTER>. Numbers come from the
+    block allocator, which may commit `db` when it reserves a new block.
     """
-    # Desired format: NG/EEV/1234A (no slash before the letter)
-    for _ in range(10):
-        digits = random.randint(0, 9999)
-        digits_str = str(digits).zfill(4)
-        letter = chr(random.randint(65, 90))  # A-Z
-        reg = f"{prefix}/{digits_str}{letter}"
-        # Ensure uniqueness in DB
-        exists = db.query(User).filter(User.registration_number == reg).first()
-        if not exists:
-            return reg
-    # fallback: always use 4 digits and a random letter
-    digits = random.randint(0, 9999)
-    digits_str = str(digits).zfill(4)
-    letter = random.choice('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-    return f"{prefix}/{digits_str}{letter}"
+    return get_allocator(db, prefix).allocate(db)
+
+def generate_registration_numbers(db: Session, count: int, prefix: str = "NG/EEV") -> list[str]:
+    """Allocate `count` unused registration numbers in one pass."""
+    return get_allocator(db, prefix).allocate_many(db, count)
+
+def normalize_email(email: str) -> str:
+    """Emails are stored and looked up trimmed and lower-cased."""
+    return (email or "").strip().lower()
 
 def create_user(db: Session, full_name: str, email: str, password: str, role: str = "student", student_class: str = None, passport: str = None):
     if not passport:
         raise ValueError("Passport/photo is required for all users")
+    email = normalize_email(email)
 
-    reg_num = None
-    if role == "student":
-        reg_num = generate_registration_number(db)
-
-    user = User(
-        full_name=full_name,
-        email=email,
-        hashed_password=hash_password(password),
-        role=role,
-        student_class=student_class,
-        registration_number=reg_num,
-        passport=passport,
-    )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    hashed = hash_password(password)
+    # A number issued outside the allocator (manual edit, old script) can
+    # still collide; the unique index rejects it and we try the next one.
+    for attempt in range(3):
+        reg_num = None
+        if role == "student":
+            reg_num = generate_registration_number(db)
+
+        user = User(
+            full_name=full_name,
+            email=email,
+            hashed_password=hashed,
+            role=role,
+            student_class=student_class,
+            registration_number=reg_num,
+            passport=passport,
+        )
+        db.add(user)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            if reg_num is None or attempt == 2 or get_user_by_registration_number(db, reg_num) is None:
+                raise
+            get_allocator(db).mark_used(reg_num)
+            continue
+        db.refresh(user)
+        return user
 
 def get_user_by_email(db: Session, email: str):
-    return db.query(User).filter(User.email == email).first()
+    return db.query(User).filter(User.email == normalize_email(email)).first()
 
 def get_user_by_registration_number(db: Session, reg: str):
     return db.query(User).filter(User.registration_number == reg).first()
 
+def list_user_rows(db: Session, columns: dict):
+    """Every user as tuples of `columns` (see core/fastjson.py)."""
+    return db.execute(select(*columns.values()).order_by(User.id)).all()
+
 def get_user(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
@@ -61,11 +80,15 @@ def update_user(db: Session, user_id: int, **kwargs):
     if not user:
         return None
     # allowed fields: full_name, password (hashed), role, student_class
+    password_changed = False
+    role_changed = False
     if 'full_name' in kwargs and kwargs['full_name'] is not None:
         user.full_name = kwargs['full_name']
     if 'password' in kwargs and kwargs['password']:
         user.hashed_password = hash_password(kwargs['password'])
+        password_changed = True
     if 'role' in kwargs and kwargs['role'] is not None:
+        role_changed = kwargs['role'] != user.role
         user.role = kwargs['role']
     if 'student_class' in kwargs:
         user.student_class = kwargs['student_class']
@@ -73,6 +96,12 @@ def update_user(db: Session, user_id: int, **kwargs):
         user.passport = kwargs['passport']
     db.add(user)
     db.commit()
+    # Access tokens carry the role and are not checked against the DB, so
+    # outstanding ones must be revoked; refresh picks up the new role.
+    if password_changed:
+        revoke_user_sessions(db, user.id)
+    elif role_changed:
+        revocations.revoke_user(user.id)
     db.refresh(user)
     return user
 
@@ -82,4 +111,142 @@ def delete_user(db: Session, user_id: int):
         return False
     db.delete(user)
     db.commit()
+    revoke_user_sessions(db, user_id)
     return True
+
+
+def _chunked(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _insert_users(db: Session, batch: list, results: list) -> None:
+    """INSERT `batch` of (row, values); if the database rejects it, retry
+    each half so only the offending rows end up as errors."""
+    try:
+        inserted = db.execute(
+            insert(User).returning(User.id, User.email),
+            [values for _, values in batch],
+        ).all()
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if len(batch) == 1:
+            idx = batch[0][0]
+            results[idx] = {"row": idx, "status": "error", "error": f"Database rejected row: {e.orig}"}
+            return
+        middle = len(batch) // 2
+        _insert_users(db, batch[:middle], results)
+        _insert_users(db, batch[middle:], results)
+        return
+    ids_by_email = {email: user_id for user_id, email in inserted}
+    for idx, values in batch:
+        results[idx] = {
+            "row": idx,
+            "status": "created",
+            "id": ids_by_email.get(values["email"]),
+            "email": values["email"],
+            "registration_number": values["registration_number"],
+        }
+
+def bulk_create_users(db: Session, rows: list[dict], batch_size: int = None, max_workers: int = None) -> list[dict]:
+    """Create many users at once and report the outcome of every row.
+
+    Rows are validated with `UserCreate`; passwords are hashed in parallel,
+    student registration numbers are allocated in one pass and users are
+    written with one multi-row INSERT per batch. Each entry in the returned
+    list has `row`, `status` ("created" or "error") and either the created
+    user's `id`/`email`/`registration_number` or an `error` message.
+    """
+    batch_size = batch_size or settings.BULK_INSERT_BATCH_SIZE
+    results: list[dict] = [None] * len(rows)
+
+    # 1) Validate and normalise every row
+    valid = []
+    seen_emails = set()
+    for idx, raw in enumerate(rows):
+        try:
+            payload = UserCreate.model_validate(raw)
+        except ValidationError as e:
+            first = e.errors()[0]
+            field = ".".join(str(p) for p in first.get("loc", ()))
+            results[idx] = {"row": idx, "status": "error", "error": f"{field}: {first.get('msg')}"}
+            continue
+        email = normalize_email(payload.email)
+        if not payload.passport:
+            results[idx] = {"row": idx, "status": "error", "error": "Passport/photo is required for all users"}
+            continue
+        if email in seen_emails:
+            results[idx] = {"row": idx, "status": "error", "error": "Duplicate email in upload"}
+            continue
+        seen_emails.add(email)
+        valid.append((idx, payload, email))
+
+    # 2) Reject emails that are already registered
+    existing = set()
+    for chunk in _chunked([email for _, _, email in valid], batch_size):
+        existing.update(e for (e,) in db.query(User.email).filter(User.email.in_(chunk)).all())
+    pending = []
+    for idx, payload, email in valid:
+        if email in existing:
+            results[idx] = {"row": idx, "status": "error", "error": "Email already registered"}
+        else:
+            pending.append((idx, payload, email))
+
+    # 3) Hash passwords in parallel and allocate registration numbers in one pass
+    hashes = hash_passwords([p.password for _, p, _ in pending], max_workers=max_workers)
+    student_count = sum(1 for _, p, _ in pending if p.role == "student")
+    reg_numbers = iter(generate_registration_numbers(db, student_count)) if student_count else iter(())
+
+    records = []
+    for (idx, payload, email), hashed in zip(pending, hashes):
+        records.append((idx, {
+            "full_name": payload.full_name,
+            "email": email,
+            "hashed_password": hashed,
+            "role": payload.role,
+            "student_class": payload.student_class,
+            "registration_number": next(reg_numbers) if payload.role == "student" else None,
+            "passport": payload.passport,
+        }))
+
+    # 4) One INSERT statement per batch
+    for batch in _chunked(records, batch_size):
+        _insert_users(db, batch, results)
+
+    return results
+
+def bulk_reset_passwords(db: Session, new_passwords: dict[str, str], max_workers: int = None) -> dict:
+    """Reset passwords for many users keyed by email.
+
+    Hashing is spread across processes like `bulk_create_users` and all
+    matching users are updated in one executemany UPDATE. Returns the
+    emails that were updated and those with no matching user.
+    """
+    emails = [normalize_email(e) for e in new_passwords]
+    found = {}
+    for chunk in _chunked(emails, settings.BULK_INSERT_BATCH_SIZE):
+        found.update(
+            (email, user_id)
+            for user_id, email in db.query(User.id, User.email).filter(User.email.in_(chunk)).all()
+        )
+
+    targets = [(email, password) for email, password in zip(emails, new_passwords.values()) if email in found]
+    hashes = hash_passwords([password for _, password in targets], max_workers=max_workers)
+    if targets:
+        db.execute(
+            update(User),
+            [
+                {"id": found[email], "hashed_password": hashed}
+                for (email, _), hashed in zip(targets, hashes)
+            ],
+        )
+        user_ids = [found[email] for email, _ in targets]
+        db.query(RefreshToken).filter(RefreshToken.user_id.in_(user_ids)).delete(synchronize_session=False)
+        db.commit()
+        for user_id in user_ids:
+            revocations.revoke_user(user_id)
+
+    return {
+        "updated": [email for email, _ in targets],
+        "not_found": [email for email in emails if email not in found],
+    }
@@ -0,0 +1,122 @@
+"""
+Report what a worker pays to start.
+
+    python -m app.startup_profile [--top N] [--target MODULE]
+
+Imports the target (default `app.main`) in a fresh interpreter with
+`-X importtime`, then prints the slowest modules by cumulative import time,
+the time per top-level package, the lifespan schema check and the resident
+memory of the child afterwards.
+
+The child gets a throwaway SQLite database (and migration lock) in a
+temporary directory, so the schema check times a fresh create-and-migrate
+and never touches the configured DATABASE_URL.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+CHILD_SCRIPT = r"""
+import json, sys, time
+t0 = time.perf_counter()
+module = __import__(sys.argv[1])
+import_s = time.perf_counter() - t0
+t1 = time.perf_counter()
+from app.core.db import init_db
+init_db()
+init_s = time.perf_counter() - t1
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak // 1024 if sys.platform == "darwin" else peak
+    except Exception:
+        return None
+
+print("@@PROFILE@@" + json.dumps({"import_s": import_s, "init_db_s": init_s, "rss_kb": rss_kb()}))
+"""
+
+
+def parse_importtime(stderr: str):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if m:
+            self_us, cum_us, indent, name = m.groups()
+            rows.append((name, int(self_us), int(cum_us), len(indent) // 2))
+    return rows
+
+
+def profile(target: str = "app.main") -> dict:
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory(prefix="startup-profile-") as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL="sqlite:///" + os.path.join(tmp, "profile.db"),
+            MIGRATION_LOCK_FILE=os.path.join(tmp, "migrations.lock"),
+        )
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, target],
+            cwd=backend_dir,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+    summary = None
+    for line in proc.stdout.splitlines():
+        if line.startswith("@@PROFILE@@"):
+            summary = json.loads(line[len("@@PROFILE@@"):])
+    if proc.returncode != 0 or summary is None:
+        raise RuntimeError(f"Profiling {target} failed:\n{proc.stderr[-2000:]}")
+
+    modules = parse_importtime(proc.stderr)
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+    summary["modules"] = modules
+    summary["packages"] = sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=20, help="number of modules/packages to list")
+    parser.add_argument("--target", default="app.main", help="module to import")
+    args = parser.parse_args(argv)
+
+    result = profile(args.target)
+    print(f"Import {args.target}: {result['import_s'] * 1000:.1f} ms")
+    print(f"Schema check (init_db, fresh database): {result['init_db_s'] * 1000:.1f} ms")
+    if result["rss_kb"] is not None:
+        print(f"Resident memory: {result['rss_kb'] / 1024:.1f} MiB")
+
+    print(f"\nSlowest modules (cumulative ms):")
+    top = sorted(result["modules"], key=lambda r: r[2], reverse=True)[:args.top]
+    for name, self_us, cum_us, _ in top:
+        print(f"  {cum_us / 1000:9.1f}  {self_us / 1000:8.1f} self  {name}")
+
+    print(f"\nTime by top-level package (self ms):")
+    for package, us in result["packages"][:args.top]:
+        print(f"  {us / 1000:9.1f}  {package}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
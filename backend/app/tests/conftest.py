@@ -0,0 +1,25 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.db import Base
+# Import every model module so Base.metadata knows all tables
+from app.models import edge, exam, question, question_bank, question_fingerprint, refresh_token, result, subject, user  # noqa: F401
+
+
+@pytest.fixture
+def db():
+    """Session bound to a private in-memory SQLite database."""
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
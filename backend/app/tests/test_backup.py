@@ -0,0 +1,117 @@
+import gzip
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+from app.core.metrics import metrics
+from app.services import backup_service
+
+
+def make_db(path, rows=5000):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE results (id INTEGER PRIMARY KEY, student_id INTEGER, answers TEXT)")
+    conn.executemany("INSERT INTO results (student_id, answers) VALUES (?, ?)", [(i, "x" * 200) for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+def test_backup_is_consistent_while_writes_continue(tmp_path):
+    db_path = str(tmp_path / "school_cbt.db")
+    make_db(db_path)
+    stop = threading.Event()
+
+    def writer():
+        conn = sqlite3.connect(db_path, timeout=10)
+        while not stop.is_set():
+            conn.execute("INSERT INTO results (student_id, answers) VALUES (1, 'during backup')")
+            conn.commit()
+        conn.close()
+
+    steps = []
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        info = backup_service.run_backup(db_path, str(tmp_path / "backups"), progress=lambda done, total: steps.append((done, total)))
+    finally:
+        stop.set()
+        thread.join()
+
+    assert len(steps) > 1  # copied in several page-limited steps
+    assert info["path"].endswith(".db.gz")
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(gzip.decompress(open(info["path"], "rb").read()))
+    conn = sqlite3.connect(str(restored))
+    assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] >= 5000
+    conn.close()
+
+    assert metrics.get("backup_in_progress") == 0
+    assert metrics.get("backup_progress_ratio") == 1.0
+    assert "backup_last_size_bytes" in metrics.render()
+    assert not [name for name in os.listdir(tmp_path / "backups") if name.endswith(".partial")]
+
+
+def test_backup_under_constant_writes_finishes_in_one_step(tmp_path):
+    db_path = str(tmp_path / "school_cbt.db")
+    make_db(db_path)
+    writer = sqlite3.connect(db_path)
+
+    def write_between_steps(done, total):
+        # A write from another connection between every two steps restarts the copy each time
+        writer.execute("INSERT INTO results (student_id, answers) VALUES (1, 'during backup')")
+        writer.commit()
+
+    try:
+        info = backup_service.backup_database(db_path, str(tmp_path / "backups"), pages=16, step_sleep=0,
+                                              progress=write_between_steps, max_restarts=2)
+    finally:
+        writer.close()
+
+    assert info["single_step"] and info["restarts"] == 3
+    restored = tmp_path / "restored.db"
+    restored.write_bytes(gzip.decompress(open(info["path"], "rb").read()))
+    conn = sqlite3.connect(str(restored))
+    assert conn.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    assert conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] >= 5000
+    conn.close()
+
+
+def test_steps_that_wait_on_a_lock_are_not_restarts(tmp_path, monkeypatch):
+    db_path = str(tmp_path / "school_cbt.db")
+    make_db(db_path)
+
+    class BusyFirst:
+        """A connection whose backups first wait on a writer's lock, as SQLite
+        reports it: a busy step before any page is counted."""
+
+        def __init__(self, conn):
+            self.conn = conn
+
+        def backup(self, target, progress=None, **kwargs):
+            progress(sqlite3.SQLITE_BUSY, 0, 0)
+            return self.conn.backup(target.conn, progress=progress, **kwargs)
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+    connect = sqlite3.connect
+    monkeypatch.setattr(backup_service.sqlite3, "connect", lambda path: BusyFirst(connect(path)))
+    info = backup_service.backup_database(db_path, str(tmp_path / "backups"), pages=16, step_sleep=0, max_restarts=0)
+    assert info["restarts"] == 0 and not info["single_step"]
+
+
+def test_retention_keeps_recent_and_daily(tmp_path):
+    now = datetime(2025, 3, 10, 12, 0, 0)
+    names = []
+    for hours in [0, 1, 2, 24, 25, 48, 72, 96]:
+        stamp = (now - timedelta(hours=hours)).strftime("%Y%m%d-%H%M%S")
+        name = f"school_cbt-{stamp}.db.gz"
+        (tmp_path / name).write_bytes(b"")
+        names.append(name)
+
+    removed = backup_service.apply_retention(str(tmp_path), keep_last=2, keep_daily=3)
+    kept = sorted(os.listdir(tmp_path))
+    # newest two, plus the newest of each of the three most recent days
+    assert kept == sorted([names[0], names[1], names[3], names[5]])
+    assert len(removed) == 4
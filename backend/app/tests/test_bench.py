@@ -0,0 +1,23 @@
+from app.bench import fixtures, runner
+from app.bench.suite import BENCHMARKS
+
+
+def test_every_benchmark_runs(monkeypatch):
+    # Only that each benchmark works is checked here, not the full-size bank
+    monkeypatch.setattr(fixtures, "BANK_QUESTIONS", 2000)
+    monkeypatch.setattr(fixtures, "DUPLICATE_INDEX_SIZE", 2000)
+    results = runner.run_suite(rounds=1, min_round_seconds=0)
+    assert set(results) == set(BENCHMARKS)
+    assert all(r["median_us"] > 0 and r["calls_per_round"] == 1 for r in results.values())
+
+
+def test_compare_flags_regressions_beyond_threshold(tmp_path):
+    path = str(tmp_path / "baseline.json")
+    runner.save_baseline({"a": {"median_us": 100.0}, "b": {"median_us": 100.0}, "c": {"median_us": 100.0}}, path)
+    runner.save_baseline({"c": {"median_us": 50.0}}, path)  # merged, not replaced
+    baseline = runner.load_baseline(path)["benchmarks"]
+    assert baseline["a"]["median_us"] == 100.0 and baseline["c"]["median_us"] == 50.0
+
+    now = {"a": {"median_us": 130.0}, "b": {"median_us": 110.0}, "c": {"median_us": 30.0}, "d": {"median_us": 1.0}}
+    verdicts = {row["name"]: row["status"] for row in runner.compare(now, baseline, threshold=0.25)}
+    assert verdicts == {"a": "regressed", "b": "ok", "c": "improved", "d": "new"}
@@ -0,0 +1,107 @@
+import pytest
+
+from app.models.exam import Exam
+from app.models.subject import Class, StudentSubject, student_class_association
+from app.models.user import User
+from app.schemas.subject import ClassCreate
+from app.services.subject_service import ClassService
+
+
+def make_student(db, n, reg=None):
+    u = User(full_name=f"Student {n}", email=f"s{n}@example.com", hashed_password="x", role="student", registration_number=reg)
+    db.add(u)
+    return u
+
+
+def test_bulk_enroll_creates_memberships_and_subjects_once(db):
+    cls = ClassService.create_class(db, ClassCreate(name="JSS1A", level="JSS1"))
+    students = [make_student(db, i, reg=f"NG/EEV/{i:04d}A") for i in range(5)]
+    db.commit()
+
+    result = ClassService.bulk_enroll_students(
+        db, cls.id,
+        student_ids=[s.id for s in students[:3]],
+        registration_numbers=["ng/eev/0003a", "NG/EEV/0004A", "NG/EEV/9999Z"],
+    )
+
+    assert result["enrolled"] == 5
+    assert result["students_added"] == 5
+    assert result["student_subjects_created"] == 5 * len(cls.subjects)
+    assert result["exams_created"] == len(cls.subjects)
+    assert result["errors"] == [{"registration_number": "NG/EEV/9999Z", "error": "Student not found"}]
+
+    # Re-running the same batch is a no-op
+    again = ClassService.bulk_enroll_students(db, cls.id, student_ids=[s.id for s in students])
+    assert again["students_added"] == 0
+    assert again["student_subjects_created"] == 0
+    assert again["exams_created"] == 0
+    assert db.query(StudentSubject).count() == 5 * len(cls.subjects)
+
+
+def test_bulk_enroll_rejects_students_in_another_class(db):
+    first = ClassService.create_class(db, ClassCreate(name="JSS1A", level="JSS1"))
+    second = ClassService.create_class(db, ClassCreate(name="JSS1B", level="JSS1"))
+    a, b = make_student(db, 1), make_student(db, 2)
+    teacher = User(full_name="T", email="t@example.com", hashed_password="x", role="teacher")
+    db.add(teacher)
+    db.commit()
+    ClassService.bulk_enroll_students(db, first.id, student_ids=[a.id])
+
+    result = ClassService.bulk_enroll_students(db, second.id, student_ids=[a.id, b.id, teacher.id, 999])
+
+    assert result["enrolled"] == 1
+    errors = {e["student_id"]: e["error"] for e in result["errors"]}
+    assert "JSS1A" in errors[a.id]
+    assert errors[teacher.id] == "User is not a student"
+    assert errors[999] == "Student not found"
+    rows = db.execute(student_class_association.select()).all()
+    assert sorted((r.student_id, r.class_id) for r in rows) == [(a.id, first.id), (b.id, second.id)]
+
+
+def test_bulk_enroll_unknown_class(db):
+    with pytest.raises(ValueError):
+        ClassService.bulk_enroll_students(db, 42, student_ids=[1])
+
+
+def test_bulk_enroll_route_normalizes_csv_and_list_alike(db):
+    from app.api.classes import enroll_students_bulk
+    from app.schemas.subject import BulkEnrollStudents
+
+    cls = ClassService.create_class(db, ClassCreate(name="JSS1A", level="JSS1"))
+    students = [make_student(db, i, reg=f"NG/EEV/{i:04d}A") for i in range(4)]
+    admin = User(full_name="Admin", email="admin@example.com", hashed_password="x", role="admin")
+    db.add(admin)
+    db.commit()
+
+    payload = BulkEnrollStudents(
+        registration_numbers=["ng/eev/0000/a", "NG/EEV/12"],
+        registration_numbers_csv="Registration Number,Name\nNG/EEV/0001/A,Ada\n\nng/eev/0002a,Bola\nNG-EEV-0003A,Chi\n",
+    )
+    result = enroll_students_bulk(cls.id, payload, db=db, current_user=admin)
+
+    assert result["enrolled"] == 3
+    assert sorted(result["errors"], key=lambda e: e["registration_number"]) == [
+        {"registration_number": "NG-EEV-0003A", "error": "Invalid registration number"},
+        {"registration_number": "NG/EEV/12", "error": "Invalid registration number"},
+    ]
+    enrolled = {r.student_id for r in db.execute(student_class_association.select()).all()}
+    assert enrolled == {s.id for s in students[:3]}
+    assert db.query(Exam).filter(Exam.class_id == cls.id).count() == len(cls.subjects)
+
+
+def test_bulk_enroll_commits_once(db):
+    from sqlalchemy import event
+
+    cls = ClassService.create_class(db, ClassCreate(name="JSS1A", level="JSS1"))
+    students = [make_student(db, i) for i in range(3)]
+    db.commit()
+    ids = [s.id for s in students]
+    commits = []
+    listener = commits.append
+    event.listen(db, "after_commit", listener)
+    try:
+        result = ClassService.bulk_enroll_students(db, cls.id, student_ids=ids)
+    finally:
+        event.remove(db, "after_commit", listener)
+    assert result["exams_created"] == len(cls.subjects) > 0
+    assert len(commits) == 1
@@ -0,0 +1,95 @@
+from app.core import security
+from app.core.security import hash_passwords, shutdown_hash_pool, verify_password
+from app.models.user import User
+from app.services import user_service
+
+
+def row(n, **overrides):
+    data = {
+        "full_name": f"User {n}",
+        "email": f"User{n}@Example.com",
+        "password": f"pass-{n}",
+        "role": "student",
+        "passport": "/uploads/p.png",
+    }
+    data.update(overrides)
+    return data
+
+
+def test_bulk_create_users_reports_each_row(db):
+    db.add(User(full_name="Old", email="taken@example.com", hashed_password="x", role="teacher"))
+    db.commit()
+
+    rows = [
+        row(1),
+        row(2, role="teacher"),
+        row(3, email="not-an-email"),
+        row(4, email="user1@example.com"),
+        row(5, email="taken@example.com"),
+        row(6, passport=""),
+    ]
+    results = user_service.bulk_create_users(db, rows, max_workers=1)
+
+    assert [r["status"] for r in results] == ["created", "created", "error", "error", "error", "error"]
+    assert results[3]["error"] == "Duplicate email in upload"
+    assert results[4]["error"] == "Email already registered"
+
+    student = db.query(User).filter(User.email == "user1@example.com").one()
+    assert student.id == results[0]["id"]
+    assert student.registration_number == results[0]["registration_number"]
+    assert verify_password("pass-1", student.hashed_password)
+    teacher = db.query(User).filter(User.email == "user2@example.com").one()
+    assert teacher.registration_number is None
+
+
+def test_bulk_create_users_fails_only_the_rows_the_database_rejects(db, monkeypatch):
+    # Another request took a registration number after it was allocated here
+    db.add(User(full_name="Racer", email="racer@example.com", hashed_password="x", role="student", registration_number="REG/2"))
+    db.commit()
+    monkeypatch.setattr(user_service, "generate_registration_numbers", lambda db, count: [f"REG/{n}" for n in range(count)])
+
+    results = user_service.bulk_create_users(db, [row(n) for n in range(5)], batch_size=5, max_workers=1)
+
+    assert [r["status"] for r in results] == ["created", "created", "error", "created", "created"]
+    assert results[2]["error"].startswith("Database rejected row")
+    assert db.query(User).count() == 5
+
+
+def test_generate_registration_numbers_are_unique(db):
+    numbers = user_service.generate_registration_numbers(db, 500)
+    assert len(set(numbers)) == 500
+    assert all(n.startswith("NG/EEV/") and len(n) == 12 for n in numbers)
+
+
+def test_bulk_reset_passwords(db):
+    db.add(User(full_name="Admin", email="admin@example.com", hashed_password="x", role="admin"))
+    db.commit()
+
+    outcome = user_service.bulk_reset_passwords(db, {"admin@example.com": "new", "ghost@example.com": "new"}, max_workers=1)
+
+    assert outcome == {"updated": ["admin@example.com"], "not_found": ["ghost@example.com"]}
+    db.expire_all()
+    admin = db.query(User).filter(User.email == "admin@example.com").one()
+    assert verify_password("new", admin.hashed_password)
+
+
+def test_hash_passwords_in_process_pool_keeps_order():
+    passwords = [f"pw{i}" for i in range(20)]
+    try:
+        hashes = hash_passwords(passwords, max_workers=2)
+        pool = security._hash_pool
+        # The next upload reuses the processes already started
+        hash_passwords(passwords, max_workers=2)
+        assert pool is not None and security._hash_pool is pool
+    finally:
+        shutdown_hash_pool()
+    assert security._hash_pool is None
+    assert all(verify_password(p, h) for p, h in zip(passwords, hashes))
+
+
+def test_single_and_bulk_users_share_email_normalization(db):
+    user = user_service.create_user(db, "Ada", "  Ada@Example.COM ", "pw", role="teacher", passport="/uploads/p.png")
+    assert user.email == "ada@example.com"
+    assert user_service.get_user_by_email(db, "ADA@example.com").id == user.id
+    [result] = user_service.bulk_create_users(db, [row(1, email="ada@EXAMPLE.com")], max_workers=1)
+    assert result["error"] == "Email already registered"
@@ -0,0 +1,121 @@
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from sqlalchemy import event
+
+from app.api import dashboard as dashboard_api
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.result import Result
+from app.models.subject import Class, Subject, TeacherSubject
+from app.models.user import User
+from app.services import dashboard_service, result_service
+from app.services.dashboard_service import DashboardCache
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    dashboard_service.cache.clear()
+    yield
+    dashboard_service.cache.clear()
+
+
+@pytest.fixture
+def school(db):
+    admin = User(full_name="Admin", email="admin@example.com", hashed_password="h", role="admin")
+    teacher = User(full_name="Teacher", email="t@example.com", hashed_password="h", role="teacher")
+    other = User(full_name="Other", email="o@example.com", hashed_password="h", role="teacher")
+    student = User(full_name="Student", email="s@example.com", hashed_password="h", role="student")
+    jss1, maths, english = Class(name="JSS1A", level="JSS1"), Subject(name="Mathematics", code="MAT"), Subject(name="English", code="ENG")
+    db.add_all([admin, teacher, other, student, jss1, maths, english])
+    db.commit()
+    db.add(TeacherSubject(teacher_id=teacher.id, class_id=jss1.id, subject_id=maths.id))
+    exams = [
+        Exam(title="Own", created_by=teacher.id),
+        Exam(title="Assigned", created_by=admin.id, class_id=jss1.id, subject_id=maths.id, published=True),
+        Exam(title="Someone else's", created_by=other.id, class_id=jss1.id, subject_id=english.id),
+    ]
+    db.add_all(exams)
+    db.commit()
+    db.add_all([Question(exam_id=exams[0].id, text=f"Q{i}", options=["a", "b"], correct_answer=0, created_by=teacher.id) for i in range(3)])
+    db.add(Question(exam_id=exams[1].id, text="Q", options=["a", "b"], correct_answer=0, created_by=admin.id))
+    db.add_all([
+        Result(student_id=student.id, exam_id=exams[1].id, answers=[], score=score, max_score=10,
+               taken_at=datetime(2026, 3, day, tzinfo=timezone.utc))
+        for day, score in ((1, 4.0), (5, 9.0))
+    ])
+    db.commit()
+    return {"admin": admin, "teacher": teacher, "student": student, "exams": exams}
+
+
+def dashboard(db, user):
+    return orjson.loads(dashboard_api.teacher_dashboard(db=db, current_user=user).body)
+
+
+def test_aggregates_for_the_teachers_exams(db, school):
+    own, assigned, _ = school["exams"]
+    rows = dashboard(db, school["teacher"])
+    assert [row["id"] for row in rows] == [own.id, assigned.id]
+    assert rows[0] == {"id": own.id, "title": "Own", "published": False, "class_id": None, "subject_id": None,
+                       "question_count": 3, "submission_count": 0, "mean_score": None, "last_submission_at": None}
+    assert (rows[1]["question_count"], rows[1]["submission_count"], rows[1]["mean_score"]) == (1, 2, 6.5)
+    assert rows[1]["last_submission_at"].startswith("2026-03-05")
+    # Admins see every exam
+    assert len(dashboard(db, school["admin"])) == 3
+
+
+def test_cached_until_a_result_is_written(db, school):
+    _, assigned, other = school["exams"]
+    teacher, admin = school["teacher"], school["admin"]
+    assert dashboard(db, teacher)[1]["submission_count"] == 2
+    dashboard(db, admin)
+
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        dashboard(db, teacher)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    assert statements == []
+
+    # A result for an exam the teacher cannot see leaves their entry alone
+    result_service.grade_and_record(db, school["student"].id, other.id, [])
+    assert dashboard_service.cache.get(teacher.id) is not None
+    assert dashboard_service.cache.get(admin.id) is None
+
+    result_service.grade_and_record(db, school["student"].id, assigned.id, [])
+    assert dashboard_service.cache.get(teacher.id) is None
+    assert dashboard(db, teacher)[1]["submission_count"] == 3
+
+    result_service.sync_results(db, [{"idempotency_key": "attempt-0001", "student_id": school["student"].id,
+                                      "exam_id": assigned.id, "answers": []}])
+    assert dashboard(db, teacher)[1]["submission_count"] == 4
+
+
+def test_cache_expires_and_tracks_exams():
+    cache = DashboardCache(ttl=10)
+    cache.put(1, [7, 8], b"[1]", now=100)
+    cache.put(2, [8], b"[2]", now=100)
+    assert cache.get(1, now=109) == b"[1]" and cache.get(1, now=110) is None
+    cache.invalidate_exams([7])
+    assert cache.get(1, now=100) is None and cache.get(2, now=100) == b"[2]"
+    # Expired entries are dropped on the next put, with their exams
+    cache.put(3, [9], b"[3]", now=200)
+    assert set(cache._entries) == {3} and set(cache._by_exam) == {9}
+    assert DashboardCache(ttl=0).put(1, [7], b"[]") is None
+
+
+def test_aggregates_read_only_the_indexes(db, school):
+    statements = []
+    listener = lambda conn, cursor, statement, parameters, *args: statements.append((statement, parameters))
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        dashboard_service.dashboard_rows(db, school["teacher"].id)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    statement, parameters = statements[-1]
+    plan = " ".join(str(row[-1]) for row in db.connection().exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters))
+    assert "COVERING INDEX ix_results_exam_id_taken_at_score" in plan
+    assert "COVERING INDEX ix_questions_exam_id" in plan
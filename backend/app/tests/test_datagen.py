@@ -0,0 +1,64 @@
+import json
+
+from sqlalchemy import create_engine, text
+
+from app import datagen
+from app.core.config import settings
+from app.models.subject import NIGERIAN_SCHOOL_SUBJECTS
+from app.services.registration_allocator import DEFAULT_PREFIX, number_to_slot
+from app.services.grading_service import compile_answer_table, grade
+
+
+def test_tiny_profile_builds_a_consistent_school(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = f"sqlite:///{tmp_path / 'data' / 'school.db'}"
+    (tmp_path / "data").mkdir()
+    profile = datagen.PROFILES["tiny"]
+    counts = datagen.generate(url, profile, seed=7)
+    # The migration lock sits next to the database, not in the working directory
+    assert (tmp_path / "data" / "school.db.migrations.lock").exists()
+    assert not (tmp_path / settings.MIGRATION_LOCK_FILE).exists()
+
+    levels = len(NIGERIAN_SCHOOL_SUBJECTS)
+    assert counts["classes"] == levels * profile.arms
+    assert counts["student_class"] == levels * profile.arms * profile.students_per_class
+    assert counts["questions"] == counts["exams"] * profile.questions
+    assert counts["results"] > 0
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        # What the app would have written: a passport for everyone, a fingerprint per question
+        assert conn.execute(text("SELECT COUNT(*) FROM users WHERE passport IS NULL")).scalar() == 0
+        assert conn.execute(text("SELECT COUNT(*) FROM question_fingerprints")).scalar() == counts["questions"] == counts["question_fingerprints"]
+
+        regs = [r for (r,) in conn.execute(text("SELECT registration_number FROM users WHERE role = 'student'"))]
+        assert len(set(regs)) == len(regs) and all(number_to_slot(DEFAULT_PREFIX, r) is not None for r in regs)
+
+        # Every student only sat published exams of their own class, and the
+        # stored score is what grading the stored answers gives
+        key = compile_answer_table(conn.execute(text("SELECT id, question_type, correct_answer, answer_key, marks, negative_marks FROM questions")))
+        rows = conn.execute(text(
+            "SELECT r.answers, r.score, r.max_score, e.published, e.class_id, sc.class_id"
+            " FROM results r JOIN exams e ON e.id = r.exam_id JOIN student_class sc ON sc.student_id = r.student_id"
+        )).fetchall()
+        for answers, score, max_score, published, exam_class, student_class in rows:
+            assert published and exam_class == student_class
+            assert grade(json.loads(answers), key) == (score, max_score)
+
+        # Teachers can see their exams through the indexed assignment table
+        assert conn.execute(text(
+            "SELECT COUNT(*) FROM exams e JOIN teacher_subjects t"
+            " ON t.class_id = e.class_id AND t.subject_id = e.subject_id AND t.teacher_id = e.created_by"
+        )).scalar() == counts["exams"]
+    engine.dispose()
+
+    # Same seed, same school
+    again = datagen.generate(f"sqlite:///{tmp_path / 'data' / 'again.db'}", profile, seed=7)
+    assert again == counts
+
+
+def test_subject_codes_are_unique():
+    names = sorted({s for subjects in NIGERIAN_SCHOOL_SUBJECTS.values() for s in subjects})
+    codes = datagen.subject_codes(names)
+    assert len(set(codes.values())) == len(names)
+    assert codes["English Language"] == "EL" and codes["Mathematics"] == "MAT"
@@ -0,0 +1,167 @@
+from io import BytesIO
+
+import pytest
+from sqlalchemy import event, insert
+
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.question_fingerprint import QuestionFingerprint, QuestionLSHBucket
+from app.models.subject import Subject
+from app.models.user import User
+from app.services import duplicate_service as dup, exam_service, question_bank_service as bank
+from app.services.exam_service import CloneTarget
+
+PHOTOSYNTHESIS = (
+    "Which of the following is the process by which green plants make their own food using sunlight?",
+    ["Photosynthesis", "Respiration", "Transpiration", "Digestion"],
+)
+
+
+@pytest.fixture
+def school(db):
+    teacher = User(full_name="Teacher", email="t@example.com", hashed_password="h", role="teacher")
+    science, english = Subject(name="Basic Science", code="BSC"), Subject(name="English Language", code="ENG")
+    db.add_all([teacher, science, english])
+    db.commit()
+    exams = {}
+    for name, subject in (("science", science), ("science2", science), ("english", english)):
+        exams[name] = Exam(title=name, created_by=teacher.id, subject_id=subject.id)
+    db.add_all(exams.values())
+    db.commit()
+    return {"teacher": teacher, "science": science, "english": english, **exams}
+
+
+def docx(*questions):
+    from docx import Document
+
+    doc = Document()
+    for n, (text, options, answer) in enumerate(questions, 1):
+        doc.add_paragraph(f"{n}. {text}")
+        for letter, option in zip("ABCD", options):
+            doc.add_paragraph(f"{letter}. {option}")
+        doc.add_paragraph(f"Answer: {'ABCD'[answer]}")
+    out = BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+
+def test_signature_ignores_option_order_case_and_diacritics():
+    text, options = PHOTOSYNTHESIS
+    base = dup.signature(text, options)
+    assert dup.signature(text.upper() + "  ", list(reversed(options))) == base
+    assert dup.signature("Ọ̀rọ̀ wo ni?", ["Ẹ̀kọ́", "Ilé"]) == dup.signature("oro wo ni", ["ile", "EKO"])
+    assert len(base) == dup.SIGNATURE_SIZE and len(dup.buckets(base)) == dup.BANDS
+
+
+def test_similarity_estimates_jaccard():
+    pairs = [
+        (PHOTOSYNTHESIS, (PHOTOSYNTHESIS[0].replace("green ", ""), PHOTOSYNTHESIS[1])),
+        (PHOTOSYNTHESIS, ("Which of the following is the process by which animals break down food?", ["Digestion", "Respiration", "Excretion", "Growth"])),
+        (("Name the capital of Nigeria", ["Abuja", "Lagos"]), ("Who wrote Things Fall Apart?", ["Chinua Achebe", "Wole Soyinka"])),
+    ]
+    for a, b in pairs:
+        sa, sb = dup.shingles(*a), dup.shingles(*b)
+        jaccard = len(sa & sb) / len(sa | sb)
+        assert dup.similarity(dup.signature(*a), dup.signature(*b)) == pytest.approx(jaccard, abs=0.12)
+
+
+def test_lookup_is_per_subject_and_follows_edits(db, school):
+    q = exam_service.add_question(db, school["teacher"].id, school["science"].id, PHOTOSYNTHESIS[0], PHOTOSYNTHESIS[1], 0)
+    reworded = ("Which of the following is the process by which plants make their own food using sunlight?", PHOTOSYNTHESIS[1][::-1])
+
+    match = dup.find_duplicate(db, school["science"].subject_id, *reworded)
+    assert match.question_id == q.id and 0.8 < match.similarity < 1
+    assert dup.find_duplicate(db, school["english"].subject_id, *reworded) is None
+    assert dup.find_duplicate(db, school["science"].subject_id, "What is the capital of Ghana?", ["Accra", "Kumasi"]) is None
+
+    exam_service.update_question(db, q.id, school["teacher"].id, text="Define osmosis.", options=["a", "b"], correct_answer=0)
+    assert dup.find_duplicate(db, school["science"].subject_id, *reworded) is None
+    assert dup.find_duplicate(db, school["science"].subject_id, "Define osmosis", ["b", "a"]).similarity == 1.0
+
+    exam_service.update_exam(db, school["science"].id, subject_id=school["english"].subject_id)
+    assert dup.find_duplicate(db, school["science2"].subject_id, "Define osmosis", ["a", "b"]) is None
+    assert dup.find_duplicate(db, school["english"].subject_id, "Define osmosis", ["a", "b"]).question_id == q.id
+
+    exam_service.delete_question(db, q.id)
+    assert db.query(QuestionFingerprint).count() == db.query(QuestionLSHBucket).count() == 0
+
+
+def test_deleted_exams_leave_nothing_to_match(db, school):
+    exam_service.add_question(db, school["teacher"].id, school["science"].id, *PHOTOSYNTHESIS, 0)
+    exam_service.delete_exam(db, school["science"].id)
+    assert dup.find_duplicate(db, school["science2"].subject_id, *PHOTOSYNTHESIS) is None
+    assert db.query(QuestionFingerprint).count() == 0
+
+
+@pytest.mark.parametrize("on_duplicate", ["flag", "skip"])
+def test_import_flags_or_skips_near_duplicates(db, school, on_duplicate):
+    existing = exam_service.add_question(db, school["teacher"].id, school["science"].id, *PHOTOSYNTHESIS, 0)
+    data = docx(
+        # Last year's wording, options reshuffled
+        ("Which of the following is the process by which green plants make food using sunlight?", ["Respiration", "Photosynthesis", "Digestion", "Transpiration"], 1),
+        ("What is the SI unit of force?", ["Newton", "Joule", "Watt", "Pascal"], 0),
+        ("What is the S.I. unit of force?", ["Joule", "Newton", "Watt", "Pascal"], 1),  # repeated within the file
+        ("What is the SI unit of energy?", ["Newton", "Joule", "Watt", "Pascal"], 1),
+    )
+    result = exam_service.import_questions_from_docx(db, school["science2"].id, data, school["teacher"].id, on_duplicate=on_duplicate)
+
+    action = "flagged" if on_duplicate == "flag" else "skipped"
+    force = db.query(Question).filter(Question.exam_id == school["science2"].id, Question.text == "What is the SI unit of force?").one()
+    assert [(d["duplicate_of"], d["action"]) for d in result["duplicates"]] == [(existing.id, action), (force.id, action)]
+    assert all(0.7 <= d["similarity"] < 1 for d in result["duplicates"])
+    assert result["questions_created"] == (4 if on_duplicate == "flag" else 2)
+    assert result["questions_skipped"] == (0 if on_duplicate == "flag" else 2)
+
+    with pytest.raises(ValueError, match="on_duplicate"):
+        exam_service.import_questions_from_docx(db, school["science2"].id, data, school["teacher"].id, on_duplicate="merge")
+
+
+def test_index_missing_covers_questions_written_directly(db, school):
+    db.execute(insert(Question), [
+        {"exam_id": school["english"].id, "text": f"Spell word number {n}", "options": ["a", "b"], "correct_answer": 0}
+        for n in range(5)
+    ])
+    db.commit()
+    assert dup.index_missing(db, chunk_size=2) == 5
+    assert dup.index_missing(db) == 0
+    assert db.query(QuestionLSHBucket).count() == 5 * dup.BANDS
+    assert dup.find_duplicate(db, school["english"].subject_id, "Spell word number 3", ["b", "a"]).similarity == 1.0
+
+
+def test_bank_attach_clone_and_bank_edits_keep_the_index_current(db, school):
+    item = bank.create_bank_question(db, school["teacher"].id, school["science"].id, "JSS1", *PHOTOSYNTHESIS, 0)
+    assert bank.attach_to_exam(db, school["science"].id, [item.id], school["teacher"].id) == 1
+    match = dup.find_duplicate(db, school["science"].subject_id, *PHOTOSYNTHESIS)
+    assert match is not None and match.similarity == 1.0
+
+    english = school["english"].subject_id
+    clone_id, = exam_service.clone_exams(db, school["teacher"].id, [CloneTarget(school["science"].id, subject_id=english)])
+    copy = db.query(Question).filter_by(exam_id=clone_id).one()
+    source = db.get(QuestionFingerprint, match.question_id)
+    assert db.get(QuestionFingerprint, copy.id).signature == source.signature
+    assert dup.find_duplicate(db, english, *PHOTOSYNTHESIS).question_id == copy.id
+
+    # The clone stays linked to the bank item, so the edit reaches both
+    bank.update_bank_question(db, item.id, text="Define osmosis.", options=["a", "b"])
+    for subject_id, question_id in ((school["science"].subject_id, match.question_id), (english, copy.id)):
+        assert dup.find_duplicate(db, subject_id, *PHOTOSYNTHESIS) is None
+        assert dup.find_duplicate(db, subject_id, "Define osmosis", ["b", "a"]).question_id == question_id
+    assert dup.index_missing(db) == 0
+
+
+def test_candidate_lookup_reads_only_the_bucket_index(db, school):
+    exam_service.add_question(db, school["teacher"].id, school["science"].id, *PHOTOSYNTHESIS, 0)
+    issued = []
+    capture = lambda conn, cursor, statement, parameters, context, executemany: issued.append((statement, parameters))
+    event.listen(db.get_bind(), "before_cursor_execute", capture)
+    try:
+        dup.find_duplicate(db, school["science"].subject_id, *PHOTOSYNTHESIS)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", capture)
+
+    (statement, parameters), = [(s, p) for s, p in issued if "question_lsh_buckets" in s]
+    raw = db.connection().connection.driver_connection
+    plan = [row[3] for row in raw.execute("EXPLAIN QUERY PLAN " + statement, parameters)]
+    assert any("COVERING INDEX ix_question_lsh_buckets_subject_id_bucket_question_id" in step for step in plan), plan
+    # Only the materialized top candidates are scanned; everything else is by key
+    assert [step for step in plan if step.startswith("SCAN")] == ["SCAN anon_1"], plan
@@ -0,0 +1,190 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import edge as edge_api
+from app.core import static_files
+from app.core.config import settings
+from app.core.db import Base, get_db
+from app.core.edge import EdgeReadOnlyMiddleware
+from app.models.edge import EdgeOutbox
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.result import Result
+from app.models.subject import Class, student_class_association
+from app.models.user import User
+from app.services import edge_service, exam_service, result_service
+
+
+class CentralUpstream:
+    """UpstreamClient stand-in that talks to an in-process central app."""
+
+    def __init__(self, client: TestClient, key: str):
+        self.client = client
+        self.headers = {"X-Edge-Key": key}
+        self.online = True
+        self.fetched = []  # status of every snapshot request
+
+    def _check(self, response):
+        if not self.online:
+            raise edge_service.UpstreamError("link down")
+        response.raise_for_status()
+        return response
+
+    def get_json(self, path, params=None):
+        return self._check(self.client.get(path, params=params, headers=self.headers)).json()
+
+    def get_json_if_changed(self, path, etag, params=None):
+        if not self.online:
+            raise edge_service.UpstreamError("link down")
+        headers = {**self.headers, "If-None-Match": etag} if etag else self.headers
+        response = self.client.get(path, params=params, headers=headers)
+        self.fetched.append(response.status_code)
+        return None if response.status_code == 304 else self._check(response).json()
+
+    def post_json(self, path, payload):
+        if not self.online:
+            raise edge_service.UpstreamError("link down")
+        return self._check(self.client.post(path, json=payload, headers=self.headers)).json()
+
+    def get_bytes(self, path):
+        return self._check(self.client.get(path)).content
+
+
+@pytest.fixture
+def edge_db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def central(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EDGE_SYNC_KEY", "lab-key")
+    monkeypatch.setattr(static_files, "UPLOAD_DIR", str(tmp_path / "central_uploads"))
+
+    admin = User(full_name="Admin", email="admin@example.com", hashed_password="h-admin", role="admin")
+    students = [
+        User(full_name=f"S{i}", email=f"s{i}@example.com", hashed_password=f"h{i}", role="student", registration_number=f"NG/EEV/000{i}A",
+             passport="data:image/png;base64," + "A" * 1000)
+        for i in range(3)
+    ]
+    db.add_all([admin, *students])
+    jss1, jss2 = Class(name="JSS1A", level="JSS1"), Class(name="JSS2A", level="JSS2")
+    db.add_all([jss1, jss2])
+    db.commit()
+    db.execute(student_class_association.insert(), [
+        {"student_id": students[0].id, "class_id": jss1.id},
+        {"student_id": students[1].id, "class_id": jss1.id},
+        {"student_id": students[2].id, "class_id": jss2.id},
+    ])
+    image_url = static_files.store_upload(b"<svg/>" * 50, ".svg", "questions")
+    published = Exam(title="Maths", created_by=admin.id, class_id=jss1.id, published=True)
+    draft = Exam(title="Draft", created_by=admin.id, class_id=jss1.id, published=False)
+    other = Exam(title="JSS2 Maths", created_by=admin.id, class_id=jss2.id, published=True)
+    db.add_all([published, draft, other])
+    db.commit()
+    db.add_all([
+        Question(exam_id=published.id, text="1 + 1?", options=["1", "2"], correct_answer=1, marks=1, image_url=image_url, created_by=admin.id),
+        Question(exam_id=draft.id, text="secret", options=["a", "b"], correct_answer=0, marks=1, created_by=admin.id),
+    ])
+    db.commit()
+
+    app = FastAPI()
+    app.include_router(edge_api.router, prefix="/api")
+    app.mount("/uploads", static_files.UploadStaticFiles(directory=static_files.UPLOAD_DIR))
+    app.dependency_overrides[get_db] = lambda: db
+    return {"db": db, "app": app, "jss1": jss1, "students": students, "exam": published, "image_url": image_url}
+
+
+def test_edge_pulls_published_exams_and_forwards_submissions(central, edge_db, tmp_path, monkeypatch):
+    upstream = CentralUpstream(TestClient(central["app"]), "lab-key")
+
+    # --- pull, restricted to one class ---
+    monkeypatch.setattr(static_files, "UPLOAD_DIR", str(tmp_path / "edge_uploads"))
+    counts = edge_service.pull(edge_db, upstream, class_ids=[central["jss1"].id])
+    assert counts["images_downloaded"] == 1
+    assert (tmp_path / "edge_uploads" / central["image_url"][len("/uploads/"):]).exists()
+
+    assert [e.title for e in edge_db.query(Exam).all()] == ["Maths"]
+    assert [q.text for q in edge_db.query(Question).all()] == ["1 + 1?"]
+    students = central["students"]
+    local_users = {u.email: u for u in edge_db.query(User).all()}
+    assert set(local_users) == {"admin@example.com", "s0@example.com", "s1@example.com"}
+    assert local_users["s0@example.com"].hashed_password == "h0"  # logins work locally
+    assert local_users["s0@example.com"].passport is None  # photos stay upstream
+
+    # Students see the exam through the normal service code
+    visible = exam_service.list_exams(edge_db, published_only=True, student_id=students[0].id)
+    assert [e.id for e in visible] == [central["exam"].id]
+
+    # --- submit locally while the link is down ---
+    upstream.online = False
+    question = edge_db.query(Question).one()
+    answers = [{"question_id": question.id, "answer_index": 1}]
+    edge_service.queue_attempt(edge_db, students[0].id, central["exam"].id, answers)
+    local = result_service.grade_and_record(edge_db, students[0].id, central["exam"].id, answers)
+    assert local.score == 1.0
+    assert edge_db.query(EdgeOutbox).count() == 1
+
+    with pytest.raises(edge_service.UpstreamError):
+        edge_service.forward(edge_db, upstream)
+    assert edge_db.query(EdgeOutbox).one().attempts == 1
+
+    # --- link back: forwarded, graded centrally, queue drained ---
+    upstream.online = True
+    assert edge_service.forward(edge_db, upstream) == {"sent": 1, "failed": 0}
+    assert edge_db.query(EdgeOutbox).count() == 0
+    central_result = central["db"].query(Result).one()
+    assert (central_result.student_id, central_result.score) == (students[0].id, 1.0)
+
+    # --- nothing changed: a 304, and not a single write on the edge ---
+    writes = []
+    record = lambda conn, cursor, statement, *args: writes.append(statement) if not statement.lstrip().upper().startswith("SELECT") else None
+    event.listen(edge_db.get_bind(), "before_cursor_execute", record)
+    try:
+        assert edge_service.pull(edge_db, upstream, class_ids=[central["jss1"].id]) == {"unchanged": True, "images_downloaded": 0}
+    finally:
+        event.remove(edge_db.get_bind(), "before_cursor_execute", record)
+    assert upstream.fetched[-1] == 304
+    assert writes == []
+
+    # --- one renamed student: only that row is written ---
+    students[1].full_name = "S1 renamed"
+    central["db"].commit()
+    counts = edge_service.pull(edge_db, upstream, class_ids=[central["jss1"].id])
+    assert counts["users"] == 1 and counts["questions"] == counts["student_class"] == 0
+    assert edge_db.get(User, students[1].id).full_name == "S1 renamed"
+
+    # --- a later pull drops exams that were unpublished centrally ---
+    exam_service.update_exam_published(central["db"], central["exam"].id, False)
+    edge_service.pull(edge_db, upstream, class_ids=[central["jss1"].id])
+    assert edge_db.query(Exam).count() == 0
+    assert edge_db.query(Question).count() == 0
+
+
+def test_edge_endpoints_require_key_and_edge_is_read_only(central):
+    client = TestClient(central["app"])
+    assert client.get("/api/edge/snapshot").status_code == 403
+    assert client.get("/api/edge/snapshot", headers={"X-Edge-Key": "wrong"}).status_code == 403
+
+    app = FastAPI()
+
+    @app.post("/api/auth/login")
+    def login():
+        return {"ok": True}
+
+    @app.post("/api/exams/")
+    def create_exam():
+        return {"ok": True}
+
+    app.add_middleware(EdgeReadOnlyMiddleware)
+    edge_client = TestClient(app)
+    assert edge_client.post("/api/auth/login").status_code == 200
+    assert edge_client.post("/api/exams/").status_code == 403
@@ -0,0 +1,167 @@
+import orjson
+import pytest
+from sqlalchemy import event
+
+from app.api import exams as exams_api, questions as questions_api
+from app.api.exams import QUESTION_COLUMNS
+from app.models.exam import Exam, ExamVariant
+from app.models.question import Question
+from app.models.question_bank import BankQuestion
+from app.models.subject import Class, Subject, student_class_association
+from app.models.user import User
+from app.services import assembly_service, exam_service, result_service
+from app.services.assembly_service import Section
+
+BLUEPRINT = [
+    Section("easy", 3, ["Fractions", "Decimals"]),
+    Section("medium", 4),
+    Section("hard", 2, ["Algebra"]),
+]
+
+
+@pytest.fixture
+def school(db):
+    teacher = User(full_name="Teacher", email="t@example.com", hashed_password="h", role="teacher")
+    students = [User(full_name=f"S{i}", email=f"s{i}@example.com", hashed_password="h", role="student") for i in range(6)]
+    jss1 = Class(name="JSS1A", level="JSS1")
+    maths = Subject(name="Mathematics", code="MAT")
+    db.add_all([teacher, *students, jss1, maths])
+    db.commit()
+    db.execute(student_class_association.insert(), [{"student_id": s.id, "class_id": jss1.id} for s in students])
+    topics = ["Fractions", "Decimals", "Algebra", "Geometry"]
+    db.add_all([
+        BankQuestion(subject_id=maths.id, level=level, topic=topic, difficulty=difficulty, text=f"{level} {topic} {difficulty} {n}",
+                     options=["a", "b", "c", "d"], correct_answer=0, marks=1, created_by=teacher.id)
+        for level in ("JSS1", "JSS2")
+        for topic in topics
+        for difficulty in ("easy", "medium", "hard")
+        for n in range(5)
+    ])
+    db.commit()
+    return {"teacher": teacher, "students": students, "class": jss1, "maths": maths}
+
+
+def assemble(db, school, sections=BLUEPRINT, **kwargs):
+    return assembly_service.assemble_exam(db, school["teacher"].id, "Maths test", school["class"].id, school["maths"].id, sections, **kwargs)
+
+
+def bank_items(db, question_ids):
+    rows = db.query(Question.id, BankQuestion).join(BankQuestion, BankQuestion.id == Question.bank_question_id).filter(Question.id.in_(question_ids))
+    return {question_id: item for question_id, item in rows}
+
+
+def test_single_paper_follows_the_blueprint(db, school):
+    out = assemble(db, school, seed=1)
+    assert out["questions"] == 9 and out["papers"] == 0
+    exam = db.get(Exam, out["exam_id"])
+    assert not exam.published
+    items = list(bank_items(db, [q.id for q in exam.questions]).values())
+    assert len({item.id for item in items}) == 9
+    assert all(item.level == "JSS1" for item in items)
+    by_difficulty = {d: [i for i in items if i.difficulty == d] for d in ("easy", "medium", "hard")}
+    assert len(by_difficulty["easy"]) == 3 and {i.topic for i in by_difficulty["easy"]} <= {"Fractions", "Decimals"}
+    assert len(by_difficulty["medium"]) == 4
+    assert len(by_difficulty["hard"]) == 2 and {i.topic for i in by_difficulty["hard"]} == {"Algebra"}
+    # Same seed, same paper
+    again = db.get(Exam, assemble(db, school, seed=1)["exam_id"])
+    assert [q.bank_question_id for q in again.questions] == [q.bank_question_id for q in exam.questions]
+
+
+def test_per_student_papers_differ_and_are_served_to_their_student(db, school):
+    out = assemble(db, school, per_student=True, seed=7)
+    variants = db.query(ExamVariant).filter(ExamVariant.exam_id == out["exam_id"]).order_by(ExamVariant.paper_number).all()
+    assert out["papers"] == len(variants) == 6
+    assert [v.student_id for v in variants] == sorted(s.id for s in school["students"])
+    assert len({frozenset(v.question_ids) for v in variants}) == 6
+    # The exam holds each drawn item once, and every paper keeps to the blueprint
+    questions = db.query(Question).filter(Question.exam_id == out["exam_id"]).all()
+    assert out["questions"] == len(questions) == len({q.bank_question_id for q in questions})
+    for variant in variants:
+        items = bank_items(db, variant.question_ids)
+        assert len(items) == 9
+        assert sorted(i.difficulty for i in items.values()) == ["easy"] * 3 + ["hard"] * 2 + ["medium"] * 4
+
+    student = school["students"][2]
+    paper = assembly_service.paper_for(db, out["exam_id"], student.id)
+    assert paper == variants[2].question_ids
+    rows = exam_service.get_question_rows_for_exam(db, out["exam_id"], QUESTION_COLUMNS, question_ids=paper)
+    assert [row.id for row in rows] == paper
+
+    # A late joiner sits an existing paper; exams without variants have none
+    assert assembly_service.paper_for(db, out["exam_id"], 10_000) in [v.question_ids for v in variants]
+    assert assembly_service.paper_for(db, assemble(db, school)["exam_id"], student.id) is None
+
+
+def test_overlapping_sections_never_repeat_an_item(db, school):
+    # 5 medium Algebra items in all: two sections drawing from them take all five
+    sections = [Section("medium", 3, ["Algebra"]), Section("medium", 2, ["Algebra"])]
+    exam = db.get(Exam, assemble(db, school, sections)["exam_id"])
+    assert len({q.bank_question_id for q in exam.questions}) == 5
+
+
+def test_short_pool_fails_without_writing(db, school):
+    exams_before = db.query(Exam).count()
+    with pytest.raises(ValueError, match="only 5 item"):
+        assemble(db, school, [Section("hard", 6, ["Algebra"])])
+    with pytest.raises(ValueError, match="only 0 free"):
+        assemble(db, school, [Section("easy", 5, ["Geometry"]), Section("easy", 1, ["Geometry"])])
+    with pytest.raises(ValueError, match="Class not found"):
+        assembly_service.assemble_exam(db, school["teacher"].id, "x", 999, school["maths"].id, BLUEPRINT)
+    assert db.query(Exam).count() == exams_before
+
+
+def test_sampling_reads_ids_from_the_index(db, school):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        assemble(db, school)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    sampling = [s for s in statements if "FROM bank_questions" in s and "INSERT" not in s]
+    assert len(sampling) == len(BLUEPRINT)
+    assert not any("random()" in s.lower() for s in statements)
+    for statement in sampling:
+        plan = " ".join(str(row[-1]) for row in db.connection().exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, (school["maths"].id, "JSS1", "easy", "Fractions", "Decimals")[:statement.count("?")]
+        ))
+        assert "COVERING INDEX ix_bank_questions_subject_id_level_topic_difficulty" in plan
+
+
+def test_students_get_their_paper_without_the_keys(db, school):
+    out = assemble(db, school, per_student=True, seed=3)
+    student, teacher = school["students"][0], school["teacher"]
+    paper = assembly_service.paper_for(db, out["exam_id"], student.id)
+    for route in (exams_api.get_exam_questions, questions_api.get_questions_for_exam):
+        rows = orjson.loads(route(out["exam_id"], db=db, current_user=student).body)
+        assert [row["id"] for row in rows] == paper
+        assert not {"correct_answer", "answer_key"} & {key for row in rows for key in row}
+        # Staff still see every question with its key
+        rows = orjson.loads(route(out["exam_id"], db=db, current_user=teacher).body)
+        assert len(rows) == out["questions"] and all("correct_answer" in row and "answer_key" in row for row in rows)
+
+
+def test_attempts_are_graded_on_the_students_own_paper(db, school):
+    out = assemble(db, school, per_student=True, seed=3)
+    first, second = school["students"][:2]
+    own = assembly_service.paper_for(db, out["exam_id"], first.id)
+    others = {q.id for q in db.query(Question).filter(Question.exam_id == out["exam_id"])} - set(own)
+    # Two right answers on the paper, and one to a question the student was not set
+    answers = [{"question_id": q, "answer_index": 0} for q in [*own[:2], min(others)]]
+
+    result = result_service.grade_and_record(db, first.id, out["exam_id"], answers)
+    assert (result.score, result.max_score) == (2, 9)
+
+    # Offline attempts are graded the same way
+    second_own = assembly_service.paper_for(db, out["exam_id"], second.id)
+    stray = min(others | set(own) - set(second_own))
+    [status] = result_service.sync_results(db, [{
+        "idempotency_key": "paper-1", "student_id": second.id, "exam_id": out["exam_id"],
+        "answers": [{"question_id": q, "answer_index": 0} for q in (second_own[0], stray)],
+    }])
+    assert (status["score"], status["max_score"]) == (1, 9)
+
+    late = (out["exam_id"], 10_000)
+    assert assembly_service.papers_for(db, [late, (out["exam_id"], first.id)]) == {
+        late: assembly_service.paper_for(db, *late), (out["exam_id"], first.id): own,
+    }
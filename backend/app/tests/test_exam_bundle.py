@@ -0,0 +1,73 @@
+import io
+import json
+import os
+import zipfile
+
+import pytest
+
+from app.core import static_files
+from app.core.config import settings
+from app.models.exam import Exam
+from app.models.user import User
+from app.services import bundle_service, exam_service
+
+
+@pytest.fixture
+def exam(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "EXAM_BUNDLE_DIR", str(tmp_path / "bundles"))
+    monkeypatch.setattr(static_files, "UPLOAD_DIR", str(tmp_path / "uploads"))
+
+    teacher = User(full_name="T", email="t@example.com", hashed_password="x", role="teacher")
+    db.add(teacher)
+    db.commit()
+    exam = Exam(title="Maths", duration_minutes=40, created_by=teacher.id)
+    db.add(exam)
+    db.commit()
+    image_url = static_files.store_upload(b"\x89PNG fake image", ".png", "questions")
+    exam_service.add_question(db, teacher.id, exam.id, "2 + 2?", ["3", "4"], 1, image_url=image_url)
+    exam_service.add_question(db, teacher.id, exam.id, "Capital of Nigeria?", ["Lagos", "Abuja"], 1)
+    return exam
+
+
+def test_bundle_built_on_publish_without_keys(db, exam):
+    with pytest.raises(ValueError):
+        bundle_service.get_exam_bundle(db, exam)
+
+    exam_service.update_exam_published(db, exam.id, True)
+    path = bundle_service.bundle_path(exam.id)
+    assert os.path.exists(path)
+
+    bundle = bundle_service.read_bundle(path)
+    paper = bundle["paper"]
+    assert [q["text"] for q in paper["questions"]] == ["2 + 2?", "Capital of Nigeria?"]
+    assert all("correct_answer" not in q for q in paper["questions"])
+    image = paper["questions"][0]["image"]
+    assert bundle["files"][image] == b"\x89PNG fake image"
+    assert bundle["manifest"]["missing_images"] == []
+
+    # Rebuilding unchanged content gives identical bytes
+    first = open(path, "rb").read()
+    bundle_service.build_exam_bundle(db, exam)
+    assert open(path, "rb").read() == first
+
+
+def test_bundle_invalidated_by_edits_and_tampering_detected(db, exam):
+    exam_service.update_exam_published(db, exam.id, True)
+    version = bundle_service.read_bundle(bundle_service.bundle_path(exam.id))["manifest"]["version"]
+
+    exam_service.add_question(db, exam.created_by, exam.id, "5 - 3?", ["2", "8"], 0)
+    assert not os.path.exists(bundle_service.bundle_path(exam.id))
+    path = bundle_service.get_exam_bundle(db, exam)
+    assert bundle_service.read_bundle(path)["manifest"]["version"] != version
+
+    tampered = io.BytesIO()
+    with zipfile.ZipFile(path) as src, zipfile.ZipFile(tampered, "w") as dst:
+        for item in src.infolist():
+            data = src.read(item.filename)
+            if item.filename == "exam.json":
+                paper = json.loads(data)
+                paper["duration_minutes"] = 400
+                data = json.dumps(paper).encode()
+            dst.writestr(item, data)
+    with pytest.raises(ValueError):
+        bundle_service.read_bundle(io.BytesIO(tampered.getvalue()))
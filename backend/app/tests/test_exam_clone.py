@@ -0,0 +1,139 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+
+from app.api import exams as exams_api
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.subject import Class, Subject, TeacherSubject
+from app.models.user import User
+from app.schemas.exam import ExamClone, ExamCloneBatch
+from app.services import exam_service
+from app.services.exam_service import CloneTarget
+
+
+@pytest.fixture
+def school(db):
+    admin = User(full_name="Admin", email="admin@example.com", hashed_password="h", role="admin")
+    teacher = User(full_name="Teacher", email="t@example.com", hashed_password="h", role="teacher")
+    jss1a, jss1b, jss2a = Class(name="JSS1A", level="JSS1"), Class(name="JSS1B", level="JSS1"), Class(name="JSS2A", level="JSS2")
+    maths, english = Subject(name="Mathematics", code="MAT"), Subject(name="English", code="ENG")
+    db.add_all([admin, teacher, jss1a, jss1b, jss2a, maths, english])
+    db.commit()
+    db.add(TeacherSubject(teacher_id=teacher.id, class_id=jss1a.id, subject_id=maths.id))
+    exams = [
+        Exam(title="Maths", description="Term 1", duration_minutes=45, created_by=admin.id, class_id=jss1a.id, subject_id=maths.id, published=True),
+        Exam(title="English", created_by=admin.id, class_id=jss2a.id, subject_id=english.id, published=True),
+    ]
+    db.add_all(exams)
+    db.commit()
+    db.add_all([
+        Question(exam_id=exams[0].id, text="1 + 1?", options=["1", "2"], correct_answer=1, created_by=admin.id),
+        Question(exam_id=exams[0].id, text="2 + 2?", options=["4", "5"], correct_answer=0, marks=2, image_url="/uploads/q.png", created_by=admin.id),
+        Question(exam_id=exams[1].id, text="Noun?", options=["run", "dog"], correct_answer=1, created_by=admin.id),
+    ])
+    db.commit()
+    return SimpleNamespace(admin=admin, teacher=teacher, jss1a=jss1a, jss1b=jss1b, jss2a=jss2a, maths=maths, english=english, exams=exams)
+
+
+def questions_of(db, exam_id):
+    return [(q.text, q.options, q.correct_answer, q.marks, q.image_url) for q in db.query(Question).filter(Question.exam_id == exam_id).order_by(Question.id)]
+
+
+def test_clone_copies_exam_and_questions_unpublished(db, school):
+    source = school.exams[0]
+    [new_id] = exam_service.clone_exams(db, school.admin.id, [CloneTarget(source.id)])
+    clone = db.get(Exam, new_id)
+    assert (clone.title, clone.description, clone.duration_minutes, clone.class_id, clone.subject_id) == ("Maths", "Term 1", 45, source.class_id, source.subject_id)
+    assert not clone.published
+    assert questions_of(db, new_id) == questions_of(db, source.id)
+    assert {q.created_by for q in clone.questions} == {school.admin.id}
+
+
+def test_clone_retargets_and_batches_in_few_statements(db, school):
+    targets = [
+        CloneTarget(school.exams[0].id, class_id=school.jss1b.id),
+        CloneTarget(school.exams[0].id, class_id=school.jss2a.id, title="Maths (JSS2)"),
+        CloneTarget(school.exams[1].id, subject_id=school.maths.id),
+    ]
+    admin_id = school.admin.id
+    statements = []
+    listener = lambda conn, cursor, statement, params, context, executemany: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        new_ids = exam_service.clone_exams(db, admin_id, targets)
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+    # One read of the sources, the exam rows (one by one on SQLite, which
+    # cannot order RETURNING for a batch), one INSERT ... SELECT for the questions,
+    # then a fixed five to index the copies: one INSERT ... SELECT each for the
+    # sources' fingerprints and buckets, and a read and two inserts for the
+    # questions of sources that were never indexed (all of them, here)
+    assert len([s for s in statements if s.startswith("INSERT INTO questions")]) == 1
+    assert len(statements) <= 2 + len(targets) + 5
+
+    clones = [db.get(Exam, i) for i in new_ids]
+    assert [(c.title, c.class_id, c.subject_id) for c in clones] == [
+        ("Maths", school.jss1b.id, school.maths.id),
+        ("Maths (JSS2)", school.jss2a.id, school.maths.id),
+        ("English", school.jss2a.id, school.maths.id),
+    ]
+    assert [len(questions_of(db, i)) for i in new_ids] == [2, 2, 1]
+
+
+def test_clone_of_missing_exam_writes_nothing(db, school):
+    before = db.query(Exam).count()
+    with pytest.raises(ValueError, match="Exams not found: 999"):
+        exam_service.clone_exams(db, school.admin.id, [CloneTarget(school.exams[0].id), CloneTarget(999)])
+    assert db.query(Exam).count() == before
+
+
+def test_clone_routes_check_teacher_access(db, school):
+    source = school.exams[0]
+    out = exams_api.clone_exam(source.id, ExamClone(), db=db, current_user=school.teacher)
+    assert out["cloned"] == 1 and db.get(Exam, out["exam_ids"][0]).created_by == school.teacher.id
+    # The teacher is not assigned to JSS1B, nor to English
+    with pytest.raises(HTTPException) as denied:
+        exams_api.clone_exam(source.id, ExamClone(class_ids=[school.jss1a.id, school.jss1b.id]), db=db, current_user=school.teacher)
+    assert denied.value.status_code == 403
+    with pytest.raises(HTTPException) as denied:
+        exams_api.clone_exams(ExamCloneBatch(items=[{"exam_id": school.exams[1].id}]), db=db, current_user=school.teacher)
+    assert denied.value.status_code == 403
+    with pytest.raises(HTTPException) as missing:
+        exams_api.clone_exam(999, ExamClone(), db=db, current_user=school.admin)
+    assert missing.value.status_code == 404
+
+    out = exams_api.clone_exams(ExamCloneBatch(items=[
+        {"exam_id": source.id, "class_ids": [school.jss1a.id, school.jss1b.id]},
+        {"exam_id": school.exams[1].id},
+    ]), db=db, current_user=school.admin)
+    assert out["cloned"] == 3
+
+
+def test_clone_access_checks_read_the_batch_once(db, school):
+    # An assigned exam, the teacher's own class-only one, and one they may not read
+    own = Exam(title="Own", created_by=school.teacher.id, class_id=school.jss1a.id)
+    db.add(own)
+    db.commit()
+    db.refresh(school.teacher)
+
+    def checked(items):
+        statements = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.get_bind(), "before_cursor_execute", listener)
+        try:
+            targets = exams_api._clone_targets(db, school.teacher, [(exam_id, ExamClone()) for exam_id in items])
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", listener)
+        return targets, len(statements)
+
+    one, queries = checked([school.exams[0].id])
+    many, batch_queries = checked([school.exams[0].id, own.id] * 50)
+    assert len(one) == 1 and len(many) == 100
+    # The sources in one query and the teacher's assignments in another
+    assert queries == batch_queries == 2
+    with pytest.raises(HTTPException) as denied:
+        checked([own.id, school.exams[1].id])
+    assert denied.value.status_code == 403
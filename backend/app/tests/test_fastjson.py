@@ -0,0 +1,94 @@
+import json
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.api import exams as exams_api, questions as questions_api, results as results_api, users as users_api
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.result import Result
+from app.models.subject import Class, Subject, TeacherSubject, student_class_association
+from app.models.user import User
+from app.schemas.exam import ExamOut
+from app.schemas.question import QuestionOut
+from app.schemas.result import ResultOut
+from app.schemas.user import UserOut
+from app.services import exam_service, result_service
+
+
+@pytest.fixture
+def school(db):
+    admin = User(full_name="Admin", email="admin@example.com", hashed_password="h", role="admin")
+    teacher = User(full_name="Teacher", email="t@example.com", hashed_password="h", role="teacher")
+    student = User(full_name="Ada Obi", email="s@example.com", hashed_password="h", role="student", registration_number="SCH/2025/001")
+    db.add_all([admin, teacher, student, Class(name="JSS1A", level="JSS1"), Subject(name="Mathematics", code="MAT")])
+    db.commit()
+    jss1, maths = db.query(Class).one(), db.query(Subject).one()
+    db.execute(student_class_association.insert(), {"student_id": student.id, "class_id": jss1.id})
+    db.add(TeacherSubject(teacher_id=teacher.id, class_id=jss1.id, subject_id=maths.id))
+    exams = [
+        Exam(title="Maths", created_by=admin.id, class_id=jss1.id, subject_id=maths.id, published=True),
+        Exam(title="Maths draft", created_by=teacher.id, class_id=jss1.id, subject_id=maths.id, published=False),
+    ]
+    db.add_all(exams)
+    db.commit()
+    db.add_all([
+        Question(exam_id=exams[0].id, text="1 + 1?", options=["1", "2"], correct_answer=1, created_by=admin.id),
+        Question(exam_id=exams[0].id, text="Ọ̀rọ̀ “quoted”", options=["é", "ü"], correct_answer=0, marks=2, image_url="/uploads/q.png", created_by=admin.id),
+        Result(student_id=student.id, exam_id=exams[0].id, answers=[{"question_id": 1, "answer_index": 1}], score=3, max_score=3),
+    ])
+    db.commit()
+    return SimpleNamespace(admin=admin, teacher=teacher, student=student, exam=exams[0])
+
+
+def body(response):
+    return json.loads(response.body)
+
+
+def as_schema(schema, objects):
+    """What the route returned before: ORM objects through response_model."""
+    adapter = TypeAdapter(List[schema])
+    return adapter.dump_python(adapter.validate_python(objects, from_attributes=True), mode="json")
+
+
+@pytest.mark.parametrize("role", ["admin", "teacher", "student"])
+def test_exam_list_matches_response_model(db, school, role):
+    user = getattr(school, role)
+    filters = {
+        "admin": {"published_only": False},
+        "teacher": {"published_only": False, "teacher_id": user.id},
+        "student": {"published_only": True, "student_id": user.id},
+    }[role]
+    # list_exams has no ORDER BY; the row path returns exams by id
+    expected = sorted(as_schema(ExamOut, exam_service.list_exams(db, **filters)), key=lambda e: e["id"])
+    assert expected
+    assert body(exams_api.list_exams_for_user(db=db, current_user=user)) == expected
+
+
+def test_question_list_matches_response_model(db, school):
+    expected = as_schema(QuestionOut, exam_service.get_questions_for_exam(db, school.exam.id))
+    assert len(expected) == 2
+    assert body(questions_api.get_questions_for_exam(school.exam.id, db=db)) == expected
+
+
+def test_exam_questions_keep_every_column(db, school):
+    # This route never had a response_model, so it has always sent the
+    # whole row, correct_answer and created_by included
+    expected = jsonable_encoder(exam_service.get_questions_for_exam(db, school.exam.id))
+    assert body(exams_api.get_exam_questions(school.exam.id, db=db, current_user=school.admin)) == expected
+
+
+def test_my_results_match_response_model(db, school):
+    expected = as_schema(ResultOut, result_service.get_results_for_student(db, school.student.id))
+    assert len(expected) == 1
+    assert body(results_api.my_results(db=db, current_user=school.student)) == expected
+
+
+def test_user_list_matches_response_model(db, school):
+    expected = as_schema(UserOut, db.query(User).order_by(User.id).all())
+    assert len(expected) == 3
+    assert body(users_api.list_users(db=db, current_user=school.admin)) == expected
+    assert body(users_api.list_users_noslash(db=db, current_user=school.admin)) == expected
@@ -0,0 +1,148 @@
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core.migrations import MigrationContext
+from app.models.exam import Exam
+from app.models.user import User
+from app.services import exam_service, grading_service, result_service
+from app.services.grading_service import compile_answer_table, grade
+
+
+@pytest.fixture
+def exam(db):
+    teacher = User(full_name="Teacher", email="t@example.com", hashed_password="h", role="teacher")
+    student = User(full_name="Student", email="s@example.com", hashed_password="h", role="student")
+    db.add_all([teacher, student])
+    db.commit()
+    exam = Exam(title="Mixed", created_by=teacher.id)
+    db.add(exam)
+    db.commit()
+    return exam
+
+
+def add(db, exam, question_type, options=(), correct_answer=None, answer_key=None, marks=2, negative_marks=0.5):
+    return exam_service.add_question(
+        db, exam.created_by, exam.id, f"A {question_type} question", list(options), correct_answer, marks,
+        question_type=question_type, answer_key=answer_key, negative_marks=negative_marks,
+    ).id
+
+
+def test_every_type_scores_right_wrong_and_blank(db, exam):
+    single = add(db, exam, "single_choice", ["a", "b", "c"], 1)
+    true_false = add(db, exam, "true_false", ["True", "False"], 0)
+    multi = add(db, exam, "multi_select", ["a", "b", "c", "d"], answer_key=[0, 2, 3], marks=3)
+    numeric = add(db, exam, "numeric", answer_key={"value": 3.14, "tolerance": 0.01})
+    short = add(db, exam, "short_text", answer_key=["Abuja", "F.C.T. Abuja"])
+    table = grading_service.load_answer_table(db, [single, true_false, multi, numeric, short])
+
+    def points(answer):
+        score, max_score = grade([answer], table)
+        entry = table[answer["question_id"]]
+        # Scored alone, a penalty shows as a 0 floor, so check the raw value too
+        return entry[0](answer, entry[1], entry[2], entry[3]), max_score
+
+    assert points({"question_id": single, "answer_index": 1}) == (2, 2)
+    assert points({"question_id": single, "answer_index": 0}) == (-0.5, 2)
+    assert points({"question_id": single}) == (0, 2)
+    assert points({"question_id": true_false, "answer_index": 0}) == (2, 2)
+    assert points({"question_id": true_false, "answer_index": 1}) == (-0.5, 2)
+
+    # Partial credit: a share per correct pick, one cancelled per wrong pick
+    assert points({"question_id": multi, "selected": [0, 2, 3]}) == (3, 3)
+    assert points({"question_id": multi, "selected": [0, 2]}) == (2, 3)
+    assert points({"question_id": multi, "selected": [0, 2, 1]}) == (1, 3)
+    assert points({"question_id": multi, "selected": [0, 1]}) == (-0.5, 3)
+    assert points({"question_id": multi, "answer_index": 3}) == (1, 3)
+    assert points({"question_id": multi, "selected": []}) == (0, 3)
+
+    assert points({"question_id": numeric, "value": 3.145}) == (2, 2)
+    assert points({"question_id": numeric, "value": " 3.13 "}) == (2, 2)
+    assert points({"question_id": numeric, "value": 3.2}) == (-0.5, 2)
+    assert points({"question_id": numeric, "value": "pi"}) == (-0.5, 2)
+    assert points({"question_id": numeric, "value": ""}) == (0, 2)
+
+    assert points({"question_id": short, "value": "  abuja "}) == (2, 2)
+    assert points({"question_id": short, "value": "FCT Abuja"}) == (2, 2)
+    assert points({"question_id": short, "value": "Lagos"}) == (-0.5, 2)
+
+
+def test_attempt_totals_and_floor(db, exam):
+    a = add(db, exam, "single_choice", ["a", "b"], 0, negative_marks=1)
+    b = add(db, exam, "numeric", answer_key={"value": 10}, negative_marks=1)
+    table = grading_service.load_answer_table(db, [a, b])
+    assert grade([{"question_id": a, "answer_index": 0}, {"question_id": b, "value": 9}], table) == (1.0, 4.0)
+    # Unknown questions are ignored, and penalties never take the score below zero
+    assert grade([{"question_id": a, "answer_index": 1}, {"question_id": b, "value": 9}, {"question_id": 999, "answer_index": 0}], table) == (0.0, 4.0)
+
+
+def test_submissions_are_graded_by_type(db, exam):
+    multi = add(db, exam, "multi_select", ["a", "b", "c"], answer_key=[0, 1], marks=2, negative_marks=0)
+    short = add(db, exam, "short_text", answer_key="photosynthesis", marks=1, negative_marks=0)
+    student = db.query(User).filter(User.role == "student").one()
+    result = result_service.grade_and_record(db, student.id, exam.id, [
+        {"question_id": multi, "selected": [0]},
+        {"question_id": short, "value": "Photosynthesis"},
+    ])
+    assert (result.score, result.max_score) == (2.0, 3.0)
+    [status] = result_service.sync_results(db, [{
+        "idempotency_key": "attempt-0001", "student_id": student.id, "exam_id": exam.id,
+        "answers": [{"question_id": multi, "selected": [0, 1]}, {"question_id": short, "value": "respiration"}],
+    }])
+    assert (status["score"], status["max_score"]) == (2.0, 3.0)
+
+
+def test_keys_are_validated_per_type(db, exam):
+    with pytest.raises(ValueError, match="out of range"):
+        add(db, exam, "single_choice", ["a", "b"], 2)
+    with pytest.raises(ValueError, match="exactly two"):
+        add(db, exam, "true_false", ["a", "b", "c"], 0)
+    with pytest.raises(ValueError, match="correct option indices"):
+        add(db, exam, "multi_select", ["a", "b"], 0)
+    with pytest.raises(ValueError, match="out of range"):
+        add(db, exam, "multi_select", ["a", "b"], answer_key=[0, 5])
+    with pytest.raises(ValueError, match="tolerance"):
+        add(db, exam, "numeric", answer_key={"value": 1, "tolerance": -1})
+    with pytest.raises(ValueError, match="accepted answers"):
+        add(db, exam, "short_text", answer_key=["  ", "?"])
+    with pytest.raises(ValueError, match="question_type must be one of"):
+        add(db, exam, "essay", ["a", "b"], 0)
+
+    # Multi-select keys are stored sorted, with the first one as correct_answer
+    q = exam_service.get_question(db, add(db, exam, "multi_select", ["a", "b", "c"], answer_key=[2, 0, 2]))
+    assert (q.correct_answer, q.answer_key) == (0, [0, 2])
+
+
+def test_update_switches_type_and_keeps_the_key_otherwise(db, exam):
+    qid = add(db, exam, "single_choice", ["1", "2", "4"], 2)
+    q = exam_service.update_question(db, qid, exam.created_by, question_type="multi_select", answer_key=[1, 2])
+    assert (q.question_type, q.answer_key) == ("multi_select", [1, 2])
+    q = exam_service.update_question(db, qid, exam.created_by, options=["1", "2", "4", "8"], negative_marks=1)
+    assert (q.answer_key, q.negative_marks) == ([1, 2], 1)
+    with pytest.raises(ValueError, match="answer_key"):
+        exam_service.update_question(db, qid, exam.created_by, question_type="numeric")
+    q = exam_service.update_question(db, qid, exam.created_by, question_type="numeric", answer_key={"value": "8"})
+    assert q.answer_key == {"value": 8.0, "tolerance": 0.0}
+
+
+def test_answer_table_is_compiled_once_per_question():
+    table = compile_answer_table([
+        (1, None, 2, None, 1, None),  # a row from before question types: single choice
+        (2, "multi_select", 0, [0, 1], 2, 0),
+        (3, "short_text", 0, ["Ọ̀yọ́"], 1, 0.25),
+    ])
+    assert table[1][1:] == (2, 1.0, 0.0)
+    assert table[2][1] == frozenset({0, 1})
+    assert table[3][1] == frozenset({"oyo"}) and table[3][3] == 0.25
+    assert grade([{"question_id": 3, "value": "OYO"}], table) == (1.0, 1.0)
+
+
+def test_migration_gives_old_questions_the_single_choice_type():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE questions (id INTEGER PRIMARY KEY, exam_id INTEGER NOT NULL, text TEXT NOT NULL,"
+                          " options JSON NOT NULL, correct_answer INTEGER NOT NULL, marks INTEGER)"))
+        conn.execute(text("INSERT INTO questions (exam_id, text, options, correct_answer, marks) VALUES (1, 'q', '[\"a\", \"b\"]', 1, 2)"))
+        MigrationContext(conn).add_missing_columns(["questions"])
+        row = conn.execute(text("SELECT question_type, answer_key, negative_marks FROM questions")).one()
+    assert tuple(row) == ("single_choice", None, 0)
+    engine.dispose()
@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import loadtest
+from app.core.db import Base, get_db
+from app.main import app
+from app.models.result import Result
+
+
+def test_arrival_curves_and_percentiles():
+    assert loadtest.arrival_offsets(4, "burst", 60) == [0.0] * 4
+    assert loadtest.arrival_offsets(4, "linear", 60) == [0.0, 15.0, 30.0, 45.0]
+    poisson = loadtest.arrival_offsets(100, "poisson", 60, seed=1)
+    assert poisson == sorted(poisson) and 0 < poisson[-1] <= 60
+    assert poisson == loadtest.arrival_offsets(100, "poisson", 60, seed=1)
+
+    values = [i / 1000 for i in range(1, 101)]
+    assert loadtest.percentile(values, 50) == 0.050
+    assert loadtest.percentile(values, 99) == 0.099
+
+
+def test_virtual_students_sit_the_exam_in_process(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'load.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with Session() as db:
+        regs = loadtest.seed_school(db, students=6, classes=2, questions=5)
+
+    def session():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            offsets = loadtest.arrival_offsets(len(regs), "linear", 0.2)
+            return await loadtest.drive(client, regs, loadtest.DEFAULT_PASSWORD, offsets, think=0, seed=0)
+
+    app.dependency_overrides[get_db] = session
+    try:
+        run = asyncio.run(go())
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+
+    report = loadtest.summarize(run, len(regs), {"lock_errors": 0, "pool_timeouts": 0})
+    assert report["completed"] == 6
+    assert {name: step["ok"] for name, step in report["steps"].items()} == dict.fromkeys(loadtest.STEPS, 6)
+    with Session() as db:
+        assert db.query(Result).count() == 6
+    engine.dispose()
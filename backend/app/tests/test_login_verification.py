@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+import anyio.to_thread
+import httpx
+import pytest
+from fastapi import FastAPI
+from passlib.context import CryptContext
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api import auth
+from app.core import security
+from app.core.config import settings
+from app.core.db import Base, get_db
+from app.models.user import User
+
+
+def test_outdated_hash_is_flagged_for_rehash():
+    old = CryptContext(schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=8192, argon2__parallelism=1)
+    stored = old.hash("secret")
+
+    valid, new_hash = asyncio.run(security.verify_password_bounded("secret", stored))
+    assert valid and new_hash
+    assert asyncio.run(security.verify_password_bounded("secret", new_hash)) == (True, None)
+    assert asyncio.run(security.verify_password_bounded("wrong", new_hash))[0] is False
+
+
+def test_full_queue_is_rejected(monkeypatch):
+    monkeypatch.setattr(security, "_verify_slots", threading.BoundedSemaphore(1))
+    monkeypatch.setattr(security, "_verify_executor", security.ThreadPoolExecutor(max_workers=1))
+    security._verify_slots.acquire()
+    try:
+        with pytest.raises(security.VerificationBusy):
+            asyncio.run(security.verify_password_bounded("secret", security.hash_password("secret")))
+    finally:
+        security._verify_slots.release()
+
+
+@pytest.fixture
+def login_app(tmp_path, monkeypatch):
+    """The auth routes alone, on a file database so concurrent requests get their own connections."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'login.db'}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as db:
+        db.add(User(full_name="Teacher", email="t@example.com", hashed_password=security.hash_password("secret"), role="teacher"))
+        db.commit()
+
+    def session():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(auth.router)
+    app.dependency_overrides[get_db] = session
+    # A fresh verify pool: one worker and four queued checks
+    monkeypatch.setattr(settings, "LOGIN_VERIFY_WORKERS", 1)
+    monkeypatch.setattr(settings, "LOGIN_VERIFY_QUEUE_LIMIT", 4)
+    monkeypatch.setattr(security, "_verify_executor", None)
+    monkeypatch.setattr(security, "_verify_slots", None)
+    yield app
+    if security._verify_executor is not None:
+        security._verify_executor.shutdown()
+    engine.dispose()
+
+
+def test_concurrent_logins_beyond_the_queue_get_503(login_app, monkeypatch):
+    verify = security.verify_password_and_update
+
+    def slow_verify(plain, hashed):
+        time.sleep(0.3)
+        return verify(plain, hashed)
+
+    monkeypatch.setattr(security, "verify_password_and_update", slow_verify)
+
+    async def storm():
+        # Fewer threadpool tokens than verify slots, as in production (40 vs
+        # workers + LOGIN_VERIFY_QUEUE_LIMIT): the slots must still fill up
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 2
+        transport = httpx.ASGITransport(app=login_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/auth/login", json={"email": "t@example.com", "password": "secret"})
+                for _ in range(8)
+            ))
+
+    responses = asyncio.run(storm())
+    statuses = sorted(r.status_code for r in responses)
+    # One check running and four queued; the rest are shed straight away
+    assert statuses.count(200) >= 5
+    assert statuses.count(503) >= 1
+    assert set(statuses) == {200, 503}
+    shed = next(r for r in responses if r.status_code == 503)
+    assert shed.headers["Retry-After"] == str(settings.LOGIN_RETRY_AFTER_SECONDS)
@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app.core import migrations
+from app.core.config import settings
+from app.core.db import Base
+
+
+@pytest.fixture
+def legacy_engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MIGRATION_LOCK_FILE", str(tmp_path / "migrations.lock"))
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        # users as created by early releases: no passport, no updated_at
+        conn.execute(text(
+            "CREATE TABLE users (id INTEGER PRIMARY KEY, full_name VARCHAR NOT NULL, email VARCHAR NOT NULL UNIQUE,"
+            " hashed_password VARCHAR NOT NULL, role VARCHAR, student_class VARCHAR,"
+            " registration_number VARCHAR UNIQUE, created_at DATETIME)"
+        ))
+        conn.execute(text("INSERT INTO users (full_name, email, hashed_password, role, registration_number) VALUES (:n, :e, 'h', 'student', :r)"), [
+            {"n": f"S{i}", "e": f"s{i}@example.com", "r": f"NG/EEV/{i:04d}/A"} for i in range(25)
+        ] + [
+            {"n": "Clash", "e": "clash@example.com", "r": "NG/EEV/0003A"},
+            {"n": "New", "e": "new@example.com", "r": "NG/EEV/0100B"},
+        ])
+    yield engine
+    engine.dispose()
+
+
+def test_upgrade_brings_legacy_database_to_current_schema(legacy_engine, monkeypatch):
+    monkeypatch.setattr(settings, "MIGRATION_BACKFILL_CHUNK_SIZE", 4)
+    Base.metadata.create_all(bind=legacy_engine)
+    applied = migrations.upgrade(legacy_engine)
+    assert applied == [m.version for m in migrations.discover()]
+
+    columns = {c["name"] for c in inspect(legacy_engine).get_columns("users")}
+    assert {"passport", "updated_at"} <= columns
+    assert "ix_users_role" in {ix["name"] for ix in inspect(legacy_engine).get_indexes("users")}
+    assert "bank_question_id" in {c["name"] for c in inspect(legacy_engine).get_columns("questions")}
+    assert inspect(legacy_engine).has_table("bank_questions_fts")
+
+    with legacy_engine.connect() as conn:
+        regs = dict(conn.execute(text("SELECT email, registration_number FROM users")).fetchall())
+    assert regs["s0@example.com"] == "NG/EEV/0000A"
+    assert regs["s24@example.com"] == "NG/EEV/0024A"
+    assert regs["s3@example.com"] == "NG/EEV/0003/A"  # would collide, left as is
+    assert regs["new@example.com"] == "NG/EEV/0100B"
+
+    # Recorded, so a second run has nothing to do
+    assert migrations.upgrade(legacy_engine) == []
+    assert all(row["applied_at"] for row in migrations.status(legacy_engine))
+
+
+def test_upgrade_stops_at_target_and_rolls_back_a_failed_migration(legacy_engine):
+    def good(ctx):
+        ctx.add_column("users", "nickname", "VARCHAR")
+
+    def bad(ctx):
+        ctx.execute("UPDATE users SET nickname = 'x'")
+        raise RuntimeError("boom")
+
+    plan = [migrations.Migration(1, "good", "", good), migrations.Migration(2, "bad", "", bad)]
+    assert migrations.upgrade(legacy_engine, target=1, migrations=plan) == [1]
+
+    with pytest.raises(migrations.MigrationError, match="0002_bad"):
+        migrations.upgrade(legacy_engine, migrations=plan)
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text("SELECT COUNT(*) FROM users WHERE nickname IS NOT NULL")).scalar() == 0
+        assert [v for (v,) in conn.execute(text("SELECT version FROM schema_migrations"))] == [1]
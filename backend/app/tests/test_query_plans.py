@@ -0,0 +1,103 @@
+import re
+
+import pytest
+from sqlalchemy import event
+
+from app.api.exams import EXAM_COLUMNS
+from app.api.questions import PAPER_COLUMNS, QUESTION_COLUMNS
+from app.api.results import RESULT_COLUMNS
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.result import Result
+from app.models.subject import Class, Subject, TeacherSubject, student_class_association
+from app.models.user import User
+from app.services import exam_service, result_service
+
+# "SCAN exams" is a full table scan; "SEARCH exams USING INDEX ..." is fine
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)")
+
+
+@pytest.fixture
+def school(db):
+    admin = User(full_name="Admin", email="admin@example.com", hashed_password="h", role="admin")
+    teacher = User(full_name="Teacher", email="t@example.com", hashed_password="h", role="teacher")
+    student = User(full_name="Student", email="s@example.com", hashed_password="h", role="student")
+    db.add_all([admin, teacher, student, Class(name="JSS1A", level="JSS1"), Subject(name="Mathematics", code="MAT")])
+    db.commit()
+    jss1, maths = db.query(Class).one(), db.query(Subject).one()
+    db.execute(student_class_association.insert(), {"student_id": student.id, "class_id": jss1.id})
+    db.add(TeacherSubject(teacher_id=teacher.id, class_id=jss1.id, subject_id=maths.id))
+    exam = Exam(title="Maths", created_by=admin.id, class_id=jss1.id, subject_id=maths.id, published=True)
+    db.add(exam)
+    db.commit()
+    db.add_all([
+        Question(exam_id=exam.id, text="1 + 1?", options=["1", "2"], correct_answer=1, created_by=admin.id),
+        Result(student_id=student.id, exam_id=exam.id, answers=[], score=1, max_score=1),
+    ])
+    db.commit()
+    return {"teacher": teacher, "student": student, "exam": exam}
+
+
+def plans_for(db, call):
+    """Run `call` and return (sql, EXPLAIN QUERY PLAN details) for each SELECT it issued."""
+    issued = []
+    engine = db.get_bind()
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            issued.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        call()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert issued, "no queries captured"
+
+    raw = db.connection().connection.driver_connection
+    return [
+        (statement, [row[3] for row in raw.execute("EXPLAIN QUERY PLAN " + statement, parameters).fetchall()])
+        for statement, parameters in issued
+    ]
+
+
+def assert_no_full_scan(db, call):
+    db.expire_all()
+    for statement, details in plans_for(db, call):
+        scans = [d for d in details if FULL_SCAN.match(d)]
+        assert not scans, f"full scan {scans} in:\n{statement}"
+
+
+def test_exam_listing_uses_indexes(db, school):
+    assert_no_full_scan(db, lambda: exam_service.list_exams(db, published_only=True))
+    assert_no_full_scan(db, lambda: exam_service.list_exams(db, published_only=True, student_id=school["student"].id))
+    assert_no_full_scan(db, lambda: exam_service.list_exams(db, published_only=False, teacher_id=school["teacher"].id))
+
+
+def test_exam_detail_queries_use_indexes(db, school):
+    exam_id = school["exam"].id
+    assert_no_full_scan(db, lambda: result_service.get_results_for_exam(db, exam_id))
+    assert_no_full_scan(db, lambda: exam_service.get_questions_for_exam(db, exam_id))
+    exam = db.get(Exam, exam_id)
+    assert_no_full_scan(db, lambda: exam_service.teacher_can_access_exam(db, school["teacher"].id, exam))
+
+
+def test_row_endpoints_use_indexes(db, school):
+    # What GET /exams/, /exams/{id}/questions, /questions/exam/{id} and /results/me run
+    exam_id, student_id, teacher_id = school["exam"].id, school["student"].id, school["teacher"].id
+    # The admin gets every exam: one pass in id order, without a sort
+    [(_, details)] = plans_for(db, lambda: exam_service.list_exam_rows(db, EXAM_COLUMNS, published_only=False))
+    assert details == ["SCAN exams"]
+    assert_no_full_scan(db, lambda: exam_service.list_exam_rows(db, EXAM_COLUMNS, published_only=False, teacher_id=teacher_id))
+    assert_no_full_scan(db, lambda: exam_service.list_exam_rows(db, EXAM_COLUMNS, published_only=True, student_id=student_id))
+    assert_no_full_scan(db, lambda: exam_service.get_question_rows_for_exam(db, exam_id, QUESTION_COLUMNS))
+    question_ids = [q.id for q in exam_service.get_questions_for_exam(db, exam_id)]
+    assert_no_full_scan(db, lambda: exam_service.get_question_rows_for_exam(db, exam_id, PAPER_COLUMNS, question_ids=question_ids))
+    assert_no_full_scan(db, lambda: result_service.get_result_rows_for_student(db, student_id, RESULT_COLUMNS))
+
+
+def test_role_filter_uses_its_index(db, school):
+    # GET /users/students/list and the admin's assignment overview filter users by role
+    for role in ("student", "teacher"):
+        plans = plans_for(db, lambda: db.query(User).filter(User.role == role).all())
+        assert any("INDEX ix_users_role" in d for _, details in plans for d in details), plans
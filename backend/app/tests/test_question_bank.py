@@ -0,0 +1,147 @@
+import pytest
+from sqlalchemy import text
+
+from app.api.bank import BANK_COLUMNS
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.question_bank import BankQuestion
+from app.models.result import Result
+from app.models.subject import Class, Subject
+from app.models.user import User
+from app.services import question_bank_service as bank
+
+
+@pytest.fixture
+def school(db):
+    teacher = User(full_name="Teacher", email="t@example.com", hashed_password="h", role="teacher")
+    jss1 = Class(name="JSS1A", level="JSS1")
+    maths, yoruba = Subject(name="Mathematics", code="MAT"), Subject(name="Yoruba", code="YOR")
+    db.add_all([teacher, jss1, maths, yoruba])
+    db.commit()
+    return {"teacher": teacher, "class": jss1, "maths": maths, "yoruba": yoruba}
+
+
+def add(db, school, text, subject="maths", topic=None, difficulty="medium", level="JSS1", options=("a", "b", "c", "d")):
+    return bank.create_bank_question(
+        db, school["teacher"].id, school[subject].id, level, text, list(options), 0, topic=topic, difficulty=difficulty,
+    )
+
+
+def ids(rows):
+    return [row.id for row in rows]
+
+
+def search(db, q=None, **filters):
+    return ids(bank.search_bank(db, BANK_COLUMNS, q, **filters))
+
+
+def exam_for(db, school, title="Maths"):
+    exam = Exam(title=title, created_by=school["teacher"].id, class_id=school["class"].id, subject_id=school["maths"].id)
+    db.add(exam)
+    db.commit()
+    return exam
+
+
+def test_fts_query_quotes_every_word_and_prefixes_the_last():
+    assert bank.fts_query("prime numbers") == '"prime" "numbers"*'
+    # FTS5 operators and stray quotes are just words or dropped
+    assert bank.fts_query('x AND "y" (NEAR') == '"x" "AND" "y" "NEAR"*'
+    assert bank.fts_query("  ?!  ") is None
+
+
+def test_search_ranks_and_filters(db, school):
+    fractions = add(db, school, "Add the fractions 1/2 and 1/3", topic="Fractions", difficulty="easy")
+    mention = add(db, school, "Which of these is not one of the fractions?", topic="Number")
+    primes = add(db, school, "Which number is prime?", topic="Primes", difficulty="hard")
+    add(db, school, "Ọ̀rọ̀ ìṣe wo ló wà nínú gbólóhùn yìí?", subject="yoruba", level="JSS2")
+
+    # A hit on the topic outranks one only in the text
+    assert search(db, "fractions") == [fractions.id, mention.id]
+    assert search(db, "fractions", difficulty="easy") == [fractions.id]
+    # The last word matches as a prefix, while typing
+    assert search(db, "pri") == [primes.id]
+    # Diacritics are folded both ways
+    assert len(search(db, "oro ise")) == 1
+    assert search(db, "ọ̀rọ̀", subject_id=school["maths"].id) == []
+    # Without words: tag filters only, newest first
+    assert search(db, subject_id=school["maths"].id) == [primes.id, mention.id, fractions.id]
+    assert search(db, "!!", level="JSS1", limit=1) == [primes.id]
+
+
+def test_search_index_follows_updates_and_deletes(db, school):
+    item = add(db, school, "What is the capital of Nigeria?")
+    assert search(db, "capital") == [item.id]
+    bank.update_bank_question(db, item.id, text="Name the largest city in Nigeria")
+    assert search(db, "capital") == []
+    assert search(db, "largest city") == [item.id]
+    bank.delete_bank_question(db, item.id)
+    assert search(db, "largest") == []
+    assert db.execute(text("SELECT count(*) FROM bank_questions_fts WHERE bank_questions_fts MATCH 'nigeria'")).scalar() == 0
+
+
+def test_search_uses_the_full_text_index(db, school):
+    add(db, school, "Solve for x")
+    stmt = text("EXPLAIN QUERY PLAN SELECT bank_questions.id FROM bank_questions_fts JOIN bank_questions ON bank_questions.id = bank_questions_fts.rowid WHERE bank_questions_fts MATCH :m")
+    plan = [row[3] for row in db.execute(stmt, {"m": '"solve"*'})]
+    assert any("VIRTUAL TABLE INDEX" in step for step in plan), plan
+    assert not any(step.startswith("SCAN bank_questions") and "VIRTUAL" not in step for step in plan), plan
+
+
+def test_attach_links_in_order_and_skips_duplicates(db, school):
+    exam = exam_for(db, school)
+    first, second, third = (add(db, school, f"Question {n}") for n in range(3))
+    assert bank.attach_to_exam(db, exam.id, [third.id, first.id], school["teacher"].id) == 2
+    assert bank.attach_to_exam(db, exam.id, [first.id, second.id, first.id], school["teacher"].id) == 1
+
+    rows = db.query(Question).filter(Question.exam_id == exam.id).order_by(Question.id).all()
+    assert [q.bank_question_id for q in rows] == [third.id, first.id, second.id]
+    assert [q.text for q in rows] == ["Question 2", "Question 0", "Question 1"]
+    assert rows[0].options == ["a", "b", "c", "d"] and rows[0].created_by == school["teacher"].id
+
+    with pytest.raises(ValueError, match="not found: 999"):
+        bank.attach_to_exam(db, exam.id, [first.id, 999], school["teacher"].id)
+    with pytest.raises(ValueError, match="Exam not found"):
+        bank.attach_to_exam(db, 999, [first.id], school["teacher"].id)
+
+
+def test_edits_reach_only_exams_nobody_has_sat(db, school):
+    item = add(db, school, "2 + 2 = ?", options=("3", "4"))
+    draft, sat = exam_for(db, school, "Draft"), exam_for(db, school, "Sat")
+    for exam in (draft, sat):
+        bank.attach_to_exam(db, exam.id, [item.id], school["teacher"].id)
+    db.add(Result(student_id=school["teacher"].id, exam_id=sat.id, answers=[], score=0, max_score=1))
+    db.commit()
+
+    bank.update_bank_question(db, item.id, text="2 + 3 = ?", options=["4", "5"], correct_answer=1, topic="Addition")
+    db.expire_all()
+    by_exam = {q.exam_id: q for q in db.query(Question).all()}
+    assert (by_exam[draft.id].text, by_exam[draft.id].options, by_exam[draft.id].correct_answer) == ("2 + 3 = ?", ["4", "5"], 1)
+    assert (by_exam[sat.id].text, by_exam[sat.id].options, by_exam[sat.id].correct_answer) == ("2 + 2 = ?", ["3", "4"], 0)
+
+    with pytest.raises(ValueError, match="out of range"):
+        bank.update_bank_question(db, item.id, correct_answer=5)
+
+    bank.delete_bank_question(db, item.id)
+    db.expire_all()
+    assert [q.bank_question_id for q in db.query(Question).all()] == [None, None]
+
+
+def test_save_exam_to_bank_tags_and_links(db, school):
+    exam = exam_for(db, school)
+    db.add_all([
+        Question(exam_id=exam.id, text=f"Q{n}", options=["x", "y"], correct_answer=1, marks=2, created_by=school["teacher"].id)
+        for n in range(3)
+    ])
+    db.commit()
+
+    assert bank.save_exam_to_bank(db, exam.id, school["teacher"].id, topic="Revision", difficulty="easy") == 3
+    # Already linked questions are not saved twice
+    assert bank.save_exam_to_bank(db, exam.id, school["teacher"].id) == 0
+
+    items = db.query(BankQuestion).order_by(BankQuestion.id).all()
+    assert [(b.text, b.level, b.subject_id, b.topic, b.difficulty, b.marks) for b in items] == [
+        (f"Q{n}", "JSS1", school["maths"].id, "Revision", "easy", 2) for n in range(3)
+    ]
+    links = [q.bank_question_id for q in db.query(Question).order_by(Question.id)]
+    assert links == [b.id for b in items]
+    assert search(db, "revision") == [b.id for b in items]
@@ -0,0 +1,133 @@
+import sqlite3
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.rate_limit import (
+    AuthRateLimitMiddleware,
+    Limit,
+    MemoryBucketStore,
+    SQLiteBucketStore,
+    WORKERS_ENV,
+    normalize_identifier,
+    launched_workers,
+    resolve_store_kind,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(store, clock):
+    app = FastAPI()
+    calls = []
+
+    @app.post("/api/auth/login")
+    def login(payload: dict):
+        calls.append(payload)
+        return {"ok": True}
+
+    app.add_middleware(
+        AuthRateLimitMiddleware,
+        store=store,
+        rules={"/api/auth/login": (Limit(100, 60), Limit(2, 60), "email", 256)},
+        clock=clock,
+    )
+    return TestClient(app), calls
+
+
+def test_identifier_bucket_rejects_before_endpoint_and_refills():
+    clock = FakeClock()
+    client, calls = make_client(MemoryBucketStore(), clock)
+
+    assert client.post("/api/auth/login", json={"email": "ng/eev/0001/a", "password": "x"}).status_code == 200
+    assert client.post("/api/auth/login", json={"email": "NG/EEV/0001A", "password": "x"}).status_code == 200
+    resp = client.post("/api/auth/login", json={"email": "NG/EEV/0001A", "password": "x"})
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "30"
+    assert len(calls) == 2
+    # Other identifiers are unaffected, and the endpoint still sees the body
+    assert client.post("/api/auth/login", json={"email": "other@example.com", "password": "x"}).status_code == 200
+    assert calls[-1]["email"] == "other@example.com"
+
+    clock.now += 30
+    assert client.post("/api/auth/login", json={"email": "NG/EEV/0001A", "password": "x"}).status_code == 200
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    first, second = SQLiteBucketStore(path), SQLiteBucketStore(path)
+    assert first.take("k", 2, 1 / 30, 0.0) == 0
+    assert second.take("k", 2, 1 / 30, 0.0) == 0
+    assert first.take("k", 2, 1 / 30, 0.0) == 30
+
+
+def test_normalize_identifier():
+    assert normalize_identifier(" Admin@Example.COM ") == "admin@example.com"
+    assert normalize_identifier("ng/eev/1234/b") == "NG/EEV/1234B"
+
+
+def test_oversized_body_is_rejected_before_buffering():
+    client, calls = make_client(MemoryBucketStore(), FakeClock())
+    resp = client.post("/api/auth/login", json={"email": "a@example.com", "password": "x" * 300})
+    assert resp.status_code == 413
+    # Chunked, without a Content-Length to go by
+    resp = client.post("/api/auth/login", content=iter([b'{"email": "a@example.com", ', b'"password": "' + b"x" * 300 + b'"}']),
+                       headers={"content-type": "application/json"})
+    assert resp.status_code == 413
+    assert calls == []
+    assert client.post("/api/auth/login", json={"email": "a@example.com", "password": "x"}).status_code == 200
+
+
+def test_sqlite_store_runs_off_the_event_loop(tmp_path):
+    class RecordingStore(SQLiteBucketStore):
+        def take(self, *args):
+            threads.append(threading.current_thread())
+            return super().take(*args)
+
+    threads = []
+    client, _ = make_client(RecordingStore(str(tmp_path / "buckets.db")), FakeClock())
+    with client:
+        assert client.post("/api/auth/login", json={"email": "a@example.com", "password": "x"}).status_code == 200
+        loop_thread = client.portal.call(threading.current_thread)
+    assert len(threads) == 2 and loop_thread not in threads
+
+
+def test_sqlite_store_prunes_refilled_buckets(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    store = SQLiteBucketStore(path, prune_every=3)
+    store.take("slow", 2, 1 / 30, 0.0)  # full again at 30
+    store.take("fast", 10, 10, 0.0)  # full again at 0.1
+    store.take("other", 2, 1 / 30, 1.0)  # third take: prunes at 1.0
+    rows = sqlite3.connect(path).execute("SELECT key FROM rate_buckets ORDER BY key").fetchall()
+    assert rows == [("other",), ("slow",)]
+    assert store.prune(31.0) == 2
+    # A pruned bucket starts full, as it would have refilled anyway
+    assert store.take("slow", 2, 1 / 30, 31.0) == 0
+
+
+def test_store_kind_follows_worker_count(monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_STORE", "auto")
+    monkeypatch.delenv(WORKERS_ENV, raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    # A plain `uvicorn app.main:app` is one process, however many CPUs there are
+    monkeypatch.setattr(settings, "SERVER_WORKERS", 0)
+    assert resolve_store_kind() == "memory"
+    monkeypatch.setenv(WORKERS_ENV, "4")
+    assert resolve_store_kind() == "sqlite"
+    monkeypatch.setattr(settings, "RATE_LIMIT_STORE", "memory")
+    with pytest.raises(ValueError, match="multiply every auth limit by 4"):
+        resolve_store_kind()
+    monkeypatch.setenv(WORKERS_ENV, "1")
+    assert resolve_store_kind() == "memory"
+    monkeypatch.delenv(WORKERS_ENV)
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    assert launched_workers() == 3
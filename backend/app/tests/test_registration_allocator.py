@@ -0,0 +1,38 @@
+from app.models.user import RegistrationBlock, User
+from app.services.registration_allocator import (
+    RegistrationNumberAllocator,
+    number_to_slot,
+    slot_to_number,
+)
+
+
+def test_slot_round_trip_and_legacy_format():
+    assert slot_to_number("NG/EEV", 0) == "NG/EEV/0000A"
+    assert slot_to_number("NG/EEV", 427 * 26 + 25) == "NG/EEV/0427Z"
+    assert number_to_slot("NG/EEV", "ng/eev/0427/z") == 427 * 26 + 25
+    assert number_to_slot("NG/EEV", "XX/EEV/0427Z") is None
+
+
+def test_workers_get_disjoint_blocks_and_skip_used_numbers(db):
+    taken = [slot_to_number("NG/EEV", s) for s in range(0, 260000, 7)]
+    db.add_all(
+        User(full_name="s", email=f"s{i}@example.com", hashed_password="x", registration_number=reg)
+        for i, reg in enumerate(taken)
+    )
+    db.commit()
+
+    first = RegistrationNumberAllocator(block_size=10)
+    second = RegistrationNumberAllocator(block_size=10)
+    a = first.allocate_many(db, 50)
+    b = second.allocate_many(db, 50)
+
+    issued = a + b
+    assert len(set(issued)) == 100
+    assert not set(issued) & set(taken)
+    blocks = db.query(RegistrationBlock).all()
+    owners = {blk.block_no: blk.owner for blk in blocks}
+    assert len(owners) == len(blocks)
+    for reg in a:
+        assert owners[number_to_slot("NG/EEV", reg) // 10] == first.owner
+    for reg in b:
+        assert owners[number_to_slot("NG/EEV", reg) // 10] == second.owner
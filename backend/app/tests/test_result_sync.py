@@ -0,0 +1,70 @@
+from app.models.exam import Exam
+from app.models.question import Question
+from app.models.result import Result, ResultSyncReceipt
+from app.models.user import User
+from app.services import result_service
+
+
+def seed(db):
+    teacher = User(full_name="T", email="t@example.com", hashed_password="x", role="teacher")
+    students = [User(full_name=f"S{i}", email=f"s{i}@example.com", hashed_password="x", role="student") for i in range(3)]
+    db.add_all([teacher, *students])
+    db.commit()
+    exam = Exam(title="Maths", created_by=teacher.id, published=True)
+    db.add(exam)
+    db.commit()
+    questions = [
+        Question(exam_id=exam.id, text="Q1", options=["a", "b"], correct_answer=1, marks=2, created_by=teacher.id),
+        Question(exam_id=exam.id, text="Q2", options=["a", "b"], correct_answer=0, marks=1, created_by=teacher.id),
+    ]
+    db.add_all(questions)
+    db.commit()
+    return exam, students, questions
+
+
+def attempt(key, student, exam, questions, picks):
+    return {
+        "idempotency_key": key,
+        "student_id": student.id,
+        "exam_id": exam.id,
+        "answers": [{"question_id": q.id, "answer_index": p} for q, p in zip(questions, picks)],
+    }
+
+
+def test_sync_grades_like_submit_and_is_idempotent(db):
+    exam, students, questions = seed(db)
+    batch = [
+        attempt("key-aaaaaaaa", students[0], exam, questions, [1, 0]),
+        attempt("key-bbbbbbbb", students[1], exam, questions, [0, 0]),
+        attempt("key-aaaaaaaa", students[0], exam, questions, [1, 0]),  # repeated in the same batch
+        {**attempt("key-cccccccc", students[2], exam, questions, [1, 1]), "exam_id": 999},
+    ]
+
+    statuses = result_service.sync_results(db, batch, chunk_size=2)
+    assert [s["status"] for s in statuses] == ["created", "created", "duplicate", "error"]
+    assert (statuses[0]["score"], statuses[0]["max_score"]) == (3.0, 3.0)
+    assert statuses[1]["score"] == 1.0
+    assert statuses[2]["result_id"] == statuses[0]["result_id"]
+
+    expected = result_service.grade_and_record(db, students[1].id, exam.id, batch[1]["answers"])
+    assert (expected.score, expected.max_score) == (statuses[1]["score"], statuses[1]["max_score"])
+    results_before = db.query(Result).count()
+
+    # Re-sending after a dropped connection records nothing new
+    again = result_service.sync_results(db, batch[:2])
+    assert [s["status"] for s in again] == ["duplicate", "duplicate"]
+    assert [s["result_id"] for s in again] == [statuses[0]["result_id"], statuses[1]["result_id"]]
+    assert db.query(Result).count() == results_before
+    assert db.query(ResultSyncReceipt).count() == 2
+
+
+def test_sync_flags_reused_key_and_respects_exam_permission(db):
+    exam, students, questions = seed(db)
+    result_service.sync_results(db, [attempt("key-dddddddd", students[0], exam, questions, [1, 0])])
+
+    reused = attempt("key-dddddddd", students[1], exam, questions, [1, 0])
+    denied = attempt("key-eeeeeeee", students[1], exam, questions, [1, 0])
+    statuses = result_service.sync_results(db, [reused, denied], allowed_exam_ids=lambda exam_id: False)
+    assert statuses[0]["status"] == "conflict"
+    assert statuses[1]["status"] == "error"
+    assert db.query(ResultSyncReceipt).count() == 1
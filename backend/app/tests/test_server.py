@@ -0,0 +1,50 @@
+import os
+import signal
+import time
+
+import pytest
+
+from app import server
+from app.core.config import settings
+from app.server import RestartPolicy
+
+
+def test_restart_delay_doubles_and_gives_up_within_the_window():
+    policy = RestartPolicy(base=0.5, cap=4, max_restarts=5, window=60)
+    assert [policy.delay(t) for t in (0, 1, 2, 3)] == [0.5, 1, 2, 4]
+    assert policy.delay(4) == 4  # capped
+    assert policy.delay(5) is None  # a sixth death within a minute
+    # Deaths that have left the window no longer count
+    policy = RestartPolicy(base=0.5, cap=4, max_restarts=2, window=60)
+    assert policy.delay(0) == 0.5 and policy.delay(1) == 1
+    assert policy.delay(100) == 0.5
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs fork")
+def test_crash_looping_workers_shut_the_parent_down(monkeypatch):
+    spawned = []
+
+    def spawn(app, sock, ready_w):
+        pid = os.fork()
+        if pid == 0:
+            os._exit(1)  # a worker that dies during startup
+        spawned.append(time.monotonic())
+        return pid
+
+    monkeypatch.setattr(server, "_spawn", spawn)
+    monkeypatch.setattr(server, "_wait_ready", lambda *args: True)
+    monkeypatch.setattr(server, "_announce_ready", lambda workers: None)
+    monkeypatch.setattr(settings, "SERVER_HOST", "127.0.0.1")
+    monkeypatch.setattr(settings, "SERVER_PORT", 0)
+    monkeypatch.setattr(settings, "SERVER_RESTART_BACKOFF_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "SERVER_MAX_RESTARTS", 3)
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    try:
+        assert server.serve_multiprocess(app=None, workers=1) == 1
+    finally:
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+    # The first worker and three replacements, each later than the last by the backoff
+    assert len(spawned) == 4
+    gaps = [b - a for a, b in zip(spawned, spawned[1:])]
+    assert gaps[1] >= 0.1 and gaps[2] >= 0.2
@@ -0,0 +1,112 @@
+import gzip
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import questions as questions_api
+from app.api.deps import get_current_user
+from app.core import static_files
+from app.core.static_files import IMMUTABLE_CACHE, MUTABLE_CACHE, UploadStaticFiles
+
+
+def make_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(static_files, "UPLOAD_DIR", str(tmp_path))
+    app = FastAPI()
+    app.mount("/uploads", UploadStaticFiles(directory=str(tmp_path)), name="uploads")
+    return TestClient(app)
+
+
+def test_hashed_upload_is_immutable_and_served_precompressed(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'>" + b"<rect width='1' height='1'/>" * 200 + b"</svg>"
+
+    url = static_files.store_upload(svg, ".SVG", "questions")
+    assert url == static_files.store_upload(svg, ".svg", "questions")
+    assert (tmp_path / "questions" / (url.rsplit("/", 1)[1] + ".gz")).exists()
+
+    plain = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert plain.status_code == 200
+    assert plain.content == svg
+    assert plain.headers["cache-control"] == IMMUTABLE_CACHE
+    assert plain.headers["vary"] == "Accept-Encoding"
+    assert "content-encoding" not in plain.headers
+
+    packed = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert packed.headers["content-encoding"] == "gzip"
+    assert packed.headers["content-type"].startswith("image/svg+xml")
+    assert int(packed.headers["content-length"]) < len(svg)
+    assert packed.content == svg  # httpx decodes gzip
+
+    again = client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": packed.headers["etag"]})
+    assert again.status_code == 304
+
+
+def test_range_request_and_legacy_names(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    png = bytes(range(256)) * 4
+    url = static_files.store_upload(png, ".png", "questions")
+    assert not (tmp_path / "questions" / (url.rsplit("/", 1)[1] + ".gz")).exists()
+
+    partial = client.get(url, headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == png[10:20]
+
+    (tmp_path / "questions" / "0b8f2a4e-legacy.png").write_bytes(png)
+    legacy = client.get("/uploads/questions/0b8f2a4e-legacy.png")
+    assert legacy.headers["cache-control"] == MUTABLE_CACHE
+
+
+def test_sidecar_not_offered_when_refused(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    text = b"question text " * 500
+    url = static_files.store_upload(text, ".txt", "notes")
+    sidecar = tmp_path / "notes" / (url.rsplit("/", 1)[1] + ".gz")
+    assert gzip.decompress(sidecar.read_bytes()) == text
+
+    refused = client.get(url, headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+    assert refused.content == text
+
+
+def test_sidecars_written_later_are_served_without_a_restart(tmp_path, monkeypatch):
+    client = make_client(tmp_path, monkeypatch)
+    text = b"legacy upload " * 500
+    (tmp_path / "notes").mkdir()
+    (tmp_path / "notes" / "0b8f2a4e-legacy.txt").write_bytes(text)
+    url = "/uploads/notes/0b8f2a4e-legacy.txt"
+    assert "content-encoding" not in client.get(url, headers={"Accept-Encoding": "gzip"}).headers
+
+    assert static_files.precompress_tree(str(tmp_path)) == 1
+    assert client.get(url, headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+
+
+def test_precompress_only_writes_what_is_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(static_files, "brotli", None)
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"question text " * 500)
+    assert static_files.precompress_tree(str(tmp_path)) == 1
+    gz = tmp_path / "notes.txt.gz"
+    written = gz.stat().st_mtime_ns
+    # Without brotli there is no .br to wait for: nothing left to do
+    assert static_files.precompress_tree(str(tmp_path)) == 0
+    assert gz.stat().st_mtime_ns == written
+
+
+def test_question_image_upload_compresses_off_the_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(static_files, "UPLOAD_DIR", str(tmp_path))
+    threads = []
+
+    def recording_store_upload(*args):
+        threads.append(threading.current_thread())
+        return static_files.store_upload(*args)
+
+    monkeypatch.setattr(questions_api, "store_upload", recording_store_upload)
+    app = FastAPI()
+    app.include_router(questions_api.router, prefix="/api")
+    app.dependency_overrides[get_current_user] = lambda: type("Teacher", (), {"id": 1, "role": "teacher"})()
+    with TestClient(app) as client:
+        response = client.post("/api/questions/upload-image", files={"file": ("q.svg", b"<svg/>" * 500, "image/svg+xml")})
+        loop_thread = client.portal.call(threading.current_thread)
+    assert response.status_code == 200 and response.json()["image_url"].endswith(".svg")
+    assert len(threads) == 1 and threads[0] is not loop_thread
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+from app.core.revocation import RevocationList
+from app.core.security import decode_access_token
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+from app.services import token_service, user_service
+
+
+def make_user(db, role="teacher"):
+    user = User(full_name="T", email="t@example.com", hashed_password="x", role=role)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def test_refresh_rotates_and_detects_reuse(db):
+    user = make_user(db)
+    first = token_service.issue_token_pair(db, user)
+    assert decode_access_token(first["access_token"])["user_id"] == user.id
+
+    second = token_service.rotate_refresh_token(db, first["refresh_token"])
+    assert second and second["refresh_token"] != first["refresh_token"]
+
+    # Replaying the rotated token kills the whole family, including `second`
+    assert token_service.rotate_refresh_token(db, first["refresh_token"]) is None
+    assert token_service.rotate_refresh_token(db, second["refresh_token"]) is None
+    assert token_service.rotate_refresh_token(db, "1.not-the-secret") is None
+
+
+def test_role_change_and_delete_revoke_access_tokens(db):
+    user = make_user(db)
+    tokens = token_service.issue_token_pair(db, user)
+
+    user_service.update_user(db, user.id, role="admin")
+    assert decode_access_token(tokens["access_token"]) is None
+    refreshed = token_service.rotate_refresh_token(db, tokens["refresh_token"])
+    assert decode_access_token(refreshed["access_token"])["role"] == "admin"
+
+    user_service.delete_user(db, user.id)
+    assert decode_access_token(refreshed["access_token"]) is None
+    assert token_service.rotate_refresh_token(db, refreshed["refresh_token"]) is None
+
+
+def test_revocation_list_prunes_expired_entries():
+    revoked = RevocationList(ttl_seconds=60)
+    revoked.revoke_token("abc", exp=100.0)
+    revoked.revoke_user(7, now=50.0)
+    assert revoked.is_revoked({"jti": "abc", "user_id": 1})
+    assert revoked.is_revoked({"jti": "x", "user_id": 7, "iat": 49.0})
+    assert not revoked.is_revoked({"jti": "x", "user_id": 7, "iat": 51.0})
+
+    revoked.prune(now=200.0)
+    assert not revoked.is_revoked({"jti": "abc", "user_id": 7, "iat": 0})
+
+
+def test_expired_refresh_tokens_are_purged_while_issuing(db, monkeypatch):
+    user = make_user(db)
+    token_service.issue_token_pair(db, user)
+    db.query(RefreshToken).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+
+    monkeypatch.setattr(token_service, "_next_purge", 0.0)
+    fresh = token_service.issue_token_pair(db, user)
+    assert [row.id for row in db.query(RefreshToken)] == [int(fresh["refresh_token"].split(".")[0])]
+    # Not again until the interval has passed
+    assert token_service.purge_expired_refresh_tokens_if_due(db) is None
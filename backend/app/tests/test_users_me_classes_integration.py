@@ -1,12 +1,36 @@
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
 from app.main import app
+from app.core import db as db_module
+from app.core.config import settings
 from app.core.db import SessionLocal
 from app.models.user import User
 from app.models.subject import Class as ClassModel
 
 from app.api.deps import get_current_user as real_get_current_user
 
-client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # Entering the client runs the lifespan, which creates the tables and
+    # migrates; point it (and SessionLocal) at a throwaway database
+    tmp = tmp_path_factory.mktemp("integration")
+    url = f"sqlite:///{tmp / 'school_cbt.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    original = db_module.engine
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(settings, "DATABASE_URL", url)
+        mp.setattr(settings, "MIGRATION_LOCK_FILE", str(tmp / "migrations.lock"))
+        mp.setattr(db_module, "engine", engine)
+        mp.setattr(db_module, "_schema_ready", False)
+        SessionLocal.configure(bind=engine)
+        try:
+            with TestClient(app) as c:
+                yield c
+        finally:
+            SessionLocal.configure(bind=original)
+            engine.dispose()
 
 
 def create_teacher_and_class(db):
@@ -25,7 +49,7 @@ def create_teacher_and_class(db):
     return teacher, cls
 
 
-def test_get_my_classes_returns_class_for_teacher():
+def test_get_my_classes_returns_class_for_teacher(client):
     db = SessionLocal()
     try:
         teacher, cls = create_teacher_and_class(db)
@@ -63,7 +87,7 @@ def test_get_my_classes_returns_class_for_teacher():
         db.close()
 
 
-def test_non_teacher_get_my_classes_returns_empty():
+def test_non_teacher_get_my_classes_returns_empty(client):
     db = SessionLocal()
     try:
         student = User(full_name="Integration Student", email="int_student@example.com", hashed_password="x", role="student")
@@ -22,7 +22,9 @@ const API_BASE_URL = (
   process.env.NEXT_PUBLIC_API_URL || "http://127.0.0.1:8000"
 ).replace(/\/$/, "");
 
-import { getStoredToken } from "./token";
+import { getStoredToken, installAuthRefresh } from "./token";
+
+installAuthRefresh(API_BASE_URL);
 
 // ============================================
 // AUTH API
@@ -12,14 +12,72 @@ export const getStoredUser = (): User | null => {
   return user ? JSON.parse(user) : null;
 };
 
-export const setStoredAuth = (token: string, user: User): void => {
+export const setStoredAuth = (
+  token: string,
+  user: User,
+  refreshToken?: string | null
+): void => {
   if (typeof window === "undefined") return;
   localStorage.setItem("access_token", token);
   localStorage.setItem("currentUser", JSON.stringify(user));
+  if (refreshToken) localStorage.setItem("refresh_token", refreshToken);
 };
 
 export const clearStoredAuth = (): void => {
   if (typeof window === "undefined") return;
   localStorage.removeItem("access_token");
+  localStorage.removeItem("refresh_token");
   localStorage.removeItem("currentUser");
 };
+
+// Access tokens are short-lived. Rather than threading refresh logic through
+// every API call, wrap fetch once: when an authorized request to the API
+// comes back 401, rotate the refresh token and retry with the new access
+// token. Concurrent 401s share one refresh request.
+let refreshInFlight: Promise<string | null> | null = null;
+
+const refreshAccessToken = async (apiBaseUrl: string, rawFetch: typeof fetch) => {
+  const refreshToken = localStorage.getItem("refresh_token");
+  if (!refreshToken) return null;
+  const response = await rawFetch(`${apiBaseUrl}/api/auth/refresh`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refresh_token: refreshToken }),
+  });
+  if (!response.ok) return null;
+  const data = await response.json();
+  localStorage.setItem("access_token", data.access_token);
+  if (data.refresh_token) localStorage.setItem("refresh_token", data.refresh_token);
+  return data.access_token as string;
+};
+
+export const installAuthRefresh = (apiBaseUrl: string): void => {
+  if (typeof window === "undefined") return;
+  const w = window as typeof window & { __authRefreshInstalled?: boolean };
+  if (w.__authRefreshInstalled) return;
+  w.__authRefreshInstalled = true;
+
+  const rawFetch = window.fetch.bind(window);
+  window.fetch = async (input: RequestInfo | URL, init?: RequestInit) => {
+    const response = await rawFetch(input, init);
+    const url = typeof input === "string" ? input : input instanceof URL ? input.href : input.url;
+    const headers = new Headers(init?.headers);
+    if (
+      response.status !== 401 ||
+      !url.startsWith(apiBaseUrl) ||
+      url.includes("/api/auth/") ||
+      !headers.has("Authorization")
+    ) {
+      return response;
+    }
+
+    refreshInFlight ??= refreshAccessToken(apiBaseUrl, rawFetch).finally(() => {
+      refreshInFlight = null;
+    });
+    const newToken = await refreshInFlight;
+    if (!newToken) return response;
+
+    headers.set("Authorization", `Bearer ${newToken}`);
+    return rawFetch(input, { ...init, headers });
+  };
+};
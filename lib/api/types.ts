@@ -155,6 +155,8 @@ export interface ClassMember {
 export interface TokenResponse {
   access_token: string;
   token_type: string;
+  refresh_token?: string;
+  expires_in?: number;
 }
 
 export interface SchoolLevel {
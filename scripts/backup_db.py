@@ -1,25 +1,42 @@
 """
-Simple DB backup script.
-Copies `backend/school_cbt.db` into `backups/` with a timestamped filename.
-Run from the repository root with: `python .\scripts\backup_db.py`
+Online backup of the SQLite database.
+Copies `backend/school_cbt.db` into `backups/` as a compressed, integrity-checked
+snapshot using SQLite's backup API, so it is safe while the server is running.
+Run from the repository root with: `python .\scripts\backup_db.py [--dest DIR]`
+
+Uses the same code as the in-server scheduler (`app.services.backup_service`),
+including its retention policy (BACKUP_KEEP_LAST / BACKUP_KEEP_DAILY).
 """
+import argparse
 import os
-import shutil
-from datetime import datetime
+import sys
 
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(ROOT, "backend", "school_cbt.db")
 BACKUP_DIR = os.path.join(ROOT, "backups")
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Back up the SQLite database without stopping the server")
+    parser.add_argument("--db", default=DB_PATH, help="database file to back up")
+    parser.add_argument("--dest", default=BACKUP_DIR, help="directory for backups")
+    args = parser.parse_args()
+
+    from app.services.backup_service import BackupError, run_backup
 
-os.makedirs(BACKUP_DIR, exist_ok=True)
+    def show(done, total):
+        print(f"\r  {done}/{total} pages", end="", flush=True)
 
-if not os.path.exists(DB_PATH):
-    print(f"Database file not found: {DB_PATH}")
-    raise SystemExit(1)
+    try:
+        info = run_backup(args.db, args.dest, progress=show)
+    except BackupError as e:
+        print(f"Backup failed: {e}")
+        raise SystemExit(1)
+    print(f"\nCreated backup: {info['path']} ({info['size']} bytes)")
+    for path in info["removed"]:
+        print(f"Removed old backup: {path}")
 
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-backup_name = f"school_cbt.db.backup_{timestamp}"
-backup_path = os.path.join(BACKUP_DIR, backup_name)
 
-shutil.copy2(DB_PATH, backup_path)
-print(f"Created backup: {backup_path}")
+if __name__ == "__main__":
+    main()
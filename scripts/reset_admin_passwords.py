@@ -1,6 +1,9 @@
 """
 Reset admin users' passwords to `adminpass`.
 Run from repo root: python .\school-cbt-sys\scripts\reset_admin_passwords.py
+
+Uses the same bulk engine as POST /api/users/bulk (`user_service.bulk_reset_passwords`),
+so passing many emails hashes them in parallel and updates them in one statement.
 """
 import os
 import sys
@@ -10,35 +13,37 @@ from sqlalchemy.orm import sessionmaker
 # Ensure we can import app modules
 ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(ROOT, 'backend', 'school_cbt.db')
-if not os.path.exists(DB_PATH):
-    print('DB not found at', DB_PATH)
-    raise SystemExit(1)
-
-# Use SQLAlchemy same as app
 sys.path.insert(0, os.path.join(ROOT, 'backend'))
-from app.core.config import settings
-from app.core.security import hash_password
-
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 ADMIN_EMAILS = ["admin@example.com", "admin@school.local"]
 NEW_PASS = 'adminpass'
 
-s = SessionLocal()
-try:
-    from app.models.user import User
-    changed = 0
-    for email in ADMIN_EMAILS:
-        u = s.query(User).filter(User.email == email).first()
-        if u:
-            u.hashed_password = hash_password(NEW_PASS)
-            s.add(u)
-            changed += 1
+
+def main():
+    if not os.path.exists(DB_PATH):
+        print('DB not found at', DB_PATH)
+        raise SystemExit(1)
+
+    # Use SQLAlchemy same as app
+    from app.core.config import settings
+    from app.services.user_service import bulk_reset_passwords
+
+    engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False})
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    s = SessionLocal()
+    try:
+        outcome = bulk_reset_passwords(s, {email: NEW_PASS for email in ADMIN_EMAILS})
+        for email in outcome['updated']:
             print('Updated password for', email)
-        else:
+        for email in outcome['not_found']:
             print('No user found for', email)
-    s.commit()
-    print('Done. Updated:', changed)
-finally:
-    s.close()
+        print('Done. Updated:', len(outcome['updated']))
+    finally:
+        s.close()
+
+
+# The guard matters: bulk hashing starts spawned worker processes that
+# re-import this module.
+if __name__ == "__main__":
+    main()